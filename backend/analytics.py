@@ -21,6 +21,8 @@ from database import (
     SMSDetails,
     VoiceCallDetails,
 )
+from turn_executor import turn_executor
+from voice_transcript import load_call_transcript
 
 settings = get_settings()
 openai_client = get_openai_client()
@@ -535,6 +537,8 @@ Consider these factors:
         transcript_segments: Optional[List[Dict]] = None,
         function_calls: Optional[List[Dict]] = None,
         interruption_count: int = 0,
+        latency_summary: Optional[Dict[str, Any]] = None,
+        call_record: Optional[bytes] = None,
     ) -> VoiceCallDetails:
         """
         Add voice call details to a message.
@@ -547,6 +551,8 @@ Consider these factors:
             transcript_segments: Structured transcript with timestamps
             function_calls: List of function calls made
             interruption_count: Number of interruptions
+            latency_summary: Per-call latency percentiles (see voice_metrics)
+            call_record: Packed transcript and function calls (see compact_transcript)
 
         Returns:
             Created VoiceCallDetails object
@@ -559,6 +565,8 @@ Consider these factors:
             function_calls=function_calls or [],
             audio_quality_score=None,
             interruption_count=interruption_count,
+            latency_summary=latency_summary,
+            call_record=call_record,
         )
         db.add(voice_details)
         db.commit()
@@ -705,7 +713,7 @@ Consider these factors:
 
     @staticmethod
     def score_conversation_satisfaction(
-        db: Session, conversation_id: Any  # UUID
+        db: Session, conversation_id: Any, *, raise_errors: bool = False  # UUID
     ) -> Dict[str, Any]:
         """
         Use GPT-4 to analyze conversation and generate satisfaction metrics.
@@ -714,6 +722,8 @@ Consider these factors:
         Args:
             db: Database session
             conversation_id: Conversation UUID
+            raise_errors: Re-raise analysis failures instead of storing neutral
+                fallback values (lets queued jobs retry)
 
         Returns:
             Dictionary with satisfaction_score, sentiment, outcome, summary
@@ -743,21 +753,32 @@ Consider these factors:
         # Build context for GPT-4
         context_lines = [f"Channel: {conversation.channel}"]
 
-        for msg in messages:
-            speaker = "Customer" if msg.direction == "inbound" else "Ava"
-            content = msg.content or ""
-            context_lines.append(f"{speaker}: {content}")
+        # Voice calls are scored on the full two-sided transcript when it
+        # was persisted incrementally (see voice_transcript)
+        transcript = (
+            load_call_transcript(db, conversation.id) if conversation.channel == "voice" else []
+        )
+        if transcript:
+            for entry in transcript:
+                speaker = "Customer" if entry["speaker"] == "customer" else "Ava"
+                context_lines.append(f"{speaker}: {entry['text']}")
+        else:
+            for msg in messages:
+                speaker = "Customer" if msg.direction == "inbound" else "Ava"
+                content = msg.content or ""
+                context_lines.append(f"{speaker}: {content}")
 
         context = "\n".join(context_lines)
 
         # Call GPT-4 for analysis
         try:
-            response = openai_client.chat.completions.create(
-                model=settings.OPENAI_SENTIMENT_MODEL,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert at analyzing customer service conversations across voice, SMS, and email.
+            with turn_executor.llm_slot():
+                response = openai_client.chat.completions.create(
+                    model=settings.OPENAI_SENTIMENT_MODEL,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": """You are an expert at analyzing customer service conversations across voice, SMS, and email.
 Analyze the following conversation between Ava (AI receptionist) and a customer.
 
 Provide your analysis in JSON format with these fields:
@@ -773,12 +794,12 @@ Consider:
 - Were there negative words or frustration indicators?
 - Was the conversation efficient or drawn out?
 """,
-                    },
-                    {"role": "user", "content": context},
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-            )
+                        },
+                        {"role": "user", "content": context},
+                    ],
+                    response_format={"type": "json_object"},
+                    temperature=0.3,
+                )
 
             result = json.loads(response.choices[0].message.content)
 
@@ -801,6 +822,9 @@ Consider:
                 "summary": summary,
             }
         except Exception as exc:  # noqa: BLE001
+            if raise_errors:
+                db.rollback()
+                raise
             print(f"Error analyzing conversation satisfaction: {exc}")
             # Fallback to neutral values
             conversation.satisfaction_score = 5
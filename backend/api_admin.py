@@ -18,6 +18,8 @@ from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session, joinedload
 
 from analytics import AnalyticsService
+from auth import User, get_current_user, require_owner
+from session_registry import session_registry
 from config import get_settings
 from database import (
     Appointment,
@@ -219,6 +221,35 @@ async def get_booking_health(
     return AnalyticsService.get_booking_health_window(db, minutes=minutes)
 
 
+# ==================== Live Voice Sessions ====================
+
+
+@router.get("/live-sessions")
+async def get_live_sessions(user: User = Depends(get_current_user)):
+    """Voice sessions live on any worker, with the worker that owns each."""
+    sessions = await session_registry.list_sessions()
+    return {
+        "sessions": sessions,
+        "total": len(sessions),
+        "workers": sorted({session["worker_id"] for session in sessions}),
+    }
+
+
+@router.post("/live-sessions/{session_id}/hangup")
+async def hangup_live_session(
+    session_id: str,
+    reason: Optional[str] = None,
+    user: User = Depends(require_owner),
+):
+    """End a live call, whichever worker it is connected to."""
+    delivered = await session_registry.send_command(
+        session_id, "hangup", {"reason": reason or "admin_hangup"}
+    )
+    if not delivered:
+        raise HTTPException(status_code=404, detail="Live session not found")
+    return {"session_id": session_id, "command": "hangup", "queued": True}
+
+
 # ==================== Calls/Conversations Endpoints ====================
 
 
@@ -2,9 +2,8 @@
 
 from __future__ import annotations
 
-import json
 import logging
-from typing import Any, Dict, List, Literal, Optional
+from typing import Any, Dict, Literal, Optional
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -13,9 +12,10 @@ from sqlalchemy.orm import Session, joinedload
 
 from analytics import AnalyticsService
 from auth import User, get_current_user
-from booking.manager import SlotSelectionManager
 from database import Conversation, Customer, get_db
+from messaging_pipeline import handle_inbound_message, sms_burst_coalescer
 from messaging_service import MessagingService
+from turn_executor import TurnQueueFull, turn_executor
 
 
 logger = logging.getLogger(__name__)
@@ -217,289 +217,26 @@ def send_message(
             status_code=422, detail="Customer email is required for email conversations"
         )
 
-    inbound_message = MessagingService.add_customer_message(
-        db=db,
-        conversation=conversation,
-        content=request.content,
-        metadata={"source": "messaging_console"},
-    )
-
-    logger = logging.getLogger(__name__)
-    logger.info(
-        "Messaging inbound: channel=%s conversation_id=%s customer_id=%s content=%s",
-        channel,
-        conversation.id,
-        customer.id,
-        (request.content or "").replace("\n", " ")[:200],
-    )
-
-    # Capture slot selections (e.g., "Option 2" or explicit time choices) as soon as the
-    # inbound message is stored so deterministic booking can trigger without waiting for
-    # the AI to parse the message later.
-    SlotSelectionManager.capture_selection(db, conversation, inbound_message)
-
-    # Refresh conversation to get any metadata updates from slot selection capture
-    db.refresh(conversation)
-
-    if channel == "sms":
-        sms_meta = MessagingService.sms_metadata_for_customer(customer.phone)
-        AnalyticsService.add_sms_details(
-            db=db,
-            message_id=inbound_message.id,
-            **sms_meta,
-        )
-    else:
-        email_meta = MessagingService.email_metadata_for_customer(
-            customer_email=customer.email,
-            subject=request.subject or conversation.subject,
-            body_text=request.content,
-        )
-        AnalyticsService.add_email_details(
-            db=db,
-            message_id=inbound_message.id,
-            subject=email_meta["subject"],
-            from_address=email_meta["from_address"],
-            to_address=email_meta["to_address"],
-            body_text=email_meta["body_text"],
-            body_html=None,
-        )
-
-    initial_content, assistant_message = MessagingService.generate_ai_response(
-        db, conversation.id, channel, log_assistant_message=False
-    )
-
-    tool_calls = (
-        list(getattr(assistant_message, "tool_calls", []) or [])
-        if assistant_message
-        else []
-    )
-    tool_results: List[Dict[str, Any]] = []
-    booking_action_success = False
-
-    if tool_calls:
-        calendar_service = MessagingService._get_calendar_service()
-        booking_confirmation_message: Optional[str] = None
-        for call in tool_calls:
-            try:
-                function_obj = getattr(call, "function", None)
-                tool_name = (
-                    getattr(function_obj, "name", None) if function_obj else None
-                )
-                raw_arguments = (
-                    getattr(function_obj, "arguments", "") if function_obj else ""
-                )
-                try:
-                    parsed_arguments = (
-                        json.loads(raw_arguments) if raw_arguments else {}
-                    )
-                except json.JSONDecodeError:
-                    parsed_arguments = {}
-
-                (
-                    normalized_arguments,
-                    adjustments,
-                ) = MessagingService._normalize_tool_arguments(
-                    tool_name, parsed_arguments
-                )
-
-                if (
-                    function_obj is not None
-                    and normalized_arguments != parsed_arguments
-                ):
-                    function_obj.arguments = json.dumps(normalized_arguments)
-
-                logger.info(
-                    "Messaging tool_call: channel=%s conversation_id=%s customer_id=%s name=%s args=%s",
-                    channel,
-                    conversation.id,
-                    customer.id,
-                    tool_name,
-                    normalized_arguments,
-                )
-
-                result = MessagingService._execute_tool_call(
-                    db=db,
-                    conversation=conversation,
-                    customer=customer,
-                    calendar_service=calendar_service,
-                    call=call,
-                )
-
-                # CRITICAL: Refresh conversation and customer after each tool call to ensure
-                # metadata updates (like pending slot offers) and customer updates
-                # are visible to subsequent tool calls in the same request
-                db.refresh(conversation)
-                db.refresh(customer)
-
-            except (
-                Exception
-            ) as exc:  # noqa: BLE001 - continue capturing failure details
-                result = {
-                    "tool_call_id": getattr(call, "id", None),
-                    "name": getattr(getattr(call, "function", None), "name", None),
-                    "arguments": {},
-                    "output": {"success": False, "error": str(exc)},
-                }
-                logger.warning("Tool call execution raised %s", exc)
-            tool_results.append(result)
-            if result.get("name") in {
-                "book_appointment",
-                "reschedule_appointment",
-                "cancel_appointment",
-            }:
-                if (result.get("output") or {}).get("success"):
-                    booking_action_success = True
-                    if (
-                        result.get("name") == "book_appointment"
-                        and not booking_confirmation_message
-                    ):
-                        booking_confirmation_message = (
-                            MessagingService.build_booking_confirmation_message(
-                                channel=channel,
-                                tool_output=result.get("output") or {},
-                            )
-                        )
-
-            tool_results[-1]["normalized_arguments"] = normalized_arguments
-            selection_adjustments = result.get("argument_adjustments") or {}
-            merged_adjustments: Dict[str, Dict[str, Optional[str]]] = {}
-            if adjustments:
-                merged_adjustments.update(adjustments)
-            if selection_adjustments:
-                merged_adjustments.update(selection_adjustments)
-            tool_results[-1]["argument_adjustments"] = merged_adjustments
-
-            last_result = tool_results[-1]
-            output_payload = last_result.get("output")
-            success_flag = None
-            if isinstance(output_payload, dict):
-                success_flag = output_payload.get("success")
-
-            logger.info(
-                "Messaging tool_result: channel=%s conversation_id=%s customer_id=%s name=%s success=%s output=%s",
-                channel,
-                conversation.id,
-                customer.id,
-                last_result.get("name"),
-                success_flag,
-                (str(output_payload).replace("\n", " ")[:400]
-                 if output_payload is not None
-                 else None),
-            )
-
-        if booking_confirmation_message:
-            response_content = booking_confirmation_message
-            assistant_message = None
-        else:
-            (
-                followup_content,
-                followup_message,
-            ) = MessagingService.generate_followup_response(
-                db=db,
-                conversation_id=conversation.id,
-                channel=channel,
-                assistant_message=assistant_message,
-                tool_results=tool_results,
-            )
-            response_content = followup_content
-            assistant_message = followup_message or assistant_message
-    else:
-        response_content = initial_content
-
-    if channel == "sms" and not booking_action_success:
-        logger.warning(
-            "SMS conversation %s completed without a successful booking tool execution.",
-            conversation.id,
-        )
-
-    outbound_metadata = {
-        "source": "messaging_console",
-        "generated_by": "assistant",
-    }
-
-    if tool_calls:
-        tool_requests: List[Dict[str, Any]] = []
-        for call in tool_calls:
-            function_obj = getattr(call, "function", None)
-            arguments_raw = (
-                getattr(function_obj, "arguments", "") if function_obj else ""
-            )
-            try:
-                parsed_args = json.loads(arguments_raw) if arguments_raw else {}
-            except json.JSONDecodeError:
-                parsed_args = arguments_raw
-            tool_requests.append(
-                {
-                    "id": getattr(call, "id", None),
-                    "type": getattr(call, "type", None),
-                    "name": getattr(function_obj, "name", None),
-                    "arguments": parsed_args,
-                }
-            )
-
-        outbound_metadata["tool_invocations"] = {
-            "requests": tool_requests,
-            "results": tool_results,
-        }
-
-    outbound_message = MessagingService.add_assistant_message(
-        db=db,
-        conversation=conversation,
-        content=response_content,
-        metadata=outbound_metadata,
-    )
-
-    logger.info(
-        "Messaging outbound: channel=%s conversation_id=%s customer_id=%s booking_success=%s tool_calls=%d content=%s",
-        channel,
-        conversation.id,
-        customer.id,
-        booking_action_success,
-        len(tool_calls),
-        (response_content or "").replace("\n", " ")[:200],
-    )
-
-    if channel == "sms":
-        sms_meta_outgoing = MessagingService.sms_metadata_for_assistant(customer.phone)
-        AnalyticsService.add_sms_details(
-            db=db,
-            message_id=outbound_message.id,
-            **sms_meta_outgoing,
-        )
-    else:
-        email_meta_outgoing = MessagingService.email_metadata_for_assistant(
-            customer_email=customer.email,
-            subject=request.subject or conversation.subject,
-            body_text=response_content,
-        )
-        AnalyticsService.add_email_details(
-            db=db,
-            message_id=outbound_message.id,
-            subject=email_meta_outgoing["subject"],
-            from_address=email_meta_outgoing["from_address"],
-            to_address=email_meta_outgoing["to_address"],
-            body_text=email_meta_outgoing["body_text"],
-            body_html=None,
+    try:
+        inbound_message, outbound_message = handle_inbound_message(
+            db,
+            conversation=conversation,
+            customer=customer,
+            channel=channel,
+            content=request.content,
+            subject=request.subject,
         )
+    except TurnQueueFull as exc:
+        logger.warning("Rejecting messaging turn: %s", exc)
+        raise HTTPException(
+            status_code=429,
+            detail="Too many messages in flight for this conversation. Please retry shortly.",
+            headers={"Retry-After": "2"},
+        ) from exc
 
     # Tool metadata already persisted via outbound_metadata; calendar_result retained for compatibility
     calendar_result: Dict[str, Any] | None = None
 
-    if channel in {"sms", "email"}:
-        try:
-            AnalyticsService.score_conversation_satisfaction(
-                db=db, conversation_id=conversation.id
-            )
-        except (
-            Exception
-        ) as exc:  # noqa: BLE001 - fall back to existing values if scoring fails
-            logger.warning(
-                "Failed to score messaging conversation %s: %s",
-                conversation.id,
-                exc,
-                exc_info=True,
-            )
-
     db.refresh(conversation)
 
     return {
@@ -510,6 +247,15 @@ def send_message(
     }
 
 
+@messaging_router.get("/turn-stats")
+def get_turn_stats(user: User = Depends(get_current_user)):
+    """Backpressure and coalescing counters for messaging turns."""
+    return {
+        "executor": turn_executor.stats(),
+        "sms_coalescer": sms_burst_coalescer.stats(),
+    }
+
+
 @messaging_router.get("", include_in_schema=False)
 @messaging_router.get("/conversations")
 def list_conversations(
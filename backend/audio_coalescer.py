@@ -0,0 +1,183 @@
+"""
+Per-session coalescing of inbound audio into target-sized appends.
+
+Browsers and telephony gateways often send 10-20ms chunks. Forwarded one by
+one, each chunk becomes its own ``input_audio_buffer.append`` event: a base64
+encode, a JSON dump and a ``ws.send`` for a few hundred bytes of audio.
+``AudioFrameCoalescer`` collects chunks in a preallocated ring buffer and
+releases them as larger appends.
+
+Latency is bounded by a deadline: audio never waits longer than
+``max_latency_ms`` after its first byte was buffered. The release size
+adapts between ``min_ms`` and ``max_ms``:
+- a size-triggered release grows the target by one step (more coalescing)
+- a deadline-triggered release shrinks the target to what actually arrived
+  within the deadline (the client is sending slower than the target)
+
+Chunks that are already at least the target size pass straight through
+when nothing is buffered, without a copy into the ring.
+"""
+
+import time
+from typing import Callable, Dict, List, Optional
+
+TARGET_STEP_MS = 10
+
+
+class AudioFrameCoalescer:
+    """Ring-buffered aggregator for one call's upstream audio."""
+
+    def __init__(
+        self,
+        *,
+        bytes_per_ms: int = 48,
+        min_ms: int = 40,
+        max_ms: int = 100,
+        max_latency_ms: int = 60,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.bytes_per_ms = bytes_per_ms
+        self.max_latency = max_latency_ms / 1000
+        self._min_bytes = min_ms * bytes_per_ms
+        self._max_bytes = max_ms * bytes_per_ms
+        self._step_bytes = TARGET_STEP_MS * bytes_per_ms
+        self._target = self._min_bytes
+        self._clock = clock
+
+        self._ring = bytearray(self._max_bytes * 2)
+        self._start = 0
+        self._size = 0
+        self._oldest_at: Optional[float] = None
+
+        self._stats = {
+            "inbound_frames": 0,
+            "upstream_messages": 0,
+            "passthrough": 0,
+            "size_flushes": 0,
+            "deadline_flushes": 0,
+            "commit_flushes": 0,
+        }
+
+    @property
+    def pending_bytes(self) -> int:
+        return self._size
+
+    @property
+    def target_ms(self) -> float:
+        return self._target / self.bytes_per_ms
+
+    def push(self, chunk) -> List[bytes]:
+        """Buffer ``chunk`` and return any appends that are ready to send."""
+        view = memoryview(chunk)
+        self._stats["inbound_frames"] += 1
+        if not view.nbytes:
+            return []
+
+        if self._size == 0 and view.nbytes >= self._target:
+            self._stats["passthrough"] += 1
+            return self._emit([bytes(view)])
+
+        ready: List[bytes] = []
+        if view.nbytes > len(self._ring) - self._size:
+            ready.append(self._take(self._size))
+            self._stats["size_flushes"] += 1
+        if view.nbytes > len(self._ring):
+            # Larger than the whole ring: forward as-is behind what was buffered
+            self._stats["passthrough"] += 1
+            return self._emit(ready + [bytes(view)])
+
+        self._write(view)
+        while self._size >= self._target:
+            ready.append(self._take(self._target))
+            self._stats["size_flushes"] += 1
+            self._target = min(self._target + self._step_bytes, self._max_bytes)
+        return self._emit(ready)
+
+    def seconds_until_due(self) -> Optional[float]:
+        """Time until buffered audio hits the latency deadline (None if empty)."""
+        if self._oldest_at is None:
+            return None
+        return max(0.0, self._oldest_at + self.max_latency - self._clock())
+
+    def poll(self) -> List[bytes]:
+        """Release buffered audio if its deadline has passed."""
+        due_in = self.seconds_until_due()
+        if due_in is None or due_in > 0:
+            return []
+        flushed = self._size
+        self._stats["deadline_flushes"] += 1
+        step = self._step_bytes
+        self._target = max(self._min_bytes, flushed - flushed % step)
+        return self._emit([self._take(flushed)])
+
+    def flush(self) -> List[bytes]:
+        """Release everything now (input buffer commit, end of call)."""
+        if not self._size:
+            return []
+        self._stats["commit_flushes"] += 1
+        return self._emit([self._take(self._size)])
+
+    def stats(self) -> Dict[str, float]:
+        inbound = self._stats["inbound_frames"]
+        upstream = self._stats["upstream_messages"]
+        return dict(
+            self._stats,
+            target_ms=self.target_ms,
+            message_ratio=round(upstream / inbound, 4) if inbound else 1.0,
+        )
+
+    def _emit(self, chunks: List[bytes]) -> List[bytes]:
+        chunks = [chunk for chunk in chunks if chunk]
+        self._stats["upstream_messages"] += len(chunks)
+        return chunks
+
+    def _write(self, view: memoryview) -> None:
+        if self._size == 0:
+            self._start = 0
+            self._oldest_at = self._clock()
+        capacity = len(self._ring)
+        end = (self._start + self._size) % capacity
+        first = min(view.nbytes, capacity - end)
+        self._ring[end : end + first] = view[:first]
+        if first < view.nbytes:
+            self._ring[: view.nbytes - first] = view[first:]
+        self._size += view.nbytes
+
+    def _take(self, count: int) -> bytes:
+        if count <= 0:
+            return b""
+        capacity = len(self._ring)
+        end = self._start + count
+        if end <= capacity:
+            data = bytes(self._ring[self._start : end])
+        else:
+            data = bytes(self._ring[self._start :]) + bytes(self._ring[: end - capacity])
+        self._start = end % capacity
+        self._size -= count
+        if self._size == 0:
+            self._oldest_at = None
+        else:
+            # Only takes right after a push leave a remainder, and it always
+            # comes from the chunk just written
+            self._oldest_at = self._clock()
+        return data
+
+
+def build_audio_coalescer(
+    *,
+    enabled: bool,
+    upstream_format: Optional[str],
+    min_ms: int,
+    max_ms: int,
+    max_latency_ms: int,
+) -> Optional[AudioFrameCoalescer]:
+    """Size a coalescer for the session's upstream format (PCM16 @ 24 kHz or G.711 @ 8 kHz)."""
+    if not enabled:
+        return None
+    bytes_per_ms = 48 if upstream_format in (None, "pcm16") else 8
+    return AudioFrameCoalescer(
+        bytes_per_ms=bytes_per_ms,
+        min_ms=min_ms,
+        max_ms=max_ms,
+        max_latency_ms=max_latency_ms,
+    )
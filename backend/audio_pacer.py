@@ -0,0 +1,207 @@
+"""
+Real-time pacing of assistant audio on the client leg.
+
+The Realtime API streams a reply's audio faster than real time, often
+seconds of it in a burst. Forwarded as it arrives, all of it ends up in the
+caller's playback buffer, where an interruption can no longer take it back.
+``OutboundAudioPacer`` holds the reply on the server instead and releases it
+in ``frame_ms`` frames at playback rate, keeping the client only ``lead_ms``
+ahead of what it is playing: enough to ride out network jitter, small
+enough that ``clear()`` on an interruption silences the assistant almost at
+once.
+
+Audio waits in a preallocated ring of ``buffer_ms``. ``push`` never waits:
+it is called from the Realtime event handler, and blocking there would hold
+up every later event (speech_started, function calls) behind queued audio.
+When a reply outgrows the ring, the oldest queued audio moves to an overflow
+buffer that is forwarded ahead of the ring without pacing. The client then
+holds more than ``lead_ms`` of that reply, so an interruption cannot take
+all of it back, but no speech is lost: only ``clear()`` drops audio.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Client-leg bytes per millisecond and sample width for each audio format
+_FORMATS = {"pcm16": (48, 2), "g711_ulaw": (8, 1), "g711_alaw": (8, 1)}
+
+
+class OutboundAudioPacer:
+    """Jitter buffer releasing one call's audio at playback rate."""
+
+    def __init__(
+        self,
+        send: Callable[[bytes], Awaitable[Any]],
+        *,
+        audio_format: str = "pcm16",
+        buffer_ms: int = 10000,
+        lead_ms: int = 200,
+        frame_ms: int = 40,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._send = send
+        self.bytes_per_ms, sample_width = _FORMATS.get(audio_format, _FORMATS["pcm16"])
+        self.lead = lead_ms / 1000
+        frame_bytes = frame_ms * self.bytes_per_ms
+        self._frame_bytes = frame_bytes - frame_bytes % sample_width
+        capacity = buffer_ms * self.bytes_per_ms
+        self._ring = bytearray(capacity - capacity % sample_width)
+        self._head = 0
+        self._size = 0
+        # Audio evicted from a full ring, forwarded unpaced ahead of it
+        self._overflow = bytearray()
+        self._clock = clock
+        # When the client finishes playing everything sent so far
+        self._playing_until = 0.0
+        self._has_audio = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._stats = {
+            "frames_sent": 0,
+            "bytes_sent": 0,
+            "clears": 0,
+            "cleared_ms": 0.0,
+            "overflow_pushes": 0,
+            "overflow_forwarded_ms": 0.0,
+            "max_queued_ms": 0.0,
+            "send_errors": 0,
+        }
+
+    def start(self) -> "OutboundAudioPacer":
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    def push(self, audio) -> None:
+        """Queue audio; what the ring cannot hold is forwarded unpaced, in order."""
+        view = memoryview(audio).cast("B")
+        if self._closed or not len(view):
+            return
+        capacity = len(self._ring)
+        overflow = self._size + len(view) - capacity
+        if overflow > 0:
+            self._overflow += self._read(min(overflow, self._size))
+            if len(view) > capacity:
+                self._overflow += view[: len(view) - capacity]
+                view = view[len(view) - capacity :]
+            self._stats["overflow_pushes"] += 1
+            self._stats["overflow_forwarded_ms"] += overflow / self.bytes_per_ms
+        self._write(view)
+        self._has_audio.set()
+        queued_ms = self.queued_ms()
+        if queued_ms > self._stats["max_queued_ms"]:
+            self._stats["max_queued_ms"] = queued_ms
+
+    def clear(self) -> float:
+        """Drop all queued audio; returns how many milliseconds were dropped."""
+        dropped_ms = self.queued_ms()
+        self._head = 0
+        self._size = 0
+        self._overflow.clear()
+        self._playing_until = 0.0
+        self._has_audio.clear()
+        if dropped_ms:
+            self._stats["clears"] += 1
+            self._stats["cleared_ms"] += dropped_ms
+        return dropped_ms
+
+    def queued_ms(self) -> float:
+        return (self._size + len(self._overflow)) / self.bytes_per_ms
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(
+            self._stats,
+            cleared_ms=round(self._stats["cleared_ms"], 1),
+            overflow_forwarded_ms=round(self._stats["overflow_forwarded_ms"], 1),
+            max_queued_ms=round(self._stats["max_queued_ms"], 1),
+        )
+
+    def _write(self, data: memoryview) -> None:
+        capacity = len(self._ring)
+        tail = (self._head + self._size) % capacity
+        first = min(len(data), capacity - tail)
+        self._ring[tail : tail + first] = data[:first]
+        if first < len(data):
+            self._ring[: len(data) - first] = data[first:]
+        self._size += len(data)
+
+    def _read(self, count: int) -> bytes:
+        capacity = len(self._ring)
+        stop = self._head + count
+        if stop <= capacity:
+            out = bytes(self._ring[self._head : stop])
+        else:
+            out = bytes(self._ring[self._head :]) + bytes(self._ring[: stop - capacity])
+        self._head = stop % capacity
+        self._size -= count
+        if self._size == 0 and not self._overflow:
+            self._has_audio.clear()
+        return out
+
+    def _next_frame(self) -> bytes:
+        if self._overflow:
+            frame = bytes(self._overflow[: self._frame_bytes])
+            del self._overflow[: self._frame_bytes]
+            if not self._overflow and not self._size:
+                self._has_audio.clear()
+            return frame
+        return self._read(min(self._frame_bytes, self._size))
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_audio.wait()
+            now = self._clock()
+            ahead = self._playing_until - now
+            if ahead > self.lead and not self._overflow:
+                await asyncio.sleep(ahead - self.lead)
+                continue
+            if not self._size and not self._overflow:
+                continue
+            frame = self._next_frame()
+            self._playing_until = max(now, self._playing_until) + (
+                len(frame) / self.bytes_per_ms / 1000
+            )
+            try:
+                await self._send(frame)
+            except Exception as exc:  # noqa: BLE001
+                # The client socket dropped mid-send; the frame is lost but
+                # pacing carries on for a resumed socket
+                self._stats["send_errors"] += 1
+                logger.debug("Dropped outbound audio frame: %s", exc)
+                continue
+            self._stats["frames_sent"] += 1
+            self._stats["bytes_sent"] += len(frame)
+
+
+def build_outbound_pacer(
+    *,
+    enabled: bool,
+    send: Callable[[bytes], Awaitable[Any]],
+    audio_format: Optional[str],
+    buffer_seconds: float,
+    lead_ms: int,
+    frame_ms: int,
+) -> Optional[OutboundAudioPacer]:
+    if not enabled:
+        return None
+    return OutboundAudioPacer(
+        send,
+        audio_format=audio_format or "pcm16",
+        buffer_ms=int(buffer_seconds * 1000),
+        lead_ms=lead_ms,
+        frame_ms=frame_ms,
+    ).start()
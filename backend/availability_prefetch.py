@@ -0,0 +1,280 @@
+"""
+Speculative availability prefetch for voice calls.
+
+The model nearly always calls ``check_availability`` right after the caller
+names a service and a day, but the calendar fetch only starts once
+``response.function_call_arguments.done`` arrives. ``AvailabilityPrefetcher``
+watches completed customer transcripts for service and date mentions and
+starts that fetch in the background, so the tool call can resolve from a
+future that is already running (or done).
+
+Prefetches only call the side-effect free ``handle_check_availability``;
+recording slot offers still happens in the orchestrator when the tool call
+actually arrives. A prefetched result is served at most once, only for the
+exact (date, service) the model asked for, and only within ``ttl_seconds``.
+Prefetch workers share the process-wide calendar service with tool calls on
+the voice DB executor; ``GoogleCalendarService`` builds a separate API client
+per thread, since googleapiclient clients are not thread-safe.
+
+Stats:
+- ``hits`` / ``misses``: tool calls served from / not served from a prefetch
+- ``wasted``: prefetches that expired, were evicted or were never asked for
+"""
+
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from booking.time_utils import EASTERN_TZ, to_eastern
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+AvailabilityFetch = Callable[[str, str], Dict[str, Any]]
+PrefetchKey = Tuple[str, str]
+
+_WEEKDAYS = (
+    "monday",
+    "tuesday",
+    "wednesday",
+    "thursday",
+    "friday",
+    "saturday",
+    "sunday",
+)
+_MONTHS = (
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+)
+_ISO_DATE = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_WEEKDAY = re.compile(r"\b(next\s+)?(" + "|".join(_WEEKDAYS) + r")\b")
+_MONTH_DAY = re.compile(
+    r"\b(" + "|".join(_MONTHS) + r")\s+(\d{1,2})(?:st|nd|rd|th)?\b"
+)
+
+
+def extract_requested_date(text: str, *, reference: Optional[datetime] = None) -> Optional[str]:
+    """Return the YYYY-MM-DD date a caller's utterance refers to, if any."""
+    content = text.lower()
+    today = (to_eastern(reference) if reference else datetime.now(EASTERN_TZ)).date()
+
+    match = _ISO_DATE.search(content)
+    if match:
+        try:
+            return date(*(int(part) for part in match.groups())).isoformat()
+        except ValueError:
+            return None
+
+    match = _MONTH_DAY.search(content)
+    if match:
+        month = _MONTHS.index(match.group(1)) + 1
+        try:
+            candidate = date(today.year, month, int(match.group(2)))
+        except ValueError:
+            return None
+        if candidate < today:
+            # "January 5th" said in December means next year
+            try:
+                candidate = candidate.replace(year=today.year + 1)
+            except ValueError:
+                return None
+        return candidate.isoformat()
+
+    match = _WEEKDAY.search(content)
+    if match:
+        days_ahead = (_WEEKDAYS.index(match.group(2)) - today.weekday()) % 7
+        if match.group(1) and days_ahead == 0:
+            days_ahead = 7
+        return (today + timedelta(days=days_ahead)).isoformat()
+
+    if re.search(r"\b(tomorrow|tmrw)\b", content):
+        return (today + timedelta(days=1)).isoformat()
+    if re.search(r"\btoday\b", content):
+        return today.isoformat()
+    return None
+
+
+def build_service_matcher(services: Dict[str, Any]) -> Callable[[str], Optional[str]]:
+    """Return a function mapping an utterance to the service slug it mentions."""
+    aliases: Dict[str, str] = {}
+    for slug, details in services.items():
+        aliases[slug.lower()] = slug
+        aliases[slug.replace("_", " ").lower()] = slug
+        name = (details or {}).get("name")
+        if name:
+            aliases[name.lower()] = slug
+    if not aliases:
+        return lambda text: None
+
+    # Longest alias first so "dermal fillers" wins over "fillers"
+    pattern = re.compile(
+        r"\b("
+        + "|".join(re.escape(alias) for alias in sorted(aliases, key=len, reverse=True))
+        + r")\b"
+    )
+
+    def match(text: str) -> Optional[str]:
+        found = pattern.search(text.lower())
+        return aliases[found.group(1)] if found else None
+
+    return match
+
+
+class _Prefetch:
+    __slots__ = ("future", "started_at")
+
+    def __init__(self, future: Future, started_at: float) -> None:
+        self.future = future
+        self.started_at = started_at
+
+
+class AvailabilityPrefetcher:
+    """Warm ``check_availability`` results from what the caller just said."""
+
+    def __init__(
+        self,
+        *,
+        fetch: AvailabilityFetch,
+        services: Dict[str, Any],
+        executor: Executor,
+        ttl_seconds: float = 90.0,
+        max_entries: int = 3,
+        wait_timeout: float = 10.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._fetch = fetch
+        self._match_service = build_service_matcher(services)
+        self._executor = executor
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_timeout = wait_timeout
+        self._clock = clock
+        # Hints persist across turns: "I'd like Botox" ... "how about Friday?"
+        self._service: Optional[str] = None
+        self._date: Optional[str] = None
+        # Observed on the event loop, taken on the voice DB executor
+        self._lock = threading.Lock()
+        self._entries: Dict[PrefetchKey, _Prefetch] = {}
+        self._stats = {"prefetches": 0, "hits": 0, "misses": 0, "wasted": 0}
+
+    def observe(self, text: str, *, reference: Optional[datetime] = None) -> Optional[PrefetchKey]:
+        """Start a prefetch if ``text`` completes a (date, service) pair."""
+        service = self._match_service(text)
+        requested_date = extract_requested_date(text, reference=reference)
+        if service is None and requested_date is None:
+            return None
+        self._service = service or self._service
+        self._date = requested_date or self._date
+        if self._service is None or self._date is None:
+            return None
+
+        key = (self._date, self._service)
+        with self._lock:
+            self._expire()
+            if key in self._entries:
+                return None
+            while len(self._entries) >= self.max_entries:
+                oldest = min(self._entries, key=lambda k: self._entries[k].started_at)
+                self._discard(oldest)
+            future = self._executor.submit(self._fetch, *key)
+            self._entries[key] = _Prefetch(future, self._clock())
+            self._stats["prefetches"] += 1
+        logger.debug("Prefetching availability for %s on %s", key[1], key[0])
+        return key
+
+    def take(self, date_str: str, service_type: str) -> Optional[Dict[str, Any]]:
+        """Return the prefetched result for this tool call, or None on a miss."""
+        with self._lock:
+            self._expire()
+            entry = self._entries.pop((date_str, service_type), None)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+        try:
+            # Still in flight: waiting is cheaper than starting over
+            payload = entry.future.result(timeout=self.wait_timeout)
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("Discarding failed availability prefetch: %s", exc)
+            payload = None
+        with self._lock:
+            if not payload or not payload.get("success"):
+                # Let the tool call run for real so its error handling applies
+                self._stats["wasted"] += 1
+                self._stats["misses"] += 1
+                return None
+            self._stats["hits"] += 1
+        return payload
+
+    def close(self) -> None:
+        """Cancel outstanding prefetches; anything not taken counts as waste."""
+        with self._lock:
+            for key in list(self._entries):
+                self._discard(key)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            stats = dict(self._stats, pending=len(self._entries))
+        calls = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / calls, 4) if calls else 0.0
+        stats["waste_rate"] = (
+            round(stats["wasted"] / stats["prefetches"], 4) if stats["prefetches"] else 0.0
+        )
+        return stats
+
+    def _expire(self) -> None:
+        deadline = self._clock() - self.ttl_seconds
+        for key in [k for k, entry in self._entries.items() if entry.started_at < deadline]:
+            self._discard(key)
+
+    def _discard(self, key: PrefetchKey) -> None:
+        entry = self._entries.pop(key)
+        entry.future.cancel()
+        self._stats["wasted"] += 1
+
+
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """Shared worker pool for calendar prefetches across all calls."""
+    global _prefetch_executor
+    with _executor_lock:
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=settings.VOICE_AVAILABILITY_PREFETCH_WORKERS,
+                thread_name_prefix="availability-prefetch",
+            )
+        return _prefetch_executor
+
+
+def build_availability_prefetcher(
+    *,
+    enabled: bool,
+    fetch: AvailabilityFetch,
+    services: Dict[str, Any],
+    ttl_seconds: float,
+) -> Optional[AvailabilityPrefetcher]:
+    if not enabled or not services:
+        return None
+    return AvailabilityPrefetcher(
+        fetch=fetch,
+        services=services,
+        executor=get_prefetch_executor(),
+        ttl_seconds=ttl_seconds,
+    )
@@ -0,0 +1,131 @@
+"""
+Server-side barge-in detection.
+
+Without it, an interruption takes the caller's client or the Realtime API's
+server VAD to notice the caller speaking, and the assistant keeps talking
+over them for the whole round trip. ``BargeInDetector`` watches the
+caller's inbound audio while assistant audio is still playing and reports a
+barge-in as soon as speech has been sustained for ``min_speech_ms``; the
+client then stops forwarding that response's audio, tells the caller's
+client to flush its playback buffer and sends ``response.cancel``.
+
+"Still playing" is estimated from the assistant audio forwarded so far:
+Realtime audio arrives faster than real time, so playback runs until the
+sum of the forwarded deltas' durations has elapsed, not until the last
+delta arrived.
+
+Detection reuses the VAD gate's 10ms sub-frame levels, with a louder
+threshold than the gate: the caller's microphone can pick up some of the
+assistant's own playback, which must not count as an interruption.
+"""
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from realtime_config import G711_AUDIO_FORMATS
+from telephony_audio import REALTIME_SAMPLE_RATE, TELEPHONY_SAMPLE_RATE, g711_decode
+from vad_gate import SUBFRAME_MS, chunk_activity
+
+# Output bytes per millisecond of assistant audio
+_OUTPUT_BYTES_PER_MS = {"pcm16": 48, "g711_ulaw": 8, "g711_alaw": 8}
+
+
+class BargeInDetector:
+    """Detect caller speech over assistant playback for one call."""
+
+    def __init__(
+        self,
+        *,
+        upstream_format: Optional[str] = None,
+        output_format: Optional[str] = None,
+        threshold_dbfs: float = -35.0,
+        min_speech_ms: int = 160,
+        clock: Callable[[], float] = time.perf_counter,
+    ) -> None:
+        self._codec = upstream_format if upstream_format in G711_AUDIO_FORMATS else None
+        sample_rate = TELEPHONY_SAMPLE_RATE if self._codec else REALTIME_SAMPLE_RATE
+        self._samples_per_subframe = sample_rate * SUBFRAME_MS // 1000
+        self._output_bytes_per_ms = _OUTPUT_BYTES_PER_MS.get(output_format or "pcm16", 48)
+        self.threshold_dbfs = threshold_dbfs
+        self.min_speech_ms = min_speech_ms
+        self._clock = clock
+        self._playing_until = 0.0
+        # Sub-frames of speech in the current run, ending at the last chunk
+        self._speech_ms = 0
+        self._stats = {"barge_ins": 0, "dropped_deltas": 0, "dropped_audio_ms": 0.0}
+
+    def assistant_playing(self) -> bool:
+        return self._clock() < self._playing_until
+
+    def assistant_audio(self, audio_b64: str) -> None:
+        """Extend the playback estimate by one forwarded ``response.audio.delta``."""
+        duration = self._b64_duration_ms(audio_b64) / 1000
+        self._playing_until = max(self._clock(), self._playing_until) + duration
+
+    def dropped_audio(self, audio_b64: str) -> None:
+        """Count a delta of an interrupted response that was not forwarded."""
+        self._stats["dropped_deltas"] += 1
+        self._stats["dropped_audio_ms"] += self._b64_duration_ms(audio_b64)
+
+    def caller_audio(self, audio: Any) -> Optional[float]:
+        """Feed inbound caller audio (upstream format).
+
+        Returns the milliseconds since the caller started speaking when this
+        chunk completes a barge-in, else None.
+        """
+        if not self.assistant_playing():
+            self._speech_ms = 0
+            return None
+        if self._codec is not None:
+            samples = g711_decode(audio, self._codec)
+        else:
+            view = memoryview(audio)
+            samples = np.frombuffer(view[: view.nbytes - view.nbytes % 2], dtype="<i2")
+        if samples.size == 0:
+            return None
+
+        dbfs, _ = chunk_activity(samples, self._samples_per_subframe)
+        speech = dbfs >= self.threshold_dbfs
+        if not speech[-1]:
+            self._speech_ms = 0
+            return None
+        # Length of the speech run at the end of this chunk
+        quiet = np.flatnonzero(~speech)
+        run = speech.size - (quiet[-1] + 1) if quiet.size else speech.size
+        self._speech_ms = run * SUBFRAME_MS + (self._speech_ms if run == speech.size else 0)
+        if self._speech_ms < self.min_speech_ms:
+            return None
+
+        elapsed_ms = float(self._speech_ms)
+        self._speech_ms = 0
+        # The caller's client flushes its playback when told about the barge-in
+        self._playing_until = 0.0
+        self._stats["barge_ins"] += 1
+        return elapsed_ms
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, dropped_audio_ms=round(self._stats["dropped_audio_ms"], 1))
+
+    def _b64_duration_ms(self, audio_b64: str) -> float:
+        size = len(audio_b64) * 3 // 4 - audio_b64[-2:].count("=")
+        return size / self._output_bytes_per_ms
+
+
+def build_barge_in_detector(
+    *,
+    enabled: bool,
+    upstream_format: Optional[str],
+    output_format: Optional[str],
+    threshold_dbfs: float,
+    min_speech_ms: int,
+) -> Optional[BargeInDetector]:
+    if not enabled:
+        return None
+    return BargeInDetector(
+        upstream_format=upstream_format,
+        output_format=output_format,
+        threshold_dbfs=threshold_dbfs,
+        min_speech_ms=min_speech_ms,
+    )
@@ -2,6 +2,9 @@
 
 import logging
 import os
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Dict, List, Optional
@@ -54,7 +57,12 @@ def _credentials_available() -> bool:
 
 
 class GoogleCalendarService:
-    """Service for interacting with Google Calendar API."""
+    """Service for interacting with Google Calendar API.
+
+    One instance is shared process-wide, but googleapiclient service objects
+    (and their httplib2 connections) are not thread-safe, so each thread that
+    uses ``service`` gets its own client built from the shared credentials.
+    """
 
     def __init__(self):
         """Initialize the Google Calendar service."""
@@ -67,9 +75,18 @@ class GoogleCalendarService:
             raise RuntimeError(message) from GOOGLE_API_IMPORT_ERROR
 
         self.creds = None
-        self.service = None
+        self._local = threading.local()
         self._authenticate()
 
+    @property
+    def service(self):
+        """Calendar API client for the calling thread."""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = build("calendar", "v3", credentials=self.creds)
+            self._local.client = client
+        return client
+
     def _authenticate(self):
         """Authenticate with Google Calendar API."""
         # The file token.json stores the user's access and refresh tokens
@@ -101,7 +118,7 @@ class GoogleCalendarService:
                 token.write(self.creds.to_json())
                 logger.info("Saved new Google Calendar OAuth token to %s", token_path)
 
-        self.service = build("calendar", "v3", credentials=self.creds)
+        self._local.client = build("calendar", "v3", credentials=self.creds)
         logger.info("Initialized Google Calendar service client")
 
     def get_available_slots(
@@ -455,15 +472,128 @@ Notes: {notes or 'None'}
             return None
 
 
+class MockCalendarService:
+    """In-memory stand-in for Google Calendar with optional simulated latency.
+
+    Used for load tests and local runs without Google credentials
+    (``CALENDAR_BACKEND=mock``). Slots follow the same business hours and
+    30-minute steps as ``GoogleCalendarService``.
+    """
+
+    def __init__(self, latency_seconds: float = 0.0):
+        self.latency_seconds = latency_seconds
+        self._lock = threading.Lock()
+        self.events: Dict[str, Dict[str, Any]] = {}
+
+    def _simulate_latency(self) -> None:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+
+    def get_available_slots(
+        self,
+        date: datetime,
+        service_type: str,
+        duration_minutes: Optional[int] = None,
+        services_dict: Optional[Dict[str, Any]] = None,
+    ) -> List[Dict[str, Any]]:
+        self._simulate_latency()
+        if duration_minutes is None:
+            service = (services_dict or {}).get(service_type)
+            if not service:
+                raise ValueError(f"Unknown service type: {service_type}")
+            duration_minutes = service.get("duration_minutes", 60)
+
+        start_time = EASTERN_TZ.localize(
+            datetime.combine(date.date(), datetime.min.time().replace(hour=9))
+        )
+        end_time = EASTERN_TZ.localize(
+            datetime.combine(date.date(), datetime.min.time().replace(hour=19))
+        )
+        with self._lock:
+            busy = [(event["start"], event["end"]) for event in self.events.values()]
+
+        slot_duration = timedelta(minutes=duration_minutes)
+        available_slots = []
+        current_time = start_time
+        while current_time + slot_duration <= end_time:
+            slot_end = current_time + slot_duration
+            if not any(current_time < busy_end and slot_end > busy_start for busy_start, busy_end in busy):
+                available_slots.append(
+                    {
+                        "start": current_time.isoformat(),
+                        "end": slot_end.isoformat(),
+                        "start_time": current_time.strftime("%I:%M %p"),
+                        "end_time": slot_end.strftime("%I:%M %p"),
+                    }
+                )
+            current_time += timedelta(minutes=30)
+        return available_slots
+
+    def book_appointment(
+        self,
+        start_time: datetime,
+        end_time: datetime,
+        customer_name: str,
+        customer_email: str,
+        customer_phone: str,
+        service_type: str,
+        provider: Optional[str] = None,
+        notes: Optional[str] = None,
+        services_dict: Optional[Dict[str, Any]] = None,
+    ) -> Optional[str]:
+        self._simulate_latency()
+        event_id = f"mock-{uuid.uuid4().hex}"
+        service_name = (services_dict or {}).get(service_type, {}).get("name", service_type)
+        with self._lock:
+            self.events[event_id] = {
+                "id": event_id,
+                "summary": f"{service_name} - {customer_name}",
+                "description": f"Service: {service_name}\nCustomer: {customer_name}",
+                "start": start_time.astimezone(EASTERN_TZ),
+                "end": end_time.astimezone(EASTERN_TZ),
+                "status": "confirmed",
+            }
+        return event_id
+
+    def cancel_appointment(self, event_id: str) -> bool:
+        self._simulate_latency()
+        with self._lock:
+            return self.events.pop(event_id, None) is not None
+
+    def reschedule_appointment(
+        self, event_id: str, new_start_time: datetime, new_end_time: datetime
+    ) -> bool:
+        self._simulate_latency()
+        with self._lock:
+            event = self.events.get(event_id)
+            if event is None:
+                return False
+            event["start"] = new_start_time.astimezone(EASTERN_TZ)
+            event["end"] = new_end_time.astimezone(EASTERN_TZ)
+            return True
+
+    def get_appointment_details(self, event_id: str) -> Optional[Dict[str, Any]]:
+        self._simulate_latency()
+        with self._lock:
+            event = self.events.get(event_id)
+            return dict(event) if event is not None else None
+
+
 # Singleton instance
-_calendar_service: Optional[GoogleCalendarService] = None
+_calendar_service: Optional[Any] = None
 
 
 def get_calendar_service() -> GoogleCalendarService:
-    """Get or create calendar service instance."""
+    """Get or create calendar service instance (``CALENDAR_BACKEND``)."""
     global _calendar_service
     if _calendar_service is None:
-        _calendar_service = GoogleCalendarService()
+        if settings.CALENDAR_BACKEND == "mock":
+            logger.info("Using mock calendar service")
+            _calendar_service = MockCalendarService(
+                latency_seconds=settings.CALENDAR_MOCK_LATENCY_SECONDS
+            )
+        else:
+            _calendar_service = GoogleCalendarService()
     return _calendar_service
 
 
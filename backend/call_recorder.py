@@ -0,0 +1,336 @@
+"""
+Streaming per-call audio recording.
+
+``CallRecorder`` tees the call's audio in both directions into a stereo
+recording: the caller on the left channel, the assistant on the right. Audio
+is placed on a shared timeline by arrival time, so pauses stay pauses, and
+assistant audio (which arrives faster than real time) stays in order after
+the previous reply.
+
+The relay path only copies samples into a preallocated ring per direction.
+A writer thread drains both rings a short lag behind real time, interleaves
+them and writes to disk, so memory per call is fixed by
+``buffer_seconds`` however long the call runs, and file I/O never happens
+on the event loop. If the assistant gets more than a buffer ahead, or the
+writer falls behind, the overflow is dropped and counted rather than
+blocking the relay.
+
+Formats:
+- ``wav``: 16-bit PCM at the session sample rate
+- ``wav_ulaw``: 8-bit G.711 mu-law WAV, half the size of ``wav``
+"""
+
+import logging
+import os
+import re
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from realtime_config import G711_AUDIO_FORMATS
+from telephony_audio import (
+    REALTIME_SAMPLE_RATE,
+    TELEPHONY_SAMPLE_RATE,
+    g711_decode,
+    g711_encode,
+)
+
+logger = logging.getLogger(__name__)
+
+CALLER = 0
+ASSISTANT = 1
+
+RECORDING_FORMATS = ("wav", "wav_ulaw")
+
+# Later arrivals than this after a track's last audio start a silent gap;
+# anything closer is network jitter and is appended back to back
+GAP_TOLERANCE_SECONDS = 0.2
+# The writer trails real time by this much so late caller chunks still land
+WRITER_LAG_SECONDS = 0.5
+WRITER_INTERVAL_SECONDS = 0.25
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_MULAW = 7
+
+
+class _TrackRing:
+    """Preallocated int16 ring holding one direction's unwritten samples.
+
+    Buffered samples are contiguous on the call timeline from ``start`` to
+    ``end``; a silent gap is written into the ring as zeros.
+    """
+
+    def __init__(self, capacity: int) -> None:
+        self.samples = np.zeros(capacity, dtype=np.int16)
+        self.head = 0
+        self.size = 0
+        self.start = 0
+        self.end = 0
+
+    def append(self, samples: np.ndarray, position: int, floor: int, tolerance: int) -> int:
+        """Place ``samples`` at ``position``; returns how many were dropped."""
+        if self.size == 0:
+            # Back to back with the track's last audio unless a new burst
+            if position - self.end <= tolerance:
+                position = self.end
+            self.start = self.end = max(position, floor)
+        elif position - self.end > tolerance:
+            gap = position - self.end
+            if self.size + gap > len(self.samples):
+                return len(samples)
+            self._write(np.zeros(gap, dtype=np.int16))
+        count = min(len(samples), len(self.samples) - self.size)
+        self._write(samples[:count])
+        return len(samples) - count
+
+    def read_until(self, horizon: int) -> np.ndarray:
+        """Remove and return buffered samples before ``horizon``."""
+        count = max(0, min(self.end, horizon) - self.start)
+        if count == 0:
+            return np.empty(0, dtype=np.int16)
+        capacity = len(self.samples)
+        stop = self.head + count
+        if stop <= capacity:
+            out = self.samples[self.head : stop].copy()
+        else:
+            out = np.concatenate((self.samples[self.head :], self.samples[: stop - capacity]))
+        self.head = stop % capacity
+        self.size -= count
+        self.start += count
+        return out
+
+    def _write(self, samples: np.ndarray) -> None:
+        capacity = len(self.samples)
+        tail = (self.head + self.size) % capacity
+        first = min(len(samples), capacity - tail)
+        self.samples[tail : tail + first] = samples[:first]
+        if first < len(samples):
+            self.samples[: len(samples) - first] = samples[first:]
+        self.size += len(samples)
+        self.end += len(samples)
+
+
+class _WavSink:
+    """Stereo WAV file written incrementally; sizes are patched on close."""
+
+    def __init__(self, path: str, sample_rate: int, file_format: str) -> None:
+        self.sample_rate = sample_rate
+        self.mulaw = file_format == "wav_ulaw"
+        self.frames = 0
+        self._file = open(path, "wb")
+        self._file.write(self._header())
+
+    def write(self, block: np.ndarray) -> int:
+        if self.mulaw:
+            data = g711_encode(block.reshape(-1), "g711_ulaw")
+        else:
+            data = block.astype("<i2", copy=False).tobytes()
+        self._file.write(data)
+        self.frames += len(block)
+        return len(data)
+
+    def close(self) -> None:
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+
+    def _header(self) -> bytes:
+        channels = 2
+        bits = 8 if self.mulaw else 16
+        block_align = channels * bits // 8
+        data_bytes = self.frames * block_align
+        fmt = struct.pack(
+            "<HHIIHH",
+            _WAVE_FORMAT_MULAW if self.mulaw else _WAVE_FORMAT_PCM,
+            channels,
+            self.sample_rate,
+            self.sample_rate * block_align,
+            block_align,
+            bits,
+        )
+        chunks = b""
+        if self.mulaw:
+            # Non-PCM formats carry cbSize and a fact chunk
+            fmt += struct.pack("<H", 0)
+            chunks = b"fact" + struct.pack("<II", 4, self.frames)
+        chunks = b"fmt " + struct.pack("<I", len(fmt)) + fmt + chunks
+        chunks += b"data" + struct.pack("<I", data_bytes)
+        return b"RIFF" + struct.pack("<I", 4 + len(chunks) + data_bytes) + b"WAVE" + chunks
+
+
+class CallRecorder:
+    """Bounded-memory stereo recorder for one call."""
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        sample_rate: int = REALTIME_SAMPLE_RATE,
+        upstream_format: Optional[str] = None,
+        file_format: str = "wav",
+        buffer_seconds: float = 20.0,
+        url: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if file_format not in RECORDING_FORMATS:
+            raise ValueError(f"Unsupported recording format: {file_format}")
+        self.path = path
+        self.url = url or os.path.abspath(path)
+        self.sample_rate = sample_rate
+        self.file_format = file_format
+        self._codec = upstream_format if upstream_format in G711_AUDIO_FORMATS else None
+        self._clock = clock
+        self._started_at = clock()
+        self._tolerance = int(GAP_TOLERANCE_SECONDS * sample_rate)
+        self._lag = int(WRITER_LAG_SECONDS * sample_rate)
+
+        capacity = int(buffer_seconds * sample_rate)
+        self._tracks = (_TrackRing(capacity), _TrackRing(capacity))
+        self._lock = threading.Lock()
+        self._written = 0
+        self._stats = {"dropped_samples": 0, "bytes_written": 0}
+        self._error: Optional[str] = None
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name=f"call-recorder-{os.path.basename(path)}", daemon=True
+        )
+        self._thread.start()
+
+    # ---- relay side (event loop) ----
+
+    def caller(self, audio) -> None:
+        self._push(CALLER, audio)
+
+    def assistant(self, audio) -> None:
+        self._push(ASSISTANT, audio)
+
+    def _push(self, channel: int, audio) -> None:
+        if self._stop.is_set() or not len(audio):
+            return
+        if self._codec is not None:
+            samples = g711_decode(audio, self._codec)
+        else:
+            view = memoryview(audio)
+            samples = np.frombuffer(view[: view.nbytes - view.nbytes % 2], dtype="<i2")
+        position = int((self._clock() - self._started_at) * self.sample_rate)
+        with self._lock:
+            dropped = self._tracks[channel].append(
+                samples, position, self._written, self._tolerance
+            )
+            self._stats["dropped_samples"] += dropped
+
+    # ---- writer side ----
+
+    def close(self, timeout: Optional[float] = 10.0) -> Optional[str]:
+        """Flush everything buffered and finish the file.
+
+        Blocks until the writer thread is done; returns the recording URL,
+        or None if nothing could be written.
+        """
+        self._stop.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Recording writer for %s did not finish in time", self.path)
+            return None
+        return self.url if self._error is None else None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            written = self._written
+            dropped = self._stats["dropped_samples"]
+            bytes_written = self._stats["bytes_written"]
+        return {
+            "format": self.file_format,
+            "recorded_seconds": round(written / self.sample_rate, 2),
+            "dropped_ms": round(dropped * 1000 / self.sample_rate, 1),
+            "bytes_written": bytes_written,
+            "error": self._error,
+        }
+
+    def _run(self) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            sink = _WavSink(self.path, self.sample_rate, self.file_format)
+        except OSError as exc:
+            self._error = str(exc)
+            self._stop.set()
+            logger.error("Cannot open call recording %s: %s", self.path, exc)
+            return
+
+        try:
+            while not self._stop.wait(WRITER_INTERVAL_SECONDS):
+                now = int((self._clock() - self._started_at) * self.sample_rate)
+                self._drain(sink, now - self._lag)
+            with self._lock:
+                final = max(track.end for track in self._tracks)
+            self._drain(sink, final)
+        except Exception as exc:  # noqa: BLE001 - a broken recording must not outlive the call
+            self._error = str(exc)
+            logger.error("Call recording %s failed: %s", self.path, exc, exc_info=True)
+        finally:
+            try:
+                sink.close()
+            except OSError as exc:
+                self._error = self._error or str(exc)
+                logger.error("Cannot finish call recording %s: %s", self.path, exc)
+
+    def _drain(self, sink: _WavSink, horizon: int) -> None:
+        with self._lock:
+            if horizon <= self._written:
+                return
+            block = np.zeros((horizon - self._written, 2), dtype=np.int16)
+            for channel, track in enumerate(self._tracks):
+                offset = track.start - self._written
+                samples = track.read_until(horizon)
+                block[offset : offset + len(samples), channel] = samples
+            self._written = horizon
+        written = sink.write(block)
+        with self._lock:
+            self._stats["bytes_written"] += written
+
+
+def recording_path(directory: str, session_id: str, file_format: str) -> str:
+    """``<directory>/<YYYYMMDD>/<session_id>.wav`` with the ID made filename-safe."""
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id).lstrip(".") or "session"
+    day = datetime.utcnow().strftime("%Y%m%d")
+    return os.path.join(directory, day, f"{safe_id}.wav")
+
+
+def build_call_recorder(
+    *,
+    enabled: bool,
+    session_id: str,
+    upstream_format: Optional[str],
+    directory: str,
+    file_format: str,
+    buffer_seconds: float,
+    base_url: Optional[str] = None,
+) -> Optional[CallRecorder]:
+    """Recorder at the session's upstream rate (24 kHz PCM16 or 8 kHz G.711)."""
+    if not enabled:
+        return None
+    if file_format not in RECORDING_FORMATS:
+        logger.warning("Unknown VOICE_RECORDING_FORMAT %r; using wav", file_format)
+        file_format = "wav"
+    path = recording_path(directory, session_id, file_format)
+    url = None
+    if base_url:
+        url = f"{base_url.rstrip('/')}/{os.path.relpath(path, directory).replace(os.sep, '/')}"
+    sample_rate = (
+        TELEPHONY_SAMPLE_RATE if upstream_format in G711_AUDIO_FORMATS else REALTIME_SAMPLE_RATE
+    )
+    return CallRecorder(
+        path,
+        sample_rate=sample_rate,
+        upstream_format=upstream_format,
+        file_format=file_format,
+        buffer_seconds=buffer_seconds,
+        url=url,
+    )
@@ -0,0 +1,192 @@
+"""
+Compact columnar encoding of a finished call's transcript and tool calls.
+
+``transcript_segments`` and ``function_calls`` used to be stored as JSON
+lists of dicts, repeating every key and a 26-character ISO timestamp per
+entry, and the admin API parsed the whole list to show any of it. At
+finalization the call is now packed into ``VoiceCallDetails.call_record``
+instead, one section per list:
+
+- a table of labels (speakers, or tool names) and a one-byte code per entry
+- each entry's offset in milliseconds from the call's first timestamp
+- the end position of each entry's payload (text, or tool call JSON),
+  followed by all payloads in one block
+
+Everything after the fixed header is zlib-compressed when
+``VOICE_CALL_RECORD_COMPRESS`` is on. ``CompactCallRecord`` reads a blob
+lazily: the columns are views into it, and an entry is only turned back
+into a dict when it is indexed, so a page of a long transcript costs that
+page's entries. Entries come back in the shape the call used in memory.
+"""
+
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+
+import json_codec
+
+MAGIC = b"VC"
+VERSION = 1
+FLAG_ZLIB = 0x01
+
+# magic, version, flags, epoch milliseconds of the earliest entry
+_HEADER = struct.Struct("<2sBBq")
+# Offset stored for an entry without a timestamp
+_NO_TIMESTAMP = 0xFFFFFFFF
+_EPOCH = datetime(1970, 1, 1)
+
+
+class CallRecordError(ValueError):
+    """Blob is not a call record this version can read."""
+
+
+def _epoch_ms(timestamp: Optional[str]) -> Optional[int]:
+    if not timestamp:
+        return None
+    try:
+        moment = datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return None
+    return int((moment.replace(tzinfo=None) - _EPOCH) / timedelta(milliseconds=1))
+
+
+def _encode_section(
+    labels: Sequence[str], stamps: Sequence[Optional[int]], payloads: Sequence[bytes], base_ms: int
+) -> bytes:
+    table: Dict[str, int] = {}
+    codes = bytearray()
+    for label in labels:
+        if label not in table:
+            if len(table) == 255:
+                raise CallRecordError("more than 255 distinct labels in one section")
+            table[label] = len(table)
+        codes.append(table[label])
+    offsets = np.array(
+        [_NO_TIMESTAMP if stamp is None else stamp - base_ms for stamp in stamps], dtype="<u4"
+    )
+    ends = np.cumsum([len(payload) for payload in payloads], dtype="<u4")
+
+    parts = [struct.pack("<IB", len(labels), len(table))]
+    for label in table:
+        encoded = label.encode("utf-8")[:255]
+        parts.append(struct.pack("<B", len(encoded)) + encoded)
+    parts += [bytes(codes), offsets.tobytes(), ends.tobytes(), b"".join(payloads)]
+    return b"".join(parts)
+
+
+def encode_call_record(
+    transcript: Sequence[Dict[str, Any]],
+    function_calls: Sequence[Dict[str, Any]] = (),
+    *,
+    compress: bool = True,
+) -> bytes:
+    """Pack a call's in-memory transcript and tool calls into one blob."""
+    transcript_stamps = [_epoch_ms(entry.get("timestamp")) for entry in transcript]
+    call_stamps = [_epoch_ms(call.get("timestamp")) for call in function_calls]
+    known = [stamp for stamp in transcript_stamps + call_stamps if stamp is not None]
+    base_ms = min(known) if known else 0
+
+    body = _encode_section(
+        [entry.get("speaker") or "" for entry in transcript],
+        transcript_stamps,
+        [(entry.get("text") or "").encode("utf-8") for entry in transcript],
+        base_ms,
+    ) + _encode_section(
+        [call.get("function") or "" for call in function_calls],
+        call_stamps,
+        [
+            json_codec.dumps_bytes(
+                {key: value for key, value in call.items() if key not in ("function", "timestamp")}
+            )
+            for call in function_calls
+        ],
+        base_ms,
+    )
+    flags = 0
+    if compress:
+        body = zlib.compress(body, 6)
+        flags |= FLAG_ZLIB
+    return _HEADER.pack(MAGIC, VERSION, flags, base_ms) + body
+
+
+class CompactSection:
+    """Read-only sequence over one section, decoding entries on access."""
+
+    def __init__(self, body: memoryview, position: int, base_ms: int, label_key: str) -> None:
+        count, label_count = struct.unpack_from("<IB", body, position)
+        position += 5
+        self._labels: List[str] = []
+        for _ in range(label_count):
+            size = body[position]
+            self._labels.append(bytes(body[position + 1 : position + 1 + size]).decode("utf-8"))
+            position += 1 + size
+        self._codes = np.frombuffer(body, dtype=np.uint8, count=count, offset=position)
+        position += count
+        self._offsets = np.frombuffer(body, dtype="<u4", count=count, offset=position)
+        position += 4 * count
+        self._ends = np.frombuffer(body, dtype="<u4", count=count, offset=position)
+        position += 4 * count
+        payload_size = int(self._ends[-1]) if count else 0
+        self._payloads = body[position : position + payload_size]
+        self.end = position + payload_size
+        self._base_ms = base_ms
+        self._label_key = label_key
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (self._entry(index) for index in range(len(self)))
+
+    def __getitem__(self, index: Union[int, slice]) -> Any:
+        if isinstance(index, slice):
+            return [self._entry(position) for position in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("call record index out of range")
+        return self._entry(index)
+
+    def labels(self) -> List[str]:
+        """Each entry's label (speaker or tool name) without decoding payloads."""
+        return [self._labels[code] for code in self._codes.tolist()]
+
+    def _payload(self, index: int) -> memoryview:
+        start = int(self._ends[index - 1]) if index else 0
+        return self._payloads[start : int(self._ends[index])]
+
+    def _timestamp(self, index: int) -> Optional[str]:
+        offset = int(self._offsets[index])
+        if offset == _NO_TIMESTAMP:
+            return None
+        return (_EPOCH + timedelta(milliseconds=self._base_ms + offset)).isoformat()
+
+    def _entry(self, index: int) -> Dict[str, Any]:
+        entry = {self._label_key: self._labels[self._codes[index]]}
+        if self._label_key == "speaker":
+            entry["text"] = str(self._payload(index), "utf-8")
+        else:
+            entry.update(json_codec.loads(self._payload(index)))
+        timestamp = self._timestamp(index)
+        if timestamp is not None:
+            entry["timestamp"] = timestamp
+        return entry
+
+
+class CompactCallRecord:
+    """Lazy accessor for a blob from ``encode_call_record``."""
+
+    def __init__(self, blob: bytes) -> None:
+        if len(blob) < _HEADER.size:
+            raise CallRecordError("call record is truncated")
+        magic, version, flags, base_ms = _HEADER.unpack_from(blob)
+        if magic != MAGIC or version != VERSION:
+            raise CallRecordError(f"unsupported call record {magic!r} v{version}")
+        body = memoryview(blob)[_HEADER.size :]
+        if flags & FLAG_ZLIB:
+            body = memoryview(zlib.decompress(body))
+        self.transcript = CompactSection(body, 0, base_ms, "speaker")
+        self.function_calls = CompactSection(body, self.transcript.end, base_ms, "function")
@@ -32,16 +32,143 @@ class Settings(BaseSettings):
     OPENAI_MODEL: str = "gpt-realtime-mini-2025-10-06"
     OPENAI_SENTIMENT_MODEL: str = "gpt-4.1-mini"
     OPENAI_MESSAGING_MODEL: str = "gpt-4.1-mini"
+    # Realtime websocket URL override, e.g. the local stand-in used by the
+    # voice load test (tests/load/realtime_standin.py)
+    OPENAI_REALTIME_URL: Optional[str] = None
 
     # Google Calendar
     GOOGLE_CALENDAR_ID: str
     GOOGLE_CREDENTIALS_FILE: str = "credentials.json"
     GOOGLE_TOKEN_FILE: str = "token.json"
+    # "google", or "mock" for an in-memory calendar (load tests, local runs)
+    CALENDAR_BACKEND: str = "google"
+    CALENDAR_MOCK_LATENCY_SECONDS: float = 0.0
 
     # Twilio
     TWILIO_ACCOUNT_SID: str = ""
     TWILIO_AUTH_TOKEN: str = ""
     TWILIO_PHONE_NUMBER: str = ""
+    # Inbound texts arriving within this window are answered with one AI turn
+    SMS_COALESCE_WINDOW_SECONDS: float = 1.5
+    # "auto" sends through Twilio when credentials are set, otherwise mocks
+    SMS_SENDER_BACKEND: str = "auto"
+    SMS_MOCK_LATENCY_SECONDS: float = 0.0
+    # Public base URL Twilio calls (for signature checks behind proxies)
+    TWILIO_WEBHOOK_BASE_URL: str = ""
+    # Local development only: accept Twilio webhooks without a valid signature
+    TWILIO_SKIP_SIGNATURE_CHECK: bool = False
+
+    # SendGrid (email)
+    SENDGRID_API_KEY: str = ""
+    # "auto" sends through SendGrid when an API key is set, otherwise mocks
+    EMAIL_SENDER_BACKEND: str = "auto"
+    # Inbound email attachments are stored here and referenced by path from
+    # EmailDetails. Set a persistent directory in production: the default
+    # (a folder in the OS temp dir) may be cleaned, leaving dangling paths.
+    EMAIL_ATTACHMENT_DIR: str = ""
+    EMAIL_INBOUND_MAX_FIELD_BYTES: int = 2_000_000
+    # Larger inbound attachments are rejected with 413 (SendGrid caps mail at 30 MB)
+    EMAIL_INBOUND_MAX_ATTACHMENT_BYTES: int = 20_000_000
+    EMAIL_INBOUND_MAX_TOTAL_ATTACHMENT_BYTES: int = 30_000_000
+
+    # Inbound webhook queue workers
+    INBOUND_QUEUE_WORKERS: int = 8
+    INBOUND_QUEUE_MAX_ATTEMPTS: int = 5
+    INBOUND_QUEUE_POLL_SECONDS: float = 1.0
+
+    # Conversation turn executor (per-conversation serialization + backpressure)
+    TURN_EXECUTOR_MAX_WORKERS: int = 16
+    TURN_QUEUE_MAX_PER_CONVERSATION: int = 8
+    TURN_QUEUE_MAX_PENDING: int = 256
+    MAX_CONCURRENT_LLM_CALLS: int = 8
+
+    # Voice session DB writes (ordered per call, off the event loop)
+    VOICE_DB_EXECUTOR_WORKERS: int = 8
+    VOICE_DB_QUEUE_PER_SESSION: int = 512
+    VOICE_DB_QUEUE_MAX_PENDING: int = 4096
+
+    # Pre-warmed OpenAI Realtime sessions (0 disables the pool). Sessions are
+    # recycled well before the Realtime API's session lifetime limit.
+    REALTIME_POOL_SIZE: int = 0
+    REALTIME_POOL_MAX_AGE_SECONDS: int = 20 * 60
+
+    # Live voice session registry shared across workers: "database" or
+    # "memory" (single worker). Sessions without a heartbeat for the stale
+    # window are treated as dead.
+    SESSION_REGISTRY_BACKEND: str = "database"
+    SESSION_REGISTRY_POLL_SECONDS: float = 1.0
+    SESSION_REGISTRY_HEARTBEAT_SECONDS: float = 5.0
+    SESSION_REGISTRY_STALE_SECONDS: float = 30.0
+
+    # JSON codec for the voice path and API responses: "auto" (orjson when
+    # installed), "orjson" or "json"
+    JSON_CODEC: str = "auto"
+
+    # Telephony (G.711 @ 8 kHz) voice clients: transcode to PCM16 @ 24 kHz on
+    # the server, or hand G.711 straight to the Realtime API when disabled
+    VOICE_TELEPHONY_SERVER_TRANSCODE: bool = True
+
+    # Server-side VAD gate: drop silent inbound audio before it reaches the
+    # Realtime API. Hangover is silence_duration_ms plus this margin.
+    VOICE_VAD_GATE_ENABLED: bool = False
+    VOICE_VAD_GATE_THRESHOLD_DBFS: float = -50.0
+    VOICE_VAD_GATE_HANGOVER_MARGIN_MS: int = 300
+
+    # Coalesce small inbound audio chunks into 40-100ms appends; buffered
+    # audio is never held longer than the max latency
+    VOICE_AUDIO_COALESCE_ENABLED: bool = True
+    VOICE_AUDIO_COALESCE_MIN_MS: int = 40
+    VOICE_AUDIO_COALESCE_MAX_MS: int = 100
+    VOICE_AUDIO_COALESCE_MAX_LATENCY_MS: int = 60
+
+    # Cut the assistant off when the caller speaks over its playback for
+    # VOICE_BARGE_IN_MIN_SPEECH_MS above the threshold, without waiting for
+    # the client or the Realtime server VAD to notice
+    VOICE_BARGE_IN_ENABLED: bool = True
+    VOICE_BARGE_IN_THRESHOLD_DBFS: float = -35.0
+    VOICE_BARGE_IN_MIN_SPEECH_MS: int = 160
+
+    # Keep a call (and its OpenAI socket) open this long after the client's
+    # websocket drops, so a reconnect with the same session_id resumes it
+    # instead of starting over. 0 ends calls on disconnect.
+    VOICE_RESUME_GRACE_SECONDS: float = 15.0
+
+    # Release assistant audio to the client at playback rate plus a small
+    # lead, so queued audio can be dropped on an interruption. Each call
+    # paces up to VOICE_OUTBOUND_BUFFER_SECONDS; longer replies send the
+    # excess ahead unpaced rather than losing it.
+    VOICE_OUTBOUND_PACING_ENABLED: bool = True
+    VOICE_OUTBOUND_BUFFER_SECONDS: float = 10.0
+    VOICE_OUTBOUND_LEAD_MS: int = 200
+    VOICE_OUTBOUND_FRAME_MS: int = 40
+
+    # Start check_availability calendar fetches as soon as the caller names a
+    # service and a day; unused results expire after the TTL
+    VOICE_AVAILABILITY_PREFETCH_ENABLED: bool = True
+    VOICE_AVAILABILITY_PREFETCH_TTL_SECONDS: int = 90
+    VOICE_AVAILABILITY_PREFETCH_WORKERS: int = 4
+
+    # Per-call stereo recording (caller left, assistant right) as "wav" or
+    # "wav_ulaw" (mu-law, half the size). Each call buffers at most
+    # VOICE_RECORDING_BUFFER_SECONDS per direction; a writer thread flushes to
+    # VOICE_RECORDING_DIR. recording_url is BASE_URL/<file> when set, else the path.
+    VOICE_RECORDING_ENABLED: bool = False
+    VOICE_RECORDING_DIR: str = "recordings"
+    VOICE_RECORDING_FORMAT: str = "wav"
+    VOICE_RECORDING_BUFFER_SECONDS: int = 20
+    VOICE_RECORDING_BASE_URL: Optional[str] = None
+
+    # Capture each call's Realtime event stream (both directions) to
+    # VOICE_EVENT_CAPTURE_DIR/<session_id>.jsonl.gz for offline replay
+    VOICE_EVENT_CAPTURE_ENABLED: bool = False
+    VOICE_EVENT_CAPTURE_DIR: str = "captures"
+
+    # Transcript entries are written to voice_transcript_entries during the
+    # call, one commit per batch of this size or after this many seconds
+    VOICE_TRANSCRIPT_BATCH_SIZE: int = 10
+    VOICE_TRANSCRIPT_FLUSH_SECONDS: float = 2.0
+    # zlib the packed call record stored on voice_call_details at the end
+    VOICE_CALL_RECORD_COMPRESS: bool = True
 
     # Med Spa Information
     MED_SPA_NAME: str = "Luxury Med Spa"
@@ -17,10 +17,12 @@ from sqlalchemy import (
     Float,
     ForeignKey,
     Integer,
+    LargeBinary,
     Numeric,
     String,
     Text,
     Time,
+    UniqueConstraint,
     create_engine,
     inspect,
     text,
@@ -28,8 +30,8 @@ from sqlalchemy import (
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.types import CHAR, TypeDecorator
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import Session, relationship, sessionmaker
-from sqlalchemy.ext.mutable import MutableDict
+from sqlalchemy.orm import Session, deferred, relationship, sessionmaker
+from sqlalchemy.ext.mutable import MutableDict, MutableList
 
 try:  # Prefer package-style import when available
     from backend.config import get_settings
@@ -137,6 +139,23 @@ class JSONBType(TypeDecorator):
 MutableDict.associate_with(JSONBType)
 
 
+class JSONBListType(TypeDecorator):
+    """JSONB column holding a JSON array (e.g. transcript segments).
+
+    ``JSONBType`` columns are tracked as ``MutableDict`` and reject lists, so
+    array-valued columns use this type, wrapped in ``MutableList``. It does not
+    subclass ``JSONBType`` so the ``MutableDict`` association skips it.
+    """
+
+    impl = JSON
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB)
+        return dialect.type_descriptor(JSON)
+
+
 # Dependency for FastAPI
 def get_db():
     """Get database session."""
@@ -718,17 +737,25 @@ class VoiceCallDetails(Base):
     duration_seconds = Column(Integer, nullable=False)
 
     # Structured transcript with timestamps
-    transcript_segments = Column(JSONBType(), nullable=True)
+    transcript_segments = Column(MutableList.as_mutable(JSONBListType()), nullable=True)
     # Example: [{"speaker": "customer", "text": "Hello", "timestamp": 1.2}, ...]
 
     # Function calls made during call
-    function_calls = Column(JSONBType(), nullable=True)
+    function_calls = Column(MutableList.as_mutable(JSONBListType()), nullable=True)
     # Example: [{"name": "book_appointment", "args": {...}, "result": {...}}]
 
+    # Transcript and function calls packed by compact_transcript; calls that
+    # have it leave the two JSON lists above empty. Loaded only when read.
+    call_record = deferred(Column(LargeBinary, nullable=True))
+
     # Audio quality metrics
     audio_quality_score = Column(Float, nullable=True)
     interruption_count = Column(Integer, default=0)
 
+    # Per-call latency percentiles: turn, greeting and tool timings
+    latency_summary = Column(JSONBType(), nullable=True)
+    # Example: {"turn_latency_ms": {"count": 4, "p50_ms": 820.0, "p95_ms": 1400.0, "max_ms": 1400.0}}
+
     # Relationship
     message = relationship("CommunicationMessage", back_populates="voice_details")
 
@@ -845,6 +872,157 @@ class CommunicationEvent(Base):
     # appointment_action, appointment_booked, appointment_rescheduled, appointment_cancelled
 
 
+class InboundMessageJob(Base):
+    """
+    Durable local queue of inbound provider messages (SMS, email).
+
+    Webhooks insert a row and acknowledge immediately; worker tasks claim rows
+    and run the assistant turn. The unique (channel, provider_message_id)
+    constraint deduplicates provider retries such as repeated Twilio
+    MessageSids.
+    """
+
+    __tablename__ = "inbound_message_queue"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    channel = Column(String(20), nullable=False, index=True)
+    provider_message_id = Column(String(255), nullable=False)
+
+    payload = Column(JSONBType(), nullable=False, default={})
+
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
+
+    # Conversation the message was routed to (set once processed)
+    conversation_id = Column(GUID(), nullable=True, index=True)
+    # CommunicationMessage recorded for this job; retries reuse it
+    inbound_message_id = Column(GUID(), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "channel",
+            "provider_message_id",
+            name="uq_inbound_message_queue_provider_message",
+        ),
+        CheckConstraint(
+            "status IN ('queued', 'processing', 'done', 'failed')",
+            name="check_inbound_queue_status",
+        ),
+    )
+
+
+class EmailMessageIndex(Base):
+    """
+    Message-ID header → conversation lookup for email threading.
+
+    Every inbound and outbound email is indexed by its Message-ID so a reply's
+    In-Reply-To/References headers resolve to a conversation with one primary
+    key lookup instead of scanning the customer's email history.
+    """
+
+    __tablename__ = "email_message_index"
+
+    message_id_header = Column(String(500), primary_key=True)
+    conversation_id = Column(
+        GUID(),
+        ForeignKey("conversations.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    communication_message_id = Column(
+        GUID(),
+        ForeignKey("communication_messages.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class VoiceSessionRecord(Base):
+    """
+    Shared registry of live voice sessions across workers and nodes.
+
+    Each worker heartbeats the sessions it owns; rows whose heartbeat is older
+    than the stale window belong to a worker that died and are reaped.
+    """
+
+    __tablename__ = "voice_sessions"
+
+    session_id = Column(String(255), primary_key=True)
+    worker_id = Column(String(255), nullable=False, index=True)
+    conversation_id = Column(GUID(), nullable=True, index=True)
+    status = Column(String(20), nullable=False, default="active", index=True)
+    details = Column(JSONBType(), nullable=True, default={})
+
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    ended_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('active', 'ended')",
+            name="check_voice_session_status",
+        ),
+    )
+
+
+class VoiceSessionCommand(Base):
+    """
+    Cross-worker command channel for live voice sessions (e.g. hangup).
+
+    Any worker inserts a command; the worker that owns the session claims it
+    on its next poll and runs it against the local websocket.
+    """
+
+    __tablename__ = "voice_session_commands"
+
+    id = Column(GUID(), primary_key=True, default=uuid.uuid4)
+    session_id = Column(String(255), nullable=False, index=True)
+    command = Column(String(50), nullable=False)
+    payload = Column(JSONBType(), nullable=False, default={})
+    status = Column(String(20), nullable=False, default="pending", index=True)
+
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    delivered_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('pending', 'delivered', 'expired')",
+            name="check_voice_session_command_status",
+        ),
+    )
+
+
+class VoiceTranscriptEntry(Base):
+    """
+    One utterance of a voice call's transcript, in call order.
+
+    Written in small batches while the call runs (see voice_transcript), so a
+    crashed worker loses at most the last unflushed batch.
+    """
+
+    __tablename__ = "voice_transcript_entries"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    conversation_id = Column(
+        GUID(), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False
+    )
+    sequence = Column(Integer, nullable=False)
+    speaker = Column(String(20), nullable=False)
+    text = Column(Text, nullable=False)
+    spoken_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        # Also the index for reading a call's transcript in order
+        UniqueConstraint("conversation_id", "sequence", name="uq_voice_transcript_sequence"),
+    )
+
+
 # ==================== Research & Outbound Campaign Models ====================
 
 
@@ -0,0 +1,426 @@
+"""
+SendGrid inbound parsing and outbound email delivery.
+
+SendGrid Inbound Parse posts multipart/form-data that can carry large
+attachments. ``parse_sendgrid_inbound`` feeds the request body to a streaming
+multipart parser chunk by chunk: text fields are buffered up to a size cap and
+attachments are written straight to files in ``EMAIL_ATTACHMENT_DIR``, so a
+20 MB PDF never sits in worker memory. Attachments are capped per file and per
+message as well, so a sender cannot fill the spool disk.
+
+``get_email_sender()`` returns a SendGrid sender backed by one pooled HTTP
+client, or a mock sender when no API key is configured.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from email.parser import HeaderParser
+from email.utils import make_msgid
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_MESSAGE_ID_PATTERN = re.compile(r"<[^<>\s]+>")
+
+# SendGrid form fields kept in the queued job payload
+_PAYLOAD_FIELDS = ("from", "to", "cc", "subject", "text", "html", "envelope")
+
+
+class InboundEmailError(ValueError):
+    """Raised when an inbound email payload cannot be parsed."""
+
+
+class InboundEmailTooLarge(InboundEmailError):
+    """Raised when a text field or attachment exceeds its configured size cap."""
+
+
+def extract_message_ids(value: Optional[str]) -> List[str]:
+    """Return the ``<id@host>`` tokens in a Message-ID style header value."""
+    if not value:
+        return []
+    return _MESSAGE_ID_PATTERN.findall(value)
+
+
+@dataclass
+class SpooledAttachment:
+    field_name: str
+    filename: str
+    content_type: str
+    path: str
+    size: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "filename": self.filename,
+            "content_type": self.content_type,
+            "size": self.size,
+            "path": self.path,
+        }
+
+
+@dataclass
+class InboundEmail:
+    fields: Dict[str, str]
+    attachments: List[SpooledAttachment] = field(default_factory=list)
+
+    @property
+    def headers(self):
+        return HeaderParser().parsestr(self.fields.get("headers", ""))
+
+    def to_payload(self) -> Dict[str, Any]:
+        """JSON-safe payload for the inbound queue, including threading headers."""
+        headers = self.headers
+        message_ids = extract_message_ids(headers.get("Message-ID"))
+        in_reply_to = extract_message_ids(headers.get("In-Reply-To"))
+        payload: Dict[str, Any] = {
+            name: self.fields[name] for name in _PAYLOAD_FIELDS if name in self.fields
+        }
+        payload["message_id"] = message_ids[0] if message_ids else None
+        payload["in_reply_to"] = in_reply_to[0] if in_reply_to else None
+        payload["references"] = extract_message_ids(headers.get("References"))
+        payload["attachments"] = [att.to_dict() for att in self.attachments]
+        return payload
+
+    def dedupe_key(self) -> str:
+        """Message-ID if present, otherwise a digest of the raw headers and body."""
+        message_ids = extract_message_ids(self.headers.get("Message-ID"))
+        if message_ids:
+            return message_ids[0][:255]
+        digest = hashlib.sha256()
+        for name in ("headers", "from", "subject", "text"):
+            digest.update(self.fields.get(name, "").encode("utf-8", "replace"))
+        return f"sha256:{digest.hexdigest()}"
+
+    def discard(self) -> None:
+        for attachment in self.attachments:
+            try:
+                os.remove(attachment.path)
+            except OSError:
+                pass
+
+
+class SendGridInboundParser:
+    """Incremental multipart/form-data parser for SendGrid Inbound Parse."""
+
+    def __init__(
+        self,
+        boundary: bytes,
+        spool_dir: str,
+        max_field_bytes: int,
+        max_attachment_bytes: Optional[int] = None,
+        max_total_attachment_bytes: Optional[int] = None,
+    ):
+        self.spool_dir = spool_dir
+        self.max_field_bytes = max_field_bytes
+        self.max_attachment_bytes = max_attachment_bytes
+        self.max_total_attachment_bytes = max_total_attachment_bytes
+        self._attachment_bytes = 0
+        self._raw_fields: Dict[str, bytearray] = {}
+        self._attachments: List[SpooledAttachment] = []
+
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._part_headers: Dict[str, bytes] = {}
+        self._field_name: Optional[str] = None
+        self._field_buffer: Optional[bytearray] = None
+        self._file = None
+        self._attachment: Optional[SpooledAttachment] = None
+
+        self._parser = MultipartParser(
+            boundary,
+            {
+                "on_part_begin": self._on_part_begin,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+            },
+        )
+
+    @classmethod
+    def for_content_type(
+        cls,
+        content_type: Optional[str],
+        spool_dir: str,
+        max_field_bytes: int,
+        max_attachment_bytes: Optional[int] = None,
+        max_total_attachment_bytes: Optional[int] = None,
+    ) -> "SendGridInboundParser":
+        mime_type, params = parse_options_header(content_type or "")
+        boundary = params.get(b"boundary")
+        if mime_type != b"multipart/form-data" or not boundary:
+            raise InboundEmailError("Expected multipart/form-data with a boundary")
+        return cls(
+            boundary,
+            spool_dir,
+            max_field_bytes,
+            max_attachment_bytes,
+            max_total_attachment_bytes,
+        )
+
+    def feed(self, chunk: bytes) -> None:
+        self._parser.write(chunk)
+
+    def close(self) -> InboundEmail:
+        self._parser.finalize()
+        return InboundEmail(fields=self._decode_fields(), attachments=self._attachments)
+
+    def discard(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        InboundEmail(fields={}, attachments=self._attachments).discard()
+
+    # -- multipart callbacks ------------------------------------------------
+
+    def _on_part_begin(self) -> None:
+        self._part_headers = {}
+        self._field_name = None
+        self._field_buffer = None
+        self._attachment = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._part_headers[bytes(self._header_field).lower().decode("latin-1")] = bytes(
+            self._header_value
+        )
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(
+            self._part_headers.get("content-disposition", b"")
+        )
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        filename = options.get(b"filename")
+
+        if filename is None:
+            self._field_name = name
+            self._field_buffer = bytearray()
+            return
+
+        safe_name = os.path.basename(filename.decode("utf-8", "replace")) or name
+        _, suffix = os.path.splitext(safe_name)
+        self._file = tempfile.NamedTemporaryFile(
+            dir=self.spool_dir, prefix="inbound-", suffix=suffix[:16], delete=False
+        )
+        self._attachment = SpooledAttachment(
+            field_name=name,
+            filename=safe_name,
+            content_type=self._part_headers.get(
+                "content-type", b"application/octet-stream"
+            ).decode("latin-1"),
+            path=self._file.name,
+        )
+        self._attachments.append(self._attachment)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._file is not None:
+            size = end - start
+            if (
+                self.max_attachment_bytes is not None
+                and self._attachment.size + size > self.max_attachment_bytes
+            ):
+                raise InboundEmailTooLarge(
+                    f"Attachment {self._attachment.filename!r} exceeds "
+                    f"{self.max_attachment_bytes} bytes"
+                )
+            if (
+                self.max_total_attachment_bytes is not None
+                and self._attachment_bytes + size > self.max_total_attachment_bytes
+            ):
+                raise InboundEmailTooLarge(
+                    f"Attachments exceed {self.max_total_attachment_bytes} bytes in total"
+                )
+            self._file.write(memoryview(data)[start:end])
+            self._attachment.size += size
+            self._attachment_bytes += size
+            return
+
+        if self._field_buffer is None:
+            return
+        if len(self._field_buffer) + (end - start) > self.max_field_bytes:
+            raise InboundEmailTooLarge(
+                f"Field {self._field_name!r} exceeds {self.max_field_bytes} bytes"
+            )
+        self._field_buffer += data[start:end]
+
+    def _on_part_end(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        elif self._field_name is not None:
+            self._raw_fields[self._field_name] = self._field_buffer
+
+    def _decode_fields(self) -> Dict[str, str]:
+        charsets: Dict[str, str] = {}
+        raw_charsets = self._raw_fields.get("charsets")
+        if raw_charsets:
+            try:
+                charsets = json.loads(bytes(raw_charsets).decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                charsets = {}
+
+        fields: Dict[str, str] = {}
+        for name, raw in self._raw_fields.items():
+            charset = charsets.get(name) or "utf-8"
+            try:
+                fields[name] = bytes(raw).decode(charset, "replace")
+            except LookupError:
+                fields[name] = bytes(raw).decode("utf-8", "replace")
+        return fields
+
+
+_warned_temporary_spool = False
+
+
+def attachment_spool_dir() -> str:
+    """Directory inbound attachments are stored in (``EMAIL_ATTACHMENT_DIR``).
+
+    Without the setting, attachments go to the OS temp dir, which is not
+    persistent: stored paths can dangle once the OS cleans it.
+    """
+    global _warned_temporary_spool
+    spool_dir = get_settings().EMAIL_ATTACHMENT_DIR
+    if not spool_dir:
+        spool_dir = os.path.join(tempfile.gettempdir(), "inbound-email-attachments")
+        if not _warned_temporary_spool:
+            _warned_temporary_spool = True
+            logger.warning(
+                "EMAIL_ATTACHMENT_DIR is not set; storing inbound email "
+                "attachments in temporary directory %s",
+                spool_dir,
+            )
+    os.makedirs(spool_dir, exist_ok=True)
+    return spool_dir
+
+
+async def parse_sendgrid_inbound(
+    content_type: Optional[str], stream: AsyncIterator[bytes]
+) -> InboundEmail:
+    """Parse a SendGrid Inbound Parse request body without buffering it whole."""
+    settings = get_settings()
+    parser = SendGridInboundParser.for_content_type(
+        content_type,
+        spool_dir=attachment_spool_dir(),
+        max_field_bytes=settings.EMAIL_INBOUND_MAX_FIELD_BYTES,
+        max_attachment_bytes=settings.EMAIL_INBOUND_MAX_ATTACHMENT_BYTES,
+        max_total_attachment_bytes=settings.EMAIL_INBOUND_MAX_TOTAL_ATTACHMENT_BYTES,
+    )
+    try:
+        async for chunk in stream:
+            parser.feed(chunk)
+        return parser.close()
+    except Exception:
+        parser.discard()
+        raise
+
+
+class SendGridEmailSender:
+    """Send email through the SendGrid v3 Mail Send API on a pooled client."""
+
+    API_URL = "https://api.sendgrid.com/v3/mail/send"
+
+    def __init__(self, api_key: str, from_address: str, *, timeout: float = 10.0):
+        import httpx
+
+        self.from_address = from_address
+        self._client = httpx.Client(
+            timeout=timeout,
+            headers={"Authorization": f"Bearer {api_key}"},
+            transport=httpx.HTTPTransport(retries=3),
+        )
+
+    def send(
+        self,
+        *,
+        to_address: str,
+        subject: str,
+        body_text: str,
+        message_id: str,
+        in_reply_to: Optional[str] = None,
+        references: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        headers = {"Message-ID": message_id}
+        if in_reply_to:
+            headers["In-Reply-To"] = in_reply_to
+        if references:
+            headers["References"] = " ".join(references)
+
+        response = self._client.post(
+            self.API_URL,
+            json={
+                "personalizations": [{"to": [{"email": to_address}]}],
+                "from": {"email": self.from_address},
+                "subject": subject,
+                "content": [{"type": "text/plain", "value": body_text}],
+                "headers": headers,
+            },
+        )
+        response.raise_for_status()
+        return {
+            "provider_message_id": response.headers.get("X-Message-Id"),
+            "delivery_status": "sent",
+        }
+
+
+class MockEmailSender:
+    """In-memory stand-in for SendGrid."""
+
+    def __init__(self, from_address: str):
+        self.from_address = from_address
+        self._lock = threading.Lock()
+        self.sent: List[Dict[str, Any]] = []
+
+    def send(self, **message: Any) -> Dict[str, Any]:
+        with self._lock:
+            self.sent.append(message)
+        return {"provider_message_id": None, "delivery_status": "sent"}
+
+
+def new_message_id() -> str:
+    """Message-ID for an outbound email, on the med spa's mail domain."""
+    domain = get_settings().MED_SPA_EMAIL.rpartition("@")[2] or None
+    return make_msgid(domain=domain)
+
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def get_email_sender():
+    """Return the configured process-wide email sender."""
+    global _sender
+    if _sender is not None:
+        return _sender
+
+    with _sender_lock:
+        if _sender is None:
+            settings = get_settings()
+            backend = settings.EMAIL_SENDER_BACKEND
+            if backend == "sendgrid" or (backend == "auto" and settings.SENDGRID_API_KEY):
+                _sender = SendGridEmailSender(
+                    settings.SENDGRID_API_KEY, settings.MED_SPA_EMAIL
+                )
+            else:
+                if backend == "auto":
+                    logger.info("SendGrid API key missing; using mock email sender")
+                _sender = MockEmailSender(settings.MED_SPA_EMAIL)
+    return _sender
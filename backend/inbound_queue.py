@@ -0,0 +1,341 @@
+"""
+Durable inbound message queue and the worker pool that drains it.
+
+Provider webhooks (Twilio SMS, SendGrid inbound email) must answer within a
+few seconds, while an assistant turn can take much longer. Webhooks therefore
+only verify and enqueue; ``InboundWorkerPool`` tasks claim queued jobs and run
+the channel processor off the request path.
+
+The queue lives in the ``inbound_message_queue`` table so accepted messages
+survive restarts. Jobs left in ``processing`` by a crashed worker are
+re-queued once their lock goes stale.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import InboundMessageJob, SessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Processor signature: (db, job) -> conversation_id (or None)
+InboundProcessor = Callable[[Session, InboundMessageJob], Any]
+
+
+class InboundQueue:
+    """Static helpers for the inbound_message_queue table."""
+
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_SECONDS = 5
+    STALE_LOCK_SECONDS = 300
+
+    @staticmethod
+    def enqueue(
+        db: Session,
+        *,
+        channel: str,
+        provider_message_id: str,
+        payload: Dict[str, Any],
+    ) -> Tuple[InboundMessageJob, bool]:
+        """
+        Insert a job unless this provider message was already accepted.
+
+        Returns:
+            Tuple of (job, created). ``created`` is False for duplicates.
+        """
+        job = InboundMessageJob(
+            channel=channel,
+            provider_message_id=provider_message_id,
+            payload=payload,
+            status="queued",
+            attempts=0,
+            available_at=datetime.utcnow(),
+        )
+        db.add(job)
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            existing = (
+                db.query(InboundMessageJob)
+                .filter(
+                    InboundMessageJob.channel == channel,
+                    InboundMessageJob.provider_message_id == provider_message_id,
+                )
+                .first()
+            )
+            if existing is None:
+                raise
+            return existing, False
+        return job, True
+
+    @staticmethod
+    def claim_next(
+        db: Session, channel: Optional[str] = None
+    ) -> Optional[InboundMessageJob]:
+        """Lock the oldest available job and mark it as processing.
+
+        SKIP LOCKED keeps Postgres workers off each other's rows; the guarded
+        UPDATE makes the claim atomic on backends that ignore row locks
+        (SQLite), where a losing worker simply tries the next job.
+        """
+        for _ in range(5):
+            now = datetime.utcnow()
+            query = db.query(InboundMessageJob.id).filter(
+                InboundMessageJob.status == "queued",
+                InboundMessageJob.available_at <= now,
+            )
+            if channel:
+                query = query.filter(InboundMessageJob.channel == channel)
+
+            row = (
+                query.order_by(
+                    InboundMessageJob.available_at, InboundMessageJob.created_at
+                )
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if row is None:
+                db.rollback()
+                return None
+
+            claimed = (
+                db.query(InboundMessageJob)
+                .filter(
+                    InboundMessageJob.id == row.id,
+                    InboundMessageJob.status == "queued",
+                )
+                .update(
+                    {
+                        "status": "processing",
+                        "attempts": InboundMessageJob.attempts + 1,
+                        "locked_at": now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if claimed:
+                return db.get(InboundMessageJob, row.id, populate_existing=True)
+        return None
+
+    @staticmethod
+    def mark_done(
+        db: Session, job: InboundMessageJob, conversation_id: Any = None
+    ) -> None:
+        job.status = "done"
+        job.locked_at = None
+        job.last_error = None
+        if conversation_id is not None:
+            job.conversation_id = conversation_id
+        db.commit()
+
+    @staticmethod
+    def mark_failed(
+        db: Session,
+        job: InboundMessageJob,
+        error: str,
+        max_attempts: Optional[int] = None,
+    ) -> None:
+        """Schedule a retry with exponential backoff, or give up."""
+        job.last_error = error[:2000]
+        job.locked_at = None
+        if (job.attempts or 0) >= (max_attempts or InboundQueue.MAX_ATTEMPTS):
+            job.status = "failed"
+        else:
+            delay = InboundQueue.RETRY_BASE_SECONDS * (2 ** max(job.attempts - 1, 0))
+            job.status = "queued"
+            job.available_at = datetime.utcnow() + timedelta(seconds=delay)
+        db.commit()
+
+    @staticmethod
+    def requeue_stale(db: Session) -> int:
+        """Return jobs abandoned in ``processing`` to the queue."""
+        cutoff = datetime.utcnow() - timedelta(seconds=InboundQueue.STALE_LOCK_SECONDS)
+        count = (
+            db.query(InboundMessageJob)
+            .filter(
+                InboundMessageJob.status == "processing",
+                InboundMessageJob.locked_at < cutoff,
+            )
+            .update(
+                {"status": "queued", "locked_at": None},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        return count
+
+    @staticmethod
+    def depth(db: Session) -> Dict[str, int]:
+        """Job counts by status."""
+        rows = (
+            db.query(InboundMessageJob.status, func.count(InboundMessageJob.id))
+            .group_by(InboundMessageJob.status)
+            .all()
+        )
+        return {status: count for status, count in rows}
+
+
+class InboundWorkerPool:
+    """Asyncio tasks that claim queued jobs and run channel processors.
+
+    Processors are synchronous (they drive SQLAlchemy and the OpenAI client)
+    and run in worker threads, each with its own database session.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = 8,
+        poll_interval: float = 1.0,
+        max_attempts: int = InboundQueue.MAX_ATTEMPTS,
+        session_factory: Callable[[], Session] = SessionLocal,
+    ):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self._session_factory = session_factory
+        self._processors: Dict[str, InboundProcessor] = {}
+        self._tasks: list = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping = False
+        self._stats = {"processed": 0, "failed": 0, "retried": 0}
+
+    def register(self, channel: str, processor: InboundProcessor) -> None:
+        self._processors[channel] = processor
+
+    def notify(self) -> None:
+        """Wake idle workers after a new job was enqueued."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        try:
+            requeued = await asyncio.to_thread(self._with_session, InboundQueue.requeue_stale)
+            if requeued:
+                logger.info("Re-queued %d stale inbound jobs", requeued)
+        except Exception as exc:  # noqa: BLE001 - startup must not fail on recovery
+            logger.warning("Failed to re-queue stale inbound jobs: %s", exc)
+        self._tasks = [
+            asyncio.create_task(self._worker(index), name=f"inbound-worker-{index}")
+            for index in range(self.concurrency)
+        ]
+        logger.info("Started %d inbound message workers", self.concurrency)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self.notify()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):  # noqa: BLE001
+                pass
+        self._tasks = []
+
+    async def run_until_idle(self) -> int:
+        """Process jobs inline until none are available (tests, CLI drains)."""
+        processed = 0
+        while await asyncio.to_thread(self._process_next):
+            processed += 1
+        return processed
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot: Dict[str, Any] = dict(self._stats)
+        snapshot["workers"] = len(self._tasks)
+        return snapshot
+
+    async def _worker(self, index: int) -> None:
+        while not self._stopping:
+            try:
+                handled = await asyncio.to_thread(self._process_next)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - keep the worker alive
+                logger.error("Inbound worker %d crashed: %s", index, exc, exc_info=True)
+                handled = False
+
+            if handled:
+                continue
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _with_session(self, fn: Callable[[Session], Any]) -> Any:
+        db = self._session_factory()
+        try:
+            return fn(db)
+        finally:
+            db.close()
+
+    def _process_next(self) -> bool:
+        db = self._session_factory()
+        try:
+            job = InboundQueue.claim_next(db)
+            if job is None:
+                return False
+
+            processor = self._processors.get(job.channel)
+            if processor is None:
+                InboundQueue.mark_failed(
+                    db,
+                    job,
+                    f"No processor for channel {job.channel}",
+                    max_attempts=1,
+                )
+                self._stats["failed"] += 1
+                return True
+
+            try:
+                conversation_id = processor(db, job)
+            except Exception as exc:  # noqa: BLE001 - recorded on the job for retry
+                db.rollback()
+                logger.error(
+                    "Inbound %s job %s failed (attempt %d): %s",
+                    job.channel,
+                    job.id,
+                    job.attempts,
+                    exc,
+                    exc_info=True,
+                )
+                job = db.get(InboundMessageJob, job.id)
+                InboundQueue.mark_failed(
+                    db, job, repr(exc), max_attempts=self.max_attempts
+                )
+                if job.status == "failed":
+                    self._stats["failed"] += 1
+                else:
+                    self._stats["retried"] += 1
+                return True
+
+            InboundQueue.mark_done(db, job, conversation_id)
+            self._stats["processed"] += 1
+            return True
+        finally:
+            db.close()
+
+
+_settings = get_settings()
+
+# Global pool; channel processors are registered at application startup
+inbound_worker_pool = InboundWorkerPool(
+    concurrency=_settings.INBOUND_QUEUE_WORKERS,
+    poll_interval=_settings.INBOUND_QUEUE_POLL_SECONDS,
+    max_attempts=_settings.INBOUND_QUEUE_MAX_ATTEMPTS,
+)
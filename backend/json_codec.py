@@ -0,0 +1,76 @@
+"""
+Pluggable JSON codec for the voice path and API responses.
+
+Uses orjson when it is installed and the standard library otherwise. The
+voice websocket parses and serializes JSON for every Realtime event and
+client message, so this is the codec used there, and ``FastJSONResponse``
+is the app's default response class.
+
+``dumps`` always returns ``str`` so websocket payloads keep going out as
+text frames (orjson itself produces bytes). Set ``JSON_CODEC=json`` to
+force the standard library.
+"""
+
+import json
+import logging
+from typing import Any, Union
+
+from fastapi.responses import JSONResponse
+
+from config import get_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+
+def _select_backend(requested: str) -> str:
+    requested = (requested or "auto").strip().lower()
+    if requested == "json" or orjson is None:
+        if requested == "orjson":
+            logger.warning("JSON_CODEC=orjson but orjson is not installed; using json")
+        return "json"
+    return "orjson"
+
+
+BACKEND = _select_backend(get_settings().JSON_CODEC)
+
+if BACKEND == "orjson":
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS)
+
+    def dumps(obj: Any) -> str:
+        return orjson.dumps(obj, option=_ORJSON_OPTIONS).decode("utf-8")
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        return orjson.loads(data)
+
+else:
+
+    def dumps_bytes(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def loads(data: Union[str, bytes, bytearray, memoryview]) -> Any:
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+
+async def send_json(websocket: Any, payload: Any) -> None:
+    """Send ``payload`` as a websocket text frame using the configured codec."""
+    await websocket.send_text(dumps(payload))
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured codec."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps_bytes(content)
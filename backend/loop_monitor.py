@@ -0,0 +1,96 @@
+"""
+Event loop lag gauge.
+
+A background task sleeps for a fixed interval and measures how late it wakes
+up. Anything that blocks the loop (a synchronous SQLAlchemy commit, a
+calendar API call) shows up directly as lag, and the same loop relays
+realtime voice audio, so lag here is audio jitter for every live call.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class EventLoopLagMonitor:
+    """Sample event loop scheduling delay."""
+
+    def __init__(self, *, interval: float = 0.1, warn_ms: float = 100.0, window: int = 600):
+        self.interval = interval
+        self.warn_ms = warn_ms
+        # Recent samples for percentiles (600 x 100ms = the last minute)
+        self._recent: deque = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.samples = 0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.over_warn = 0
+        self._recent.clear()
+
+    def record(self, lag_ms: float) -> None:
+        lag_ms = max(lag_ms, 0.0)
+        self.samples += 1
+        self.last_ms = lag_ms
+        self.total_ms += lag_ms
+        self._recent.append(lag_ms)
+        if lag_ms > self.max_ms:
+            self.max_ms = lag_ms
+        if lag_ms >= self.warn_ms:
+            self.over_warn += 1
+            logger.warning("Event loop lag %.1fms", lag_ms)
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            elapsed = time.perf_counter() - started
+            self.record((elapsed - self.interval) * 1000)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(
+                self._run(), name="event-loop-lag-monitor"
+            )
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        recent = sorted(self._recent)
+
+        def _pct(fraction: float) -> float:
+            if not recent:
+                return 0.0
+            return round(recent[min(len(recent) - 1, int(fraction * len(recent)))], 3)
+
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "last_ms": round(self.last_ms, 3),
+            "max_ms": round(self.max_ms, 3),
+            "avg_ms": round(self.total_ms / self.samples, 3) if self.samples else 0.0,
+            "recent_p50_ms": _pct(0.5),
+            "recent_p95_ms": _pct(0.95),
+            "recent_p99_ms": _pct(0.99),
+            "over_warn": self.over_warn,
+            "warn_ms": self.warn_ms,
+        }
+
+
+# Global monitor, started with the application
+loop_lag_monitor = EventLoopLagMonitor()
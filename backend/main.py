@@ -3,6 +3,7 @@ Main FastAPI application for Med Spa Voice AI.
 """
 
 import asyncio
+import base64
 import logging
 import uuid
 from datetime import datetime, time, timedelta
@@ -27,6 +28,7 @@ from starlette.websockets import WebSocketState
 
 from ai_insights_service import AIInsightsService
 from analytics import AnalyticsService
+from audio_pacer import build_outbound_pacer
 from api_messaging import messaging_router
 from api_research import router as research_router
 from api_admin import router as admin_router
@@ -49,9 +51,35 @@ from database import (
     get_db,
     init_db,
 )
+from email_gateway import (
+    InboundEmailError,
+    InboundEmailTooLarge,
+    parse_sendgrid_inbound,
+)
+from inbound_queue import InboundQueue, inbound_worker_pool
+import json_codec
+from loop_monitor import loop_lag_monitor
+from messaging_pipeline import process_inbound_email, process_inbound_sms
+from post_call import POST_CALL_CHANNEL, persist_call_transcript, process_call_finalization
 from provider_analytics_service import ProviderAnalyticsService
-from realtime_client import RealtimeClient
+from realtime_client import RealtimeClient, build_default_session_config
+from realtime_pool import call_setup_metrics, realtime_session_pool
+from session_registry import session_registry
+from voice_resume import ResumeTokenError, is_dropped, session_parking
 from settings_service import SettingsService
+from sms_gateway import validate_twilio_signature
+from turn_executor import voice_db_executor
+from voice_frames import (
+    PROTOCOL_BINARY,
+    FrameError,
+    decode_frame,
+    encode_audio_frame,
+    negotiate_audio_format,
+    negotiate_protocol,
+)
+import voice_metrics
+from compact_transcript import CompactCallRecord
+from voice_transcript import call_transcript_page, load_call_transcript
 
 settings = get_settings()
 
@@ -77,6 +105,7 @@ app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="AI-powered voice receptionist for medical spas",
+    default_response_class=json_codec.FastJSONResponse,
 )
 
 
@@ -1182,10 +1211,6 @@ app.add_middleware(
     max_age=600,  # Cache preflight requests for 10 minutes
 )
 
-# Active WebSocket connections
-active_connections: Dict[str, WebSocket] = {}
-
-
 @app.on_event("startup")
 async def startup_event():
     """Initialize database on startup."""
@@ -1198,9 +1223,25 @@ async def startup_event():
         logger.warning(
             "Google Calendar credentials require attention: %s", credential_status
         )
+    inbound_worker_pool.register("sms", process_inbound_sms)
+    inbound_worker_pool.register("email", process_inbound_email)
+    inbound_worker_pool.register(POST_CALL_CHANNEL, process_call_finalization)
+    await inbound_worker_pool.start()
+    loop_lag_monitor.start()
+    realtime_session_pool.start(build_default_session_config)
+    await session_registry.start()
     logger.info("%s started successfully!", settings.APP_NAME)
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background workers."""
+    await loop_lag_monitor.stop()
+    await inbound_worker_pool.stop()
+    await realtime_session_pool.stop()
+    await session_registry.stop()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -1228,6 +1269,34 @@ async def health_ready(db: Session = Depends(get_db)):
         raise HTTPException(status_code=503, detail="Database unavailable") from exc
 
 
+@app.get("/health/loop")
+async def health_loop():
+    """Event loop lag and voice DB executor backlog."""
+    return {
+        "event_loop": loop_lag_monitor.stats(),
+        "voice_db_executor": voice_db_executor.stats(),
+    }
+
+
+@app.get("/health/realtime")
+async def health_realtime():
+    """Realtime session pool, time-to-greeting and resumed sessions."""
+    return {
+        "pool": realtime_session_pool.stats(),
+        "time_to_greeting": call_setup_metrics.summary(),
+        "resume": session_parking.stats(),
+    }
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Voice latency histograms in the Prometheus text exposition format."""
+    return Response(
+        content=voice_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Backward-compatible health endpoint (liveness)."""
@@ -1250,7 +1319,25 @@ async def voice_websocket(
         db: Database session
     """
     await websocket.accept()
-    active_connections[session_id] = websocket
+    # A reconnect for a call still live in this worker carries on with it
+    try:
+        released = session_parking.reattach(
+            session_id, websocket, websocket.query_params.get("resume_token")
+        )
+    except ResumeTokenError:
+        logger.warning("Rejected reconnect to live session %s: bad resume token", session_id)
+        await websocket.close(code=4403)
+        return
+    if released is not None:
+        logger.info("Websocket reattached to live session %s", session_id)
+        await released
+        return
+
+    audio_protocol = negotiate_protocol(websocket.query_params.get("audio_protocol"))
+    client_audio_format = negotiate_audio_format(websocket.query_params.get("audio_format"))
+    # G.711 is one byte per sample, PCM16 two
+    frame_sample_width = 1 if client_audio_format else 2
+    outbound_sequence = 0
 
     # Create a new omnichannel conversation (voice channel only).
     metadata: Dict[str, Any] = {"session_id": session_id}
@@ -1268,7 +1355,8 @@ async def voice_websocket(
             return
 
         try:
-            await websocket.send_json(
+            await json_codec.send_json(
+                websocket,
                 {
                     "type": "transcript",
                     "data": {"speaker": speaker, "text": text},
@@ -1282,16 +1370,91 @@ async def voice_websocket(
                 exc_info=True,
             )
 
+    async def send_client_audio(audio) -> None:
+        nonlocal outbound_sequence
+        if websocket.client_state != WebSocketState.CONNECTED:
+            return
+        if audio_protocol == PROTOCOL_BINARY:
+            await websocket.send_bytes(encode_audio_frame(audio, outbound_sequence))
+            outbound_sequence += 1
+        else:
+            await json_codec.send_json(
+                websocket, {"type": "audio", "data": base64.b64encode(audio).decode("ascii")}
+            )
+
+    # Releases assistant audio at playback rate so an interruption can take
+    # back what the client has not played yet (VOICE_OUTBOUND_PACING_*)
+    outbound_pacer = build_outbound_pacer(
+        enabled=settings.VOICE_OUTBOUND_PACING_ENABLED,
+        send=send_client_audio,
+        audio_format=client_audio_format,
+        buffer_seconds=settings.VOICE_OUTBOUND_BUFFER_SECONDS,
+        lead_ms=settings.VOICE_OUTBOUND_LEAD_MS,
+        frame_ms=settings.VOICE_OUTBOUND_FRAME_MS,
+    )
+
+    async def barge_in_callback() -> None:
+        """Tell the client to drop assistant audio it has not played yet."""
+        if outbound_pacer is not None:
+            outbound_pacer.clear()
+        if websocket.client_state == WebSocketState.CONNECTED:
+            await json_codec.send_json(websocket, {"type": "barge_in"})
+
+    async def speech_started_callback() -> None:
+        """The Realtime server VAD heard the caller; it cancels the reply itself."""
+        if outbound_pacer is not None and outbound_pacer.clear():
+            if websocket.client_state == WebSocketState.CONNECTED:
+                await json_codec.send_json(websocket, {"type": "barge_in"})
+
     realtime_client = RealtimeClient(
         session_id=session_id,
         db=db,
         conversation=conversation,
         transcript_callback=transcript_callback,
+        client_audio_format=client_audio_format,
+        barge_in_callback=barge_in_callback,
+        speech_started_callback=speech_started_callback,
     )
 
+    # Commands from any worker (admin hangup) arrive via the session registry
+    hangup_requested = asyncio.Event()
+
+    async def on_session_command(command: str, payload: Dict[str, Any]) -> None:
+        if command != "hangup":
+            logger.warning("Ignoring unknown command %s for session %s", command, session_id)
+            return
+        reason = payload.get("reason") or "hangup"
+        logger.info("Hangup requested for session %s (%s)", session_id, reason)
+        if websocket.client_state == WebSocketState.CONNECTED:
+            try:
+                await json_codec.send_json(
+                    websocket, {"type": "session_ended", "data": {"reason": reason}}
+                )
+                await websocket.close(code=1000)
+            except Exception as close_err:  # noqa: BLE001
+                logger.warning(
+                    "Error closing websocket on hangup for session %s: %s",
+                    session_id,
+                    close_err,
+                )
+        hangup_requested.set()
+
+    try:
+        await session_registry.register(
+            session_id,
+            on_command=on_session_command,
+            conversation_id=conversation.id,
+            details={"audio_protocol": audio_protocol, "audio_format": client_audio_format or "pcm16"},
+        )
+    except Exception as registry_err:  # noqa: BLE001 - never fail a call on bookkeeping
+        logger.warning("Failed to register session %s: %s", session_id, registry_err)
+
     session_finalized = False
     finalize_lock = asyncio.Lock()
     disconnect_performed = False
+    # Set when the client's socket drops rather than ending the call
+    client_dropped = False
+    resumable = None
 
     async def finalize_session(reason: str) -> None:
         nonlocal session_finalized, disconnect_performed
@@ -1303,10 +1466,35 @@ async def voice_websocket(
             session_finalized = True
             logger.info("Finalizing session %s (%s)", session_id, reason)
 
-            # Remove active connection reference if present
-            active_connections.pop(session_id, None)
+            try:
+                await session_registry.unregister(session_id)
+            except Exception as registry_err:  # noqa: BLE001
+                logger.warning(
+                    "Failed to unregister session %s: %s", session_id, registry_err
+                )
+
+            if outbound_pacer is not None:
+                await outbound_pacer.close()
+
+            # Transcript and tool writes run on the voice DB executor; let them
+            # land before finalization reuses the same session.
+            try:
+                await realtime_client.flush_db_writes()
+            except Exception as flush_exc:  # noqa: BLE001
+                logger.warning(
+                    "Failed to flush DB writes for session %s: %s", session_id, flush_exc
+                )
+
+            try:
+                await realtime_client.finish_recording()
+            except Exception as recording_exc:  # noqa: BLE001
+                logger.warning(
+                    "Failed to finish recording for session %s: %s", session_id, recording_exc
+                )
 
             session_data = realtime_client.get_session_data()
+            if outbound_pacer is not None:
+                session_data["outbound_pacer"] = outbound_pacer.stats()
             transcript_entries = session_data.get("transcript", [])
             logger.info(
                 "Transcript entries captured for session %s: %d",
@@ -1320,84 +1508,18 @@ async def voice_websocket(
                 logger.debug("Transcript preview for session %s: %s", session_id, preview)
 
             try:
-                # Extract customer data once for reuse
-                customer_data = session_data.get("customer_data", {})
-                customer = AnalyticsService.resolve_or_create_customer_for_call(
-                    db, customer_data
-                )
-                customer_id = customer.id if customer is not None else None
-
-                # Update conversation with customer ID if identified
-                if customer_id:
-                    conversation.customer_id = customer_id
-                    logger.info(
-                        "Linked conversation %s to customer %s",
-                        conversation.id,
-                        customer_id,
+                # Only the transcript is written here; customer linking, scoring
+                # and rollups run as a queued post-call job (see post_call)
+                await realtime_client.run_db(
+                    lambda: persist_call_transcript(
+                        db,
+                        conversation=conversation,
+                        session_id=session_id,
+                        session_data=session_data,
                     )
-                    db.commit()
-                else:
-                    logger.warning("No customer linked for session %s", session_id)
-
-                # Add message with human-readable summary (not raw JSON)
-                # The actual transcript goes in voice_details.transcript_segments
-                import json
-
-                summary_text = (
-                    f"Voice call - {len(transcript_entries)} transcript segments"
                 )
-                if transcript_entries:
-                    # Include first and last message for context
-                    first_msg = (
-                        transcript_entries[0].get("text", "")
-                        if transcript_entries
-                        else ""
-                    )
-                    summary_text = f"Voice call starting with: {first_msg[:100]}..."
-
-                message = AnalyticsService.add_message(
-                    db=db,
-                    conversation_id=conversation.id,
-                    direction="inbound",
-                    content=summary_text,  # Human-readable summary, not JSON dump
-                    sent_at=conversation.initiated_at,
-                    metadata={
-                        "customer_interruptions": customer_data.get("interruptions", 0),
-                        "ai_clarifications_needed": 0,
-                        "transcript_entry_count": len(transcript_entries),
-                    },
-                )
-
-                # Add voice call details
-                duration = (
-                    int(
-                        (
-                            datetime.utcnow()
-                            - conversation.initiated_at.replace(tzinfo=None)
-                        ).total_seconds()
-                    )
-                    if conversation.initiated_at
-                    else 0
-                )
-                AnalyticsService.add_voice_details(
-                    db=db,
-                    message_id=message.id,
-                    duration_seconds=duration,
-                    transcript_segments=transcript_entries,
-                    function_calls=session_data.get("function_calls", []),
-                    interruption_count=session_data.get("customer_data", {}).get(
-                        "interruptions", 0
-                    ),
-                )
-
-                # Complete conversation
-                AnalyticsService.complete_conversation(db, conversation.id)
-
-                # Score conversation satisfaction (AI analysis)
-                AnalyticsService.score_conversation_satisfaction(db, conversation.id)
-
-                logger.info("Finalization complete for session %s", session_id)
-
+                inbound_worker_pool.notify()
+                logger.info("Transcript persisted for session %s; post-call job queued", session_id)
             except Exception as e:
                 logger.error("Error ending call session %s: %s", session_id, e, exc_info=True)
             finally:
@@ -1418,19 +1540,36 @@ async def voice_websocket(
         await realtime_client.send_greeting()
 
         # Log session start to the conversations schema
-        AnalyticsService.add_communication_event(
-            db=db,
-            conversation_id=conversation.id,
-            event_type="session_started",
-            details={"session_id": session_id},
+        realtime_client.submit_db(
+            lambda: AnalyticsService.add_communication_event(
+                db=db,
+                conversation_id=conversation.id,
+                event_type="session_started",
+                details={"session_id": session_id},
+            )
         )
         logger.info("Session %s logged to conversations schema", session_id)
 
         # Define callback for audio output
         logger.debug("Defining audio_callback function for session %s", session_id)
 
+        # Only this call's own client learns the token a reconnect must present
+        resumable = session_parking.open(session_id)
+
+        async def send_protocol() -> None:
+            data = {"audio": audio_protocol, "format": client_audio_format or "pcm16"}
+            if resumable is not None:
+                data["resume_token"] = resumable.token
+            await json_codec.send_json(websocket, {"type": "protocol", "data": data})
+
+        await send_protocol()
+
         async def audio_callback(audio_b64: str):
             """Send audio from OpenAI back to client."""
+            nonlocal outbound_sequence
+            if outbound_pacer is not None:
+                outbound_pacer.push(base64.b64decode(audio_b64))
+                return
             if websocket.client_state != WebSocketState.CONNECTED:
                 logger.warning(
                     "Skipping audio send for session %s; websocket no longer connected",
@@ -1443,7 +1582,13 @@ async def voice_websocket(
                 session_id,
                 len(audio_b64),
             )
-            await websocket.send_json({"type": "audio", "data": audio_b64})
+            if audio_protocol == PROTOCOL_BINARY:
+                await websocket.send_bytes(
+                    encode_audio_frame(base64.b64decode(audio_b64), outbound_sequence)
+                )
+                outbound_sequence += 1
+            else:
+                await json_codec.send_json(websocket, {"type": "audio", "data": audio_b64})
             logger.debug("Audio sent to browser for session %s", session_id)
 
         logger.debug("audio_callback defined for session %s; defining client handlers", session_id)
@@ -1451,10 +1596,33 @@ async def voice_websocket(
         # Handle messages from both client and OpenAI
         async def handle_client_messages():
             """Handle incoming messages from client."""
+            nonlocal client_dropped
             logger.info("Starting client message handler for session %s", session_id)
             try:
                 while True:
-                    message = await websocket.receive_json()
+                    raw_message = await websocket.receive()
+                    if raw_message["type"] == "websocket.disconnect":
+                        raise WebSocketDisconnect(raw_message.get("code", 1000))
+
+                    if raw_message.get("bytes") is not None:
+                        # Binary audio frame; the payload is a view, not a copy
+                        try:
+                            frame = decode_frame(
+                                raw_message["bytes"], sample_width=frame_sample_width
+                            )
+                        except FrameError as frame_err:
+                            logger.warning(
+                                "Dropping malformed audio frame for session %s: %s",
+                                session_id,
+                                frame_err,
+                            )
+                            continue
+                        await realtime_client.send_audio_bytes(
+                            frame.payload, commit=frame.commit
+                        )
+                        continue
+
+                    message = json_codec.loads(raw_message.get("text") or "{}")
                     msg_type = message.get("type")
                     logger.debug("Received from client for session %s: %s", session_id, msg_type)
 
@@ -1472,6 +1640,8 @@ async def voice_websocket(
 
                     elif msg_type == "interrupt":
                         logger.info("Client interrupted assistant for session %s", session_id)
+                        if outbound_pacer is not None:
+                            outbound_pacer.clear()
                         await realtime_client.cancel_response()
 
                     elif msg_type == "end_session":
@@ -1489,7 +1659,8 @@ async def voice_websocket(
 
                     elif msg_type == "ping":
                         payload = message.get("data") or {}
-                        await websocket.send_json(
+                        await json_codec.send_json(
+                            websocket,
                             {
                                 "type": "pong",
                                 "data": {
@@ -1499,8 +1670,9 @@ async def voice_websocket(
                             }
                         )
 
-            except WebSocketDisconnect:
+            except WebSocketDisconnect as disconnect:
                 logger.info("Client WebSocket disconnected for session %s", session_id)
+                client_dropped = is_dropped(disconnect.code)
             except Exception as e:
                 logger.error(
                     "Error in client handler for session %s: %s", session_id, e, exc_info=True
@@ -1534,17 +1706,86 @@ async def voice_websocket(
             session_id,
         )
 
+        async def resume_client(handoff, reason: str) -> None:
+            nonlocal websocket, released, outbound_sequence
+            if websocket.client_state == WebSocketState.CONNECTED:
+                try:
+                    await websocket.close(code=1000)
+                except Exception as close_err:  # noqa: BLE001
+                    logger.debug("Error closing replaced websocket: %s", close_err)
+            if released is not None and not released.done():
+                released.set_result(True)
+            websocket, released = handoff
+            outbound_sequence = 0
+            if outbound_pacer is not None:
+                outbound_pacer.clear()
+            logger.info("Session %s resumed on a new websocket (%s)", session_id, reason)
+            await send_protocol()
+            await json_codec.send_json(
+                websocket,
+                {"type": "session_resumed", "data": {"resume_token": resumable.token}},
+            )
+            realtime_client.submit_db(
+                lambda: AnalyticsService.add_communication_event(
+                    db=db,
+                    conversation_id=conversation.id,
+                    event_type="session_resumed",
+                    details={"session_id": session_id, "reason": reason},
+                )
+            )
+
         try:
-            client_task = asyncio.create_task(handle_client_messages())
             openai_task = asyncio.create_task(handle_openai_messages())
+            hangup_task = asyncio.create_task(hangup_requested.wait())
+
+            while True:
+                client_dropped = False
+                client_task = asyncio.create_task(handle_client_messages())
+                waiters = {client_task, openai_task, hangup_task}
+                handoff_task = None
+                if resumable is not None:
+                    handoff_task = asyncio.create_task(resumable.next_handoff())
+                    waiters.add(handoff_task)
+
+                done, _ = await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+                call_over = openai_task.done() or hangup_task.done()
+                if handoff_task is not None and not handoff_task.done():
+                    handoff_task.cancel()
+                elif handoff_task is not None and call_over:
+                    handoff_task.result()[1].set_result(False)
+
+                if handoff_task in done and not call_over:
+                    # The client reconnected before its old socket was seen to drop
+                    client_task.cancel()
+                    await asyncio.gather(client_task, return_exceptions=True)
+                    session_parking.took_over()
+                    await resume_client(handoff_task.result(), "takeover")
+                    continue
+
+                if client_dropped and resumable is not None and not call_over:
+                    logger.info(
+                        "Holding session %s open for %.0fs for a reconnect",
+                        session_id,
+                        session_parking.grace_seconds,
+                    )
+                    if outbound_pacer is not None:
+                        outbound_pacer.clear()
+                    park_task = asyncio.create_task(session_parking.park(resumable))
+                    done, _ = await asyncio.wait(
+                        {park_task, openai_task, hangup_task},
+                        return_when=asyncio.FIRST_COMPLETED,
+                    )
+                    if park_task in done and park_task.result() is not None:
+                        await resume_client(park_task.result(), "reconnect")
+                        continue
+                    park_task.cancel()
+                break
 
-            done, pending = await asyncio.wait(
-                {client_task, openai_task},
-                return_when=asyncio.FIRST_COMPLETED,
-            )
+            session_parking.close(resumable)
+            hangup_task.cancel()
 
-            done_tasks = set(done)
-            pending_tasks = set(pending)
+            done_tasks = {task for task in (client_task, openai_task) if task.done()}
+            pending_tasks = {client_task, openai_task} - done_tasks
 
             if pending_tasks:
                 # Give pending tasks (typically the OpenAI handler) a grace period to flush events
@@ -1601,7 +1842,10 @@ async def voice_websocket(
         await finalize_session("exception")
         raise
     finally:
+        session_parking.close(resumable)
         await finalize_session("closed")
+        if released is not None and not released.done():
+            released.set_result(True)
         logger.info("Cleaning up session %s", session_id)
         try:
             await realtime_client.disconnect()
@@ -2205,12 +2449,24 @@ async def get_conversation_detail(
 
         # Add channel-specific details
         if conversation.channel == "voice" and msg.voice_details:
+            details = msg.voice_details
+            if details.call_record:
+                record = CompactCallRecord(details.call_record)
+                transcript_segments = list(record.transcript)
+                function_calls = list(record.function_calls)
+            else:
+                # Older calls keep their transcript in voice_transcript_entries
+                # or inline in transcript_segments
+                transcript_segments = details.transcript_segments or load_call_transcript(
+                    db, conversation.id
+                )
+                function_calls = details.function_calls
             msg_data["voice"] = {
-                "duration_seconds": msg.voice_details.duration_seconds,
-                "recording_url": msg.voice_details.recording_url,
-                "transcript_segments": msg.voice_details.transcript_segments,
-                "function_calls": msg.voice_details.function_calls,
-                "interruption_count": msg.voice_details.interruption_count,
+                "duration_seconds": details.duration_seconds,
+                "recording_url": details.recording_url,
+                "transcript_segments": transcript_segments,
+                "function_calls": function_calls,
+                "interruption_count": details.interruption_count,
             }
         elif conversation.channel == "sms" and msg.sms_details:
             msg_data["sms"] = {
@@ -2296,6 +2552,48 @@ async def get_conversation_detail(
     }
 
 
+@app.get("/api/admin/communications/{conversation_id}/transcript")
+async def get_conversation_transcript(
+    conversation_id: str,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user),
+):
+    """
+    Page through a voice call's transcript without loading all of it.
+    """
+    from uuid import UUID
+
+    from database import CommunicationMessage, Conversation, VoiceCallDetails
+
+    try:
+        conv_uuid = UUID(conversation_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid conversation ID format")
+
+    conversation = db.get(Conversation, conv_uuid)
+    if not conversation:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if conversation.channel != "voice":
+        raise HTTPException(status_code=400, detail="Conversation is not a voice call")
+
+    details = (
+        db.query(VoiceCallDetails)
+        .join(CommunicationMessage, CommunicationMessage.id == VoiceCallDetails.message_id)
+        .filter(CommunicationMessage.conversation_id == conv_uuid)
+        .first()
+    )
+    total, entries = call_transcript_page(db, details, conv_uuid, offset, limit)
+    return {
+        "conversation_id": conversation_id,
+        "total": total,
+        "offset": offset,
+        "limit": limit,
+        "entries": entries,
+    }
+
+
 # ==================== Webhook Endpoints (Phase 2) ====================
 
 
@@ -2303,44 +2601,77 @@ async def get_conversation_detail(
 async def handle_twilio_sms(request: Request, db: Session = Depends(get_db)):
     """
     Twilio SMS webhook handler.
-    Receives incoming SMS, finds or creates conversation, generates AI response.
-    """
-    # TODO: Implement Twilio SMS handling
-    # 1. Parse incoming SMS from Twilio webhook
-    # 2. Find or create customer by phone number
-    # 3. Find active SMS conversation or create new one
-    # 4. Add inbound message
-    # 5. Generate AI response (use GPT-4 or similar)
-    # 6. Send outbound SMS via Twilio
-    # 7. Add outbound message to conversation
-    # 8. If conversation complete, score satisfaction
 
+    Verifies the request signature, queues the message (deduplicated on
+    MessageSid) and acknowledges with empty TwiML straight away. Inbound queue
+    workers run the AI turn and send the reply through the Twilio REST API.
+    """
     from twilio.twiml.messaging_response import MessagingResponse
 
-    # Placeholder response
-    resp = MessagingResponse()
-    resp.message("Thank you for contacting us! This feature is coming soon.")
+    form = await request.form()
+    params = {key: value for key, value in form.items()}
+
+    url = str(request.url)
+    if settings.TWILIO_WEBHOOK_BASE_URL:
+        url = settings.TWILIO_WEBHOOK_BASE_URL.rstrip("/") + request.url.path
+        if request.url.query:
+            url += f"?{request.url.query}"
+    if not validate_twilio_signature(
+        url, params, request.headers.get("X-Twilio-Signature")
+    ):
+        raise HTTPException(status_code=403, detail="Invalid Twilio signature")
+
+    message_sid = params.get("MessageSid") or params.get("SmsSid")
+    if not message_sid or not params.get("From"):
+        raise HTTPException(status_code=400, detail="Missing MessageSid or From")
+
+    _, created = InboundQueue.enqueue(
+        db, channel="sms", provider_message_id=message_sid, payload=params
+    )
+    if created:
+        inbound_worker_pool.notify()
+    else:
+        logger.info("Duplicate Twilio delivery for %s ignored", message_sid)
 
-    return Response(content=str(resp), media_type="application/xml")
+    return Response(content=str(MessagingResponse()), media_type="application/xml")
 
 
 @app.post("/api/webhooks/sendgrid/email")
 async def handle_sendgrid_email(request: Request, db: Session = Depends(get_db)):
     """
     SendGrid inbound email webhook handler.
-    Receives incoming emails, finds or creates conversation, generates AI response.
+
+    Streams the multipart body (attachments are spooled to disk), queues the
+    message deduplicated on its Message-ID and acknowledges immediately.
+    Inbound queue workers resolve the thread and run the AI turn.
     """
-    # TODO: Implement SendGrid email handling
-    # 1. Parse incoming email from SendGrid webhook
-    # 2. Find or create customer by email address
-    # 3. Find email thread or create new conversation
-    # 4. Add inbound message
-    # 5. Generate AI response
-    # 6. Send outbound email via SendGrid
-    # 7. Add outbound message to conversation
-    # 8. If conversation complete, score satisfaction
-
-    return {"status": "received", "message": "Email webhook handler coming soon"}
+    try:
+        inbound_email = await parse_sendgrid_inbound(
+            request.headers.get("content-type"), request.stream()
+        )
+    except InboundEmailTooLarge as exc:
+        raise HTTPException(status_code=413, detail=str(exc))
+    except InboundEmailError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+
+    try:
+        _, created = InboundQueue.enqueue(
+            db,
+            channel="email",
+            provider_message_id=inbound_email.dedupe_key(),
+            payload=inbound_email.to_payload(),
+        )
+    except Exception:
+        # Not queued, so nothing will ever reference the spooled attachments
+        inbound_email.discard()
+        raise
+    if created:
+        inbound_worker_pool.notify()
+    else:
+        inbound_email.discard()
+        logger.info("Duplicate SendGrid delivery for %s ignored", inbound_email.dedupe_key())
+
+    return {"status": "queued" if created else "duplicate"}
 
 
 if __name__ == "__main__":
@@ -0,0 +1,715 @@
+"""Inbound message and assistant turn pipeline shared by all messaging entry points.
+
+The admin messaging console, the Twilio SMS webhook workers and the inbound
+email workers all record a guest message and then run one assistant turn.
+This module owns that sequence so every entry point gets the same
+per-conversation serialization (``turn_executor``) and SMS burst coalescing.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import re
+from email.utils import getaddresses, parseaddr
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from analytics import AnalyticsService
+from booking.manager import SlotSelectionManager
+from config import get_settings
+from database import CommunicationMessage, Conversation, Customer, InboundMessageJob
+from email_gateway import get_email_sender, new_message_id
+from messaging_service import MessagingService
+from sms_coalescer import SUPERSEDED, InboundBurstCoalescer
+from sms_gateway import get_sms_sender
+from turn_executor import turn_executor
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    formatter = logging.Formatter(
+        "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+    )
+    handler.setFormatter(formatter)
+    logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+sms_burst_coalescer = InboundBurstCoalescer(
+    window_seconds=get_settings().SMS_COALESCE_WINDOW_SECONDS
+)
+
+
+def record_inbound_message(
+    db: Session,
+    *,
+    conversation: Conversation,
+    customer: Customer,
+    channel: str,
+    content: str,
+    subject: Optional[str],
+    source: str = "messaging_console",
+    channel_details: Optional[Dict[str, Any]] = None,
+) -> CommunicationMessage:
+    """Store an inbound guest message with its channel details.
+
+    ``channel_details`` overrides the simulated SMS/email detail fields with
+    real provider data (e.g. the Twilio MessageSid) for webhook traffic.
+    """
+
+    inbound_message = MessagingService.add_customer_message(
+        db=db,
+        conversation=conversation,
+        content=content,
+        metadata={"source": source},
+    )
+
+    logger.info(
+        "Messaging inbound: channel=%s conversation_id=%s customer_id=%s content=%s",
+        channel,
+        conversation.id,
+        customer.id,
+        (content or "").replace("\n", " ")[:200],
+    )
+
+    # Capture slot selections (e.g., "Option 2" or explicit time choices) as soon as the
+    # inbound message is stored so deterministic booking can trigger without waiting for
+    # the AI to parse the message later.
+    SlotSelectionManager.capture_selection(db, conversation, inbound_message)
+
+    # Refresh conversation to get any metadata updates from slot selection capture
+    db.refresh(conversation)
+
+    if channel == "sms":
+        sms_meta = channel_details or MessagingService.sms_metadata_for_customer(
+            customer.phone
+        )
+        AnalyticsService.add_sms_details(
+            db=db,
+            message_id=inbound_message.id,
+            **sms_meta,
+        )
+    else:
+        email_meta = channel_details or MessagingService.email_metadata_for_customer(
+            customer_email=customer.email,
+            subject=subject or conversation.subject,
+            body_text=content,
+        )
+        AnalyticsService.add_email_details(
+            db=db,
+            message_id=inbound_message.id,
+            **{"body_html": None, **email_meta},
+        )
+
+    return inbound_message
+
+
+def run_assistant_turn(
+    db: Session,
+    *,
+    conversation: Conversation,
+    customer: Customer,
+    channel: str,
+    subject: Optional[str],
+    claim: Callable[[], bool],
+    source: str = "messaging_console",
+    deliver: Optional[Callable[[CommunicationMessage], Dict[str, Any]]] = None,
+):
+    """Generate, persist and score one assistant reply for ``conversation``.
+
+    ``deliver`` sends the stored reply to the guest (e.g. via Twilio) and
+    returns provider detail fields to record alongside it. The console leaves
+    it unset because the reply is shown in the HTTP response instead.
+
+    Returns the stored outbound message, or ``SUPERSEDED`` when ``claim()``
+    reports that a newer inbound message took over the turn. A turn that
+    booked, rescheduled or cancelled an appointment is never superseded: its
+    confirmation is always stored and delivered.
+    """
+
+    initial_content, assistant_message = MessagingService.generate_ai_response(
+        db, conversation.id, channel, log_assistant_message=False
+    )
+
+    tool_calls = (
+        list(getattr(assistant_message, "tool_calls", []) or [])
+        if assistant_message
+        else []
+    )
+    tool_results: List[Dict[str, Any]] = []
+    # generate_ai_response only answers without an assistant message when its
+    # deterministic path has already booked the guest's selected slot.
+    booking_action_success = assistant_message is None and bool(initial_content)
+
+    if tool_calls:
+        calendar_service = MessagingService._get_calendar_service()
+        booking_confirmation_message: Optional[str] = None
+        for call in tool_calls:
+            try:
+                function_obj = getattr(call, "function", None)
+                tool_name = (
+                    getattr(function_obj, "name", None) if function_obj else None
+                )
+                raw_arguments = (
+                    getattr(function_obj, "arguments", "") if function_obj else ""
+                )
+                try:
+                    parsed_arguments = (
+                        json.loads(raw_arguments) if raw_arguments else {}
+                    )
+                except json.JSONDecodeError:
+                    parsed_arguments = {}
+
+                (
+                    normalized_arguments,
+                    adjustments,
+                ) = MessagingService._normalize_tool_arguments(
+                    tool_name, parsed_arguments
+                )
+
+                if (
+                    function_obj is not None
+                    and normalized_arguments != parsed_arguments
+                ):
+                    function_obj.arguments = json.dumps(normalized_arguments)
+
+                logger.info(
+                    "Messaging tool_call: channel=%s conversation_id=%s customer_id=%s name=%s args=%s",
+                    channel,
+                    conversation.id,
+                    customer.id,
+                    tool_name,
+                    normalized_arguments,
+                )
+
+                result = MessagingService._execute_tool_call(
+                    db=db,
+                    conversation=conversation,
+                    customer=customer,
+                    calendar_service=calendar_service,
+                    call=call,
+                )
+
+                # CRITICAL: Refresh conversation and customer after each tool call to ensure
+                # metadata updates (like pending slot offers) and customer updates
+                # are visible to subsequent tool calls in the same request
+                db.refresh(conversation)
+                db.refresh(customer)
+
+            except (
+                Exception
+            ) as exc:  # noqa: BLE001 - continue capturing failure details
+                result = {
+                    "tool_call_id": getattr(call, "id", None),
+                    "name": getattr(getattr(call, "function", None), "name", None),
+                    "arguments": {},
+                    "output": {"success": False, "error": str(exc)},
+                }
+                logger.warning("Tool call execution raised %s", exc)
+            tool_results.append(result)
+            if result.get("name") in {
+                "book_appointment",
+                "reschedule_appointment",
+                "cancel_appointment",
+            }:
+                if (result.get("output") or {}).get("success"):
+                    booking_action_success = True
+                    if (
+                        result.get("name") == "book_appointment"
+                        and not booking_confirmation_message
+                    ):
+                        booking_confirmation_message = (
+                            MessagingService.build_booking_confirmation_message(
+                                channel=channel,
+                                tool_output=result.get("output") or {},
+                            )
+                        )
+
+            tool_results[-1]["normalized_arguments"] = normalized_arguments
+            selection_adjustments = result.get("argument_adjustments") or {}
+            merged_adjustments: Dict[str, Dict[str, Optional[str]]] = {}
+            if adjustments:
+                merged_adjustments.update(adjustments)
+            if selection_adjustments:
+                merged_adjustments.update(selection_adjustments)
+            tool_results[-1]["argument_adjustments"] = merged_adjustments
+
+            last_result = tool_results[-1]
+            output_payload = last_result.get("output")
+            success_flag = None
+            if isinstance(output_payload, dict):
+                success_flag = output_payload.get("success")
+
+            logger.info(
+                "Messaging tool_result: channel=%s conversation_id=%s customer_id=%s name=%s success=%s output=%s",
+                channel,
+                conversation.id,
+                customer.id,
+                last_result.get("name"),
+                success_flag,
+                (str(output_payload).replace("\n", " ")[:400]
+                 if output_payload is not None
+                 else None),
+            )
+
+        if booking_confirmation_message:
+            response_content = booking_confirmation_message
+            assistant_message = None
+        else:
+            (
+                followup_content,
+                followup_message,
+            ) = MessagingService.generate_followup_response(
+                db=db,
+                conversation_id=conversation.id,
+                channel=channel,
+                assistant_message=assistant_message,
+                tool_results=tool_results,
+            )
+            response_content = followup_content
+            assistant_message = followup_message or assistant_message
+    else:
+        response_content = initial_content
+
+    if channel == "sms" and not booking_action_success:
+        logger.warning(
+            "SMS conversation %s completed without a successful booking tool execution.",
+            conversation.id,
+        )
+
+    # Last chance for a newer inbound message in the same burst to take over.
+    # Tool calls may already have committed changes; once an appointment was
+    # booked, rescheduled or cancelled the guest must get this reply, so only
+    # replies without such a change are dropped.
+    if not claim() and not booking_action_success:
+        return SUPERSEDED
+
+    outbound_metadata = {
+        "source": source,
+        "generated_by": "assistant",
+    }
+
+    if tool_calls:
+        tool_requests: List[Dict[str, Any]] = []
+        for call in tool_calls:
+            function_obj = getattr(call, "function", None)
+            arguments_raw = (
+                getattr(function_obj, "arguments", "") if function_obj else ""
+            )
+            try:
+                parsed_args = json.loads(arguments_raw) if arguments_raw else {}
+            except json.JSONDecodeError:
+                parsed_args = arguments_raw
+            tool_requests.append(
+                {
+                    "id": getattr(call, "id", None),
+                    "type": getattr(call, "type", None),
+                    "name": getattr(function_obj, "name", None),
+                    "arguments": parsed_args,
+                }
+            )
+
+        outbound_metadata["tool_invocations"] = {
+            "requests": tool_requests,
+            "results": tool_results,
+        }
+
+    outbound_message = MessagingService.add_assistant_message(
+        db=db,
+        conversation=conversation,
+        content=response_content,
+        metadata=outbound_metadata,
+    )
+
+    logger.info(
+        "Messaging outbound: channel=%s conversation_id=%s customer_id=%s booking_success=%s tool_calls=%d content=%s",
+        channel,
+        conversation.id,
+        customer.id,
+        booking_action_success,
+        len(tool_calls),
+        (response_content or "").replace("\n", " ")[:200],
+    )
+
+    delivery_details = deliver(outbound_message) if deliver is not None else {}
+
+    if channel == "sms":
+        sms_meta_outgoing = MessagingService.sms_metadata_for_assistant(customer.phone)
+        sms_meta_outgoing.update(delivery_details)
+        AnalyticsService.add_sms_details(
+            db=db,
+            message_id=outbound_message.id,
+            **sms_meta_outgoing,
+        )
+    else:
+        email_meta_outgoing = MessagingService.email_metadata_for_assistant(
+            customer_email=customer.email,
+            subject=subject or conversation.subject,
+            body_text=response_content,
+        )
+        email_meta_outgoing.update(delivery_details)
+        AnalyticsService.add_email_details(
+            db=db,
+            message_id=outbound_message.id,
+            **{"body_html": None, **email_meta_outgoing},
+        )
+
+    if channel in {"sms", "email"}:
+        try:
+            AnalyticsService.score_conversation_satisfaction(
+                db=db, conversation_id=conversation.id
+            )
+        except (
+            Exception
+        ) as exc:  # noqa: BLE001 - fall back to existing values if scoring fails
+            logger.warning(
+                "Failed to score messaging conversation %s: %s",
+                conversation.id,
+                exc,
+                exc_info=True,
+            )
+
+    return outbound_message
+
+
+def handle_inbound_message(
+    db: Session,
+    *,
+    conversation: Conversation,
+    customer: Customer,
+    channel: str,
+    content: str,
+    subject: Optional[str] = None,
+    source: str = "messaging_console",
+    channel_details: Optional[Dict[str, Any]] = None,
+    deliver: Optional[Callable[[CommunicationMessage], Dict[str, Any]]] = None,
+    recorded_message: Optional[CommunicationMessage] = None,
+    on_recorded: Optional[Callable[[CommunicationMessage], None]] = None,
+) -> Tuple[CommunicationMessage, CommunicationMessage]:
+    """Record an inbound message and return it with the assistant's reply.
+
+    Inbound recording and the assistant turn both mutate conversation
+    metadata, so they run on the per-conversation turn executor. SMS turns
+    are also coalesced: texts sent in quick succession share one reply. An
+    SMS joins its burst before it is recorded, so one arriving while a reply
+    is generating supersedes that reply instead of queueing behind it.
+
+    Queue workers pass ``recorded_message`` when an earlier attempt already
+    stored the message, and ``on_recorded`` to remember it for later attempts.
+
+    Raises ``TurnQueueFull`` when the conversation has too much queued work.
+    """
+
+    recorded: List[CommunicationMessage] = []
+
+    def _store() -> CommunicationMessage:
+        message = record_inbound_message(
+            db,
+            conversation=conversation,
+            customer=customer,
+            channel=channel,
+            content=content,
+            subject=subject,
+            source=source,
+            channel_details=channel_details,
+        )
+        if on_recorded is not None:
+            on_recorded(message)
+        return message
+
+    def _record() -> None:
+        if recorded_message is not None:
+            recorded.append(recorded_message)
+        else:
+            recorded.append(turn_executor.run(conversation.id, _store))
+
+    def _turn(claim: Callable[[], bool]):
+        outbound_message = run_assistant_turn(
+            db,
+            conversation=conversation,
+            customer=customer,
+            channel=channel,
+            subject=subject,
+            claim=claim,
+            source=source,
+            deliver=deliver,
+        )
+        if outbound_message is SUPERSEDED:
+            return SUPERSEDED
+        return outbound_message.id
+
+    if channel == "sms":
+        outbound_message_id = sms_burst_coalescer.run(
+            conversation.id,
+            lambda claim: turn_executor.run(conversation.id, lambda: _turn(claim)),
+            on_arrival=_record,
+        )
+    else:
+        _record()
+        outbound_message_id = turn_executor.run(
+            conversation.id, lambda: _turn(lambda: True)
+        )
+
+    inbound_message = recorded[0]
+    return inbound_message, db.get(CommunicationMessage, outbound_message_id)
+
+
+def _earlier_attempt(
+    db: Session, job: InboundMessageJob
+) -> Tuple[Optional[CommunicationMessage], bool]:
+    """Inbound message stored by an earlier attempt at ``job``, and whether it
+    has been answered since (by this job or by a coalesced burst turn)."""
+
+    if job.inbound_message_id is None:
+        return None, False
+    inbound_message = db.get(CommunicationMessage, job.inbound_message_id)
+    if inbound_message is None:
+        return None, False
+    answered = (
+        db.query(CommunicationMessage.id)
+        .filter(
+            CommunicationMessage.conversation_id == inbound_message.conversation_id,
+            CommunicationMessage.direction == "outbound",
+            CommunicationMessage.sent_at >= inbound_message.sent_at,
+        )
+        .first()
+        is not None
+    )
+    return inbound_message, answered
+
+
+def _remember_inbound(db: Session, job: InboundMessageJob):
+    def _on_recorded(message: CommunicationMessage) -> None:
+        job.inbound_message_id = message.id
+        db.commit()
+
+    return _on_recorded
+
+
+def process_inbound_sms(db: Session, job: InboundMessageJob):
+    """Inbound queue processor for Twilio SMS webhook payloads.
+
+    Runs one assistant turn for the sender and texts the reply back through
+    the configured SMS sender. Returns the conversation ID for the job record.
+
+    Retries are idempotent: the message stored by an earlier attempt is
+    reused, and a message that was already answered gets no second reply.
+    """
+
+    payload = job.payload or {}
+    from_number = (payload.get("From") or "").strip()
+    body = payload.get("Body") or ""
+    if not from_number:
+        raise ValueError("Twilio payload is missing From")
+
+    inbound_message, answered = _earlier_attempt(db, job)
+    if answered:
+        logger.info("SMS job %s was answered by an earlier attempt", job.id)
+        return inbound_message.conversation_id
+
+    customer = MessagingService.find_or_create_customer(
+        db=db,
+        channel="sms",
+        customer_name=None,
+        customer_phone=from_number,
+        customer_email=None,
+    )
+    if inbound_message is not None:
+        conversation = db.get(Conversation, inbound_message.conversation_id)
+    else:
+        conversation = MessagingService.find_active_conversation(
+            db=db, customer_id=customer.id, channel="sms"
+        )
+    if conversation is None:
+        conversation = MessagingService.create_conversation(
+            db=db,
+            customer_id=customer.id,
+            channel="sms",
+            metadata={"source": "twilio"},
+        )
+
+    sender = get_sms_sender()
+
+    def _deliver(outbound_message: CommunicationMessage) -> Dict[str, Any]:
+        # The reply is already stored; a send failure is recorded on the
+        # message rather than retrying the whole job (which would re-run
+        # the turn).
+        try:
+            return sender.send(from_number, outbound_message.content)
+        except Exception as exc:  # noqa: BLE001 - recorded on SMSDetails
+            logger.error(
+                "Failed to send SMS reply for conversation %s: %s",
+                conversation.id,
+                exc,
+            )
+            return {"delivery_status": "failed", "error_message": str(exc)}
+
+    handle_inbound_message(
+        db,
+        conversation=conversation,
+        customer=customer,
+        channel="sms",
+        content=body,
+        source="twilio",
+        channel_details={
+            "from_number": from_number,
+            "to_number": payload.get("To") or sender.from_number,
+            "provider_message_id": job.provider_message_id,
+            "delivery_status": "delivered",
+            "segments": int(payload.get("NumSegments") or 1),
+        },
+        deliver=_deliver,
+        recorded_message=inbound_message,
+        on_recorded=_remember_inbound(db, job),
+    )
+    return conversation.id
+
+
+def _reply_subject(subject: Optional[str]) -> str:
+    subject = (subject or "").strip() or "Your message"
+    return subject if subject.lower().startswith("re:") else f"Re: {subject}"
+
+
+def process_inbound_email(db: Session, job: InboundMessageJob):
+    """Inbound queue processor for SendGrid Inbound Parse payloads.
+
+    Replies are matched to their conversation through the Message-ID index;
+    new threads fall back to the customer's active email conversation. The
+    inbound and outbound Message-IDs are indexed so later replies resolve
+    with a single lookup. Returns the conversation ID for the job record.
+    Retries are idempotent, as for SMS.
+    """
+
+    payload = job.payload or {}
+    from_name, from_address = parseaddr(payload.get("from") or "")
+    if not from_address:
+        raise ValueError("SendGrid payload is missing a sender address")
+    _, to_address = parseaddr(payload.get("to") or "")
+    subject = payload.get("subject") or None
+    body_text = payload.get("text") or ""
+    if not body_text and payload.get("html"):
+        body_text = re.sub(r"<[^>]+>", " ", payload["html"]).strip()
+
+    inbound_message_id = payload.get("message_id")
+    references = list(payload.get("references") or [])
+
+    recorded_message, answered = _earlier_attempt(db, job)
+    if answered:
+        logger.info("Email job %s was answered by an earlier attempt", job.id)
+        MessagingService.index_email_message(
+            db=db,
+            message_id_header=inbound_message_id,
+            conversation_id=recorded_message.conversation_id,
+            communication_message_id=recorded_message.id,
+        )
+        return recorded_message.conversation_id
+
+    customer = MessagingService.find_or_create_customer(
+        db=db,
+        channel="email",
+        customer_name=from_name or None,
+        customer_phone=None,
+        customer_email=from_address,
+    )
+
+    if recorded_message is not None:
+        conversation = db.get(Conversation, recorded_message.conversation_id)
+    else:
+        conversation = MessagingService.find_email_thread_conversation(
+            db=db,
+            in_reply_to=payload.get("in_reply_to"),
+            references=references,
+        )
+        if conversation is not None and (
+            conversation.customer_id != customer.id or conversation.status != "active"
+        ):
+            conversation = None
+    if conversation is None:
+        conversation = MessagingService.find_active_conversation(
+            db=db, customer_id=customer.id, channel="email"
+        )
+    if conversation is None:
+        conversation = MessagingService.create_conversation(
+            db=db,
+            customer_id=customer.id,
+            channel="email",
+            subject=subject,
+            metadata={"source": "sendgrid"},
+        )
+
+    sender = get_email_sender()
+    reply_references = references + ([inbound_message_id] if inbound_message_id else [])
+
+    def _deliver(outbound_message: CommunicationMessage) -> Dict[str, Any]:
+        message_id = new_message_id()
+        try:
+            result = sender.send(
+                to_address=from_address,
+                subject=_reply_subject(subject or conversation.subject),
+                body_text=outbound_message.content,
+                message_id=message_id,
+                in_reply_to=inbound_message_id,
+                references=reply_references,
+            )
+        except Exception as exc:  # noqa: BLE001 - recorded on EmailDetails
+            logger.error(
+                "Failed to send email reply for conversation %s: %s",
+                conversation.id,
+                exc,
+            )
+            result = {"provider_message_id": None, "delivery_status": "failed"}
+
+        MessagingService.index_email_message(
+            db=db,
+            message_id_header=message_id,
+            conversation_id=conversation.id,
+            communication_message_id=outbound_message.id,
+        )
+        return {
+            "subject": _reply_subject(subject or conversation.subject),
+            "in_reply_to": inbound_message_id,
+            "references": reply_references or None,
+            **result,
+        }
+
+    inbound_message, _ = handle_inbound_message(
+        db,
+        conversation=conversation,
+        customer=customer,
+        channel="email",
+        content=body_text,
+        subject=subject,
+        source="sendgrid",
+        channel_details={
+            "subject": subject or conversation.subject or "(no subject)",
+            "from_address": from_address,
+            "to_address": to_address or get_settings().MED_SPA_EMAIL,
+            "body_text": body_text,
+            "body_html": payload.get("html"),
+            "cc_addresses": [
+                address for _, address in getaddresses([payload.get("cc") or ""])
+                if address
+            ]
+            or None,
+            "in_reply_to": payload.get("in_reply_to"),
+            "references": references or None,
+            # JSONBType columns hold objects, so wrap the attachment list
+            "attachments": (
+                {"files": payload["attachments"]} if payload.get("attachments") else None
+            ),
+            "provider_message_id": inbound_message_id,
+        },
+        deliver=_deliver,
+        recorded_message=recorded_message,
+        on_recorded=_remember_inbound(db, job),
+    )
+
+    MessagingService.index_email_message(
+        db=db,
+        message_id_header=inbound_message_id,
+        conversation_id=conversation.id,
+        communication_message_id=inbound_message.id,
+    )
+    return conversation.id
@@ -17,6 +17,7 @@ from uuid import UUID, uuid4
 
 import pytz
 from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session, joinedload
 from sqlalchemy.orm.attributes import flag_modified
 
@@ -41,11 +42,18 @@ from booking_handlers import (
 from booking_tools import get_booking_tools
 from calendar_service import get_calendar_service
 from config import get_settings
-from database import Appointment, CommunicationMessage, Conversation, Customer
+from database import (
+    Appointment,
+    CommunicationMessage,
+    Conversation,
+    Customer,
+    EmailMessageIndex,
+)
 from faq_service import get_faq_answer
 from faq_tools import get_faq_tools
 from prompts import get_system_prompt
 from settings_service import SettingsService
+from turn_executor import turn_executor
 from turn_orchestrator import TurnContext, TurnIntent, TurnOrchestrator
 
 logger = logging.getLogger(__name__)
@@ -224,6 +232,71 @@ class MessagingService:
 
         return convo
 
+    # Bound on how many References entries a reply lookup considers
+    EMAIL_THREAD_LOOKUP_LIMIT = 20
+
+    @staticmethod
+    def find_email_thread_conversation(
+        *,
+        db: Session,
+        in_reply_to: Optional[str],
+        references: Optional[List[str]] = None,
+    ) -> Optional[Conversation]:
+        """Resolve an email reply to its conversation via the Message-ID index.
+
+        In-Reply-To wins, then the most recent References entry. All candidates
+        are fetched in a single primary-key lookup, so the cost does not grow
+        with the customer's email history.
+        """
+
+        candidates: List[str] = []
+        for message_id in [in_reply_to, *reversed(references or [])]:
+            if message_id and message_id not in candidates:
+                candidates.append(message_id)
+        candidates = candidates[: MessagingService.EMAIL_THREAD_LOOKUP_LIMIT]
+        if not candidates:
+            return None
+
+        rows = (
+            db.query(EmailMessageIndex)
+            .filter(EmailMessageIndex.message_id_header.in_(candidates))
+            .all()
+        )
+        if not rows:
+            return None
+
+        by_header = {row.message_id_header: row for row in rows}
+        for message_id in candidates:
+            row = by_header.get(message_id)
+            if row is not None:
+                return db.get(Conversation, row.conversation_id)
+        return None
+
+    @staticmethod
+    def index_email_message(
+        *,
+        db: Session,
+        message_id_header: Optional[str],
+        conversation_id: Any,
+        communication_message_id: Any = None,
+    ) -> None:
+        """Record a Message-ID so replies to it resolve to ``conversation_id``."""
+
+        if not message_id_header:
+            return
+        db.add(
+            EmailMessageIndex(
+                message_id_header=message_id_header[:500],
+                conversation_id=conversation_id,
+                communication_message_id=communication_message_id,
+            )
+        )
+        try:
+            db.commit()
+        except IntegrityError:
+            # Already indexed (e.g. a redelivered inbound email)
+            db.rollback()
+
     @staticmethod
     def create_conversation(
         *,
@@ -634,6 +707,54 @@ class MessagingService:
             "tool_history": tool_history,
         }
 
+    @staticmethod
+    def _handle_selection_turn(
+        *,
+        db: Session,
+        conversation: Conversation,
+        channel: str,
+        log_assistant_message: bool,
+    ) -> Optional[Dict[str, Any]]:
+        """Book a just-captured slot selection without a completion call.
+
+        Runs when the latest customer message resolved a pending offer (for
+        example "2" or "the 3pm one") and the customer's name and phone are
+        already known. Returns ``None`` when the turn still needs the model,
+        otherwise the result of ``_execute_deterministic_booking``.
+        """
+
+        readiness = MessagingService._should_execute_booking(db, conversation)
+        if not readiness:
+            return None
+
+        trace = MessagingService._make_trace_logger(conversation)
+        trace("=== TURN START: channel=%s mode=%s", channel, "selection_fast_path")
+
+        booking_result = MessagingService._execute_deterministic_booking(
+            db=db,
+            conversation=conversation,
+            calendar_service=MessagingService._get_calendar_service(),
+            channel=channel,
+            trace=trace,
+            readiness=readiness,
+        )
+
+        if booking_result.get("status") == "success":
+            trace("Selection fast path booked without calling the model.")
+            message_text = booking_result["message"]
+            if log_assistant_message and message_text:
+                MessagingService.add_assistant_message(
+                    db=db,
+                    conversation=conversation,
+                    content=message_text,
+                    metadata={
+                        "source": "ai_deterministic",
+                        "generated_by": "assistant",
+                        "fast_path": "slot_selection",
+                    },
+                )
+        return booking_result
+
     @staticmethod
     def _extract_booking_params(
         db: Session, conversation: Conversation
@@ -1832,14 +1953,15 @@ class MessagingService:
 
             tools = get_booking_tools(db) + get_faq_tools()
 
-            response = openai_client.chat.completions.create(
-                model=s.OPENAI_MESSAGING_MODEL,
-                messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
-                tools=tools,
-                tool_choice=tool_choice,
-            )
+            with turn_executor.llm_slot():
+                response = openai_client.chat.completions.create(
+                    model=s.OPENAI_MESSAGING_MODEL,
+                    messages=messages,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    tools=tools,
+                    tool_choice=tool_choice,
+                )
             trace("AI raw response: %s", response)
             return response
         except Exception as exc:  # noqa: BLE001 - fall back gracefully for local dev
@@ -1873,10 +1995,14 @@ class MessagingService:
         if not conversation:
             raise HTTPException(status_code=404, detail="Conversation not found")
 
+        selection_result: Optional[Dict[str, Any]] = None
         last_customer = MessagingService._latest_customer_message(conversation)
         if last_customer and last_customer.content:
+            selection_captured = False
             try:
-                SlotSelectionManager.capture_selection(db, conversation, last_customer)
+                selection_captured = SlotSelectionManager.capture_selection(
+                    db, conversation, last_customer
+                )
             except Exception as exc:  # noqa: BLE001 - selection capture should be best-effort
                 logger.warning(
                     "Failed to capture slot selection from latest customer message for conversation %s: %s",
@@ -1901,8 +2027,22 @@ class MessagingService:
                             db, conversation, metadata
                         )
                 SlotSelectionManager.clear_offers(db, conversation)
+            elif selection_captured:
+                # The guest just picked one of the offered slots. When their
+                # identity is already known there is nothing left for the model
+                # to decide, so book and confirm from the template directly.
+                selection_result = MessagingService._handle_selection_turn(
+                    db=db,
+                    conversation=conversation,
+                    channel=channel,
+                    log_assistant_message=log_assistant_message,
+                )
+                if selection_result and selection_result.get("status") == "success":
+                    return selection_result["message"], None
 
         history = MessagingService._build_history(conversation, channel)
+        if selection_result:
+            history.extend(selection_result.get("tool_history") or [])
         max_tokens = 500 if channel == "sms" else 1000
         metadata = SlotSelectionManager.conversation_metadata(conversation)
 
@@ -2077,7 +2217,13 @@ class MessagingService:
                         exc_info=True,
                     )
 
-        readiness = MessagingService._should_execute_booking(db, conversation)
+        # Skip the second deterministic attempt when the selection fast path
+        # already tried (and failed) to book this turn.
+        readiness = (
+            None
+            if selection_result and selection_result.get("tool_history")
+            else MessagingService._should_execute_booking(db, conversation)
+        )
         if readiness:
             booking_result = MessagingService._execute_deterministic_booking(
                 db=db,
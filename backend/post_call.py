@@ -0,0 +1,211 @@
+"""
+Post-call finalization for voice sessions.
+
+Ending a call used to do everything inline in the websocket handler:
+resolve the customer, write the summary message and voice details, complete
+the conversation and then run the GPT satisfaction scoring, all on the
+request's DB session and the event loop. Now teardown only persists the
+transcript and enqueues a ``voice_call`` job on the durable inbound queue;
+``process_call_finalization`` runs on the inbound worker pool with the
+queue's retries and backoff.
+
+Each step of the job is idempotent so a retry after a partial run is safe:
+customer linking and completion only set fields, and the daily rollup is
+recomputed from the day's calls rather than incremented.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from analytics import AnalyticsService
+from compact_transcript import encode_call_record
+from config import get_settings
+from database import (
+    CommunicationMessage,
+    Conversation,
+    DailyMetric,
+    InboundMessageJob,
+    VoiceCallDetails,
+)
+from inbound_queue import InboundQueue
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+POST_CALL_CHANNEL = "voice_call"
+
+# session_data keys copied into the call summary message metadata
+_PIPELINE_STATS_KEYS = (
+    "audio_gate",
+    "audio_coalescer",
+    "barge_in",
+    "outbound_pacer",
+    "availability_prefetch",
+    "recording",
+    "transcript_writer",
+)
+
+
+def persist_call_transcript(
+    db: Session,
+    *,
+    conversation: Conversation,
+    session_id: str,
+    session_data: Dict[str, Any],
+) -> InboundMessageJob:
+    """Write the call's transcript and enqueue the rest of finalization.
+
+    Returns the ``voice_call`` job. Jobs are keyed by conversation ID, so a
+    second call for the same conversation returns the existing job.
+    """
+    transcript_entries = session_data.get("transcript", [])
+    customer_data = session_data.get("customer_data", {})
+
+    # Human-readable summary; the transcript itself is in voice_transcript_entries
+    summary_text = f"Voice call - {len(transcript_entries)} transcript segments"
+    if transcript_entries:
+        first_msg = transcript_entries[0].get("text", "")
+        summary_text = f"Voice call starting with: {first_msg[:100]}..."
+
+    message = AnalyticsService.add_message(
+        db=db,
+        conversation_id=conversation.id,
+        direction="inbound",
+        content=summary_text,
+        sent_at=conversation.initiated_at,
+        metadata={
+            "customer_interruptions": customer_data.get("interruptions", 0),
+            "ai_clarifications_needed": 0,
+            "transcript_entry_count": len(transcript_entries),
+            **{key: session_data[key] for key in _PIPELINE_STATS_KEYS if key in session_data},
+        },
+    )
+
+    duration = (
+        int((datetime.utcnow() - conversation.initiated_at.replace(tzinfo=None)).total_seconds())
+        if conversation.initiated_at
+        else 0
+    )
+    AnalyticsService.add_voice_details(
+        db=db,
+        message_id=message.id,
+        duration_seconds=duration,
+        # The full in-memory transcript, including any batch that never landed
+        call_record=encode_call_record(
+            transcript_entries,
+            session_data.get("function_calls", []),
+            compress=settings.VOICE_CALL_RECORD_COMPRESS,
+        ),
+        interruption_count=customer_data.get("interruptions", 0),
+        latency_summary=session_data.get("latency"),
+        recording_url=session_data.get("recording_url"),
+    )
+
+    job, created = InboundQueue.enqueue(
+        db,
+        channel=POST_CALL_CHANNEL,
+        provider_message_id=str(conversation.id),
+        payload={
+            "conversation_id": str(conversation.id),
+            "session_id": session_id,
+            "customer_data": customer_data,
+        },
+    )
+    if not created:
+        logger.info("Post-call job for conversation %s already queued", conversation.id)
+    return job
+
+
+def process_call_finalization(db: Session, job: InboundMessageJob) -> Any:
+    """Inbound worker processor for ``voice_call`` jobs."""
+    payload = job.payload or {}
+    conversation = _load_conversation(db, payload.get("conversation_id"))
+    if conversation is None:
+        raise ValueError(f"Conversation {payload.get('conversation_id')} not found")
+
+    _link_customer(db, conversation, payload.get("customer_data") or {})
+    AnalyticsService.complete_conversation(db, conversation.id)
+
+    # Earlier attempts raise so the queue retries; the last one settles for
+    # the neutral fallback instead of leaving the call unscored
+    final_attempt = (job.attempts or 0) >= settings.INBOUND_QUEUE_MAX_ATTEMPTS
+    AnalyticsService.score_conversation_satisfaction(
+        db, conversation.id, raise_errors=not final_attempt
+    )
+
+    if conversation.initiated_at is not None:
+        refresh_daily_call_rollup(db, conversation.initiated_at)
+    logger.info("Post-call finalization complete for session %s", payload.get("session_id"))
+    return conversation.id
+
+
+def refresh_daily_call_rollup(db: Session, day: datetime) -> DailyMetric:
+    """Recompute the voice-call columns of ``day``'s DailyMetric row."""
+    start = datetime(day.year, day.month, day.day)
+    end = start + timedelta(days=1)
+    voice_calls = db.query(Conversation).filter(
+        Conversation.channel == "voice",
+        Conversation.status == "completed",
+        Conversation.initiated_at >= start,
+        Conversation.initiated_at < end,
+    )
+    total_calls = voice_calls.count()
+    booked = voice_calls.filter(Conversation.outcome == "appointment_scheduled").count()
+    rescheduled = voice_calls.filter(Conversation.outcome == "appointment_rescheduled").count()
+    cancelled = voice_calls.filter(Conversation.outcome == "appointment_cancelled").count()
+    escalated = voice_calls.filter(Conversation.outcome == "escalated").count()
+    avg_score = (
+        voice_calls.with_entities(func.avg(Conversation.satisfaction_score))
+        .filter(Conversation.satisfaction_score.isnot(None))
+        .scalar()
+    )
+    talk_time = (
+        db.query(func.coalesce(func.sum(VoiceCallDetails.duration_seconds), 0))
+        .join(CommunicationMessage, CommunicationMessage.id == VoiceCallDetails.message_id)
+        .join(Conversation, Conversation.id == CommunicationMessage.conversation_id)
+        .filter(
+            Conversation.channel == "voice",
+            Conversation.status == "completed",
+            Conversation.initiated_at >= start,
+            Conversation.initiated_at < end,
+        )
+        .scalar()
+    )
+
+    metric = db.query(DailyMetric).filter(DailyMetric.date == start).first()
+    if metric is None:
+        metric = DailyMetric(date=start)
+        db.add(metric)
+    metric.total_calls = total_calls
+    metric.total_talk_time_seconds = int(talk_time or 0)
+    metric.avg_call_duration_seconds = int(talk_time or 0) // total_calls if total_calls else 0
+    metric.appointments_booked = booked
+    metric.appointments_rescheduled = rescheduled
+    metric.appointments_cancelled = cancelled
+    metric.calls_escalated = escalated
+    metric.avg_satisfaction_score = round(float(avg_score), 2) if avg_score is not None else 0.0
+    metric.conversion_rate = round(booked / total_calls * 100, 2) if total_calls else 0.0
+    db.commit()
+    return metric
+
+
+def _load_conversation(db: Session, conversation_id: Optional[str]) -> Optional[Conversation]:
+    if not conversation_id:
+        return None
+    return db.query(Conversation).filter(Conversation.id == conversation_id).first()
+
+
+def _link_customer(db: Session, conversation: Conversation, customer_data: Dict[str, Any]) -> None:
+    if conversation.customer_id is not None:
+        return
+    customer = AnalyticsService.resolve_or_create_customer_for_call(db, customer_data)
+    if customer is None:
+        logger.warning("No customer linked for conversation %s", conversation.id)
+        return
+    conversation.customer_id = customer.id
+    db.commit()
+    logger.info("Linked conversation %s to customer %s", conversation.id, customer.id)
@@ -0,0 +1,259 @@
+"""
+Capture and offline replay of OpenAI Realtime sessions.
+
+Capture (``VOICE_EVENT_CAPTURE_ENABLED``) wraps a call's Realtime socket in
+``CapturingSocket``. Every server event and every message the client sends
+is appended, in order, to ``<VOICE_EVENT_CAPTURE_DIR>/<session_id>.jsonl.gz``;
+one line per message::
+
+    {"t": <ms since capture start>, "d": "s" | "c", "e": <message as sent>}
+
+The message is embedded verbatim rather than re-encoded, and lines are
+gzipped by a writer thread, so capture costs the relay one string format
+and a queue put per message.
+
+Replay feeds a capture's server events into ``RealtimeClient.handle_messages``
+through ``ReplaySocket``, a local stand-in for the Realtime socket, at the
+recorded pace scaled by ``speed`` (``speed=0`` replays as fast as the client
+can process). ``replay_capture`` reports throughput, per-event processing
+latency and the router's per-type handler stats, so changes can be
+benchmarked against real call traffic offline::
+
+    python scripts/replay_realtime_capture.py captures/<session>.jsonl.gz --speed 0
+
+Captured tool calls run again during a replay. By default the client gets an
+in-memory ``MockCalendarService``, so replayed bookings, reschedules and
+cancellations never reach the real calendar; ``live_calendar=True`` opts in
+to the configured one.
+"""
+
+import asyncio
+import gzip
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+from voice_metrics import summarize_samples
+
+logger = logging.getLogger(__name__)
+
+DIRECTION_SERVER = "s"
+DIRECTION_CLIENT = "c"
+
+_CLOSE = object()
+
+
+class CapturedMessage(NamedTuple):
+    offset_ms: float
+    direction: str
+    raw: str
+
+
+class CaptureWriter:
+    """Ordered JSONL (optionally gzipped) writer fed from the event loop."""
+
+    def __init__(self, path: str, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.path = path
+        self._clock = clock
+        self._started = clock()
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._stats = {"server": 0, "client": 0}
+        self._error: Optional[str] = None
+        self._thread = threading.Thread(target=self._run, name="realtime-capture", daemon=True)
+        self._thread.start()
+
+    def server(self, raw: Any) -> None:
+        self._stats["server"] += 1
+        self._put(DIRECTION_SERVER, raw)
+
+    def client(self, raw: Any) -> None:
+        self._stats["client"] += 1
+        self._put(DIRECTION_CLIENT, raw)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, path=self.path, error=self._error)
+
+    def _put(self, direction: str, raw: Any) -> None:
+        if isinstance(raw, (bytes, bytearray, memoryview)):
+            raw = bytes(raw).decode("utf-8")
+        offset_ms = (self._clock() - self._started) * 1000
+        self._queue.put('{"t":%.1f,"d":"%s","e":%s}\n' % (offset_ms, direction, raw))
+
+    def _run(self) -> None:
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            opener = gzip.open if self.path.endswith(".gz") else open
+            with opener(self.path, "wt", encoding="utf-8") as handle:
+                while True:
+                    line = self._queue.get()
+                    if line is _CLOSE:
+                        return
+                    handle.write(line)
+        except Exception as exc:  # noqa: BLE001 - capture must never affect the call
+            self._error = str(exc)
+            logger.error("Realtime capture %s failed: %s", self.path, exc)
+
+
+class CapturingSocket:
+    """Realtime socket proxy that records traffic in both directions."""
+
+    def __init__(self, ws: Any, writer: CaptureWriter) -> None:
+        self._ws = ws
+        self._writer = writer
+
+    async def send(self, message: Any) -> None:
+        self._writer.client(message)
+        await self._ws.send(message)
+
+    async def recv(self) -> Any:
+        message = await self._ws.recv()
+        self._writer.server(message)
+        return message
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        async for message in self._ws:
+            self._writer.server(message)
+            yield message
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._ws, name)
+
+
+def build_capture_writer(
+    *, enabled: bool, directory: str, session_id: str
+) -> Optional[CaptureWriter]:
+    if not enabled:
+        return None
+    safe_id = re.sub(r"[^A-Za-z0-9_.-]", "_", session_id).lstrip(".") or "session"
+    return CaptureWriter(os.path.join(directory, f"{safe_id}.jsonl.gz"))
+
+
+def load_capture(path: str) -> List[CapturedMessage]:
+    opener = gzip.open if path.endswith(".gz") else open
+    messages: List[CapturedMessage] = []
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for line in handle:
+            line = line.rstrip()
+            if not line:
+                continue
+            # Slice the verbatim message back out instead of re-encoding it
+            head, _, raw = line.partition(',"e":')
+            offset, direction = head[len('{"t":') :].split(',"d":')
+            messages.append(CapturedMessage(float(offset), direction.strip('"'), raw[:-1]))
+    return messages
+
+
+class ReplaySocket:
+    """Stand-in Realtime socket that serves captured server events.
+
+    The time between yielding an event and the next read is the client's
+    processing time for that event; it is collected in ``processing_ms``.
+    """
+
+    def __init__(self, messages: List[CapturedMessage], *, speed: float = 1.0) -> None:
+        self.server_messages = [m for m in messages if m.direction == DIRECTION_SERVER]
+        self.expected_client_messages = sum(1 for m in messages if m.direction == DIRECTION_CLIENT)
+        self.speed = speed
+        self.sent: List[Any] = []
+        self.processing_ms: List[float] = []
+        self.closed = False
+
+    async def send(self, message: Any) -> None:
+        self.sent.append(message)
+
+    async def close(self) -> None:
+        self.closed = True
+
+    def __aiter__(self) -> AsyncIterator[str]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[str]:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for message in self.server_messages:
+            if self.closed:
+                return
+            if self.speed > 0:
+                delay = started + message.offset_ms / 1000 / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yielded_at = time.perf_counter()
+            yield message.raw
+            self.processing_ms.append((time.perf_counter() - yielded_at) * 1000)
+
+
+async def replay_capture(
+    path: str,
+    *,
+    speed: float = 1.0,
+    client_factory: Optional[Callable[[], Any]] = None,
+    live_calendar: bool = False,
+) -> Dict[str, Any]:
+    """Replay a capture through a fresh ``RealtimeClient`` and report timings.
+
+    The default client books against a mock calendar unless ``live_calendar``
+    is set; a custom ``client_factory`` chooses its own calendar.
+    """
+    messages = load_capture(path)
+    socket = ReplaySocket(messages, speed=speed)
+
+    if client_factory is None:
+        from calendar_service import MockCalendarService
+        from realtime_client import RealtimeClient
+
+        def client_factory() -> Any:
+            return RealtimeClient(
+                session_id=f"replay-{os.path.basename(path)}",
+                calendar_service=None if live_calendar else MockCalendarService(),
+            )
+
+    client = client_factory()
+    audio_chars = 0
+
+    async def on_audio(audio_b64: str) -> None:
+        nonlocal audio_chars
+        audio_chars += len(audio_b64)
+
+    await client.attach(socket)
+    started = time.perf_counter()
+    try:
+        await client.handle_messages(on_audio)
+        await client.flush_db_writes()
+    finally:
+        wall_seconds = time.perf_counter() - started
+        event_stats = client.event_stats()
+        client.close()
+
+    server_events = len(socket.server_messages)
+    captured_ms = socket.server_messages[-1].offset_ms if socket.server_messages else 0.0
+    return {
+        "capture": path,
+        "speed": speed,
+        "server_events": server_events,
+        "captured_seconds": round(captured_ms / 1000, 3),
+        "wall_seconds": round(wall_seconds, 3),
+        "events_per_second": round(server_events / wall_seconds, 1) if wall_seconds else 0.0,
+        "client_messages": {
+            "captured": socket.expected_client_messages,
+            "replayed": len(socket.sent),
+        },
+        "audio_b64_chars": audio_chars,
+        "processing_ms": summarize_samples(socket.processing_ms) if socket.processing_ms else {},
+        "handlers": {
+            event_type: {key: summary[key] for key in ("count", "errors", "mean_ms", "p95_ms", "max_ms")}
+            for event_type, summary in event_stats.items()
+        },
+    }
@@ -3,6 +3,7 @@ OpenAI Realtime API client for voice-to-voice conversation handling.
 """
 
 import asyncio
+import base64
 import json
 import logging
 import re
@@ -11,11 +12,13 @@ from datetime import datetime, timedelta
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pytz
-import websockets
 from sqlalchemy.orm import Session
 
 from analytics import AnalyticsService
 from analytics_metrics import record_calendar_error, record_tool_execution
+from audio_coalescer import AudioFrameCoalescer, build_audio_coalescer
+from availability_prefetch import AvailabilityPrefetcher, build_availability_prefetcher
+from barge_in import BargeInDetector, build_barge_in_detector
 from booking import BookingChannel, BookingContext, BookingOrchestrator
 from booking.manager import SlotSelectionError, SlotSelectionManager
 from booking.time_utils import format_for_display, parse_iso_datetime, to_eastern
@@ -25,17 +28,30 @@ from booking_handlers import (
     handle_get_service_info,
 )
 from calendar_service import get_calendar_service
+from call_recorder import CallRecorder, build_call_recorder
 from config import OPENING_SCRIPT, PROVIDERS, get_settings
 from database import Conversation, SessionLocal
 from faq_service import get_faq_answer
-from realtime_config import build_voice_session_config
+import json_codec
+from realtime_capture import CaptureWriter, CapturingSocket, build_capture_writer
+from realtime_config import AudioFormat, build_voice_session_config
+from realtime_events import LazyJson, RealtimeEventRouter
+from realtime_pool import call_setup_metrics, open_realtime_socket, realtime_session_pool
 from prompts import get_system_prompt
 from settings_service import SettingsService
+from telephony_audio import TelephonyTranscoder, build_transcoder
+from turn_executor import TurnQueueFull, voice_db_executor
 from turn_orchestrator import TurnContext, TurnIntent, TurnOrchestrator
+from vad_gate import VoiceActivityGate, build_vad_gate
+from voice_metrics import CallLatencyTracker, TimedProxy
+from voice_transcript import TranscriptWriter, next_transcript_sequence, write_transcript_entries
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# High-volume events that are never logged per event
+_QUIET_EVENTS = frozenset({"response.audio.delta", "input_audio_buffer.append"})
+
 
 class _BookingContextFactory:
     """Factory for constructing BookingContext objects for voice sessions.
@@ -237,6 +253,16 @@ class _VoiceSessionState:
         )
 
 
+def build_default_session_config() -> Dict[str, Any]:
+    """Voice session config for pre-warmed pool sessions (PCM16 clients)."""
+    db = SessionLocal()
+    try:
+        service_names = list(SettingsService.get_services_dict(db).keys())
+    finally:
+        db.close()
+    return RealtimeClient.build_session_config(service_names=service_names)
+
+
 class RealtimeClient:
     """Client for managing OpenAI Realtime API voice conversations."""
 
@@ -248,10 +274,25 @@ class RealtimeClient:
         conversation: Optional[Conversation] = None,
         legacy_call_session_id: Optional[str] = None,
         transcript_callback: Optional[Callable[[str, str], Any]] = None,
+        client_audio_format: Optional[AudioFormat] = None,
+        barge_in_callback: Optional[Callable[[], Any]] = None,
+        speech_started_callback: Optional[Callable[[], Any]] = None,
+        calendar_service: Optional[Any] = None,
     ) -> None:
-        """Initialize the Realtime client with database context."""
+        """Initialize the Realtime client with database context.
+
+        ``calendar_service`` overrides the process-wide calendar (e.g. a
+        ``MockCalendarService`` for offline replays).
+        """
         self.ws = None
-        self.calendar_service = self._init_calendar_service()
+        self.calendar_service = (
+            calendar_service
+            if calendar_service is not None
+            else self._init_calendar_service()
+        )
+        if self.calendar_service is not None:
+            # Lets handle_function_call split calendar time from DB time
+            self.calendar_service = TimedProxy(self.calendar_service)
         self.session_id = session_id
         self._owns_db_session = db is None
         self.db = db or SessionLocal()
@@ -274,8 +315,49 @@ class RealtimeClient:
         self._pending_items: Dict[str, Dict[str, Any]] = {}
         self._last_transcript_entry: Optional[str] = None
         self._awaiting_response: bool = False
+        # Every DB operation for this call runs on voice_db_executor under this
+        # key: in order, one at a time, and never on the event loop.
+        self._db_key = f"voice:{session_id}"
         # Optional callback to stream transcript entries back to the client in real time
         self._transcript_callback = transcript_callback
+        # Audio format on the client leg; G.711 clients get a transcoder once
+        # the session format is known (see _initialize_session)
+        self.client_audio_format = client_audio_format
+        self._transcoder: Optional[TelephonyTranscoder] = None
+        # Optional server-side silence suppression (VOICE_VAD_GATE_ENABLED)
+        self._vad_gate: Optional[VoiceActivityGate] = None
+        # Coalesces small client chunks into larger appends (VOICE_AUDIO_COALESCE_*)
+        self._coalescer: Optional[AudioFrameCoalescer] = None
+        self._coalesce_timer: Optional[asyncio.TimerHandle] = None
+        # Warms check_availability from customer transcripts (VOICE_AVAILABILITY_PREFETCH_*)
+        self._availability_prefetcher: Optional[AvailabilityPrefetcher] = None
+        # Cuts the assistant off when the caller talks over it (VOICE_BARGE_IN_*);
+        # the callback tells the caller's client to flush its playback
+        self._barge_in: Optional[BargeInDetector] = None
+        self._barge_in_callback = barge_in_callback
+        self._speech_started_callback = speech_started_callback
+        self._speaking_response_id: Optional[str] = None
+        self._interrupted_response_id: Optional[str] = None
+        # Tees both directions of audio to disk (VOICE_RECORDING_*)
+        self._recorder: Optional[CallRecorder] = None
+        # Records the Realtime event stream for replay (VOICE_EVENT_CAPTURE_*)
+        self._capture: Optional[CaptureWriter] = None
+        # Server event dispatch table (see realtime_events)
+        self._on_audio_callback: Optional[Callable] = None
+        self._event_router = self._build_event_router()
+        # Time-to-greeting tracking ("warm" = pre-warmed pooled session)
+        self.connection_source = "cold"
+        self._setup_started: Optional[float] = None
+        self._awaiting_first_audio = False
+        # Turn, greeting and tool latencies (see voice_metrics)
+        self._latency = CallLatencyTracker()
+        # Batches transcript entries into voice_transcript_entries (VOICE_TRANSCRIPT_*)
+        self._transcript_writer = TranscriptWriter(
+            lambda rows: self.submit_db(self._persist_transcript_batch, rows),
+            batch_size=settings.VOICE_TRANSCRIPT_BATCH_SIZE,
+            flush_seconds=settings.VOICE_TRANSCRIPT_FLUSH_SECONDS,
+        )
+        self._transcript_offset: Optional[int] = None
 
         # Load services and providers from database (with caching)
         self._services_dict = None
@@ -351,6 +433,53 @@ class RealtimeClient:
             # Refresh can fail if conversation was expired or detached; ignore silently.
             pass
 
+    def _guarded_db_call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        try:
+            return fn(*args)
+        except Exception:
+            try:
+                self.db.rollback()
+            except Exception:  # noqa: BLE001
+                pass
+            raise
+
+    async def run_db(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn`` on the voice DB executor after this call's earlier writes."""
+        return await voice_db_executor.run_async(
+            self._db_key, lambda: self._guarded_db_call(fn, *args)
+        )
+
+    def submit_db(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Queue a fire-and-forget DB write, ordered after earlier ones."""
+        try:
+            future = voice_db_executor.submit(
+                self._db_key, lambda: self._guarded_db_call(fn, *args)
+            )
+        except TurnQueueFull as exc:
+            logger.error(
+                "Dropping voice DB write %s for session %s: %s",
+                getattr(fn, "__name__", fn),
+                self.session_id,
+                exc,
+            )
+            return
+
+        def _log_failure(done) -> None:
+            if not done.cancelled() and done.exception() is not None:
+                logger.error(
+                    "Voice DB write %s failed for session %s",
+                    getattr(fn, "__name__", fn),
+                    self.session_id,
+                    exc_info=done.exception(),
+                )
+
+        future.add_done_callback(_log_failure)
+
+    async def flush_db_writes(self) -> None:
+        """Wait until every queued DB write for this call has been applied."""
+        self._transcript_writer.flush()
+        await voice_db_executor.run_async(self._db_key, lambda: None)
+
     def _init_calendar_service(self):
         try:
             return get_calendar_service()
@@ -363,20 +492,64 @@ class RealtimeClient:
             raise
 
     async def connect(self):
-        """Establish WebSocket connection to OpenAI Realtime API."""
-        url = "wss://api.openai.com/v1/realtime?model=gpt-realtime-mini-2025-10-06"
-        headers = {
-            "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
-            "OpenAI-Beta": "realtime=v1",
-        }
-
-        logger.info("Connecting to OpenAI Realtime API: %s", url)
-        self.ws = await websockets.connect(url, extra_headers=headers)
-        logger.info("Connected to OpenAI Realtime API")
+        """Establish WebSocket connection to OpenAI Realtime API.
 
-        # Initialize session with instructions and tools
-        await self._initialize_session()
+        Takes a pre-warmed session from ``realtime_session_pool`` when one
+        with a matching configuration is available; otherwise connects and
+        sends ``session.update`` here.
+        """
+        self._setup_started = time.perf_counter()
+        session_config = await self.run_db(self._initialize_session)
+
+        warm_ws = await realtime_session_pool.acquire(session_config)
+        if warm_ws is not None:
+            self.ws = self._wrap_socket(warm_ws)
+            self.connection_source = "warm"
+            logger.info("Using pre-warmed Realtime session for %s", self.session_id)
+        else:
+            self.ws = self._wrap_socket(await open_realtime_socket())
+            self.connection_source = "cold"
+            logger.info("Connected to OpenAI Realtime API")
+            await self.ws.send(json_codec.dumps(session_config))
+            # System instructions are already in session config above - no need for separate message
         logger.info("Realtime session initialized")
+        self._record_setup_stage("connected")
+
+    async def attach(self, ws: Any) -> None:
+        """Set up the session against an already-open socket.
+
+        Used by the event replay harness and the local Realtime stand-in;
+        no ``session.update`` is sent.
+        """
+        await self.run_db(self._initialize_session)
+        self.ws = self._wrap_socket(ws)
+
+    def _wrap_socket(self, ws: Any) -> Any:
+        if self._capture is None:
+            try:
+                self._capture = build_capture_writer(
+                    enabled=settings.VOICE_EVENT_CAPTURE_ENABLED,
+                    directory=settings.VOICE_EVENT_CAPTURE_DIR,
+                    session_id=self.session_id,
+                )
+            except Exception as exc:  # noqa: BLE001 - capture is optional
+                logger.error("Event capture unavailable for %s: %s", self.session_id, exc)
+        return CapturingSocket(ws, self._capture) if self._capture is not None else ws
+
+    def _record_setup_stage(self, stage: str) -> None:
+        if self._setup_started is None:
+            return
+        elapsed_ms = (time.perf_counter() - self._setup_started) * 1000
+        call_setup_metrics.record(self.connection_source, stage, elapsed_ms)
+        if stage == "first_audio":
+            self._latency.greeting(elapsed_ms, source=self.connection_source)
+        logger.info(
+            "Call setup for %s (%s): %s after %.0fms",
+            self.session_id,
+            self.connection_source,
+            stage,
+            elapsed_ms,
+        )
 
     async def send_greeting(self):
         """Send an introductory greeting to kick off the call."""
@@ -402,30 +575,92 @@ class RealtimeClient:
             },
         }
 
-        await self.ws.send(json.dumps(response_create))
+        await self.ws.send(json_codec.dumps(response_create))
         # Don't call _request_response() - response.create already triggers a response
         logger.info("Sent greeting request to Realtime API")
+        self._record_setup_stage("greeting_requested")
+        self._awaiting_first_audio = True
 
-    async def _initialize_session(self):
-        """Initialize the session with system instructions and available functions."""
-        system_prompt = get_system_prompt("voice")
+    @classmethod
+    def build_session_config(
+        cls,
+        *,
+        service_names: List[str],
+        client_audio_format: Optional[AudioFormat] = None,
+    ) -> Dict[str, Any]:
+        """Build the voice ``session.update`` payload (also used to pre-warm sessions)."""
+        return build_voice_session_config(
+            system_prompt=get_system_prompt("voice"),
+            tools=cls.function_definitions(service_names),
+            client_audio_format=client_audio_format,
+            server_transcode=settings.VOICE_TELEPHONY_SERVER_TRANSCODE,
+        )
 
+    def _initialize_session(self) -> Dict[str, Any]:
+        """Build the session config and the audio pipeline that matches it."""
         self.identity_instructions = (
             f"You are {settings.AI_ASSISTANT_NAME}, the virtual receptionist for {settings.MED_SPA_NAME}. "
             "Always stay in character as Ava, focus on med spa services, and never describe yourself as ChatGPT or an OpenAI model. "
             f"If asked who you are, respond with: 'I'm {settings.AI_ASSISTANT_NAME}, the virtual receptionist for {settings.MED_SPA_NAME}. I'm here to help with appointments or any questions about our treatments.'"
         )
 
-        session_config = build_voice_session_config(
-            system_prompt=system_prompt,
-            tools=self._get_function_definitions(),
+        session_config = self.build_session_config(
+            service_names=list(self._get_services().keys()),
+            client_audio_format=self.client_audio_format,
         )
-
-        await self.ws.send(json.dumps(session_config))
-        # System instructions are already in session config above - no need for separate message
+        upstream_format = session_config["session"]["input_audio_format"]
+        self._transcoder = build_transcoder(self.client_audio_format, upstream_format)
+        turn_detection = session_config["session"]["turn_detection"]
+        self._vad_gate = build_vad_gate(
+            enabled=settings.VOICE_VAD_GATE_ENABLED,
+            upstream_format=upstream_format,
+            prefix_padding_ms=turn_detection["prefix_padding_ms"],
+            silence_duration_ms=turn_detection["silence_duration_ms"],
+            threshold_dbfs=settings.VOICE_VAD_GATE_THRESHOLD_DBFS,
+            hangover_margin_ms=settings.VOICE_VAD_GATE_HANGOVER_MARGIN_MS,
+        )
+        self._coalescer = build_audio_coalescer(
+            enabled=settings.VOICE_AUDIO_COALESCE_ENABLED,
+            upstream_format=upstream_format,
+            min_ms=settings.VOICE_AUDIO_COALESCE_MIN_MS,
+            max_ms=settings.VOICE_AUDIO_COALESCE_MAX_MS,
+            max_latency_ms=settings.VOICE_AUDIO_COALESCE_MAX_LATENCY_MS,
+        )
+        self._barge_in = build_barge_in_detector(
+            enabled=settings.VOICE_BARGE_IN_ENABLED,
+            upstream_format=upstream_format,
+            output_format=session_config["session"]["output_audio_format"],
+            threshold_dbfs=settings.VOICE_BARGE_IN_THRESHOLD_DBFS,
+            min_speech_ms=settings.VOICE_BARGE_IN_MIN_SPEECH_MS,
+        )
+        self._availability_prefetcher = build_availability_prefetcher(
+            enabled=settings.VOICE_AVAILABILITY_PREFETCH_ENABLED
+            and self.calendar_service is not None,
+            fetch=self._fetch_availability,
+            services=self._get_services(),
+            ttl_seconds=settings.VOICE_AVAILABILITY_PREFETCH_TTL_SECONDS,
+        )
+        try:
+            self._recorder = build_call_recorder(
+                enabled=settings.VOICE_RECORDING_ENABLED,
+                session_id=self.session_id,
+                upstream_format=upstream_format,
+                directory=settings.VOICE_RECORDING_DIR,
+                file_format=settings.VOICE_RECORDING_FORMAT,
+                buffer_seconds=settings.VOICE_RECORDING_BUFFER_SECONDS,
+                base_url=settings.VOICE_RECORDING_BASE_URL,
+            )
+        except Exception as exc:  # noqa: BLE001 - recording is optional
+            logger.error("Call recording unavailable for %s: %s", self.session_id, exc)
+        return session_config
 
     def _get_function_definitions(self) -> List[Dict[str, Any]]:
         """Define functions that the AI can call."""
+        return self.function_definitions(list(self._get_services().keys()))
+
+    @staticmethod
+    def function_definitions(service_names: List[str]) -> List[Dict[str, Any]]:
+        """Tool definitions for the given active service slugs."""
         return [
             {
                 "type": "function",
@@ -440,7 +675,7 @@ class RealtimeClient:
                         },
                         "service_type": {
                             "type": "string",
-                            "enum": list(self._get_services().keys()),
+                            "enum": service_names,
                             "description": "Type of service requested",
                         },
                     },
@@ -481,7 +716,7 @@ class RealtimeClient:
                         },
                         "service_type": {
                             "type": "string",
-                            "enum": list(self._get_services().keys()),
+                            "enum": service_names,
                             "description": "Type of service",
                         },
                         "provider": {
@@ -510,7 +745,7 @@ class RealtimeClient:
                     "properties": {
                         "service_type": {
                             "type": "string",
-                            "enum": list(self._get_services().keys()),
+                            "enum": service_names,
                             "description": "Type of service to get information about",
                         }
                     },
@@ -578,7 +813,7 @@ class RealtimeClient:
                         },
                         "service_type": {
                             "type": "string",
-                            "enum": list(self._get_services().keys()),
+                            "enum": service_names,
                             "description": "Service type for duration lookup (optional if previously stored)",
                         },
                         "provider": {
@@ -649,6 +884,74 @@ class RealtimeClient:
 
     async def handle_function_call(
         self, function_name: str, arguments: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Execute a function call from the AI assistant off the event loop.
+
+        Tools read and commit conversation state (and call the calendar API),
+        so they run on the voice DB executor behind any pending transcript
+        writes for this call.
+        """
+        submitted = time.perf_counter()
+
+        def execute() -> Dict[str, Any]:
+            started = time.perf_counter()
+            self._take_calendar_ms()
+            try:
+                return self._execute_function_call(function_name, arguments)
+            finally:
+                execution_ms = (time.perf_counter() - started) * 1000
+                calendar_ms = self._take_calendar_ms()
+                self._latency.tool_backend(
+                    function_name,
+                    {
+                        "queue_wait": (started - submitted) * 1000,
+                        "calendar": calendar_ms,
+                        "db": max(0.0, execution_ms - calendar_ms),
+                    },
+                )
+
+        return await self.run_db(execute)
+
+    def _take_calendar_ms(self) -> float:
+        if isinstance(self.calendar_service, TimedProxy):
+            return self.calendar_service.take_elapsed_ms()
+        return 0.0
+
+    def _fetch_availability(self, date_str: str, service_type: str) -> Dict[str, Any]:
+        """Speculative fetch run by the prefetcher; same arguments as the tool call."""
+        return handle_check_availability(
+            self.calendar_service,
+            date=date_str,
+            service_type=service_type,
+            limit=10,
+            services_dict=self._get_services(),
+        )
+
+    def _check_availability(
+        self,
+        calendar_service,
+        *,
+        date: str,
+        service_type: str,
+        limit: Optional[int] = 10,
+        services_dict: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """``handle_check_availability`` that resolves from a prefetch when one matches."""
+        if self._availability_prefetcher is not None and limit == 10:
+            prefetched = self._availability_prefetcher.take(date, service_type)
+            if prefetched is not None:
+                return prefetched
+        return handle_check_availability(
+            calendar_service,
+            date=date,
+            service_type=service_type,
+            limit=limit,
+            services_dict=services_dict,
+        )
+
+    def _execute_function_call(
+        self, function_name: str, arguments: Dict[str, Any]
     ) -> Dict[str, Any]:
         """
         Execute function calls from the AI assistant.
@@ -675,7 +978,10 @@ class RealtimeClient:
 
                 try:
                     booking_context = self._booking_context_factory.for_voice()
-                    orchestrator = BookingOrchestrator(channel=BookingChannel.VOICE)
+                    orchestrator = BookingOrchestrator(
+                        channel=BookingChannel.VOICE,
+                        check_availability_func=self._check_availability,
+                    )
                     availability_result = orchestrator.check_availability(
                         booking_context,
                         date=date_str,
@@ -1080,7 +1386,21 @@ class RealtimeClient:
             return {"success": False, "error": str(e)}
 
     async def send_audio(self, audio_base64: str, *, commit: bool = False):
-        """Send base64-encoded audio data to the Realtime API."""
+        """Send base64-encoded client audio to the Realtime API."""
+        if audio_base64 and self._has_audio_pipeline():
+            await self.send_audio_bytes(base64.b64decode(audio_base64), commit=commit)
+            return
+        await self._append_audio(audio_base64, commit=commit)
+
+    def _has_audio_pipeline(self) -> bool:
+        return (
+            self._transcoder is not None
+            or self._vad_gate is not None
+            or self._coalescer is not None
+            or self._barge_in is not None
+        )
+
+    async def _append_audio(self, audio_base64: str, *, commit: bool = False):
         if not self.ws:
             logger.warning("WebSocket not ready; dropping audio chunk")
             return
@@ -1090,19 +1410,78 @@ class RealtimeClient:
             return
 
         append_event = {"type": "input_audio_buffer.append", "audio": audio_base64}
-        await self.ws.send(json.dumps(append_event))
+        await self.ws.send(json_codec.dumps(append_event))
         logger.debug("Sent audio chunk (base64 len=%d)", len(audio_base64))
 
         if commit:
             await self.commit_audio_buffer()
 
+    async def send_audio_bytes(self, pcm, *, commit: bool = False):
+        """Send raw client audio (bytes or memoryview) to the Realtime API.
+
+        The Realtime API only accepts base64 inside JSON, so binary-mode
+        clients pay for exactly one encode here instead of a base64 round
+        trip plus JSON decode on the client leg. G.711 client audio is
+        transcoded to PCM16 @ 24 kHz first when the session needs it,
+        silent chunks are held back when the VAD gate is on, and small
+        chunks are coalesced into larger appends. Speech over assistant
+        playback cuts the assistant off (see barge_in).
+        """
+        if not len(pcm):
+            logger.debug("Empty audio payload received; skipping append")
+            return
+        if self._transcoder is not None:
+            pcm = self._transcoder.to_upstream(pcm)
+        if self._recorder is not None:
+            self._recorder.caller(pcm)
+        if self._barge_in is not None:
+            onset_ms = self._barge_in.caller_audio(pcm)
+            if onset_ms is not None:
+                await self._on_barge_in(onset_ms)
+        chunks = self._vad_gate.process(pcm) if self._vad_gate is not None else [pcm]
+
+        if self._coalescer is not None:
+            chunks = [ready for chunk in chunks for ready in self._coalescer.push(chunk)]
+            if commit:
+                chunks.extend(self._coalescer.flush())
+            self._schedule_coalesce_deadline()
+
+        for chunk in chunks:
+            await self._append_audio(base64.b64encode(chunk).decode("ascii"))
+        if commit:
+            await self.commit_audio_buffer()
+
+    def _schedule_coalesce_deadline(self) -> None:
+        """Arm a timer so buffered audio never waits past the latency deadline."""
+        if self._coalesce_timer is not None:
+            return
+        due_in = self._coalescer.seconds_until_due()
+        if due_in is None:
+            return
+        self._coalesce_timer = asyncio.get_running_loop().call_later(
+            due_in, self._on_coalesce_deadline
+        )
+
+    def _on_coalesce_deadline(self) -> None:
+        self._coalesce_timer = None
+        asyncio.ensure_future(self._flush_coalesced_audio())
+
+    async def _flush_coalesced_audio(self) -> None:
+        try:
+            for chunk in self._coalescer.poll():
+                await self._append_audio(base64.b64encode(chunk).decode("ascii"))
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("Failed to flush coalesced audio for %s: %s", self.session_id, exc)
+        # Audio buffered after the deadline passed re-arms the timer
+        self._schedule_coalesce_deadline()
+
     async def commit_audio_buffer(self):
         """Commit the current audio buffer and request a model response."""
         if not self.ws:
             logger.warning("WebSocket not ready; cannot commit buffer")
             return
 
-        await self.ws.send(json.dumps({"type": "input_audio_buffer.commit"}))
+        await self.ws.send(json_codec.dumps({"type": "input_audio_buffer.commit"}))
         logger.debug("Committed audio buffer")
         self._awaiting_response = True
 
@@ -1112,9 +1491,61 @@ class RealtimeClient:
             logger.warning("WebSocket not ready; cannot cancel response")
             return
 
-        await self.ws.send(json.dumps({"type": "response.cancel"}))
+        await self.ws.send(json_codec.dumps({"type": "response.cancel"}))
         logger.info("Cancelled assistant response")
 
+    async def _on_barge_in(self, onset_ms: float) -> None:
+        # Deltas of the interrupted response still in flight are dropped in
+        # _on_audio_delta, so the cut is immediate
+        self._interrupted_response_id = self._speaking_response_id
+        self._latency.barge_in(onset_ms)
+        self.session_data["customer_data"]["interruptions"] = (
+            self.session_data["customer_data"].get("interruptions", 0) + 1
+        )
+        logger.info("Barge-in on session %s after %.0fms of caller speech", self.session_id, onset_ms)
+        if self._barge_in_callback is not None:
+            try:
+                await self._barge_in_callback()
+            except Exception as exc:  # noqa: BLE001 - the cancel below still matters
+                logger.warning("Barge-in callback failed for %s: %s", self.session_id, exc)
+        await self.cancel_response()
+
+    def _build_event_router(self) -> RealtimeEventRouter:
+        """Map Realtime server event types to their handlers."""
+        router = RealtimeEventRouter()
+        router.register("response.audio.delta", self._on_audio_delta)
+        router.register("session.updated", self._on_session_updated)
+        router.register("input_audio_buffer.speech_started", self._on_speech_started)
+        router.register("input_audio_buffer.speech_stopped", self._on_speech_stopped)
+        router.register(
+            "input_audio_buffer.transcription.delta", self._on_input_transcription_delta
+        )
+        router.register(
+            "input_audio_buffer.transcription.completed",
+            self._on_input_transcription_completed,
+        )
+        router.register(
+            "conversation.item.input_audio_transcription.delta",
+            self._on_item_transcription_delta,
+        )
+        router.register(
+            "conversation.item.input_audio_transcription.completed",
+            self._on_item_transcription_completed,
+        )
+        router.register("conversation.item.created", self._process_conversation_item_created)
+        router.register("conversation.item.delta", self._process_conversation_item_delta)
+        router.register("conversation.item.completed", self._process_conversation_item_completed)
+        router.register("response.audio_transcript.delta", self._on_assistant_transcript_delta)
+        router.register("response.audio_transcript.done", self._on_assistant_transcript_done)
+        router.register("response.output_text.delta", self._on_output_text_delta)
+        router.register("response.output_text.done", self._on_output_text_done)
+        router.register("response.text.done", self._on_text_done)
+        router.register(
+            "response.function_call_arguments.done", self._on_function_call_arguments_done
+        )
+        router.register("error", self._on_error)
+        return router
+
     async def handle_messages(self, on_audio_callback: Optional[Callable] = None):
         """
         Handle incoming messages from the Realtime API.
@@ -1123,188 +1554,231 @@ class RealtimeClient:
             on_audio_callback: Callback function for audio output
         """
         logger.info("Starting to listen for OpenAI messages")
+        self._on_audio_callback = on_audio_callback
+        dispatch = self._event_router.dispatch
         async for message in self.ws:
-            data = json.loads(message)
+            data = json_codec.loads(message)
             event_type = data.get("type")
 
-            # Log all events for debugging transcription issues
-            if event_type not in ["response.audio.delta", "input_audio_buffer.append"]:
+            # Log events for debugging transcription issues; payloads are only
+            # serialized when a debug record is actually emitted
+            if event_type not in _QUIET_EVENTS and logger.isEnabledFor(logging.DEBUG):
                 logger.debug("Received OpenAI event: %s", event_type)
-                if event_type.startswith("input_audio") or event_type.startswith(
-                    "conversation.item"
-                ):
-                    logger.debug("   Data: %s", json.dumps(data, indent=2)[:500])
-
-            # Handle different event types
-            if event_type == "session.updated":
-                # Log session configuration to verify transcription is enabled
-                session = data.get("session", {})
-                logger.debug(
-                    "Session updated - Transcription enabled: %s",
-                    session.get("input_audio_transcription") is not None,
-                )
-                logger.debug("   Voice: %s", session.get("voice"))
-                logger.debug(
-                    "   Turn detection: %s",
-                    session.get("turn_detection", {}).get("type"),
-                )
+                if event_type.startswith(("input_audio", "conversation.item")):
+                    logger.debug("   Data: %s", LazyJson(data))
+
+            await dispatch(event_type, data)
+
+    async def _on_audio_delta(self, data: Dict[str, Any]) -> None:
+        # Audio output from AI
+        response_id = data.get("response_id")
+        if self._barge_in is not None:
+            if response_id is not None and response_id == self._interrupted_response_id:
+                self._barge_in.dropped_audio(data.get("delta") or "")
+                return
+            self._speaking_response_id = response_id
+            self._barge_in.assistant_audio(data.get("delta") or "")
+        if self._awaiting_first_audio:
+            self._awaiting_first_audio = False
+            self._record_setup_stage("first_audio")
+        self._latency.response_audio()
+        audio_b64 = data.get("delta")
+        if audio_b64 and (self._transcoder is not None or self._recorder is not None):
+            audio = base64.b64decode(audio_b64)
+            if self._recorder is not None:
+                self._recorder.assistant(audio)
+            if self._transcoder is not None:
+                audio_b64 = base64.b64encode(self._transcoder.to_client(audio)).decode("ascii")
+        on_audio_callback = self._on_audio_callback
+        if audio_b64 and on_audio_callback:
+            logger.debug("Sending audio to client: %d chars", len(audio_b64))
+            await on_audio_callback(audio_b64)
+        elif not audio_b64:
+            logger.warning("No audio data in response.audio.delta event")
+        elif not on_audio_callback:
+            logger.warning("No audio callback function configured")
+
+    async def _on_speech_started(self, data: Dict[str, Any]) -> None:
+        if self._speech_started_callback is not None:
+            await self._speech_started_callback()
+
+    def _on_speech_stopped(self, data: Dict[str, Any]) -> None:
+        self._latency.speech_stopped()
+
+    def _on_session_updated(self, data: Dict[str, Any]) -> None:
+        # Log session configuration to verify transcription is enabled
+        session = data.get("session", {})
+        logger.debug(
+            "Session updated - Transcription enabled: %s",
+            session.get("input_audio_transcription") is not None,
+        )
+        logger.debug("   Voice: %s", session.get("voice"))
+        logger.debug(
+            "   Turn detection: %s",
+            session.get("turn_detection", {}).get("type"),
+        )
 
-            elif event_type == "response.audio.delta":
-                # Audio output from AI
-                audio_b64 = data.get("delta")
-                if audio_b64 and on_audio_callback:
-                    logger.debug("Sending audio to client: %d chars", len(audio_b64))
-                    await on_audio_callback(audio_b64)
-                elif not audio_b64:
-                    logger.warning("No audio data in response.audio.delta event")
-                elif not on_audio_callback:
-                    logger.warning("No audio callback function configured")
-
-            elif event_type == "input_audio_buffer.transcription.delta":
-                delta = data.get("delta")
-                if isinstance(delta, str):
-                    self._current_customer_text += delta
-                elif isinstance(delta, dict):
-                    self._current_customer_text += delta.get("transcript", "")
-                logger.debug("User speech delta: %s", delta)
-
-            elif event_type == "input_audio_buffer.transcription.completed":
-                transcript_text = (
-                    data.get("transcript") or self._current_customer_text.strip()
-                )
-                if transcript_text:
-                    logger.debug("User speech completed: %s", transcript_text)
-                    self._append_transcript_entry("customer", transcript_text)
-                    # Classify turn intent for voice and persist in conversation metadata
-                    try:
-                        metadata = SlotSelectionManager.conversation_metadata(
-                            self.conversation
-                        )
-                        intent = TurnOrchestrator.classify_intent(
-                            TurnContext(
-                                channel="voice",
-                                last_customer_text=transcript_text,
-                                metadata=metadata or {},
-                            )
-                        )
-                        if isinstance(metadata, dict):
-                            metadata["last_turn_intent"] = intent.value
-                            SlotSelectionManager.persist_conversation_metadata(
-                                self.db, self.conversation, metadata
-                            )
-                    except Exception:  # noqa: BLE001 - intent logging should never break flows
-                        logger.exception(
-                            "Failed to classify turn intent for voice conversation %s",
-                            getattr(self.conversation, "id", "unknown"),
-                        )
-                self._current_customer_text = ""
-
-            elif event_type == "conversation.item.input_audio_transcription.delta":
-                # User audio transcription delta (incremental update)
-                delta = data.get("delta")
-                item_id = data.get("item_id")
-                logger.debug(
-                    "User audio transcription delta (item %s): %s", item_id, delta
-                )
+    def _on_input_transcription_delta(self, data: Dict[str, Any]) -> None:
+        delta = data.get("delta")
+        if isinstance(delta, str):
+            self._current_customer_text += delta
+        elif isinstance(delta, dict):
+            self._current_customer_text += delta.get("transcript", "")
+        logger.debug("User speech delta: %s", delta)
+
+    def _on_input_transcription_completed(self, data: Dict[str, Any]) -> None:
+        transcript_text = data.get("transcript") or self._current_customer_text.strip()
+        if transcript_text:
+            logger.debug("User speech completed: %s", transcript_text)
+            self._append_transcript_entry("customer", transcript_text)
+            self._observe_customer_text(transcript_text)
+            self.submit_db(self._record_turn_intent, transcript_text)
+        self._current_customer_text = ""
 
-            elif event_type == "conversation.item.input_audio_transcription.completed":
-                # User audio transcription completed
-                transcript = data.get("transcript")
-                item_id = data.get("item_id")
-                logger.debug(
-                    "User audio transcription completed (item %s): %s",
-                    item_id,
-                    transcript,
-                )
-                if transcript:
-                    self._append_transcript_entry("customer", transcript)
-
-            elif event_type == "conversation.item.created":
-                logger.debug("conversation.item.created: %s", data)
-                self._process_conversation_item_created(data)
-
-            elif event_type == "conversation.item.delta":
-                logger.debug("conversation.item.delta: %s", data)
-                self._process_conversation_item_delta(data)
-
-            elif event_type == "conversation.item.completed":
-                logger.debug("conversation.item.completed: %s", data)
-                self._process_conversation_item_completed(data)
-
-            elif event_type == "response.audio_transcript.delta":
-                transcript_delta = data.get("delta") or ""
-                if transcript_delta:
-                    self._current_assistant_text += transcript_delta
-                    logger.debug("Assistant speech delta: %s", transcript_delta)
-
-            elif event_type == "response.audio_transcript.done":
-                transcript_text = (
-                    data.get("transcript") or self._current_assistant_text
-                ).strip()
-                if transcript_text:
-                    logger.debug("Assistant speech completed: %s", transcript_text)
-                    self._append_transcript_entry("assistant", transcript_text)
-                self._current_assistant_text = ""
-
-            elif event_type == "response.output_text.delta":
-                delta = data.get("delta")
-                if isinstance(delta, str):
-                    self._current_assistant_text += delta
-                elif isinstance(delta, dict):
-                    self._current_assistant_text += delta.get("text", "")
-
-            elif event_type == "response.output_text.done":
-                assistant_text = self._current_assistant_text.strip()
-                self._append_transcript_entry("assistant", assistant_text)
-                self._current_assistant_text = ""
-
-            elif event_type == "response.text.done":
-                # Legacy text response event
-                text = data.get("text")
-                self._append_transcript_entry("assistant", text)
-
-            elif event_type == "response.function_call_arguments.done":
-                # Function call from AI
-                function_name = data.get("name")
-                arguments_str = data.get("arguments")
-                arguments = json.loads(arguments_str) if arguments_str else {}
-
-                # Execute function
-                result = await self.handle_function_call(function_name, arguments)
-
-                # Send result back to AI
-                response_event = {
-                    "type": "conversation.item.create",
-                    "item": {
-                        "type": "function_call_output",
-                        "call_id": data.get("call_id"),
-                        "output": json.dumps(result),
-                    },
-                }
-                await self.ws.send(json.dumps(response_event))
-
-                # Continue the response
-                await self._request_response()
-
-            elif event_type == "error":
-                error_code = data.get("error", {}).get("code")
-
-                # Some "errors" are expected and can be ignored
-                if error_code == "response_cancel_not_active":
-                    # This happens when user interrupts after assistant already finished
-                    print("ℹ️  Interrupt received but response already completed")
-                elif error_code == "input_audio_buffer_commit_empty":
-                    # This happens when commit is sent with no audio in buffer
-                    print("ℹ️  Commit requested but audio buffer was empty")
-                elif error_code == "conversation_already_has_active_response":
-                    # This happens when multiple responses are requested simultaneously
-                    print(f"⚠️  {data.get('error', {}).get('message')}")
-                else:
-                    # Unexpected errors should be logged fully
-                    print(f"❌ Error: {data}")
+    def _on_item_transcription_delta(self, data: Dict[str, Any]) -> None:
+        # User audio transcription delta (incremental update)
+        logger.debug(
+            "User audio transcription delta (item %s): %s",
+            data.get("item_id"),
+            data.get("delta"),
+        )
+
+    def _on_item_transcription_completed(self, data: Dict[str, Any]) -> None:
+        # User audio transcription completed
+        transcript = data.get("transcript")
+        logger.debug(
+            "User audio transcription completed (item %s): %s",
+            data.get("item_id"),
+            transcript,
+        )
+        if transcript:
+            self._append_transcript_entry("customer", transcript)
+            self._observe_customer_text(transcript)
+
+    def _observe_customer_text(self, text: str) -> None:
+        if self._availability_prefetcher is not None:
+            self._availability_prefetcher.observe(text)
+
+    def _on_assistant_transcript_delta(self, data: Dict[str, Any]) -> None:
+        transcript_delta = data.get("delta") or ""
+        if transcript_delta:
+            self._current_assistant_text += transcript_delta
+            logger.debug("Assistant speech delta: %s", transcript_delta)
+
+    def _on_assistant_transcript_done(self, data: Dict[str, Any]) -> None:
+        transcript_text = (data.get("transcript") or self._current_assistant_text).strip()
+        if transcript_text:
+            logger.debug("Assistant speech completed: %s", transcript_text)
+            self._append_transcript_entry("assistant", transcript_text)
+        self._current_assistant_text = ""
+
+    def _on_output_text_delta(self, data: Dict[str, Any]) -> None:
+        delta = data.get("delta")
+        if isinstance(delta, str):
+            self._current_assistant_text += delta
+        elif isinstance(delta, dict):
+            self._current_assistant_text += delta.get("text", "")
+
+    def _on_output_text_done(self, data: Dict[str, Any]) -> None:
+        assistant_text = self._current_assistant_text.strip()
+        self._append_transcript_entry("assistant", assistant_text)
+        self._current_assistant_text = ""
+
+    def _on_text_done(self, data: Dict[str, Any]) -> None:
+        # Legacy text response event
+        self._append_transcript_entry("assistant", data.get("text"))
+
+    async def _on_function_call_arguments_done(self, data: Dict[str, Any]) -> None:
+        # Function call from AI
+        started = time.perf_counter()
+        function_name = data.get("name")
+        arguments_str = data.get("arguments")
+        arguments = json_codec.loads(arguments_str) if arguments_str else {}
+
+        # Execute function
+        result = await self.handle_function_call(function_name, arguments)
+
+        # Send result back to AI
+        response_event = {
+            "type": "conversation.item.create",
+            "item": {
+                "type": "function_call_output",
+                "call_id": data.get("call_id"),
+                "output": json_codec.dumps(result),
+            },
+        }
+        await self.ws.send(json_codec.dumps(response_event))
+        self._latency.tool_turnaround(
+            function_name or "unknown", (time.perf_counter() - started) * 1000
+        )
+
+        # Continue the response
+        await self._request_response()
+
+    def _on_error(self, data: Dict[str, Any]) -> None:
+        error_code = data.get("error", {}).get("code")
+
+        # Some "errors" are expected and can be ignored
+        if error_code == "response_cancel_not_active":
+            # This happens when user interrupts after assistant already finished
+            print("ℹ️  Interrupt received but response already completed")
+        elif error_code == "input_audio_buffer_commit_empty":
+            # This happens when commit is sent with no audio in buffer
+            print("ℹ️  Commit requested but audio buffer was empty")
+        elif error_code == "conversation_already_has_active_response":
+            # This happens when multiple responses are requested simultaneously
+            print(f"⚠️  {data.get('error', {}).get('message')}")
+        else:
+            # Unexpected errors should be logged fully
+            print(f"❌ Error: {data}")
+
+    def event_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-event-type counts and processing-time histograms for this call."""
+        return self._event_router.stats()
+
+    async def finish_recording(self) -> Optional[str]:
+        """Flush the call recording to disk and note its URL in session_data."""
+        recorder = self._recorder
+        if recorder is None:
+            return None
+        self._recorder = None
+        url = await asyncio.to_thread(recorder.close)
+        self.session_data["recording"] = recorder.stats()
+        if url:
+            self.session_data["recording_url"] = url
+        return url
 
     async def disconnect(self):
         """Close the WebSocket connection."""
+        if self._recorder is not None:
+            await self.finish_recording()
+        # Land the last transcript batch before the owner closes the DB session
+        await self.flush_db_writes()
+        if self._capture is not None:
+            capture, self._capture = self._capture, None
+            await asyncio.to_thread(capture.close)
+            logger.info("Realtime event capture for %s: %s", self.session_id, capture.stats())
+        if self._coalesce_timer is not None:
+            self._coalesce_timer.cancel()
+            self._coalesce_timer = None
+        if self._coalescer is not None:
+            logger.info("Audio coalescer stats for %s: %s", self.session_id, self._coalescer.stats())
+        if self._availability_prefetcher is not None:
+            self._availability_prefetcher.close()
+            logger.info(
+                "Availability prefetch stats for %s: %s",
+                self.session_id,
+                self._availability_prefetcher.stats(),
+            )
+        logger.info(
+            "Realtime event counts for %s: %s",
+            self.session_id,
+            {event_type: summary["count"] for event_type, summary in self.event_stats().items()},
+        )
+        if self._transcoder is not None:
+            logger.info("Telephony transcoder stats: %s", self._transcoder.stats())
+        if self._vad_gate is not None:
+            logger.info("VAD gate stats for %s: %s", self.session_id, self._vad_gate.stats())
         if self.ws:
             await self.ws.close()
             print("Disconnected from OpenAI Realtime API")
@@ -1312,6 +1786,19 @@ class RealtimeClient:
     def get_session_data(self) -> Dict[str, Any]:
         """Get collected session data for logging."""
         self._finalize_transcript_buffers()
+        self._transcript_writer.flush()
+        self.session_data["transcript_writer"] = self._transcript_writer.stats()
+        if self._vad_gate is not None:
+            self.session_data["audio_gate"] = self._vad_gate.stats()
+        if self._coalescer is not None:
+            self.session_data["audio_coalescer"] = self._coalescer.stats()
+        if self._availability_prefetcher is not None:
+            self.session_data["availability_prefetch"] = self._availability_prefetcher.stats()
+        if self._barge_in is not None:
+            self.session_data["barge_in"] = self._barge_in.stats()
+        latency = self._latency.summary()
+        if latency:
+            self.session_data["latency"] = latency
         return self.session_data
 
     def _append_transcript_entry(self, speaker: str, raw_text: Optional[str]) -> None:
@@ -1340,12 +1827,14 @@ class RealtimeClient:
             return
 
         print(f"📝 Captured transcript entry [{speaker}]: {text}")
+        spoken_at = datetime.utcnow()
         entry = {
             "speaker": speaker,
             "text": text,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": spoken_at.isoformat(),
         }
         self.session_data["transcript"].append(entry)
+        self._transcript_writer.append(speaker, text, spoken_at)
         self._last_transcript_entry = fingerprint
 
         # Optionally stream transcript entries to the connected browser client
@@ -1360,13 +1849,52 @@ class RealtimeClient:
             asyncio.create_task(self._request_response())
 
         if speaker == "customer":
-            self._record_customer_transcript_message(text)
+            self.submit_db(self._record_customer_transcript_message, text)
+
+    def _record_turn_intent(self, transcript_text: str) -> None:
+        """Classify turn intent for voice and persist in conversation metadata."""
+        try:
+            metadata = SlotSelectionManager.conversation_metadata(self.conversation)
+            intent = TurnOrchestrator.classify_intent(
+                TurnContext(
+                    channel="voice",
+                    last_customer_text=transcript_text,
+                    metadata=metadata or {},
+                )
+            )
+            if isinstance(metadata, dict):
+                metadata["last_turn_intent"] = intent.value
+                SlotSelectionManager.persist_conversation_metadata(
+                    self.db, self.conversation, metadata
+                )
+        except Exception:  # noqa: BLE001 - intent logging should never break flows
+            logger.exception(
+                "Failed to classify turn intent for voice conversation %s",
+                getattr(self.conversation, "id", "unknown"),
+            )
+
+    def _persist_transcript_batch(self, rows: List[Dict[str, Any]]) -> None:
+        if self._transcript_offset is None:
+            # A reconnect can reuse the conversation; continue its numbering
+            self._transcript_offset = next_transcript_sequence(self.db, self.conversation.id)
+        write_transcript_entries(
+            self.db, self.conversation.id, rows, offset=self._transcript_offset
+        )
 
     def _record_customer_transcript_message(self, content: str) -> None:
-        """Persist customer transcript entries and capture slot selections."""
+        """Capture slot selections from a customer utterance.
+
+        The utterance itself is persisted by the transcript writer; a message
+        row is only written as the anchor of a selection, so only while slot
+        offers are pending.
+        """
         sanitized = content.strip()
         if not sanitized:
             return
+        if not SlotSelectionManager.get_pending_slot_offers(
+            self.db, self.conversation, enforce_expiry=False
+        ):
+            return
 
         message = AnalyticsService.add_message(
             db=self.db,
@@ -1460,11 +1988,10 @@ class RealtimeClient:
             for m in getattr(self.conversation, "messages", [])
             if getattr(m, "direction", None) == "inbound"
         ]
-        if not messages:
-            return False
 
         recent_messages = messages[-5:]
         anchor_id = getattr(anchor_message, "id", None)
+        seen = {(getattr(anchor_message, "content", None) or "").strip()}
 
         for msg in reversed(recent_messages):
             if getattr(msg, "id", None) == anchor_id:
@@ -1473,9 +2000,24 @@ class RealtimeClient:
             text = content.strip()
             if not text:
                 continue
+            seen.add(text)
             if self._infer_slot_selection_from_text(msg, text):
                 return True
 
+        # Utterances from before the offers were made have no message row;
+        # they are only in the transcript
+        spoken = [
+            entry["text"]
+            for entry in self.session_data["transcript"][-10:]
+            if entry.get("speaker") == "customer"
+        ]
+        for text in reversed(spoken[-5:]):
+            if text in seen:
+                continue
+            seen.add(text)
+            if self._infer_slot_selection_from_text(anchor_message, text):
+                return True
+
         return False
 
     def _extract_time_preferences(self, text: str) -> List[int]:
@@ -1679,7 +2221,7 @@ class RealtimeClient:
             return
         self._current_assistant_text = ""
         await self.ws.send(
-            json.dumps(
+            json_codec.dumps(
                 {
                     "type": "response.create",
                     "response": {
@@ -8,6 +8,7 @@ from typing import Any, Dict, List, Literal, Optional
 AudioFormat = Literal["pcm16", "g711_ulaw", "g711_alaw"]
 DEFAULT_INPUT_AUDIO_FORMAT: AudioFormat = "pcm16"
 DEFAULT_OUTPUT_AUDIO_FORMAT: AudioFormat = "pcm16"
+G711_AUDIO_FORMATS = ("g711_ulaw", "g711_alaw")
 
 # Voice settings
 Voice = Literal["alloy", "echo", "shimmer"]
@@ -67,6 +68,8 @@ def build_voice_session_config(
     temperature: Optional[float] = None,
     input_audio_format: Optional[AudioFormat] = None,
     output_audio_format: Optional[AudioFormat] = None,
+    client_audio_format: Optional[AudioFormat] = None,
+    server_transcode: bool = True,
 ) -> Dict[str, Any]:
     """Build OpenAI Realtime session.update payload for voice channel.
 
@@ -83,11 +86,21 @@ def build_voice_session_config(
         temperature: Sampling temperature (0.0-1.0)
         input_audio_format: Input audio format
         output_audio_format: Output audio format
+        client_audio_format: Audio format on the client leg. For G.711
+            (telephony) clients the server transcodes to PCM16 @ 24 kHz when
+            ``server_transcode`` is set, otherwise the Realtime session is
+            switched to the same G.711 format and audio passes straight through.
+            Explicit input/output formats take precedence.
+        server_transcode: Transcode G.711 client audio server-side
 
     Returns:
         Session configuration dictionary for Realtime API
     """
 
+    if client_audio_format in G711_AUDIO_FORMATS and not server_transcode:
+        input_audio_format = input_audio_format or client_audio_format
+        output_audio_format = output_audio_format or client_audio_format
+
     return {
         "type": "session.update",
         "session": {
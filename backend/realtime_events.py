@@ -0,0 +1,147 @@
+"""
+Dispatch table for OpenAI Realtime server events.
+
+``RealtimeEventRouter`` maps an event ``type`` to its handler with one dict
+lookup. The same lookup returns the per-type ``EventTypeStats`` (count and
+processing-time histogram), so hot events like ``response.audio.delta`` pay
+for the type lookup, a handler call and two ``perf_counter`` reads, nothing
+more.
+
+Handlers may be plain functions or coroutines; the router checks once at
+registration time instead of on every event.
+"""
+
+import bisect
+import inspect
+import json
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
+
+EventHandler = Callable[[Dict[str, Any]], Union[None, Awaitable[None]]]
+
+# Upper bounds (ms) of the processing-time histogram buckets; the last bucket
+# is open-ended
+HISTOGRAM_BOUNDS_MS: Tuple[float, ...] = (
+    0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000,
+)
+
+
+class EventTypeStats:
+    """Counter and processing-time histogram for one event type."""
+
+    __slots__ = ("count", "errors", "total_ms", "max_ms", "buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(HISTOGRAM_BOUNDS_MS) + 1)
+
+    def observe(self, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        self.buckets[bisect.bisect_left(HISTOGRAM_BOUNDS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bucket bound containing ``fraction`` of observations."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank:
+                if index < len(HISTOGRAM_BOUNDS_MS):
+                    return HISTOGRAM_BOUNDS_MS[index]
+                break
+        return self.max_ms
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "mean_ms": round(self.total_ms / self.count, 4) if self.count else 0.0,
+            "p95_ms": self.percentile(0.95),
+            "max_ms": round(self.max_ms, 4),
+            "buckets": list(self.buckets),
+        }
+
+
+class _Route:
+    __slots__ = ("handler", "is_async", "stats")
+
+    def __init__(self, handler: Optional[EventHandler], is_async: bool) -> None:
+        self.handler = handler
+        self.is_async = is_async
+        self.stats = EventTypeStats()
+
+
+class LazyJson:
+    """Defer ``json.dumps`` until a log record is actually formatted."""
+
+    __slots__ = ("data", "limit")
+
+    def __init__(self, data: Any, limit: int = 500) -> None:
+        self.data = data
+        self.limit = limit
+
+    def __str__(self) -> str:
+        return json.dumps(self.data, indent=2, default=str)[: self.limit]
+
+
+class RealtimeEventRouter:
+    """Route Realtime events to registered handlers and time them."""
+
+    def __init__(self) -> None:
+        self._routes: Dict[str, _Route] = {}
+
+    def register(self, event_type: str, handler: EventHandler) -> None:
+        is_async = inspect.iscoroutinefunction(handler)
+        self._routes[event_type] = _Route(handler, is_async)
+
+    def on(self, event_type: str) -> Callable[[EventHandler], EventHandler]:
+        """Decorator form of ``register``."""
+
+        def decorator(handler: EventHandler) -> EventHandler:
+            self.register(event_type, handler)
+            return handler
+
+        return decorator
+
+    def handles(self, event_type: str) -> bool:
+        route = self._routes.get(event_type)
+        return route is not None and route.handler is not None
+
+    async def dispatch(self, event_type: str, data: Dict[str, Any]) -> bool:
+        """Run the handler for ``event_type``; returns False if none is registered."""
+        route = self._routes.get(event_type)
+        if route is None:
+            # Count unhandled types too, so unexpected traffic shows up in stats
+            route = self._routes[event_type] = _Route(None, False)
+        handler = route.handler
+        if handler is None:
+            route.stats.observe(0.0)
+            return False
+
+        started = time.perf_counter()
+        try:
+            if route.is_async:
+                await handler(data)
+            else:
+                handler(data)
+        except Exception:
+            route.stats.errors += 1
+            raise
+        finally:
+            route.stats.observe((time.perf_counter() - started) * 1000)
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            event_type: route.stats.summary()
+            for event_type, route in self._routes.items()
+            if route.stats.count
+        }
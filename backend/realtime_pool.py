@@ -0,0 +1,299 @@
+"""
+Pre-warmed OpenAI Realtime sessions for faster call setup.
+
+Without a pool every call pays for a TLS websocket handshake to OpenAI plus
+a ``session.update`` carrying the full prompt and tool list before the
+greeting can be requested. ``RealtimeSessionPool`` keeps a few sessions that
+are already connected and configured; ``RealtimeClient.connect`` takes one
+and goes straight to the greeting.
+
+Warm sessions are keyed by a fingerprint of their ``session.update`` payload
+and only handed to calls with the same fingerprint. A call with a different
+config (e.g. G.711 passthrough) leaves them in the pool and connects cold.
+Sessions are discarded only once they no longer match the pool's own config
+(e.g. settings were edited). The prompt's ``<current_datetime>`` block changes
+every minute, so it is left out of the fingerprint; a warm session whose
+instructions are out of date gets an instructions-only ``session.update`` as
+it is handed out instead of being thrown away. Sessions are recycled after
+``max_age_seconds`` so none hits the Realtime API's session lifetime limit
+mid-call.
+
+``call_setup_metrics`` records time-to-greeting for warm and cold setups.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+import websockets
+
+import json_codec
+from config import get_settings
+from voice_metrics import summarize_samples
+
+logger = logging.getLogger(__name__)
+settings = get_settings()
+
+REALTIME_URL = "wss://api.openai.com/v1/realtime?model=gpt-realtime-mini-2025-10-06"
+
+SessionConfigFactory = Callable[[], Dict[str, Any]]
+Connector = Callable[[], Awaitable[Any]]
+
+
+async def open_realtime_socket() -> Any:
+    """Open an authenticated websocket to the OpenAI Realtime API."""
+    headers = {
+        "Authorization": f"Bearer {settings.OPENAI_API_KEY}",
+        "OpenAI-Beta": "realtime=v1",
+    }
+    url = settings.OPENAI_REALTIME_URL or REALTIME_URL
+    logger.info("Connecting to OpenAI Realtime API: %s", url)
+    return await websockets.connect(url, extra_headers=headers)
+
+
+# Per-call part of the voice prompt (see prompts._current_datetime_prompt)
+_CURRENT_DATETIME = re.compile(r"<current_datetime>.*?</current_datetime>", re.DOTALL)
+
+
+def session_config_key(session_config: Dict[str, Any]) -> str:
+    """Fingerprint of the parts of a config that do not change from call to call."""
+    session = session_config.get("session") or {}
+    instructions = session.get("instructions")
+    if isinstance(instructions, str):
+        session_config = dict(
+            session_config,
+            session=dict(session, instructions=_CURRENT_DATETIME.sub("", instructions)),
+        )
+    return hashlib.sha1(json_codec.dumps(session_config).encode("utf-8")).hexdigest()
+
+
+def _instructions(session_config: Dict[str, Any]) -> Optional[str]:
+    return (session_config.get("session") or {}).get("instructions")
+
+
+def _is_open(ws: Any) -> bool:
+    return bool(getattr(ws, "open", True))
+
+
+class _WarmSession:
+    __slots__ = ("ws", "config_key", "instructions", "opened_at")
+
+    def __init__(
+        self, ws: Any, config_key: str, instructions: Optional[str], opened_at: float
+    ) -> None:
+        self.ws = ws
+        self.config_key = config_key
+        self.instructions = instructions
+        self.opened_at = opened_at
+
+
+class RealtimeSessionPool:
+    """Keep ``size`` connected, configured Realtime sessions ready."""
+
+    def __init__(
+        self,
+        *,
+        size: int,
+        max_age_seconds: float,
+        refresh_interval: float = 5.0,
+        max_backoff_seconds: float = 60.0,
+        connector: Connector = open_realtime_socket,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.size = size
+        self.max_age_seconds = max_age_seconds
+        self.refresh_interval = refresh_interval
+        self.max_backoff_seconds = max_backoff_seconds
+        self._connector = connector
+        self._clock = clock
+        self._config_factory: Optional[SessionConfigFactory] = None
+        self._idle: Deque[_WarmSession] = deque()
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "opened": 0,
+            "recycled": 0,
+            "stale": 0,
+            "skipped": 0,
+            "refreshed": 0,
+            "warm_failures": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and self._task is not None
+
+    def start(self, config_factory: SessionConfigFactory) -> None:
+        if self.size <= 0 or self._task is not None:
+            return
+        self._config_factory = config_factory
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._task = asyncio.create_task(self._maintain())
+        logger.info("Realtime session pool started (size=%d)", self.size)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            # The flag covers a cancel swallowed by wait_for when the wake
+            # event fires at the same moment
+            self._stopping = True
+            self._wake.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        while self._idle:
+            await self._close(self._idle.popleft())
+
+    async def acquire(self, session_config: Dict[str, Any]) -> Optional[Any]:
+        """Return a warm websocket configured with ``session_config``, if any."""
+        if not self.enabled:
+            return None
+        key = session_config_key(session_config)
+        deadline = self._clock() - self.max_age_seconds
+        skipped: List[_WarmSession] = []
+        try:
+            return await self._take(session_config, key, deadline, skipped)
+        finally:
+            # Sessions configured for other calls stay available, in order
+            self._idle.extendleft(reversed(skipped))
+
+    async def _take(
+        self,
+        session_config: Dict[str, Any],
+        key: str,
+        deadline: float,
+        skipped: List[_WarmSession],
+    ) -> Optional[Any]:
+        while self._idle:
+            warm = self._idle.popleft()
+            if warm.config_key != key:
+                self._stats["skipped"] += 1
+                skipped.append(warm)
+                continue
+            if warm.opened_at < deadline or not _is_open(warm.ws):
+                self._stats["recycled"] += 1
+                await self._close(warm)
+                continue
+            instructions = _instructions(session_config)
+            if warm.instructions != instructions:
+                # Only the date/time block differs: update it in place
+                try:
+                    await warm.ws.send(
+                        json_codec.dumps(
+                            {"type": "session.update", "session": {"instructions": instructions}}
+                        )
+                    )
+                except Exception as exc:  # noqa: BLE001
+                    logger.debug("Failed to refresh pooled Realtime session: %s", exc)
+                    self._stats["recycled"] += 1
+                    await self._close(warm)
+                    continue
+                self._stats["refreshed"] += 1
+            self._stats["hits"] += 1
+            self._wake.set()
+            return warm.ws
+        self._stats["misses"] += 1
+        self._wake.set()
+        return None
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, size=self.size, idle=len(self._idle))
+
+    async def _maintain(self) -> None:
+        backoff = 1.0
+        while not self._stopping:
+            try:
+                await self._recycle_expired()
+                while len(self._idle) < self.size:
+                    self._idle.append(await self._open_warm())
+                backoff = 1.0
+                timeout = self.refresh_interval
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001
+                self._stats["warm_failures"] += 1
+                logger.warning("Failed to pre-warm Realtime session: %s", exc)
+                timeout = backoff
+                backoff = min(backoff * 2, self.max_backoff_seconds)
+            if self._stopping:
+                break
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _session_config(self) -> Dict[str, Any]:
+        # The factory may hit the database; keep it off the event loop
+        return await asyncio.to_thread(self._config_factory)
+
+    async def _recycle_expired(self) -> None:
+        key = session_config_key(await self._session_config())
+        deadline = self._clock() - self.max_age_seconds
+        keep: List[_WarmSession] = []
+        while self._idle:
+            warm = self._idle.popleft()
+            if warm.config_key != key:
+                self._stats["stale"] += 1
+                await self._close(warm)
+            elif warm.opened_at < deadline or not _is_open(warm.ws):
+                self._stats["recycled"] += 1
+                await self._close(warm)
+            else:
+                keep.append(warm)
+        self._idle.extend(keep)
+
+    async def _open_warm(self) -> _WarmSession:
+        session_config = await self._session_config()
+        ws = await self._connector()
+        try:
+            await ws.send(json_codec.dumps(session_config))
+        except Exception:
+            await ws.close()
+            raise
+        self._stats["opened"] += 1
+        return _WarmSession(
+            ws, session_config_key(session_config), _instructions(session_config), self._clock()
+        )
+
+    @staticmethod
+    async def _close(warm: _WarmSession) -> None:
+        try:
+            await warm.ws.close()
+        except Exception as exc:  # noqa: BLE001
+            logger.debug("Error closing pooled Realtime session: %s", exc)
+
+
+class CallSetupMetrics:
+    """Recent time-to-greeting samples for warm and cold call setups."""
+
+    def __init__(self, window: int = 500) -> None:
+        self._samples: Dict[str, Dict[str, Deque[float]]] = {}
+        self._window = window
+
+    def record(self, source: str, stage: str, elapsed_ms: float) -> None:
+        stages = self._samples.setdefault(source, {})
+        stages.setdefault(stage, deque(maxlen=self._window)).append(elapsed_ms)
+
+    def summary(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        return {
+            source: {stage: summarize_samples(samples) for stage, samples in stages.items()}
+            for source, stages in self._samples.items()
+        }
+
+
+realtime_session_pool = RealtimeSessionPool(
+    size=settings.REALTIME_POOL_SIZE,
+    max_age_seconds=settings.REALTIME_POOL_MAX_AGE_SECONDS,
+)
+call_setup_metrics = CallSetupMetrics()
@@ -0,0 +1,41 @@
+"""
+Add the inbound_message_id column to inbound_message_queue.
+Run this script once against an existing Supabase database; new databases get
+the column from Base.metadata.create_all.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import text
+
+from backend.database import SessionLocal
+
+
+def add_inbound_job_message_id():
+    """Add inbound_message_queue.inbound_message_id (UUID, nullable)."""
+
+    statement = """
+        ALTER TABLE inbound_message_queue
+        ADD COLUMN IF NOT EXISTS inbound_message_id UUID NULL;
+    """
+
+    db = SessionLocal()
+    try:
+        db.execute(text(statement))
+        db.commit()
+        print("\n✅ inbound_message_queue.inbound_message_id is in place")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Error adding column: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Adding inbound job message id column...")
+    add_inbound_job_message_id()
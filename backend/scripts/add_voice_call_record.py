@@ -0,0 +1,41 @@
+"""
+Add the call_record column to voice_call_details.
+Run this script once against an existing Supabase database; new databases get
+the column from Base.metadata.create_all.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from sqlalchemy import text
+
+from backend.database import SessionLocal
+
+
+def add_voice_call_record():
+    """Add voice_call_details.call_record (BYTEA, nullable)."""
+
+    statement = """
+        ALTER TABLE voice_call_details
+        ADD COLUMN IF NOT EXISTS call_record BYTEA NULL;
+    """
+
+    db = SessionLocal()
+    try:
+        db.execute(text(statement))
+        db.commit()
+        print("\n✅ voice_call_details.call_record is in place")
+    except Exception as e:
+        db.rollback()
+        print(f"\n❌ Error adding column: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    print("Adding voice call record column...")
+    add_voice_call_record()
@@ -0,0 +1,51 @@
+"""
+Replay a captured Realtime session through RealtimeClient and print timings.
+
+Captures are written when VOICE_EVENT_CAPTURE_ENABLED is set. Captured tool
+calls execute again: calendar calls go to an in-memory mock calendar unless
+--live-calendar is passed, and database writes go to the configured database,
+so point DATABASE_URL at a scratch database.
+
+Usage:
+    python scripts/replay_realtime_capture.py captures/<session>.jsonl.gz
+    python scripts/replay_realtime_capture.py <capture> --speed 0   # as fast as possible
+    python scripts/replay_realtime_capture.py <capture> --live-calendar  # real bookings!
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add backend directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from realtime_capture import replay_capture
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("capture", help="Path to a .jsonl or .jsonl.gz capture")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1.0,
+        help="Playback speed multiplier (1 = recorded pace, 0 = no pacing)",
+    )
+    parser.add_argument(
+        "--live-calendar",
+        action="store_true",
+        help="Run replayed tool calls against the configured calendar "
+        "(creates, moves and cancels real appointments)",
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        replay_capture(args.capture, speed=args.speed, live_calendar=args.live_calendar)
+    )
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+"""
+Registry of live voice sessions shared across uvicorn workers and nodes.
+
+A websocket lives in exactly one worker process, so a process-local dict of
+connections cannot answer "which calls are live?" or route "hang up session
+X" once voice runs on more than one worker behind a load balancer.
+``SessionRegistry`` records every session with the worker that owns it and
+keeps it alive with heartbeats; commands for a session are written to a
+shared channel and run by the owning worker.
+
+Backends (``SESSION_REGISTRY_BACKEND``):
+- ``database``: the ``voice_sessions`` / ``voice_session_commands`` tables,
+  shared by every worker pointed at the same database
+- ``memory``: process-local, for single-worker development and tests
+
+Backends are synchronous (SQLAlchemy); the registry runs them in worker
+threads. Commands for a session owned by this worker skip the backend.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from config import get_settings
+from database import SessionLocal, VoiceSessionCommand, VoiceSessionRecord
+
+logger = logging.getLogger(__name__)
+
+# (command, payload) -> None; runs on the owning worker's event loop
+CommandHandler = Callable[[str, Dict[str, Any]], Awaitable[None]]
+# (session_id, command, payload)
+PendingCommand = Tuple[str, str, Dict[str, Any]]
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class InMemorySessionBackend:
+    """Process-local backend; only sees this worker's sessions."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, Dict[str, Any]] = {}
+        self._commands: List[PendingCommand] = []
+
+    def register(
+        self,
+        session_id: str,
+        worker_id: str,
+        conversation_id: Optional[str],
+        details: Dict[str, Any],
+    ) -> None:
+        now = datetime.utcnow()
+        with self._lock:
+            self._sessions[session_id] = {
+                "session_id": session_id,
+                "worker_id": worker_id,
+                "conversation_id": conversation_id,
+                "details": details,
+                "started_at": now,
+                "heartbeat_at": now,
+            }
+
+    def unregister(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def heartbeat(self, worker_id: str, session_ids: List[str]) -> None:
+        now = datetime.utcnow()
+        with self._lock:
+            for session_id in session_ids:
+                record = self._sessions.get(session_id)
+                if record is not None and record["worker_id"] == worker_id:
+                    record["heartbeat_at"] = now
+
+    def reap_stale(self, stale_after_seconds: float) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        with self._lock:
+            stale = [sid for sid, r in self._sessions.items() if r["heartbeat_at"] < cutoff]
+            for session_id in stale:
+                del self._sessions[session_id]
+        return len(stale)
+
+    def list_active(self, stale_after_seconds: float) -> List[Dict[str, Any]]:
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        with self._lock:
+            return [dict(r) for r in self._sessions.values() if r["heartbeat_at"] >= cutoff]
+
+    def owner_of(self, session_id: str) -> Optional[str]:
+        with self._lock:
+            record = self._sessions.get(session_id)
+            return record["worker_id"] if record else None
+
+    def enqueue_command(self, session_id: str, command: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._commands.append((session_id, command, payload))
+
+    def claim_commands(self, session_ids: List[str]) -> List[PendingCommand]:
+        wanted = set(session_ids)
+        with self._lock:
+            claimed = [c for c in self._commands if c[0] in wanted]
+            self._commands = [c for c in self._commands if c[0] not in wanted]
+        return claimed
+
+
+class DatabaseSessionBackend:
+    """Backend on the ``voice_sessions`` and ``voice_session_commands`` tables."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal) -> None:
+        self._session_factory = session_factory
+
+    def register(
+        self,
+        session_id: str,
+        worker_id: str,
+        conversation_id: Optional[str],
+        details: Dict[str, Any],
+    ) -> None:
+        now = datetime.utcnow()
+        with self._session_factory() as db:
+            record = db.get(VoiceSessionRecord, session_id)
+            if record is None:
+                record = VoiceSessionRecord(session_id=session_id)
+                db.add(record)
+            record.worker_id = worker_id
+            record.conversation_id = conversation_id
+            record.status = "active"
+            record.details = details
+            record.started_at = now
+            record.heartbeat_at = now
+            record.ended_at = None
+            db.commit()
+
+    def unregister(self, session_id: str) -> None:
+        with self._session_factory() as db:
+            db.query(VoiceSessionRecord).filter(
+                VoiceSessionRecord.session_id == session_id
+            ).update(
+                {"status": "ended", "ended_at": datetime.utcnow()},
+                synchronize_session=False,
+            )
+            # Undelivered commands for an ended call are moot
+            db.query(VoiceSessionCommand).filter(
+                VoiceSessionCommand.session_id == session_id,
+                VoiceSessionCommand.status == "pending",
+            ).update({"status": "expired"}, synchronize_session=False)
+            db.commit()
+
+    def heartbeat(self, worker_id: str, session_ids: List[str]) -> None:
+        if not session_ids:
+            return
+        with self._session_factory() as db:
+            db.query(VoiceSessionRecord).filter(
+                VoiceSessionRecord.session_id.in_(session_ids),
+                VoiceSessionRecord.worker_id == worker_id,
+            ).update({"heartbeat_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+
+    def reap_stale(self, stale_after_seconds: float) -> int:
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        with self._session_factory() as db:
+            count = (
+                db.query(VoiceSessionRecord)
+                .filter(
+                    VoiceSessionRecord.status == "active",
+                    VoiceSessionRecord.heartbeat_at < cutoff,
+                )
+                .update(
+                    {"status": "ended", "ended_at": datetime.utcnow()},
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            return count
+
+    def list_active(self, stale_after_seconds: float) -> List[Dict[str, Any]]:
+        cutoff = datetime.utcnow() - timedelta(seconds=stale_after_seconds)
+        with self._session_factory() as db:
+            records = (
+                db.query(VoiceSessionRecord)
+                .filter(
+                    VoiceSessionRecord.status == "active",
+                    VoiceSessionRecord.heartbeat_at >= cutoff,
+                )
+                .order_by(VoiceSessionRecord.started_at)
+                .all()
+            )
+            return [
+                {
+                    "session_id": r.session_id,
+                    "worker_id": r.worker_id,
+                    "conversation_id": str(r.conversation_id) if r.conversation_id else None,
+                    "details": dict(r.details or {}),
+                    "started_at": r.started_at,
+                    "heartbeat_at": r.heartbeat_at,
+                }
+                for r in records
+            ]
+
+    def owner_of(self, session_id: str) -> Optional[str]:
+        with self._session_factory() as db:
+            record = db.get(VoiceSessionRecord, session_id)
+            if record is None or record.status != "active":
+                return None
+            return record.worker_id
+
+    def enqueue_command(self, session_id: str, command: str, payload: Dict[str, Any]) -> None:
+        with self._session_factory() as db:
+            db.add(VoiceSessionCommand(session_id=session_id, command=command, payload=payload))
+            db.commit()
+
+    def claim_commands(self, session_ids: List[str]) -> List[PendingCommand]:
+        if not session_ids:
+            return []
+        with self._session_factory() as db:
+            rows = (
+                db.query(VoiceSessionCommand)
+                .filter(
+                    VoiceSessionCommand.session_id.in_(session_ids),
+                    VoiceSessionCommand.status == "pending",
+                )
+                .order_by(VoiceSessionCommand.created_at)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            claimed: List[PendingCommand] = []
+            now = datetime.utcnow()
+            for row in rows:
+                # Guarded update: only one poller wins a command on SQLite too
+                won = (
+                    db.query(VoiceSessionCommand)
+                    .filter(
+                        VoiceSessionCommand.id == row.id,
+                        VoiceSessionCommand.status == "pending",
+                    )
+                    .update(
+                        {"status": "delivered", "delivered_at": now},
+                        synchronize_session=False,
+                    )
+                )
+                if won:
+                    claimed.append((row.session_id, row.command, dict(row.payload or {})))
+            db.commit()
+            return claimed
+
+
+class SessionRegistry:
+    """Track this worker's live sessions in a shared backend."""
+
+    def __init__(
+        self,
+        backend: Any,
+        *,
+        worker_id: Optional[str] = None,
+        poll_seconds: float = 1.0,
+        heartbeat_seconds: float = 5.0,
+        stale_after_seconds: float = 30.0,
+    ) -> None:
+        self.backend = backend
+        self.worker_id = worker_id or default_worker_id()
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.stale_after_seconds = stale_after_seconds
+        self._handlers: Dict[str, CommandHandler] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._last_heartbeat = 0.0
+        self._stats = {"commands_local": 0, "commands_remote": 0, "commands_received": 0}
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._stopping = False
+        self._task = asyncio.create_task(self._run(), name="session-registry")
+        logger.info("Session registry started for worker %s", self.worker_id)
+
+    async def stop(self) -> None:
+        self._stopping = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):  # noqa: BLE001
+                pass
+            self._task = None
+
+    async def register(
+        self,
+        session_id: str,
+        *,
+        on_command: CommandHandler,
+        conversation_id: Any = None,
+        details: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self._handlers[session_id] = on_command
+        await asyncio.to_thread(
+            self.backend.register,
+            session_id,
+            self.worker_id,
+            str(conversation_id) if conversation_id else None,
+            details or {},
+        )
+
+    async def unregister(self, session_id: str) -> None:
+        self._handlers.pop(session_id, None)
+        await asyncio.to_thread(self.backend.unregister, session_id)
+
+    async def send_command(
+        self, session_id: str, command: str, payload: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """Deliver ``command`` to the worker owning ``session_id``.
+
+        Returns False when no live session has that ID.
+        """
+        payload = payload or {}
+        handler = self._handlers.get(session_id)
+        if handler is not None:
+            self._stats["commands_local"] += 1
+            await handler(command, payload)
+            return True
+        owner = await asyncio.to_thread(self.backend.owner_of, session_id)
+        if owner is None:
+            return False
+        await asyncio.to_thread(self.backend.enqueue_command, session_id, command, payload)
+        self._stats["commands_remote"] += 1
+        return True
+
+    async def list_sessions(self) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.backend.list_active, self.stale_after_seconds)
+
+    def local_session_ids(self) -> List[str]:
+        return list(self._handlers)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, worker_id=self.worker_id, local_sessions=len(self._handlers))
+
+    async def poll_once(self) -> int:
+        """Heartbeat if due and run any commands for this worker's sessions."""
+        session_ids = self.local_session_ids()
+        loop = asyncio.get_running_loop()
+        if loop.time() - self._last_heartbeat >= self.heartbeat_seconds:
+            self._last_heartbeat = loop.time()
+            await asyncio.to_thread(self.backend.heartbeat, self.worker_id, session_ids)
+            reaped = await asyncio.to_thread(self.backend.reap_stale, self.stale_after_seconds)
+            if reaped:
+                logger.info("Reaped %d voice sessions with stale heartbeats", reaped)
+
+        commands = await asyncio.to_thread(self.backend.claim_commands, session_ids)
+        for session_id, command, payload in commands:
+            handler = self._handlers.get(session_id)
+            if handler is None:
+                continue
+            self._stats["commands_received"] += 1
+            try:
+                await handler(command, payload)
+            except Exception as exc:  # noqa: BLE001 - one bad command must not stop polling
+                logger.error(
+                    "Command %s for session %s failed: %s", command, session_id, exc, exc_info=True
+                )
+        return len(commands)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await self.poll_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # noqa: BLE001 - keep the registry alive
+                logger.warning("Session registry poll failed: %s", exc)
+            await asyncio.sleep(self.poll_seconds)
+
+
+def build_session_backend(name: str) -> Any:
+    if name == "memory":
+        return InMemorySessionBackend()
+    if name != "database":
+        logger.warning("Unknown SESSION_REGISTRY_BACKEND %r; using database", name)
+    return DatabaseSessionBackend()
+
+
+_settings = get_settings()
+
+session_registry = SessionRegistry(
+    build_session_backend(_settings.SESSION_REGISTRY_BACKEND),
+    poll_seconds=_settings.SESSION_REGISTRY_POLL_SECONDS,
+    heartbeat_seconds=_settings.SESSION_REGISTRY_HEARTBEAT_SECONDS,
+    stale_after_seconds=_settings.SESSION_REGISTRY_STALE_SECONDS,
+)
@@ -0,0 +1,200 @@
+"""
+Per-conversation coalescing of inbound message bursts.
+
+Guests often send two or three texts in quick succession ("hi", "can I book
+botox", "tomorrow?"). Rather than running one AI turn per message, every
+request that lands inside the debounce window joins the same burst and the
+most recent arrival runs a single turn over the whole conversation history.
+All requests in the burst receive that one reply.
+
+A message that arrives while the turn is still generating supersedes it: the
+generating request notices before it persists/sends anything and hands the
+burst over to the newer arrival, so replies are never interleaved. Arrivals
+join the burst before any other per-message work (``on_arrival``), so a
+message whose recording queues behind the in-flight turn still supersedes it.
+
+The coalescer is in-memory and thread based (request handlers run in the
+FastAPI threadpool). With multiple workers, bursts are only merged when the
+messages reach the same process.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Returned by a turn function when claim() failed and a newer arrival took over.
+SUPERSEDED = object()
+
+
+class _Burst:
+    """Mutable state shared by every request that joined one burst."""
+
+    __slots__ = ("seq", "arrivals", "future")
+
+    def __init__(self) -> None:
+        self.seq = 0
+        self.arrivals = 0
+        self.future: Future = Future()
+
+
+class InboundBurstCoalescer:
+    """
+    Debounce inbound messages per conversation and run one turn per burst.
+
+    Usage::
+
+        def turn(claim):
+            reply = generate_reply()
+            if not claim():
+                return SUPERSEDED   # a newer message arrived; drop this reply
+            return persist_and_send(reply)
+
+        result = coalescer.run(conversation_id, turn)
+
+    ``claim()`` atomically closes the burst if the caller is still the latest
+    arrival. After a successful claim, later messages start a new burst.
+
+    A turn that has already committed side effects the guest must hear about
+    (a booking, say) may ignore a failed claim and return its result anyway.
+    That reply goes to its own caller only; the newer arrival still runs the
+    burst's turn, with the committed reply in its history.
+    """
+
+    def __init__(self, window_seconds: float = 1.5):
+        self.window_seconds = max(0.0, float(window_seconds))
+        self._lock = threading.Lock()
+        self._bursts: Dict[Hashable, _Burst] = {}
+        self._stats = {
+            "messages": 0,
+            "turns": 0,
+            "merged_messages": 0,
+            "superseded_turns": 0,
+            "committed_turns": 0,
+        }
+
+    def run(
+        self,
+        key: Hashable,
+        turn: Callable[[Callable[[], bool]], Any],
+        on_arrival: Optional[Callable[[], Any]] = None,
+    ) -> Any:
+        """
+        Join the burst for ``key`` and return the burst's single turn result.
+
+        ``on_arrival`` runs right after joining, before the debounce window
+        (e.g. recording the message, which may wait behind the turn it is
+        superseding). If it raises while this call is the latest arrival, the
+        burst fails with that error, since nobody is left to run its turn.
+
+        Blocks the calling thread for the debounce window. If a newer message
+        joins the burst in the meantime, this call waits for (and returns) the
+        result produced on behalf of the newer message instead.
+        """
+        with self._lock:
+            burst = self._bursts.get(key)
+            if burst is None:
+                burst = _Burst()
+                self._bursts[key] = burst
+            burst.seq += 1
+            burst.arrivals += 1
+            my_seq = burst.seq
+            self._stats["messages"] += 1
+
+        if on_arrival is not None:
+            try:
+                on_arrival()
+            except Exception as exc:
+                with self._lock:
+                    still_latest = burst.seq == my_seq
+                    if still_latest and self._bursts.get(key) is burst:
+                        del self._bursts[key]
+                if still_latest and not burst.future.done():
+                    burst.future.set_exception(exc)
+                raise
+
+        if self.window_seconds:
+            time.sleep(self.window_seconds)
+
+        with self._lock:
+            is_leader = burst.seq == my_seq
+
+        if not is_leader:
+            return burst.future.result()
+
+        lost_claim = False
+
+        def claim() -> bool:
+            nonlocal lost_claim
+            with self._lock:
+                if burst.seq != my_seq:
+                    lost_claim = True
+                    return False
+                if self._bursts.get(key) is burst:
+                    del self._bursts[key]
+                self._stats["turns"] += 1
+                self._stats["merged_messages"] += burst.arrivals - 1
+                return True
+
+        try:
+            result = turn(claim)
+        except Exception as exc:
+            with self._lock:
+                still_leader = burst.seq == my_seq
+                if still_leader and self._bursts.get(key) is burst:
+                    del self._bursts[key]
+            if not still_leader:
+                # A newer arrival now owns the burst; defer to its outcome.
+                return burst.future.result()
+            if not burst.future.done():
+                burst.future.set_exception(exc)
+            raise
+
+        if result is not SUPERSEDED and lost_claim:
+            with self._lock:
+                self._stats["committed_turns"] += 1
+            logger.info(
+                "Kept committed turn for %s although a newer inbound message arrived",
+                key,
+            )
+            return result
+
+        # Turns that never called claim() still have to close the burst.
+        if result is not SUPERSEDED and self._bursts.get(key) is burst:
+            if not claim():
+                result = SUPERSEDED
+
+        if result is SUPERSEDED:
+            with self._lock:
+                self._stats["superseded_turns"] += 1
+            logger.info(
+                "Discarded in-flight turn for %s; newer inbound message arrived",
+                key,
+            )
+            return burst.future.result()
+
+        if not burst.future.done():
+            burst.future.set_result(result)
+        if burst.arrivals > 1:
+            logger.info(
+                "Coalesced %d inbound messages into one turn for %s",
+                burst.arrivals,
+                key,
+            )
+        return result
+
+    def pending_count(self, key: Optional[Hashable] = None) -> int:
+        """Number of open bursts (or arrivals in the burst for ``key``)."""
+        with self._lock:
+            if key is None:
+                return len(self._bursts)
+            burst = self._bursts.get(key)
+            return burst.arrivals if burst else 0
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of coalescing counters."""
+        with self._lock:
+            return dict(self._stats)
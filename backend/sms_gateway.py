@@ -0,0 +1,159 @@
+"""
+Outbound SMS delivery and Twilio webhook verification.
+
+``get_sms_sender()`` returns a process-wide sender. The Twilio sender reuses a
+single REST client whose HTTP session keeps connections alive between sends.
+The mock sender is used when Twilio credentials are missing (local
+development, throughput tests) or when ``SMS_SENDER_BACKEND=mock``.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Mapping, Optional
+from uuid import uuid4
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# SMSDetails.delivery_status only accepts these values
+_DELIVERY_STATUSES = {"queued", "sent", "delivered", "failed", "undelivered"}
+
+
+def _normalize_status(status: Optional[str]) -> str:
+    if status in _DELIVERY_STATUSES:
+        return status
+    # Twilio also reports accepted/scheduled/sending before "sent"
+    return "queued"
+
+
+class TwilioSmsSender:
+    """Send SMS through the Twilio REST API with a pooled HTTP client."""
+
+    def __init__(
+        self,
+        account_sid: str,
+        auth_token: str,
+        from_number: str,
+        *,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+    ):
+        from twilio.http.http_client import TwilioHttpClient
+        from twilio.rest import Client
+
+        self.from_number = from_number
+        self._client = Client(
+            account_sid,
+            auth_token,
+            http_client=TwilioHttpClient(
+                pool_connections=True, timeout=timeout, max_retries=max_retries
+            ),
+        )
+
+    def send(self, to_number: str, body: str) -> Dict[str, Any]:
+        message = self._client.messages.create(
+            to=to_number, from_=self.from_number, body=body
+        )
+        return {
+            "from_number": self.from_number,
+            "to_number": to_number,
+            "provider_message_id": message.sid,
+            "delivery_status": _normalize_status(message.status),
+        }
+
+
+class MockSmsSender:
+    """In-memory stand-in for Twilio with optional simulated latency."""
+
+    def __init__(self, from_number: str, latency_seconds: float = 0.0):
+        self.from_number = from_number
+        self.latency_seconds = latency_seconds
+        self._lock = threading.Lock()
+        self.sent: List[Dict[str, Any]] = []
+
+    def send(self, to_number: str, body: str) -> Dict[str, Any]:
+        if self.latency_seconds:
+            time.sleep(self.latency_seconds)
+        result = {
+            "from_number": self.from_number,
+            "to_number": to_number,
+            "provider_message_id": f"SM{uuid4().hex}",
+            "delivery_status": "sent",
+        }
+        with self._lock:
+            self.sent.append({**result, "body": body})
+        return result
+
+
+_sender = None
+_sender_lock = threading.Lock()
+
+
+def get_sms_sender():
+    """Return the configured process-wide SMS sender."""
+    global _sender
+    if _sender is not None:
+        return _sender
+
+    with _sender_lock:
+        if _sender is None:
+            settings = get_settings()
+            from_number = settings.TWILIO_PHONE_NUMBER or settings.MED_SPA_PHONE
+            backend = settings.SMS_SENDER_BACKEND
+            has_credentials = bool(
+                settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN
+            )
+            if backend == "twilio" or (backend == "auto" and has_credentials):
+                _sender = TwilioSmsSender(
+                    settings.TWILIO_ACCOUNT_SID,
+                    settings.TWILIO_AUTH_TOKEN,
+                    from_number,
+                )
+            else:
+                if backend == "auto":
+                    logger.info("Twilio credentials missing; using mock SMS sender")
+                _sender = MockSmsSender(
+                    from_number,
+                    latency_seconds=settings.SMS_MOCK_LATENCY_SECONDS,
+                )
+    return _sender
+
+
+def validate_twilio_signature(
+    url: str,
+    params: Mapping[str, Any],
+    signature: Optional[str],
+    auth_token: Optional[str] = None,
+    skip_check: Optional[bool] = None,
+) -> bool:
+    """
+    Check the X-Twilio-Signature header for a webhook request.
+
+    Fails closed: without an auth token every request is rejected, unless
+    ``TWILIO_SKIP_SIGNATURE_CHECK`` is set for local development and the
+    mock sender, in which case the check is skipped with a warning.
+    """
+    settings = get_settings()
+    if skip_check is None:
+        skip_check = settings.TWILIO_SKIP_SIGNATURE_CHECK
+    if skip_check:
+        logger.warning(
+            "TWILIO_SKIP_SIGNATURE_CHECK is set; accepting unsigned Twilio webhook"
+        )
+        return True
+
+    token = auth_token if auth_token is not None else settings.TWILIO_AUTH_TOKEN
+    if not token:
+        logger.error(
+            "TWILIO_AUTH_TOKEN is not configured; rejecting Twilio webhook "
+            "(set TWILIO_SKIP_SIGNATURE_CHECK=true for local development)"
+        )
+        return False
+    if not signature:
+        return False
+
+    from twilio.request_validator import RequestValidator
+
+    return RequestValidator(token).validate(url, dict(params), signature)
@@ -0,0 +1,218 @@
+"""
+G.711 transcoding and 8 kHz <-> 24 kHz resampling for telephony sessions.
+
+Phone media streams carry 8 kHz G.711 (mu-law or A-law, one byte per
+sample). The Realtime session runs PCM16 at 24 kHz. ``TelephonyTranscoder``
+bridges the two so the client leg carries 64 kbit/s instead of 384 kbit/s.
+
+Everything is vectorized with NumPy:
+- decode is a 256-entry table lookup, encode a 65536-entry lookup indexed by
+  the raw int16 bit pattern (both tables are built once at import)
+- resampling by 3 uses a windowed-sinc low-pass FIR; upsampling runs as three
+  polyphase sub-filters so no zero-stuffed samples are convolved
+
+Resamplers keep filter history between calls, so chunk boundaries are
+seamless and chunk sizes are arbitrary.
+"""
+
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from realtime_config import G711_AUDIO_FORMATS, AudioFormat
+
+TELEPHONY_SAMPLE_RATE = 8000
+REALTIME_SAMPLE_RATE = 24000
+RESAMPLE_FACTOR = REALTIME_SAMPLE_RATE // TELEPHONY_SAMPLE_RATE
+
+_ULAW_BIAS = 0x84
+_ULAW_CLIP = 8159
+_ULAW_ENCODE_BIAS = 0x21
+
+
+# ==================== G.711 lookup tables ====================
+
+
+def _build_ulaw_decode_table() -> np.ndarray:
+    codes = ~np.arange(256, dtype=np.int32) & 0xFF
+    sign = codes & 0x80
+    exponent = (codes >> 4) & 0x07
+    mantissa = codes & 0x0F
+    magnitude = (((mantissa << 3) + _ULAW_BIAS) << exponent) - _ULAW_BIAS
+    return np.where(sign != 0, -magnitude, magnitude).astype(np.int16)
+
+
+def _build_ulaw_encode_table() -> np.ndarray:
+    # 14-bit reference encoder (Sun g711.c), bit-exact with audioop.lin2ulaw
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    pcm = samples >> 2
+    mask = np.where(pcm < 0, 0x7F, 0xFF)
+    pcm = np.minimum(np.abs(pcm), _ULAW_CLIP) + _ULAW_ENCODE_BIAS
+    segment_ends = np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF])
+    segment = np.searchsorted(segment_ends, pcm)
+    codes = (np.minimum(segment, 7) << 4) | ((pcm >> (np.minimum(segment, 7) + 1)) & 0x0F)
+    codes = np.where(segment >= 8, 0x7F, codes) ^ mask
+    return _index_by_bit_pattern(samples, codes)
+
+
+def _build_alaw_decode_table() -> np.ndarray:
+    codes = np.arange(256, dtype=np.int32) ^ 0x55
+    segment = (codes & 0x70) >> 4
+    value = (codes & 0x0F) << 4
+    value = np.where(segment == 0, value + 8, value + 0x108)
+    value = np.where(segment > 1, value << np.maximum(segment - 1, 0), value)
+    return np.where(codes & 0x80, value, -value).astype(np.int16)
+
+
+def _build_alaw_encode_table() -> np.ndarray:
+    samples = np.arange(-32768, 32768, dtype=np.int32)
+    pcm = samples >> 3
+    mask = np.where(pcm >= 0, 0xD5, 0x55)
+    pcm = np.where(pcm >= 0, pcm, -pcm - 1)
+    segment_ends = np.array([0x1F, 0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF])
+    segment = np.searchsorted(segment_ends, pcm)
+    shift = np.where(segment < 2, 1, segment)
+    codes = (np.minimum(segment, 7) << 4) | ((pcm >> shift) & 0x0F)
+    codes = np.where(segment >= 8, 0x7F, codes) ^ mask
+    return _index_by_bit_pattern(samples, codes)
+
+
+def _index_by_bit_pattern(samples: np.ndarray, codes: np.ndarray) -> np.ndarray:
+    """Reorder so the table is indexed by ``int16.view(uint16)``."""
+    table = np.empty(65536, dtype=np.uint8)
+    table[samples.astype(np.int16).view(np.uint16)] = codes
+    return table
+
+
+_DECODE_TABLES = {
+    "g711_ulaw": _build_ulaw_decode_table(),
+    "g711_alaw": _build_alaw_decode_table(),
+}
+_ENCODE_TABLES = {
+    "g711_ulaw": _build_ulaw_encode_table(),
+    "g711_alaw": _build_alaw_encode_table(),
+}
+
+
+def g711_decode(data, codec: AudioFormat) -> np.ndarray:
+    """Decode G.711 bytes to int16 samples."""
+    return _DECODE_TABLES[codec][np.frombuffer(data, dtype=np.uint8)]
+
+
+def g711_encode(samples: np.ndarray, codec: AudioFormat) -> bytes:
+    """Encode int16 samples to G.711 bytes."""
+    return _ENCODE_TABLES[codec][samples.astype(np.int16, copy=False).view(np.uint16)].tobytes()
+
+
+# ==================== Resampling ====================
+
+
+def _lowpass_taps(num_taps: int, cutoff: float) -> np.ndarray:
+    """Hamming-windowed sinc; ``cutoff`` is a fraction of the sample rate."""
+    n = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = 2 * cutoff * np.sinc(2 * cutoff * n) * np.hamming(num_taps)
+    return taps / taps.sum()
+
+
+# 48 taps at 24 kHz, cutoff 3.6 kHz (just under the 4 kHz telephony Nyquist)
+_FILTER_TAPS = _lowpass_taps(48, 3600 / REALTIME_SAMPLE_RATE)
+
+
+def _to_int16(samples: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(samples), -32768, 32767).astype(np.int16)
+
+
+class Upsampler:
+    """Stream 8 kHz int16 samples up to 24 kHz."""
+
+    def __init__(self, taps: np.ndarray = _FILTER_TAPS, factor: int = RESAMPLE_FACTOR):
+        self.factor = factor
+        # Polyphase components, scaled by the factor to keep unity gain
+        self._phases = [taps[phase::factor] * factor for phase in range(factor)]
+        self._history = np.zeros(len(self._phases[0]) - 1, dtype=np.float64)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if samples.size == 0:
+            return np.empty(0, dtype=np.int16)
+        buffer = np.concatenate((self._history, samples.astype(np.float64)))
+        output = np.empty((samples.size, self.factor), dtype=np.float64)
+        for phase, sub_taps in enumerate(self._phases):
+            output[:, phase] = np.convolve(buffer, sub_taps, mode="valid")
+        self._history = buffer[buffer.size - self._history.size :]
+        return _to_int16(output.ravel())
+
+
+class Downsampler:
+    """Stream 24 kHz int16 samples down to 8 kHz."""
+
+    def __init__(self, taps: np.ndarray = _FILTER_TAPS, factor: int = RESAMPLE_FACTOR):
+        self.factor = factor
+        self._taps = taps
+        self._history = np.zeros(len(taps) - 1, dtype=np.float64)
+        # Samples held back until a full group of ``factor`` arrives
+        self._pending = np.empty(0, dtype=np.float64)
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        data = np.concatenate((self._pending, samples.astype(np.float64)))
+        usable = data.size - data.size % self.factor
+        self._pending = data[usable:]
+        if usable == 0:
+            return np.empty(0, dtype=np.int16)
+        buffer = np.concatenate((self._history, data[:usable]))
+        filtered = np.convolve(buffer, self._taps, mode="valid")
+        self._history = buffer[buffer.size - self._history.size :]
+        return _to_int16(filtered[:: self.factor])
+
+
+# ==================== Session transcoder ====================
+
+
+class TelephonyTranscoder:
+    """Per-session G.711 8 kHz <-> PCM16 24 kHz bridge with CPU accounting."""
+
+    def __init__(self, codec: AudioFormat):
+        if codec not in G711_AUDIO_FORMATS:
+            raise ValueError(f"Unsupported telephony codec: {codec}")
+        self.codec = codec
+        self._upsampler = Upsampler()
+        self._downsampler = Downsampler()
+        self._stats = {
+            "inbound_bytes": 0,
+            "upstream_bytes": 0,
+            "outbound_bytes": 0,
+            "client_bytes": 0,
+            "cpu_ms": 0.0,
+        }
+
+    def to_upstream(self, data) -> bytes:
+        """Client G.711 @ 8 kHz -> PCM16 @ 24 kHz for the Realtime API."""
+        started = time.thread_time()
+        pcm = self._upsampler.process(g711_decode(data, self.codec)).tobytes()
+        self._account(started, "inbound_bytes", len(data), "upstream_bytes", len(pcm))
+        return pcm
+
+    def to_client(self, pcm: bytes) -> bytes:
+        """Realtime PCM16 @ 24 kHz -> G.711 @ 8 kHz for the client."""
+        started = time.thread_time()
+        samples = np.frombuffer(pcm, dtype="<i2")
+        encoded = g711_encode(self._downsampler.process(samples), self.codec)
+        self._account(started, "outbound_bytes", len(pcm), "client_bytes", len(encoded))
+        return encoded
+
+    def _account(self, started: float, in_key: str, in_bytes: int, out_key: str, out_bytes: int) -> None:
+        self._stats["cpu_ms"] += (time.thread_time() - started) * 1000
+        self._stats[in_key] += in_bytes
+        self._stats[out_key] += out_bytes
+
+    def stats(self) -> Dict[str, float]:
+        return dict(self._stats, codec=self.codec)
+
+
+def build_transcoder(
+    client_format: Optional[AudioFormat], upstream_format: Optional[AudioFormat]
+) -> Optional[TelephonyTranscoder]:
+    """Return a transcoder when the client leg is G.711 and upstream is PCM16."""
+    if client_format in G711_AUDIO_FORMATS and upstream_format in (None, "pcm16"):
+        return TelephonyTranscoder(client_format)
+    return None
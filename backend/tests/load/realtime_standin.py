@@ -0,0 +1,328 @@
+"""
+Local stand-in for the OpenAI Realtime API, for voice load tests.
+
+Implements the subset of the Realtime protocol that ``RealtimeClient`` uses,
+so the backend can run full voice calls with no OpenAI connection:
+
+- ``session.created`` on connect; ``session.update`` answered with
+  ``session.updated``
+- ``input_audio_buffer.append`` / ``commit``: ``speech_started``,
+  ``speech_stopped``, ``committed`` and the caller's scripted line as
+  ``conversation.item.input_audio_transcription.completed``; like the real
+  API, a manual commit does not start a reply on its own
+- ``response.create``: the greeting, then the current turn's tool call or
+  reply, then the reply that follows a tool call
+- replies stream ``response.audio.delta`` chunks (silence, in the session's
+  output format) with ``response.audio_transcript.delta``/``done``
+- tool turns emit ``response.function_call_arguments.done``; the reply is
+  spoken after the client sends the output and ``response.create``
+- ``response.cancel`` stops the reply in progress
+
+Each reply waits ``latency_ms`` (plus up to ``jitter_ms``) before its first
+event, standing in for model time-to-first-token.
+
+Point the backend at it with ``OPENAI_REALTIME_URL``::
+
+    python backend/tests/load/realtime_standin.py --port 8765 --latency-ms 300
+    OPENAI_REALTIME_URL=ws://127.0.0.1:8765 uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import random
+import uuid
+from typing import Any, Dict, List, Optional
+
+import websockets
+
+GREETING = "Hi, thanks for calling. How can I help you?"
+
+# Each turn: what the caller "said", an optional tool call, and the reply
+DEFAULT_SCRIPT: List[Dict[str, Any]] = [
+    {
+        "caller": "Hi, what's today's date?",
+        "tool": {"name": "get_current_date", "arguments": {}},
+        "assistant": "Today is a great day to book a treatment.",
+    },
+    {
+        "caller": "Do you offer Botox?",
+        "assistant": "Yes, we offer Botox. Would you like to book an appointment?",
+    },
+    {
+        "caller": "Not today, thanks.",
+        "assistant": "No problem. Have a wonderful day!",
+    },
+]
+
+# Bytes per millisecond of audio for each Realtime audio format
+_BYTES_PER_MS = {"pcm16": 48, "g711_ulaw": 8, "g711_alaw": 8}
+_SILENCE_BYTE = {"pcm16": b"\x00", "g711_ulaw": b"\xff", "g711_alaw": b"\xd5"}
+
+
+class _Session:
+    """Protocol state for one Realtime connection."""
+
+    def __init__(self, server: "RealtimeStandIn", ws: Any) -> None:
+        self.server = server
+        self.ws = ws
+        self.turns = itertools.cycle(server.script)
+        self.output_format = "pcm16"
+        self.greeted = False
+        self.turn: Optional[Dict[str, Any]] = None
+        self.pending_reply: Optional[str] = None
+        self.buffered_bytes = 0
+        self.speaking = False
+        self.response: Optional[asyncio.Task] = None
+
+    async def send(self, event: Dict[str, Any]) -> None:
+        if event["type"] == "error":
+            errors = self.server.stats["errors"]
+            code = event["error"]["code"]
+            errors[code] = errors.get(code, 0) + 1
+        event.setdefault("event_id", f"event_{uuid.uuid4().hex[:12]}")
+        await self.ws.send(json.dumps(event))
+
+    async def run(self) -> None:
+        await self.send({"type": "session.created", "session": {"id": f"sess_{uuid.uuid4().hex[:12]}"}})
+        try:
+            async for message in self.ws:
+                await self.handle(json.loads(message))
+        finally:
+            if self.response is not None:
+                self.response.cancel()
+
+    async def handle(self, event: Dict[str, Any]) -> None:
+        event_type = event.get("type")
+        self.server.stats["client_events"] += 1
+        if event_type == "session.update":
+            session = event.get("session") or {}
+            self.output_format = session.get("output_audio_format") or self.output_format
+            await self.send({"type": "session.updated", "session": session})
+        elif event_type == "input_audio_buffer.append":
+            self.buffered_bytes += len(event.get("audio") or "")
+            if not self.speaking:
+                self.speaking = True
+                await self.send({"type": "input_audio_buffer.speech_started"})
+        elif event_type == "input_audio_buffer.commit":
+            await self._commit()
+        elif event_type == "response.create":
+            self._create_response()
+        elif event_type == "response.cancel":
+            if self.response is not None and not self.response.done():
+                self.response.cancel()
+            else:
+                await self.send(
+                    {
+                        "type": "error",
+                        "error": {"code": "response_cancel_not_active", "message": "No active response"},
+                    }
+                )
+
+    async def _commit(self) -> None:
+        if not self.buffered_bytes:
+            await self.send(
+                {
+                    "type": "error",
+                    "error": {"code": "input_audio_buffer_commit_empty", "message": "Buffer is empty"},
+                }
+            )
+            return
+        item_id = f"item_{uuid.uuid4().hex[:12]}"
+        self.buffered_bytes = 0
+        self.speaking = False
+        turn = self.turn = next(self.turns)
+        await self.send({"type": "input_audio_buffer.speech_stopped", "item_id": item_id})
+        await self.send({"type": "input_audio_buffer.committed", "item_id": item_id})
+        await self.send(
+            {
+                "type": "conversation.item.input_audio_transcription.completed",
+                "item_id": item_id,
+                "transcript": turn["caller"],
+            }
+        )
+
+    def _create_response(self) -> None:
+        if not self.greeted:
+            self.greeted = True
+            self._start_response(GREETING)
+        elif self.pending_reply is not None:
+            text, self.pending_reply = self.pending_reply, None
+            self._start_response(text)
+        elif self.turn is not None:
+            turn, self.turn = self.turn, None
+            if turn.get("tool"):
+                self.pending_reply = turn["assistant"]
+                self._start_response(None, tool=turn["tool"])
+            else:
+                self._start_response(turn["assistant"])
+        else:
+            self._start_response("Is there anything else I can help with?")
+
+    def _start_response(self, text: Optional[str], tool: Optional[Dict[str, Any]] = None) -> None:
+        # A reply requested mid-response (e.g. right after a tool output,
+        # before that response's ``response.done``) starts when it finishes
+        previous = self.response if self.response is not None and not self.response.done() else None
+        self.response = asyncio.ensure_future(self._respond(text, tool, previous))
+
+    async def _respond(
+        self, text: Optional[str], tool: Optional[Dict[str, Any]], previous: Optional[asyncio.Task]
+    ) -> None:
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            await self._run_response(text, tool)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+
+    async def _run_response(self, text: Optional[str], tool: Optional[Dict[str, Any]]) -> None:
+        server = self.server
+        response_id = f"resp_{uuid.uuid4().hex[:12]}"
+        status = "completed"
+        await asyncio.sleep(server.reply_delay())
+        await self.send({"type": "response.created", "response": {"id": response_id}})
+        server.stats["responses"] += 1
+        try:
+            if tool is not None:
+                server.stats["function_calls"] += 1
+                await self.send(
+                    {
+                        "type": "response.function_call_arguments.done",
+                        "response_id": response_id,
+                        "call_id": f"call_{uuid.uuid4().hex[:12]}",
+                        "name": tool["name"],
+                        "arguments": json.dumps(tool.get("arguments") or {}),
+                    }
+                )
+            else:
+                await self._speak(response_id, text or "")
+        except asyncio.CancelledError:
+            status = "cancelled"
+        await self.send({"type": "response.done", "response": {"id": response_id, "status": status}})
+
+    async def _speak(self, response_id: str, text: str) -> None:
+        server = self.server
+        fmt = self.output_format if self.output_format in _BYTES_PER_MS else "pcm16"
+        chunk = base64.b64encode(_SILENCE_BYTE[fmt] * (_BYTES_PER_MS[fmt] * server.chunk_ms)).decode(
+            "ascii"
+        )
+        # Roughly speaking pace: 60ms of audio per character
+        chunks = max(1, len(text) * 60 // server.chunk_ms)
+        words = text.split(" ")
+        for index in range(chunks):
+            if index < len(words):
+                await self.send(
+                    {
+                        "type": "response.audio_transcript.delta",
+                        "response_id": response_id,
+                        "delta": words[index] + " ",
+                    }
+                )
+            await self.send({"type": "response.audio.delta", "response_id": response_id, "delta": chunk})
+            server.stats["audio_deltas"] += 1
+            if server.chunk_interval_ms:
+                await asyncio.sleep(server.chunk_interval_ms / 1000)
+        await self.send({"type": "response.audio.done", "response_id": response_id})
+        await self.send(
+            {"type": "response.audio_transcript.done", "response_id": response_id, "transcript": text}
+        )
+
+
+class RealtimeStandIn:
+    """Scripted Realtime websocket server."""
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        script: Optional[List[Dict[str, Any]]] = None,
+        latency_ms: float = 300.0,
+        jitter_ms: float = 0.0,
+        chunk_ms: int = 100,
+        chunk_interval_ms: float = 20.0,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.script = script or DEFAULT_SCRIPT
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.chunk_ms = chunk_ms
+        self.chunk_interval_ms = chunk_interval_ms
+        self.stats = {
+            "sessions": 0,
+            "active": 0,
+            "client_events": 0,
+            "responses": 0,
+            "function_calls": 0,
+            "audio_deltas": 0,
+            "errors": {},
+        }
+        self._server: Any = None
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def reply_delay(self) -> float:
+        return (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+
+    async def start(self) -> "RealtimeStandIn":
+        self._server = await websockets.serve(self._handle, self.host, self.port, max_size=None)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle(self, ws: Any, path: Optional[str] = None) -> None:
+        self.stats["sessions"] += 1
+        self.stats["active"] += 1
+        try:
+            await _Session(self, ws).run()
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.stats["active"] -= 1
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    script = None
+    if args.script:
+        with open(args.script, encoding="utf-8") as handle:
+            script = json.load(handle)
+    server = await RealtimeStandIn(
+        host=args.host,
+        port=args.port,
+        script=script,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        chunk_interval_ms=args.chunk_interval_ms,
+    ).start()
+    print(f"Realtime stand-in listening on {server.url}", flush=True)
+    try:
+        await asyncio.Future()
+    finally:
+        print(f"Realtime stand-in stats: {server.stats}", flush=True)
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local OpenAI Realtime stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="Delay before each reply")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra reply delay")
+    parser.add_argument(
+        "--chunk-interval-ms", type=float, default=20.0, help="Gap between 100ms audio deltas"
+    )
+    parser.add_argument("--script", help="JSON file with a list of {caller, tool?, assistant} turns")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
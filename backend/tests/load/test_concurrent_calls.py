@@ -4,27 +4,136 @@ Load test for voice WebSocket connections.
 Tests the system's ability to handle multiple concurrent voice calls.
 Run this script to simulate realistic load before production demos.
 
+Each simulated call waits for the greeting, then plays scripted caller turns:
+a second of audio streamed in real-time 20ms chunks, a commit, and the time
+until the first audio of the reply (turn latency). The backend's event loop
+lag is sampled from /health/loop throughout the run. The summary reports
+p50/p95/p99 of greeting latency, turn latency and loop lag.
+
 Usage:
     python backend/tests/load/test_concurrent_calls.py
 
     # Or with custom parameters:
     python backend/tests/load/test_concurrent_calls.py --calls 100 --url ws://localhost:8000
+
+    # No OpenAI needed: start the local Realtime stand-in and a backend
+    # pointed at it, then drive 300 calls through /ws/voice
+    python backend/tests/load/test_concurrent_calls.py --standin --calls 300 --ramp 10
 """
 
 import asyncio
+import base64
 import json
+import os
+import subprocess
 import sys
+import time
+import urllib.request
 import uuid
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import websockets
 
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# 20ms of PCM16 @ 24 kHz with a low constant level, so a VAD gate passes it
+SPEECH_CHUNK_B64 = base64.b64encode(b"\x00\x10" * 480).decode("ascii")
+SPEECH_CHUNK_SECONDS = 0.02
+SPEECH_SECONDS = 1.0
+# A reply is over once no audio has arrived for this long
+REPLY_QUIET_SECONDS = 0.4
+
+
+class LoadMetrics:
+    """Latency samples collected across all simulated calls."""
+
+    def __init__(self) -> None:
+        self.greeting_ms: List[float] = []
+        self.turn_ms: List[float] = []
+        self.loop_lag_ms: List[float] = []
+        self.server_loop: Dict[str, Any] = {}
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def _pct(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 1)
+
+    return {
+        "count": len(ordered),
+        "p50": _pct(0.5),
+        "p95": _pct(0.95),
+        "p99": _pct(0.99),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class _AudioWatcher:
+    """Reads server messages and tracks when reply audio arrives.
+
+    Also tracks when the received audio would finish playing, so the
+    simulated caller waits for the reply like a real one instead of
+    talking over it (which the backend would treat as a barge-in).
+    """
+
+    def __init__(self, ws: Any) -> None:
+        self.ws = ws
+        self.last_audio_at: Optional[float] = None
+        self.playing_until = 0.0
+        self._audio = asyncio.Event()
+        self._task = asyncio.create_task(self._read())
+
+    async def _read(self) -> None:
+        async for raw in self.ws:
+            if isinstance(raw, bytes):
+                # Binary frames carry a small header; close enough for pacing
+                audio_bytes = len(raw)
+            else:
+                message = json.loads(raw)
+                if message.get("type") != "audio":
+                    continue
+                audio_bytes = len(message.get("data") or "") * 3 // 4
+            now = time.perf_counter()
+            # PCM16 @ 24 kHz
+            self.playing_until = max(now, self.playing_until) + audio_bytes / 48000
+            self.last_audio_at = now
+            self._audio.set()
+
+    async def wait_for_audio(self, timeout: float) -> float:
+        """Wait for the next audio message; returns its arrival time."""
+        self._audio.clear()
+        await asyncio.wait_for(self._audio.wait(), timeout=timeout)
+        return self.last_audio_at
+
+    async def wait_until_quiet(self, timeout: float = 30.0) -> None:
+        deadline = time.perf_counter() + timeout
+        while time.perf_counter() < deadline:
+            now = time.perf_counter()
+            if self.last_audio_at is None or (
+                now - self.last_audio_at >= REPLY_QUIET_SECONDS and now >= self.playing_until
+            ):
+                return
+            await asyncio.sleep(0.05)
+
+    def close(self) -> None:
+        self._task.cancel()
+
 
 async def simulate_voice_call(
     session_num: int,
     base_url: str,
     duration_seconds: int = 10,
+    *,
+    turns: int = 2,
+    start_delay: float = 0.0,
+    metrics: Optional[LoadMetrics] = None,
+    verbose: bool = True,
 ) -> Tuple[bool, Optional[str]]:
     """
     Simulate one voice call session.
@@ -32,50 +141,64 @@ async def simulate_voice_call(
     Args:
         session_num: Call number for logging
         base_url: WebSocket base URL (e.g., "ws://localhost:8000")
-        duration_seconds: How long to simulate the call
+        duration_seconds: Minimum call length; the call idles after its turns
+        turns: Caller turns to play after the greeting
+        start_delay: Seconds to wait before connecting (ramp-up)
+        metrics: Collector for greeting and turn latencies
+        verbose: Print per-call progress
 
     Returns:
         Tuple of (success: bool, error_message: Optional[str])
     """
     session_id = f"load-test-{uuid.uuid4()}"
     uri = f"{base_url}/ws/voice/{session_id}"
+    metrics = metrics or LoadMetrics()
+    await asyncio.sleep(start_delay)
 
     try:
-        async with websockets.connect(uri, ping_timeout=20) as ws:
-            # Wait for greeting
-            try:
-                greeting = await asyncio.wait_for(ws.recv(), timeout=10)
-                print(f"  Call {session_num:3d}: Connected, received greeting")
-            except asyncio.TimeoutError:
-                return False, "Timeout waiting for greeting"
-
-            # Send 5 audio chunks (simulating ~5 seconds of speech)
-            for i in range(5):
-                await ws.send(json.dumps({
-                    "type": "audio",
-                    "data": "AAAA"  # Dummy base64 audio
-                }))
-                await asyncio.sleep(0.1)
-
-            # Commit audio buffer
-            await ws.send(json.dumps({"type": "commit"}))
-
-            # Wait for response
+        started = time.perf_counter()
+        async with websockets.connect(uri, ping_timeout=20, open_timeout=30, max_size=None) as ws:
+            watcher = _AudioWatcher(ws)
             try:
-                response = await asyncio.wait_for(ws.recv(), timeout=15)
-                print(f"  Call {session_num:3d}: Received AI response")
-            except asyncio.TimeoutError:
-                return False, "Timeout waiting for AI response"
-
-            # Keep connection alive for remaining duration
-            remaining = duration_seconds - 6  # 5 chunks + 1 commit already done
-            if remaining > 0:
-                await asyncio.sleep(remaining)
-
-            # End session gracefully
-            await ws.send(json.dumps({"type": "end_session"}))
-
-            return True, None
+                # Wait for greeting
+                try:
+                    greeted_at = await watcher.wait_for_audio(timeout=15)
+                except asyncio.TimeoutError:
+                    return False, "Timeout waiting for greeting"
+                metrics.greeting_ms.append((greeted_at - started) * 1000)
+                if verbose:
+                    print(f"  Call {session_num:3d}: Connected, received greeting")
+                await watcher.wait_until_quiet()
+
+                for turn in range(turns):
+                    # Stream a second of caller speech at real-time pace
+                    for _ in range(int(SPEECH_SECONDS / SPEECH_CHUNK_SECONDS)):
+                        await ws.send(json.dumps({"type": "audio", "data": SPEECH_CHUNK_B64}))
+                        await asyncio.sleep(SPEECH_CHUNK_SECONDS)
+
+                    # Commit audio buffer; the reply's first audio closes the turn
+                    committed_at = time.perf_counter()
+                    await ws.send(json.dumps({"type": "commit"}))
+                    try:
+                        replied_at = await watcher.wait_for_audio(timeout=15)
+                    except asyncio.TimeoutError:
+                        return False, "Timeout waiting for AI response"
+                    metrics.turn_ms.append((replied_at - committed_at) * 1000)
+                    if verbose:
+                        print(f"  Call {session_num:3d}: Received AI response (turn {turn + 1})")
+                    await watcher.wait_until_quiet()
+
+                # Keep connection alive for remaining duration
+                remaining = duration_seconds - (time.perf_counter() - started)
+                if remaining > 0:
+                    await asyncio.sleep(remaining)
+
+                # End session gracefully
+                await ws.send(json.dumps({"type": "end_session"}))
+
+                return True, None
+            finally:
+                watcher.close()
 
     except websockets.exceptions.WebSocketException as e:
         return False, f"WebSocket error: {str(e)}"
@@ -83,10 +206,35 @@ async def simulate_voice_call(
         return False, f"Unexpected error: {str(e)}"
 
 
+def _http_url(base_url: str, path: str) -> str:
+    return base_url.replace("wss://", "https://", 1).replace("ws://", "http://", 1) + path
+
+
+def _fetch_json(url: str, timeout: float = 5.0) -> Dict[str, Any]:
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+async def sample_loop_lag(base_url: str, metrics: LoadMetrics, interval: float = 1.0) -> None:
+    """Poll the backend's /health/loop until cancelled."""
+    url = _http_url(base_url, "/health/loop")
+    while True:
+        try:
+            stats = (await asyncio.to_thread(_fetch_json, url))["event_loop"]
+            metrics.loop_lag_ms.append(stats["last_ms"])
+            metrics.server_loop = stats
+        except Exception:  # noqa: BLE001 - the endpoint is best-effort
+            pass
+        await asyncio.sleep(interval)
+
+
 async def load_test(
     num_calls: int = 50,
     base_url: str = "ws://localhost:8000",
-    call_duration: int = 10
+    call_duration: int = 10,
+    *,
+    turns: int = 2,
+    ramp_seconds: float = 0.0,
 ):
     """
     Run load test with N concurrent calls.
@@ -95,23 +243,37 @@ async def load_test(
         num_calls: Number of concurrent calls to simulate
         base_url: WebSocket base URL
         call_duration: Duration of each call in seconds
+        turns: Caller turns per call
+        ramp_seconds: Spread call starts evenly over this many seconds
     """
     print(f"\n{'='*70}")
     print(f"LOAD TEST: {num_calls} concurrent voice calls")
     print(f"Target: {base_url}")
-    print(f"Call duration: {call_duration} seconds")
+    print(f"Call duration: {call_duration} seconds, {turns} turns, ramp {ramp_seconds}s")
     print(f"{'='*70}\n")
 
     start_time = datetime.now()
+    metrics = LoadMetrics()
+    sampler = asyncio.create_task(sample_loop_lag(base_url, metrics))
 
     # Create tasks for all calls
+    verbose = num_calls <= 50
     tasks = [
-        simulate_voice_call(i+1, base_url, call_duration)
+        simulate_voice_call(
+            i + 1,
+            base_url,
+            call_duration,
+            turns=turns,
+            start_delay=ramp_seconds * i / num_calls,
+            metrics=metrics,
+            verbose=verbose,
+        )
         for i in range(num_calls)
     ]
 
     # Run all calls concurrently
     results = await asyncio.gather(*tasks, return_exceptions=True)
+    sampler.cancel()
 
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
@@ -134,7 +296,8 @@ async def load_test(
             else:
                 fail_count += 1
                 errors[error_msg] = errors.get(error_msg, 0) + 1
-                print(f"  ❌ Call {i:3d}: Failed - {error_msg}")
+                if verbose:
+                    print(f"  ❌ Call {i:3d}: Failed - {error_msg}")
 
     # Print summary
     print(f"\n{'='*70}")
@@ -144,6 +307,16 @@ async def load_test(
     print(f"  Failed:          {fail_count} ({fail_count/num_calls*100:.1f}%)")
     print(f"  Duration:        {duration:.2f}s")
     print(f"  Calls/sec:       {num_calls/duration:.2f}")
+    print(f"\nLATENCY (ms):")
+    print(f"  Greeting:        {percentiles(metrics.greeting_ms)}")
+    print(f"  Turn:            {percentiles(metrics.turn_ms)}")
+    print(f"  Loop lag:        {percentiles(metrics.loop_lag_ms)}")
+    if metrics.server_loop:
+        server = metrics.server_loop
+        print(
+            f"  Server loop:     p50={server.get('recent_p50_ms')} p95={server.get('recent_p95_ms')} "
+            f"p99={server.get('recent_p99_ms')} max={server.get('max_ms')} (last minute / run max)"
+        )
     print(f"{'='*70}")
 
     if errors:
@@ -180,6 +353,81 @@ async def quick_test(base_url: str = "ws://localhost:8000"):
         return False
 
 
+@asynccontextmanager
+async def local_stack(
+    *, backend_port: int, standin_port: int, latency_ms: float, jitter_ms: float
+) -> AsyncIterator[str]:
+    """Run the Realtime stand-in and a backend pointed at it; yields the ws URL."""
+    standin = subprocess.Popen(
+        [
+            sys.executable,
+            str(Path(__file__).with_name("realtime_standin.py")),
+            "--port",
+            str(standin_port),
+            "--latency-ms",
+            str(latency_ms),
+            "--jitter-ms",
+            str(jitter_ms),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    env = dict(os.environ, OPENAI_REALTIME_URL=f"ws://127.0.0.1:{standin_port}")
+    env.setdefault("OPENAI_API_KEY", "load-test")
+    env.setdefault("CALENDAR_BACKEND", "mock")
+    backend = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "main:app",
+            "--port",
+            str(backend_port),
+            "--log-level",
+            "warning",
+            "--ws-max-size",
+            "16777216",
+        ],
+        cwd=str(BACKEND_DIR),
+        env=env,
+    )
+    try:
+        await asyncio.to_thread(standin.stdout.readline)
+        base_url = f"ws://127.0.0.1:{backend_port}"
+        for _ in range(60):
+            try:
+                await asyncio.to_thread(_fetch_json, _http_url(base_url, "/health/live"), 1.0)
+                break
+            except Exception:  # noqa: BLE001 - still starting
+                if backend.poll() is not None:
+                    raise RuntimeError("Backend exited during startup")
+                await asyncio.sleep(0.5)
+        else:
+            raise RuntimeError("Backend did not become live within 30s")
+        yield base_url
+    finally:
+        for process in (backend, standin):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+async def run_against_local_stack(args) -> bool:
+    async with local_stack(
+        backend_port=args.backend_port,
+        standin_port=args.standin_port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+    ) as base_url:
+        if args.quick:
+            return await quick_test(base_url)
+        return await load_test(
+            args.calls, base_url, args.duration, turns=args.turns, ramp_seconds=args.ramp
+        )
+
+
 if __name__ == "__main__":
     import argparse
 
@@ -202,20 +450,49 @@ if __name__ == "__main__":
         default=10,
         help="Call duration in seconds (default: 10)"
     )
+    parser.add_argument(
+        "--turns",
+        type=int,
+        default=2,
+        help="Caller turns per call after the greeting (default: 2)"
+    )
+    parser.add_argument(
+        "--ramp",
+        type=float,
+        default=0.0,
+        help="Spread call starts over this many seconds (default: 0)"
+    )
     parser.add_argument(
         "--quick",
         action="store_true",
         help="Run quick connectivity test only (single call)"
     )
+    parser.add_argument(
+        "--standin",
+        action="store_true",
+        help="Start the local Realtime stand-in and a backend using it (ignores --url)"
+    )
+    parser.add_argument("--backend-port", type=int, default=8010, help="Backend port with --standin")
+    parser.add_argument("--standin-port", type=int, default=8765, help="Stand-in port with --standin")
+    parser.add_argument(
+        "--latency-ms", type=float, default=300.0, help="Stand-in reply latency with --standin"
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=100.0, help="Stand-in reply jitter with --standin"
+    )
 
     args = parser.parse_args()
 
     # Run test
     try:
-        if args.quick:
+        if args.standin:
+            passed = asyncio.run(run_against_local_stack(args))
+        elif args.quick:
             passed = asyncio.run(quick_test(args.url))
         else:
-            passed = asyncio.run(load_test(args.calls, args.url, args.duration))
+            passed = asyncio.run(
+                load_test(args.calls, args.url, args.duration, turns=args.turns, ramp_seconds=args.ramp)
+            )
 
         sys.exit(0 if passed else 1)
 
@@ -0,0 +1,62 @@
+"""
+Tests for the local Realtime stand-in used by the voice load test.
+"""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+import realtime_pool
+from calendar_service import MockCalendarService
+from realtime_client import RealtimeClient
+from realtime_standin import DEFAULT_SCRIPT, GREETING, RealtimeStandIn
+
+
+async def _wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_realtime_client_completes_a_scripted_call(mock_calendar_service, db_session, monkeypatch):
+    mock_calendar_service.return_value = MockCalendarService()
+    server = await RealtimeStandIn(latency_ms=10, chunk_interval_ms=0).start()
+    monkeypatch.setattr(realtime_pool.settings, "OPENAI_REALTIME_URL", server.url)
+    client = RealtimeClient(session_id="standin-call", db=db_session)
+    audio = []
+
+    async def on_audio(audio_b64):
+        audio.append(audio_b64)
+
+    def spoken():
+        return [e["text"] for e in client.session_data["transcript"] if e["speaker"] == "assistant"]
+
+    reader = None
+    try:
+        await client.connect()
+        reader = asyncio.create_task(client.handle_messages(on_audio))
+        await client.send_greeting()
+        await _wait_for(lambda: len(spoken()) == 1)
+
+        for turn in DEFAULT_SCRIPT[:2]:
+            # Quiet enough not to count as barging in on the reply still "playing"
+            await client.send_audio_bytes(b"\x00\x01" * 2400)
+            await client.commit_audio_buffer()
+            await _wait_for(lambda: spoken()[-1] == turn["assistant"])
+    finally:
+        if reader is not None:
+            reader.cancel()
+        await client.disconnect()
+        await server.stop()
+
+    assert spoken() == [GREETING] + [turn["assistant"] for turn in DEFAULT_SCRIPT[:2]]
+    customer = [e["text"] for e in client.session_data["transcript"] if e["speaker"] == "customer"]
+    assert customer == [turn["caller"] for turn in DEFAULT_SCRIPT[:2]]
+    assert [call["function"] for call in client.session_data["function_calls"]] == ["get_current_date"]
+    assert audio
+    assert server.stats["function_calls"] == 1
+    assert server.stats["errors"] == {}
@@ -0,0 +1,55 @@
+"""
+Upstream audio send-path benchmarks using pytest-benchmark.
+
+Each run pushes one second of 10ms PCM16 chunks through the work done per
+``input_audio_buffer.append`` (base64 + JSON) and records the upstream
+message rate in ``extra_info``.
+
+Run with: pytest -m performance --benchmark-only
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+
+from audio_coalescer import AudioFrameCoalescer
+
+CHUNK = bytes(480)  # 10ms of PCM16 @ 24 kHz
+CHUNKS_PER_SECOND = 100
+
+
+def _encode_append(chunk: bytes) -> str:
+    return json.dumps(
+        {"type": "input_audio_buffer.append", "audio": base64.b64encode(chunk).decode("ascii")}
+    )
+
+
+@pytest.mark.performance
+@pytest.mark.benchmark
+class TestAudioCoalescerBenchmarks:
+    """Compare per-chunk appends with coalesced appends."""
+
+    def test_uncoalesced_send_path(self, benchmark):
+        def run():
+            return [_encode_append(CHUNK) for _ in range(CHUNKS_PER_SECOND)]
+
+        messages = benchmark(run)
+        benchmark.extra_info["messages_per_second"] = len(messages)
+
+    def test_coalesced_send_path(self, benchmark):
+        def run():
+            coalescer = AudioFrameCoalescer(max_latency_ms=1000)
+            messages = [
+                _encode_append(ready)
+                for _ in range(CHUNKS_PER_SECOND)
+                for ready in coalescer.push(CHUNK)
+            ]
+            messages.extend(_encode_append(ready) for ready in coalescer.flush())
+            return messages
+
+        messages = benchmark(run)
+        benchmark.extra_info["messages_per_second"] = len(messages)
+        assert len(messages) < CHUNKS_PER_SECOND / 4
@@ -0,0 +1,86 @@
+"""
+JSON codec benchmarks using pytest-benchmark.
+
+Compares the standard library with the configured codec (orjson when
+installed) on a Realtime audio event round trip and an admin-sized response
+body. ``extra_info`` records the backend and per-event overhead.
+
+Run with: pytest -m performance --benchmark-only
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+
+import pytest
+
+import json_codec
+
+AUDIO_EVENT = json.dumps(
+    {
+        "type": "response.audio.delta",
+        "event_id": "event_123",
+        "response_id": "resp_123",
+        "item_id": "item_123",
+        "output_index": 0,
+        "content_index": 0,
+        "delta": base64.b64encode(bytes(4800)).decode("ascii"),
+    }
+)
+
+ADMIN_PAYLOAD = {
+    "conversations": [
+        {
+            "id": f"conv-{i}",
+            "channel": "voice",
+            "status": "completed",
+            "satisfaction_score": 8.5,
+            "messages": [
+                {"direction": "inbound", "content": "I'd like to book botox", "index": j}
+                for j in range(10)
+            ],
+        }
+        for i in range(200)
+    ]
+}
+
+
+def _stdlib_round_trip():
+    data = json.loads(AUDIO_EVENT)
+    return json.dumps({"type": "audio", "data": data["delta"]})
+
+
+def _codec_round_trip():
+    data = json_codec.loads(AUDIO_EVENT)
+    return json_codec.dumps({"type": "audio", "data": data["delta"]})
+
+
+@pytest.mark.performance
+@pytest.mark.benchmark
+class TestJsonCodecBenchmarks:
+    """Per-event JSON overhead on the voice path and API responses."""
+
+    @pytest.mark.parametrize(
+        "name, round_trip",
+        [("stdlib", _stdlib_round_trip), ("codec", _codec_round_trip)],
+        ids=["stdlib", "codec"],
+    )
+    def test_audio_event_round_trip(self, benchmark, name, round_trip):
+        result = benchmark(round_trip)
+        benchmark.extra_info["backend"] = json_codec.BACKEND if name == "codec" else "json"
+        benchmark.extra_info["us_per_event"] = round(benchmark.stats.stats.mean * 1e6, 2)
+        assert json.loads(result)["type"] == "audio"
+
+    @pytest.mark.parametrize("name", ["stdlib", "codec"])
+    def test_admin_response_render(self, benchmark, name):
+        if name == "codec":
+            render = json_codec.FastJSONResponse(None).render
+        else:
+            from fastapi.responses import JSONResponse
+
+            render = JSONResponse(None).render
+
+        body = benchmark(render, ADMIN_PAYLOAD)
+        benchmark.extra_info["backend"] = json_codec.BACKEND if name == "codec" else "json"
+        assert len(body) > 100_000
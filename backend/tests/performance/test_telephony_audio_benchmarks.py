@@ -0,0 +1,95 @@
+"""
+Telephony transcoding throughput benchmarks using pytest-benchmark.
+
+Each benchmark processes one second of audio and records how many
+concurrent real-time streams a single core can sustain in ``extra_info``.
+
+Run with: pytest -m performance --benchmark-only
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from telephony_audio import (
+    Downsampler,
+    TelephonyTranscoder,
+    Upsampler,
+    g711_decode,
+    g711_encode,
+)
+
+FRAME_MS = 20
+FRAMES_PER_SECOND = 1000 // FRAME_MS
+
+
+def _speech_like(sample_rate: int, seconds: float = 1.0) -> np.ndarray:
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    signal = 6000 * np.sin(2 * np.pi * 220 * t) + 2000 * np.sin(2 * np.pi * 1700 * t)
+    return signal.astype(np.int16)
+
+
+def _record_streams_per_core(benchmark, audio_seconds: float = 1.0) -> None:
+    mean = benchmark.stats.stats.mean
+    benchmark.extra_info["realtime_streams_per_core"] = round(audio_seconds / mean)
+
+
+@pytest.mark.performance
+@pytest.mark.benchmark
+class TestTelephonyAudioBenchmarks:
+    """Benchmark the G.711 + resampling pipeline on 20ms frames."""
+
+    @pytest.mark.parametrize("codec", ["g711_ulaw", "g711_alaw"])
+    def test_g711_codec_throughput(self, benchmark, codec):
+        """Encode + decode one second of 8 kHz audio."""
+        samples = _speech_like(8000)
+
+        def run():
+            return g711_decode(g711_encode(samples, codec), codec)
+
+        result = benchmark(run)
+        assert result.size == samples.size
+        _record_streams_per_core(benchmark)
+
+    def test_upsample_throughput(self, benchmark):
+        """Resample one second of 8 kHz audio to 24 kHz in 20ms frames."""
+        frames = np.split(_speech_like(8000), FRAMES_PER_SECOND)
+        upsampler = Upsampler()
+
+        def run():
+            return [upsampler.process(frame) for frame in frames]
+
+        result = benchmark(run)
+        assert sum(chunk.size for chunk in result) == 24000
+        _record_streams_per_core(benchmark)
+
+    def test_downsample_throughput(self, benchmark):
+        """Resample one second of 24 kHz audio to 8 kHz in 20ms frames."""
+        frames = np.split(_speech_like(24000), FRAMES_PER_SECOND)
+        downsampler = Downsampler()
+
+        def run():
+            return [downsampler.process(frame) for frame in frames]
+
+        result = benchmark(run)
+        assert sum(chunk.size for chunk in result) == 8000
+        _record_streams_per_core(benchmark)
+
+    def test_full_duplex_transcoder_throughput(self, benchmark):
+        """One second of both directions through a session transcoder."""
+        transcoder = TelephonyTranscoder("g711_ulaw")
+        inbound = [
+            g711_encode(frame, "g711_ulaw")
+            for frame in np.split(_speech_like(8000), FRAMES_PER_SECOND)
+        ]
+        outbound = [frame.tobytes() for frame in np.split(_speech_like(24000), FRAMES_PER_SECOND)]
+
+        def run():
+            for client_frame, upstream_frame in zip(inbound, outbound):
+                transcoder.to_upstream(client_frame)
+                transcoder.to_client(upstream_frame)
+
+        benchmark(run)
+        _record_streams_per_core(benchmark)
+        assert transcoder.stats()["client_bytes"] > 0
@@ -430,6 +430,69 @@ class TestDeterministicBooking:
         assert "Booked" in response_text
         assert message is None
 
+    @patch("messaging_service.handle_check_availability")
+    @patch("messaging_service.MessagingService._get_calendar_service")
+    def test_selection_reply_books_without_availability_or_model(
+        self,
+        mock_calendar,
+        mock_check_avail,
+        mock_openai,
+        mock_book,
+        db_session,
+        customer,
+        conversation,
+    ):
+        """A bare option number should book from offers without any extra round trips."""
+        slots = _build_availability_output()["available_slots"]
+
+        SlotSelectionManager.record_offers(
+            db_session,
+            conversation,
+            tool_call_id="fast-path-test",
+            arguments={"date": "2025-11-20", "service_type": "botox"},
+            output={
+                "success": True,
+                "available_slots": slots,
+                "all_slots": slots,
+                "date": "2025-11-20",
+                "service_type": "botox",
+            },
+        )
+        metadata = SlotSelectionManager.conversation_metadata(conversation)
+        metadata["pending_booking_intent"] = True
+        SlotSelectionManager.persist_conversation_metadata(
+            db_session, conversation, metadata
+        )
+
+        _add_user_message(db_session, conversation, "2")
+
+        mock_calendar.return_value = Mock()
+        mock_book.return_value = {
+            "success": True,
+            "event_id": "evt-789",
+            "start_time": slots[1]["start"],
+            "original_start_time": slots[1]["start"],
+            "service_type": "botox",
+            "service": "Botox",
+        }
+
+        response_text, message = MessagingService.generate_ai_response(
+            db_session,
+            conversation.id,
+            "sms",
+        )
+
+        mock_openai.assert_not_called()
+        mock_check_avail.assert_not_called()
+        mock_book.assert_called_once()
+        assert "Booked" in response_text
+        assert message is None
+
+        db_session.refresh(conversation)
+        metadata = SlotSelectionManager.conversation_metadata(conversation)
+        assert metadata.get("pending_slot_offers") is None
+        assert metadata["last_appointment"]["start_time"] == slots[1]["start"]
+
 
 class TestNonBookingRequests:
     """Ensure non-booking flows do not trigger preemptive availability checks."""
@@ -0,0 +1,104 @@
+"""
+Tests for inbound audio frame coalescing.
+"""
+
+import asyncio
+import base64
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from audio_coalescer import AudioFrameCoalescer
+from realtime_client import RealtimeClient
+
+BYTES_PER_MS = 48
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chunk(ms: int, fill: int = 1) -> bytes:
+    return bytes([fill]) * (ms * BYTES_PER_MS)
+
+
+def test_small_frames_are_coalesced_in_order():
+    coalescer = AudioFrameCoalescer(min_ms=40, max_ms=100, max_latency_ms=1000)
+    frames = [_chunk(10, fill=i) for i in range(20)]
+
+    released = [ready for frame in frames for ready in coalescer.push(frame)]
+    released.extend(coalescer.flush())
+
+    assert b"".join(released) == b"".join(frames)
+    # Target grows 40 -> 50 -> 60ms as size-triggered releases succeed
+    assert [len(chunk) // BYTES_PER_MS for chunk in released] == [40, 50, 60, 50]
+    stats = coalescer.stats()
+    assert stats["inbound_frames"] == 20
+    assert stats["upstream_messages"] == 4
+    assert stats["message_ratio"] == 0.2
+
+
+def test_deadline_releases_partial_buffer_and_shrinks_target():
+    clock = FakeClock()
+    coalescer = AudioFrameCoalescer(min_ms=40, max_ms=100, max_latency_ms=60, clock=clock)
+    for _ in range(6):
+        coalescer.push(_chunk(10))
+        coalescer.push(_chunk(10))
+    assert coalescer.target_ms > 40
+
+    coalescer.push(_chunk(10))
+    clock.now = 0.05
+    assert coalescer.poll() == []
+    assert coalescer.seconds_until_due() == pytest.approx(0.01)
+
+    clock.now = 0.07
+    released = coalescer.poll()
+
+    assert len(released) == 1
+    assert coalescer.pending_bytes == 0
+    assert coalescer.target_ms == 40
+    assert coalescer.stats()["deadline_flushes"] == 1
+
+
+def test_large_frames_pass_through_and_ring_wraps():
+    coalescer = AudioFrameCoalescer(min_ms=40, max_ms=50, max_latency_ms=1000)
+
+    assert coalescer.push(_chunk(60, fill=9)) == [_chunk(60, fill=9)]
+    assert coalescer.stats()["passthrough"] == 1
+
+    frames = [_chunk(30, fill=i) for i in range(12)]
+    released = [ready for frame in frames for ready in coalescer.push(frame)]
+    released.extend(coalescer.flush())
+    assert b"".join(released) == b"".join(frames)
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_realtime_client_flushes_coalesced_audio_on_deadline(
+    mock_calendar_service, db_session
+):
+    mock_calendar_service.return_value = object()
+    client = RealtimeClient(session_id="session-coalesce", db=db_session)
+    client._coalescer = AudioFrameCoalescer(min_ms=40, max_ms=100, max_latency_ms=20)
+    client.ws = AsyncMock()
+
+    for _ in range(3):
+        await client.send_audio(base64.b64encode(_chunk(10)).decode("ascii"))
+    assert client.ws.send.await_count == 0
+
+    await asyncio.sleep(0.05)
+
+    sent = [json.loads(call.args[0]) for call in client.ws.send.await_args_list]
+    assert [event["type"] for event in sent] == ["input_audio_buffer.append"]
+    assert len(base64.b64decode(sent[0]["audio"])) == 30 * BYTES_PER_MS
+
+    await client.send_audio_bytes(_chunk(10), commit=True)
+    sent = [json.loads(call.args[0])["type"] for call in client.ws.send.await_args_list]
+    assert sent[-2:] == ["input_audio_buffer.append", "input_audio_buffer.commit"]
+    await client.disconnect()
+    assert client.get_session_data()["audio_coalescer"]["upstream_messages"] == 2
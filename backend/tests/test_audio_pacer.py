@@ -0,0 +1,120 @@
+"""
+Tests for outbound assistant audio pacing.
+"""
+
+import asyncio
+
+import pytest
+
+from audio_pacer import OutboundAudioPacer
+
+
+@pytest.mark.asyncio
+async def test_pacer_keeps_client_only_lead_ahead_and_clears_at_once():
+    sent = []
+
+    async def send(frame):
+        sent.append(frame)
+
+    # pcm16 at 24kHz: 48 bytes per millisecond
+    pacer = OutboundAudioPacer(send, lead_ms=50, frame_ms=10).start()
+    try:
+        pacer.push(b"\x01\x00" * 24 * 2000)
+        await asyncio.sleep(0.02)
+
+        # Only the lead plus what has played since went out; the rest waits
+        sent_ms = sum(len(frame) for frame in sent) / 48
+        assert 50 <= sent_ms <= 150
+        assert all(len(frame) == 48 * 10 for frame in sent)
+        assert pacer.queued_ms() == 2000 - sent_ms
+
+        await asyncio.sleep(0.1)
+        later_ms = sum(len(frame) for frame in sent) / 48
+        assert sent_ms < later_ms <= sent_ms + 200
+
+        dropped_ms = pacer.clear()
+        assert dropped_ms > 1500
+        assert pacer.queued_ms() == 0
+        await asyncio.sleep(0.05)
+        assert sum(len(frame) for frame in sent) / 48 == later_ms
+        assert pacer.stats()["clears"] == 1
+    finally:
+        await pacer.close()
+
+
+@pytest.mark.asyncio
+async def test_full_buffer_forwards_oldest_audio_unpaced_without_losing_any():
+    sent = []
+
+    async def send(frame):
+        sent.append(frame)
+
+    pacer = OutboundAudioPacer(send, buffer_ms=100, lead_ms=0, frame_ms=20)
+    # Not started: nothing drains, so the ring fills up
+    pacer.push(b"\x01" * 48 * 80)
+    pacer.push(b"\x02" * 48 * 60)
+    pacer.push(b"\x03" * 48 * 300)
+    assert pacer.queued_ms() == 440
+    assert len(pacer._ring) == 48 * 100
+
+    pacer.start()
+    try:
+        await asyncio.sleep(0.01)
+        # The 340ms the ring could not hold went out at once, oldest first;
+        # the newest 100ms is still paced
+        expected = b"\x01" * 48 * 80 + b"\x02" * 48 * 60 + b"\x03" * 48 * 200
+        assert b"".join(sent) == expected
+        assert pacer.queued_ms() == 100
+        stats = pacer.stats()
+        assert stats["overflow_pushes"] == 2
+        assert stats["overflow_forwarded_ms"] == 340.0
+        assert stats["max_queued_ms"] == 440.0
+
+        await asyncio.sleep(0.5)
+        assert b"".join(sent) == expected + b"\x03" * 48 * 100
+    finally:
+        await pacer.close()
+
+
+@pytest.mark.asyncio
+async def test_clear_drops_overflow_audio_too():
+    sent = []
+
+    async def send(frame):
+        sent.append(frame)
+
+    pacer = OutboundAudioPacer(send, buffer_ms=100, lead_ms=0, frame_ms=20)
+    pacer.push(b"\x01" * 48 * 250)
+    assert pacer.clear() == 250
+    pacer.start()
+    try:
+        await asyncio.sleep(0.02)
+        assert sent == []
+    finally:
+        await pacer.close()
+
+
+@pytest.mark.asyncio
+async def test_send_failure_drops_frame_and_pacing_continues():
+    sent = []
+    failing = True
+
+    async def send(frame):
+        if failing:
+            raise RuntimeError("socket closed")
+        sent.append(frame)
+
+    pacer = OutboundAudioPacer(send, lead_ms=50, frame_ms=10).start()
+    try:
+        pacer.push(b"\x00" * 48 * 20)
+        await asyncio.sleep(0.01)
+        assert pacer.stats()["send_errors"] == 2
+
+        # A resumed client socket gets the audio queued after the failure
+        failing = False
+        pacer.clear()
+        pacer.push(b"\x00" * 48 * 20)
+        await asyncio.sleep(0.01)
+        assert sum(len(frame) for frame in sent) == 48 * 20
+    finally:
+        await pacer.close()
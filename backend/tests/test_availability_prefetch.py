@@ -0,0 +1,153 @@
+"""
+Tests for speculative availability prefetch on voice calls.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from availability_prefetch import (
+    AvailabilityPrefetcher,
+    build_service_matcher,
+    extract_requested_date,
+)
+import calendar_service
+from booking.time_utils import EASTERN_TZ
+from realtime_client import RealtimeClient
+
+SERVICES = {
+    "botox": {"name": "Botox"},
+    "dermal_fillers": {"name": "Dermal Fillers"},
+}
+# A Wednesday
+REFERENCE = EASTERN_TZ.localize(datetime(2025, 11, 12, 10, 0))
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _payload(date_str: str, service_type: str) -> dict:
+    return {"success": True, "date": date_str, "service": service_type, "available_slots": []}
+
+
+@pytest.fixture
+def executor():
+    pool = ThreadPoolExecutor(max_workers=2)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_prefetch_threads_get_their_own_calendar_client():
+    """googleapiclient clients are not thread-safe, so each thread builds one."""
+    google = object.__new__(calendar_service.GoogleCalendarService)
+    google.creds = object()
+    google._local = threading.local()
+    clients = {}
+
+    def _use(name):
+        clients[name] = (google.service, google.service)
+
+    with patch.object(calendar_service, "build", side_effect=lambda *a, **k: object()):
+        threads = [threading.Thread(target=_use, args=(name,)) for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        _use("main")
+
+    assert all(first is second for first, second in clients.values())
+    assert len({id(first) for first, _ in clients.values()}) == 3
+
+
+def test_extract_requested_date_handles_common_phrasings():
+    assert extract_requested_date("Do you have anything today?", reference=REFERENCE) == "2025-11-12"
+    assert extract_requested_date("how about tomorrow", reference=REFERENCE) == "2025-11-13"
+    assert extract_requested_date("Friday works", reference=REFERENCE) == "2025-11-14"
+    assert extract_requested_date("next Wednesday please", reference=REFERENCE) == "2025-11-19"
+    assert extract_requested_date("January 5th", reference=REFERENCE) == "2026-01-05"
+    assert extract_requested_date("on 2025-12-01", reference=REFERENCE) == "2025-12-01"
+    assert extract_requested_date("What does Botox cost?", reference=REFERENCE) is None
+
+
+def test_service_matcher_prefers_longest_alias():
+    match = build_service_matcher(SERVICES)
+    assert match("I'd like dermal fillers") == "dermal_fillers"
+    assert match("BOTOX please") == "botox"
+    assert match("just a consultation") is None
+
+
+def test_prefetch_combines_hints_across_turns_and_serves_once(executor):
+    fetch = MagicMock(side_effect=_payload)
+    prefetcher = AvailabilityPrefetcher(fetch=fetch, services=SERVICES, executor=executor)
+
+    assert prefetcher.observe("I'd like to book Botox", reference=REFERENCE) is None
+    key = prefetcher.observe("Is Friday open?", reference=REFERENCE)
+    assert key == ("2025-11-14", "botox")
+    # Same pair again (e.g. both transcription events) does not refetch
+    assert prefetcher.observe("Friday", reference=REFERENCE) is None
+
+    assert prefetcher.take("2025-11-14", "botox") == _payload("2025-11-14", "botox")
+    assert prefetcher.take("2025-11-14", "botox") is None
+    fetch.assert_called_once_with("2025-11-14", "botox")
+
+    stats = prefetcher.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["waste_rate"] == 0.0
+
+
+def test_unused_failed_and_expired_prefetches_count_as_waste(executor):
+    clock = FakeClock()
+    prefetcher = AvailabilityPrefetcher(
+        fetch=lambda date_str, service: {"success": False, "error": "boom"},
+        services=SERVICES,
+        executor=executor,
+        ttl_seconds=30,
+        clock=clock,
+    )
+
+    prefetcher.observe("Botox tomorrow", reference=REFERENCE)
+    # A failed prefetch falls back to the real call
+    assert prefetcher.take("2025-11-13", "botox") is None
+
+    prefetcher.observe("Botox on Friday", reference=REFERENCE)
+    clock.now = 31
+    assert prefetcher.take("2025-11-14", "botox") is None
+
+    prefetcher.observe("fillers today", reference=REFERENCE)
+    prefetcher.close()
+
+    stats = prefetcher.stats()
+    assert stats["prefetches"] == 3
+    assert stats["wasted"] == 3
+    assert stats["hits"] == 0 and stats["pending"] == 0
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_check_availability_resolves_from_prefetch(mock_calendar_service, db_session, executor):
+    calendar = MagicMock()
+    mock_calendar_service.return_value = calendar
+    client = RealtimeClient(session_id="session-prefetch", db=db_session)
+    fetch = MagicMock(side_effect=_payload)
+    client._availability_prefetcher = AvailabilityPrefetcher(
+        fetch=fetch, services=SERVICES, executor=executor
+    )
+
+    client._observe_customer_text("Can I get Botox on 2025-12-01?")
+    result = await client.handle_function_call(
+        "check_availability", {"date": "2025-12-01", "service_type": "botox"}
+    )
+
+    assert result["success"] is True
+    assert result["service_type"] == "botox"
+    calendar.get_available_slots.assert_not_called()
+    assert client.get_session_data()["availability_prefetch"]["hits"] == 1
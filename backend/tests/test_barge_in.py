@@ -0,0 +1,95 @@
+"""
+Tests for server-side barge-in detection.
+"""
+
+import base64
+import json
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from barge_in import BargeInDetector
+from realtime_client import RealtimeClient
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class _FakeSocket:
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def send(self, message) -> None:
+        self.sent.append(json.loads(message))
+
+
+def _tone(ms: int, amplitude: int) -> bytes:
+    t = np.arange(24 * ms) / 24000
+    return (amplitude * np.sin(2 * np.pi * 440 * t)).astype("<i2").tobytes()
+
+
+def _assistant_delta(ms: int) -> str:
+    return base64.b64encode(b"\x00" * 48 * ms).decode("ascii")
+
+
+def test_detector_only_fires_on_sustained_speech_over_playback():
+    clock = _Clock()
+    detector = BargeInDetector(min_speech_ms=160, clock=clock)
+
+    # Nothing is playing: the caller is just taking their turn
+    assert detector.caller_audio(_tone(200, 8000)) is None
+
+    detector.assistant_audio(_assistant_delta(1000))
+    assert detector.assistant_playing()
+    # Playback bleeding into the microphone stays under the threshold
+    assert detector.caller_audio(_tone(200, 300)) is None
+    # Speech accumulates across chunks until it is long enough
+    assert detector.caller_audio(_tone(100, 8000)) is None
+    assert detector.caller_audio(_tone(100, 8000)) == 200.0
+    assert not detector.assistant_playing()
+
+    clock.now += 1.0
+    assert not detector.assistant_playing()
+    assert detector.stats()["barge_ins"] == 1
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_barge_in_cuts_audio_and_cancels_response(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = object()
+    notified = AsyncMock()
+    client = RealtimeClient(session_id="s-barge-in", db=db_session, barge_in_callback=notified)
+    client.ws = _FakeSocket()
+    client._barge_in = BargeInDetector(min_speech_ms=100)
+    forwarded = []
+
+    async def on_audio(audio_b64):
+        forwarded.append(audio_b64)
+
+    client._on_audio_callback = on_audio
+    try:
+        await client._on_audio_delta({"response_id": "resp_1", "delta": _assistant_delta(2000)})
+        await client.send_audio_bytes(_tone(120, 8000))
+
+        assert client.ws.sent[0] == {"type": "response.cancel"}
+        notified.assert_awaited_once()
+
+        # The rest of the interrupted response never reaches the caller
+        await client._on_audio_delta({"response_id": "resp_1", "delta": _assistant_delta(100)})
+        await client._on_audio_delta({"response_id": "resp_2", "delta": _assistant_delta(100)})
+        assert len(forwarded) == 2
+
+        session_data = client.get_session_data()
+        assert session_data["barge_in"]["dropped_deltas"] == 1
+        assert session_data["barge_in"]["dropped_audio_ms"] == 100.0
+        assert session_data["latency"]["barge_in_latency_ms"]["count"] == 1
+        assert session_data["customer_data"]["interruptions"] == 1
+    finally:
+        await client.flush_db_writes()
+        client.close()
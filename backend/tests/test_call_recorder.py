@@ -0,0 +1,110 @@
+"""
+Tests for bounded-memory streaming call recording.
+"""
+
+import struct
+import wave
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+import pytest
+
+from call_recorder import CallRecorder, build_call_recorder
+from realtime_client import RealtimeClient
+
+RATE = 8000
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _tone(seconds: float, value: int) -> bytes:
+    return np.full(int(seconds * RATE), value, dtype="<i2").tobytes()
+
+
+def _read_stereo(path) -> np.ndarray:
+    with wave.open(str(path), "rb") as wav:
+        assert wav.getnchannels() == 2
+        assert wav.getframerate() == RATE
+        frames = wav.readframes(wav.getnframes())
+    return np.frombuffer(frames, dtype="<i2").reshape(-1, 2)
+
+
+def test_directions_land_on_their_channel_and_timeline(tmp_path):
+    clock = FakeClock()
+    recorder = CallRecorder(str(tmp_path / "call.wav"), sample_rate=RATE, clock=clock)
+
+    recorder.caller(_tone(0.5, 100))
+    clock.now += 1.0
+    # A burst of assistant audio arrives faster than real time
+    recorder.assistant(_tone(0.25, 200))
+    recorder.assistant(_tone(0.25, 300))
+    url = recorder.close()
+
+    samples = _read_stereo(tmp_path / "call.wav")
+    assert url == str(tmp_path / "call.wav")
+    assert len(samples) == int(1.5 * RATE)
+    assert (samples[: int(0.5 * RATE), 0] == 100).all()
+    assert (samples[int(0.5 * RATE) :, 0] == 0).all()
+    assert (samples[: RATE, 1] == 0).all()
+    assert (samples[RATE : int(1.25 * RATE), 1] == 200).all()
+    assert (samples[int(1.25 * RATE) :, 1] == 300).all()
+
+
+def test_memory_is_bounded_and_overflow_is_counted(tmp_path):
+    recorder = CallRecorder(
+        str(tmp_path / "call.wav"), sample_rate=RATE, buffer_seconds=1, clock=FakeClock()
+    )
+    recorder.assistant(_tone(3, 500))
+    recorder.close()
+
+    stats = recorder.stats()
+    assert stats["dropped_ms"] == 2000.0
+    assert stats["recorded_seconds"] == 1.0
+    assert recorder._tracks[1].samples.nbytes == RATE * 2
+
+
+def test_mulaw_recording_has_a_valid_header(tmp_path):
+    recorder = CallRecorder(
+        str(tmp_path / "call.wav"), sample_rate=RATE, file_format="wav_ulaw", clock=FakeClock()
+    )
+    recorder.caller(_tone(0.5, 1000))
+    recorder.close()
+
+    data = (tmp_path / "call.wav").read_bytes()
+    format_tag, channels, rate = struct.unpack("<HHI", data[20:28])
+    assert (format_tag, channels, rate) == (7, 2, RATE)
+    data_at = data.index(b"data")
+    (data_bytes,) = struct.unpack("<I", data[data_at + 4 : data_at + 8])
+    assert data_bytes == int(0.5 * RATE) * 2 == len(data) - data_at - 8
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_realtime_client_records_both_directions(mock_calendar_service, db_session, tmp_path):
+    mock_calendar_service.return_value = MagicMock()
+    client = RealtimeClient(session_id="session/rec", db=db_session)
+    client.ws = AsyncMock()
+    client._recorder = build_call_recorder(
+        enabled=True,
+        session_id="session/rec",
+        upstream_format="pcm16",
+        directory=str(tmp_path),
+        file_format="wav",
+        buffer_seconds=5,
+        base_url="https://cdn.example.com/calls/",
+    )
+
+    await client.send_audio_bytes(b"\x01\x00" * 2400)
+    await client._event_router.dispatch("response.audio.delta", {"delta": "AAAAAAAA"})
+    url = await client.finish_recording()
+
+    assert url.startswith("https://cdn.example.com/calls/")
+    assert url.endswith("/session_rec.wav")
+    assert client.get_session_data()["recording_url"] == url
+    assert client.get_session_data()["recording"]["recorded_seconds"] > 0
@@ -0,0 +1,102 @@
+"""
+Tests for the compact call record encoding.
+"""
+
+import json
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+import pytest
+
+from analytics import AnalyticsService
+from compact_transcript import CallRecordError, CompactCallRecord, encode_call_record
+from database import CommunicationMessage, VoiceCallDetails, VoiceTranscriptEntry
+from post_call import persist_call_transcript
+from realtime_client import RealtimeClient
+from voice_transcript import call_transcript_page
+
+
+def _transcript(count: int):
+    start = datetime(2026, 3, 2, 15, 0, 0)
+    return [
+        {
+            "speaker": "customer" if index % 2 else "assistant",
+            "text": f"Line {index}: do you have Botox openings on Friday? ✨",
+            "timestamp": (start + timedelta(milliseconds=1500 * index)).isoformat(),
+        }
+        for index in range(count)
+    ]
+
+
+def test_call_record_round_trips_and_slices_lazily():
+    transcript = _transcript(400)
+    function_calls = [
+        {
+            "function": "check_availability",
+            "arguments": {"date": "2026-03-06", "service_type": "botox"},
+            "timestamp": transcript[3]["timestamp"],
+        },
+        {"function": "book_appointment", "arguments": {"slot": 2}},
+    ]
+
+    for compress in (True, False):
+        record = CompactCallRecord(encode_call_record(transcript, function_calls, compress=compress))
+        assert len(record.transcript) == 400
+        assert record.transcript[0] == transcript[0]
+        assert record.transcript[-1] == transcript[-1]
+        assert record.transcript[100:103] == transcript[100:103]
+        assert record.transcript[398:500] == transcript[398:]
+        assert record.transcript.labels()[:3] == ["assistant", "customer", "assistant"]
+        assert list(record.function_calls) == function_calls
+        with pytest.raises(IndexError):
+            record.transcript[400]
+
+    compact = encode_call_record(transcript, function_calls)
+    assert len(compact) * 5 < len(json.dumps(transcript + function_calls))
+    assert list(CompactCallRecord(encode_call_record([])).transcript) == []
+    with pytest.raises(CallRecordError):
+        CompactCallRecord(b"{}")
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_finalized_call_is_paged_from_call_record(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = object()
+    conversation = AnalyticsService.create_conversation(
+        db=db_session, customer_id=None, channel="voice", metadata={"session_id": "s-compact"}
+    )
+    try:
+        client = RealtimeClient(session_id="s-compact", db=db_session, conversation=conversation)
+        for index in range(25):
+            client._append_transcript_entry("customer" if index % 2 else "assistant", f"line {index}")
+        session_data = client.get_session_data()
+        await client.run_db(
+            lambda: persist_call_transcript(
+                db_session,
+                conversation=conversation,
+                session_id="s-compact",
+                session_data=session_data,
+            )
+        )
+
+        details = (
+            db_session.query(VoiceCallDetails)
+            .join(CommunicationMessage)
+            .filter(CommunicationMessage.conversation_id == conversation.id)
+            .one()
+        )
+        assert details.transcript_segments == [] and details.function_calls == []
+
+        total, entries = call_transcript_page(db_session, details, conversation.id, 20, 10)
+        assert total == 25
+        assert [entry["text"] for entry in entries] == [f"line {i}" for i in range(20, 25)]
+
+        # Without a call record the incrementally written entries are paged in SQL
+        total, entries = call_transcript_page(db_session, None, conversation.id, 5, 2)
+        assert total == 25
+        assert [entry["text"] for entry in entries] == ["line 5", "line 6"]
+    finally:
+        db_session.query(VoiceTranscriptEntry).filter(
+            VoiceTranscriptEntry.conversation_id == conversation.id
+        ).delete()
+        db_session.commit()
@@ -0,0 +1,358 @@
+"""
+Tests for SendGrid inbound parsing and Message-ID thread resolution.
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+import main
+import messaging_pipeline
+from analytics import AnalyticsService
+from config import get_settings
+from database import (
+    CommunicationMessage,
+    EmailMessageIndex,
+    InboundMessageJob,
+    get_db,
+)
+from email_gateway import (
+    InboundEmailError,
+    InboundEmailTooLarge,
+    MockEmailSender,
+    SendGridInboundParser,
+    extract_message_ids,
+)
+from inbound_queue import InboundQueue, InboundWorkerPool
+from messaging_service import MessagingService
+
+BOUNDARY = "xYzZY"
+
+
+def _multipart(fields, files=()):
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode()
+            + value.encode()
+            + b"\r\n"
+        )
+    for name, filename, content_type, data in files:
+        parts.append(
+            (
+                f"--{BOUNDARY}\r\n"
+                f'Content-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                f"Content-Type: {content_type}\r\n\r\n"
+            ).encode()
+            + data
+            + b"\r\n"
+        )
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def _parse(body, spool_dir, chunk_size=7, max_field_bytes=10_000, **limits):
+    parser = SendGridInboundParser.for_content_type(
+        f"multipart/form-data; boundary={BOUNDARY}",
+        str(spool_dir),
+        max_field_bytes,
+        **limits,
+    )
+    for index in range(0, len(body), chunk_size):
+        parser.feed(body[index : index + chunk_size])
+    return parser.close()
+
+
+HEADERS = (
+    "Message-ID: <reply-2@mail.example.com>\r\n"
+    "In-Reply-To: <ours-1@luxurymedspa.com>\r\n"
+    "References: <first-0@mail.example.com> <ours-1@luxurymedspa.com>\r\n"
+)
+
+
+def test_streaming_parse_spools_attachments_to_disk(tmp_path):
+    """Fields are decoded and attachments land in the spool directory."""
+    pdf = os.urandom(5000)
+    body = _multipart(
+        {
+            "headers": HEADERS,
+            "from": "Jane Doe <jane@example.com>",
+            "subject": "Re: Botox appointment",
+            "text": "Does Friday work?",
+            "charsets": '{"text": "utf-8"}',
+        },
+        files=[("attachment1", "intake form.pdf", "application/pdf", pdf)],
+    )
+
+    inbound = _parse(body, tmp_path)
+
+    assert inbound.fields["text"] == "Does Friday work?"
+    assert len(inbound.attachments) == 1
+    attachment = inbound.attachments[0]
+    assert attachment.filename == "intake form.pdf"
+    assert attachment.size == len(pdf)
+    assert os.path.dirname(attachment.path) == str(tmp_path)
+    with open(attachment.path, "rb") as handle:
+        assert handle.read() == pdf
+
+    payload = inbound.to_payload()
+    assert payload["message_id"] == "<reply-2@mail.example.com>"
+    assert payload["in_reply_to"] == "<ours-1@luxurymedspa.com>"
+    assert payload["references"] == [
+        "<first-0@mail.example.com>",
+        "<ours-1@luxurymedspa.com>",
+    ]
+    assert payload["attachments"][0]["path"] == attachment.path
+    assert inbound.dedupe_key() == "<reply-2@mail.example.com>"
+
+    inbound.discard()
+    assert not os.path.exists(attachment.path)
+
+
+def test_oversized_field_is_rejected(tmp_path):
+    body = _multipart({"text": "x" * 200})
+
+    with pytest.raises(InboundEmailTooLarge):
+        _parse(body, tmp_path, max_field_bytes=100)
+
+
+@pytest.mark.parametrize(
+    "limits",
+    [
+        {"max_attachment_bytes": 1000},
+        {"max_attachment_bytes": 5000, "max_total_attachment_bytes": 1500},
+    ],
+)
+def test_oversized_attachments_are_rejected(tmp_path, limits):
+    """Per-file and per-message attachment caps stop spooling mid-stream."""
+    body = _multipart(
+        {"text": "See attached"},
+        files=[
+            ("attachment1", "a.pdf", "application/pdf", os.urandom(800)),
+            ("attachment2", "b.pdf", "application/pdf", os.urandom(1200)),
+        ],
+    )
+    parser = SendGridInboundParser.for_content_type(
+        f"multipart/form-data; boundary={BOUNDARY}", str(tmp_path), 10_000, **limits
+    )
+
+    with pytest.raises(InboundEmailTooLarge):
+        for index in range(0, len(body), 64):
+            parser.feed(body[index : index + 64])
+    parser.discard()
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_non_multipart_payload_is_rejected(tmp_path):
+    with pytest.raises(InboundEmailError):
+        SendGridInboundParser.for_content_type("application/json", str(tmp_path), 100)
+
+
+def test_extract_message_ids_ignores_noise():
+    assert extract_message_ids(" <a@b>\r\n\t<c@d> junk") == ["<a@b>", "<c@d>"]
+    assert extract_message_ids(None) == []
+
+
+def test_thread_resolution_uses_message_id_index(db_session, email_conversation):
+    """In-Reply-To (or the latest References entry) maps to the conversation."""
+    ours = f"<{uuid.uuid4().hex}@luxurymedspa.com>"
+    MessagingService.index_email_message(
+        db=db_session, message_id_header=ours, conversation_id=email_conversation.id
+    )
+    # Indexing the same Message-ID twice is a no-op
+    MessagingService.index_email_message(
+        db=db_session, message_id_header=ours, conversation_id=email_conversation.id
+    )
+
+    by_reply = MessagingService.find_email_thread_conversation(
+        db=db_session, in_reply_to=ours
+    )
+    by_references = MessagingService.find_email_thread_conversation(
+        db=db_session,
+        in_reply_to="<unknown@example.com>",
+        references=["<older@example.com>", ours],
+    )
+    unknown = MessagingService.find_email_thread_conversation(
+        db=db_session, in_reply_to="<unknown@example.com>"
+    )
+
+    assert by_reply.id == email_conversation.id
+    assert by_references.id == email_conversation.id
+    assert unknown is None
+
+    db_session.query(EmailMessageIndex).filter(
+        EmailMessageIndex.message_id_header == ours
+    ).delete()
+    db_session.commit()
+
+
+# ==================== End to end ====================
+
+
+@pytest.fixture
+def email_replies(monkeypatch, db_session):
+    """Stub the AI turn and capture outbound email instead of sending it."""
+    sender = MockEmailSender(get_settings().MED_SPA_EMAIL)
+    monkeypatch.setattr(messaging_pipeline, "get_email_sender", lambda: sender)
+    monkeypatch.setattr(
+        MessagingService,
+        "generate_ai_response",
+        staticmethod(
+            lambda db, conversation_id, channel, log_assistant_message=True: (
+                "Friday at 3pm works. See you then!",
+                None,
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        AnalyticsService,
+        "score_conversation_satisfaction",
+        staticmethod(lambda db, conversation_id: None),
+    )
+    yield sender
+    db_session.query(InboundMessageJob).delete()
+    db_session.commit()
+
+
+def test_process_inbound_email_replies_in_thread(db_session, email_conversation, email_replies):
+    """A reply to one of our emails lands on its conversation and is answered in thread."""
+    customer = email_conversation.customer
+    ours = f"<{uuid.uuid4().hex}@luxurymedspa.com>"
+    theirs = f"<{uuid.uuid4().hex}@mail.example.com>"
+    MessagingService.index_email_message(
+        db=db_session, message_id_header=ours, conversation_id=email_conversation.id
+    )
+    job, _ = InboundQueue.enqueue(
+        db_session,
+        channel="email",
+        provider_message_id=theirs,
+        payload={
+            "from": f"Guest <{customer.email}>",
+            "to": "hello@luxurymedspa.com",
+            "subject": "Re: Botox appointment",
+            "text": "Does Friday work?",
+            "message_id": theirs,
+            "in_reply_to": ours,
+            "references": [ours],
+            "attachments": [],
+        },
+    )
+
+    conversation_id = messaging_pipeline.process_inbound_email(db_session, job)
+
+    assert conversation_id == email_conversation.id
+    contents = [
+        (message.direction, message.content)
+        for message in db_session.query(CommunicationMessage)
+        .filter(CommunicationMessage.conversation_id == email_conversation.id)
+        .order_by(CommunicationMessage.sent_at)
+    ]
+    assert contents == [
+        ("inbound", "Does Friday work?"),
+        ("outbound", "Friday at 3pm works. See you then!"),
+    ]
+
+    (reply,) = email_replies.sent
+    assert reply["to_address"] == customer.email
+    assert reply["subject"] == "Re: Botox appointment"
+    assert reply["in_reply_to"] == theirs
+    assert reply["references"] == [ours, theirs]
+    assert MessagingService.find_email_thread_conversation(
+        db=db_session, in_reply_to=reply["message_id"]
+    ).id == email_conversation.id
+
+
+def test_sendgrid_webhook_queues_and_worker_replies(
+    db_session, test_engine, customer, email_replies, tmp_path, monkeypatch
+):
+    """Webhook -> queue -> worker -> reply, with duplicates and oversized mail refused."""
+    monkeypatch.setattr(get_settings(), "EMAIL_ATTACHMENT_DIR", str(tmp_path))
+    monkeypatch.setattr(get_settings(), "EMAIL_INBOUND_MAX_ATTACHMENT_BYTES", 4000)
+    message_id = f"<{uuid.uuid4().hex}@mail.example.com>"
+    body = _multipart(
+        {
+            "headers": f"Message-ID: {message_id}\r\n",
+            "from": f"Guest <{customer.email}>",
+            "to": "hello@luxurymedspa.com",
+            "subject": "Lip filler",
+            "text": "Do you have anything next week?",
+        },
+        files=[("attachment1", "photo.jpg", "image/jpeg", os.urandom(1000))],
+    )
+    oversized = _multipart(
+        {"headers": "Message-ID: <big@mail.example.com>\r\n", "text": "hi"},
+        files=[("attachment1", "scan.pdf", "application/pdf", os.urandom(5000))],
+    )
+    headers = {"content-type": f"multipart/form-data; boundary={BOUNDARY}"}
+
+    client = TestClient(main.app)
+    main.app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        first = client.post("/api/webhooks/sendgrid/email", content=body, headers=headers)
+        retry = client.post("/api/webhooks/sendgrid/email", content=body, headers=headers)
+        too_large = client.post(
+            "/api/webhooks/sendgrid/email", content=oversized, headers=headers
+        )
+    finally:
+        main.app.dependency_overrides.pop(get_db)
+
+    assert first.json() == {"status": "queued"}
+    assert retry.json() == {"status": "duplicate"}
+    assert too_large.status_code == 413
+    # Only the accepted message's attachment is left on disk
+    assert len(os.listdir(tmp_path)) == 1
+
+    pool = InboundWorkerPool(
+        concurrency=1,
+        max_attempts=1,
+        session_factory=sessionmaker(autocommit=False, autoflush=False, bind=test_engine),
+    )
+    pool.register("email", messaging_pipeline.process_inbound_email)
+    assert asyncio.run(pool.run_until_idle()) == 1
+
+    db_session.expire_all()
+    job = (
+        db_session.query(InboundMessageJob)
+        .filter(InboundMessageJob.provider_message_id == message_id)
+        .one()
+    )
+    assert job.status == "done"
+    (reply,) = email_replies.sent
+    assert reply["to_address"] == customer.email
+    assert reply["subject"] == "Re: Lip filler"
+    assert reply["in_reply_to"] == message_id
+    assert reply["body_text"] == "Friday at 3pm works. See you then!"
+
+
+def test_sendgrid_webhook_removes_attachments_when_enqueue_fails(
+    db_session, tmp_path, monkeypatch
+):
+    """Attachments of a message that was never queued are not left on disk."""
+    monkeypatch.setattr(get_settings(), "EMAIL_ATTACHMENT_DIR", str(tmp_path))
+
+    def failing_enqueue(*args, **kwargs):
+        raise RuntimeError("database unavailable")
+
+    monkeypatch.setattr(InboundQueue, "enqueue", failing_enqueue)
+    body = _multipart(
+        {"headers": "Message-ID: <lost@mail.example.com>\r\n", "text": "hi"},
+        files=[("attachment1", "photo.jpg", "image/jpeg", os.urandom(1000))],
+    )
+
+    client = TestClient(main.app, raise_server_exceptions=False)
+    main.app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        response = client.post(
+            "/api/webhooks/sendgrid/email",
+            content=body,
+            headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+        )
+    finally:
+        main.app.dependency_overrides.pop(get_db)
+
+    assert response.status_code == 500
+    assert os.listdir(tmp_path) == []
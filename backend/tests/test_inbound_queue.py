@@ -0,0 +1,263 @@
+"""
+Tests for the durable inbound message queue, worker pool and SMS gateway.
+"""
+
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from twilio.request_validator import RequestValidator
+
+import main
+import messaging_pipeline
+from analytics import AnalyticsService
+from config import get_settings
+from database import CommunicationMessage, Conversation, InboundMessageJob, get_db
+from inbound_queue import InboundQueue, InboundWorkerPool
+from messaging_service import MessagingService
+from sms_coalescer import InboundBurstCoalescer
+from sms_gateway import MockSmsSender, validate_twilio_signature
+
+
+def _sid() -> str:
+    return f"SM{uuid.uuid4().hex}"
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+
+@pytest.fixture(autouse=True)
+def clear_queue(db_session):
+    db_session.query(InboundMessageJob).delete()
+    db_session.commit()
+    yield
+    db_session.query(InboundMessageJob).delete()
+    db_session.commit()
+
+
+def test_enqueue_dedupes_on_provider_message_id(db_session):
+    """Twilio retries of the same MessageSid do not create a second job."""
+    sid = _sid()
+    job, created = InboundQueue.enqueue(
+        db_session, channel="sms", provider_message_id=sid, payload={"Body": "hi"}
+    )
+    duplicate, created_again = InboundQueue.enqueue(
+        db_session, channel="sms", provider_message_id=sid, payload={"Body": "hi"}
+    )
+
+    assert created is True
+    assert created_again is False
+    assert duplicate.id == job.id
+    assert db_session.query(InboundMessageJob).count() == 1
+
+
+def test_failed_job_is_retried_with_backoff_then_given_up(db_session):
+    """Failures re-queue the job in the future until max attempts."""
+    InboundQueue.enqueue(
+        db_session, channel="sms", provider_message_id=_sid(), payload={}
+    )
+
+    job = InboundQueue.claim_next(db_session)
+    assert job.status == "processing"
+    assert job.attempts == 1
+
+    InboundQueue.mark_failed(db_session, job, "boom", max_attempts=2)
+    assert job.status == "queued"
+    assert job.available_at > datetime.utcnow()
+    assert InboundQueue.claim_next(db_session) is None
+
+    job.available_at = datetime.utcnow() - timedelta(seconds=1)
+    db_session.commit()
+    job = InboundQueue.claim_next(db_session)
+    assert job.attempts == 2
+
+    InboundQueue.mark_failed(db_session, job, "boom again", max_attempts=2)
+    assert job.status == "failed"
+    assert job.last_error == "boom again"
+
+
+def test_job_is_claimed_by_only_one_worker(db_session, session_factory):
+    """A second session cannot claim a job another session already holds."""
+    InboundQueue.enqueue(
+        db_session, channel="sms", provider_message_id=_sid(), payload={}
+    )
+    first, second = session_factory(), session_factory()
+    try:
+        assert InboundQueue.claim_next(first) is not None
+        assert InboundQueue.claim_next(second) is None
+    finally:
+        first.close()
+        second.close()
+
+
+def test_stale_processing_jobs_are_requeued(db_session):
+    """Jobs abandoned by a crashed worker return to the queue."""
+    InboundQueue.enqueue(
+        db_session, channel="sms", provider_message_id=_sid(), payload={}
+    )
+    job = InboundQueue.claim_next(db_session)
+    job.locked_at = datetime.utcnow() - timedelta(
+        seconds=InboundQueue.STALE_LOCK_SECONDS + 1
+    )
+    db_session.commit()
+
+    assert InboundQueue.requeue_stale(db_session) == 1
+    db_session.refresh(job)
+    assert job.status == "queued"
+
+
+def test_worker_pool_runs_registered_processor(db_session, session_factory):
+    """Workers dispatch by channel and record the outcome on each job."""
+    seen = []
+
+    def processor(db, job):
+        if job.payload.get("fail"):
+            raise RuntimeError("processor failed")
+        seen.append(job.payload["Body"])
+        return None
+
+    pool = InboundWorkerPool(
+        concurrency=1, max_attempts=1, session_factory=session_factory
+    )
+    pool.register("sms", processor)
+
+    ok_sid, bad_sid = _sid(), _sid()
+    InboundQueue.enqueue(
+        db_session, channel="sms", provider_message_id=ok_sid, payload={"Body": "hi"}
+    )
+    InboundQueue.enqueue(
+        db_session, channel="sms", provider_message_id=bad_sid, payload={"fail": True}
+    )
+
+    assert asyncio.run(pool.run_until_idle()) == 2
+    assert seen == ["hi"]
+
+    db_session.expire_all()
+    statuses = {
+        job.provider_message_id: job.status
+        for job in db_session.query(InboundMessageJob).all()
+    }
+    assert statuses == {ok_sid: "done", bad_sid: "failed"}
+    assert pool.stats()["processed"] == 1
+    assert pool.stats()["failed"] == 1
+
+
+def test_twilio_webhook_to_reply_survives_retries(
+    db_session, session_factory, customer, monkeypatch
+):
+    """Retried SMS jobs reuse the recorded message and never text twice."""
+    sender = MockSmsSender("+15550000000")
+    monkeypatch.setattr(messaging_pipeline, "get_sms_sender", lambda: sender)
+    monkeypatch.setattr(
+        messaging_pipeline, "sms_burst_coalescer", InboundBurstCoalescer(window_seconds=0)
+    )
+    monkeypatch.setattr(InboundQueue, "RETRY_BASE_SECONDS", 0)
+    monkeypatch.setattr(get_settings(), "TWILIO_SKIP_SIGNATURE_CHECK", True)
+    monkeypatch.setattr(
+        AnalyticsService,
+        "score_conversation_satisfaction",
+        staticmethod(lambda db, conversation_id: None),
+    )
+    generations = []
+
+    def flaky_generation(db, conversation_id, channel, log_assistant_message=True):
+        generations.append(conversation_id)
+        if len(generations) == 1:
+            raise RuntimeError("OpenAI timed out")
+        return "We have 3pm tomorrow open. Want it?", None
+
+    monkeypatch.setattr(
+        MessagingService, "generate_ai_response", staticmethod(flaky_generation)
+    )
+
+    client = TestClient(main.app)
+    main.app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        response = client.post(
+            "/api/webhooks/twilio/sms",
+            data={
+                "MessageSid": _sid(),
+                "From": customer.phone,
+                "To": "+15550000000",
+                "Body": "Any botox openings tomorrow?",
+            },
+        )
+    finally:
+        main.app.dependency_overrides.pop(get_db)
+    assert response.status_code == 200
+
+    crashed = []
+
+    def process(db, job):
+        conversation_id = messaging_pipeline.process_inbound_sms(db, job)
+        if not crashed:
+            # The reply went out but the worker died before marking the job done
+            crashed.append(job.id)
+            raise RuntimeError("worker crashed")
+        return conversation_id
+
+    pool = InboundWorkerPool(
+        concurrency=1, max_attempts=5, session_factory=session_factory
+    )
+    pool.register("sms", process)
+
+    # attempt 1 fails generating, attempt 2 replies then crashes, attempt 3 skips
+    assert asyncio.run(pool.run_until_idle()) == 3
+
+    db_session.expire_all()
+    job = db_session.query(InboundMessageJob).one()
+    assert job.status == "done"
+    assert job.attempts == 3
+    assert pool.stats()["retried"] == 2
+
+    conversation = (
+        db_session.query(Conversation)
+        .filter(Conversation.customer_id == customer.id, Conversation.channel == "sms")
+        .one()
+    )
+    assert job.conversation_id == conversation.id
+    messages = (
+        db_session.query(CommunicationMessage)
+        .filter(CommunicationMessage.conversation_id == conversation.id)
+        .order_by(CommunicationMessage.sent_at)
+        .all()
+    )
+    assert [(message.direction, message.content) for message in messages] == [
+        ("inbound", "Any botox openings tomorrow?"),
+        ("outbound", "We have 3pm tomorrow open. Want it?"),
+    ]
+    assert job.inbound_message_id == messages[0].id
+    assert len(generations) == 2
+    assert [sent["body"] for sent in sender.sent] == [
+        "We have 3pm tomorrow open. Want it?"
+    ]
+
+
+def test_mock_sms_sender_records_sends():
+    sender = MockSmsSender("+15550000000")
+
+    result = sender.send("+15551112222", "See you at 3pm!")
+
+    assert result["delivery_status"] == "sent"
+    assert result["provider_message_id"].startswith("SM")
+    assert sender.sent[0]["body"] == "See you at 3pm!"
+
+
+def test_twilio_signature_validation():
+    url = "https://example.com/api/webhooks/twilio/sms"
+    params = {"From": "+15551112222", "Body": "hello", "MessageSid": "SM123"}
+    signature = RequestValidator("secret").compute_signature(url, params)
+
+    assert validate_twilio_signature(url, params, signature, auth_token="secret")
+    assert not validate_twilio_signature(url, params, "bad", auth_token="secret")
+    assert not validate_twilio_signature(url, params, None, auth_token="secret")
+    # No auth token configured: fail closed unless the check is skipped
+    assert not validate_twilio_signature(
+        url, params, None, auth_token="", skip_check=False
+    )
+    assert validate_twilio_signature(url, params, None, auth_token="", skip_check=True)
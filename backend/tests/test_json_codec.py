@@ -0,0 +1,51 @@
+"""
+Tests for the pluggable JSON codec.
+"""
+
+import json
+
+import pytest
+
+import json_codec
+
+
+def test_codec_round_trips_realtime_events():
+    event = {"type": "response.audio.delta", "delta": "AAAA", "item_id": "é", "n": [1, 2.5]}
+
+    encoded = json_codec.dumps(event)
+
+    assert isinstance(encoded, str)
+    assert json.loads(encoded) == event
+    assert json_codec.loads(encoded) == event
+    assert json_codec.loads(encoded.encode("utf-8")) == event
+    assert json_codec.loads(memoryview(encoded.encode("utf-8"))) == event
+
+
+def test_fast_json_response_renders_compact_utf8():
+    response = json_codec.FastJSONResponse({"name": "Café", "count": 3})
+
+    assert response.media_type == "application/json"
+    assert json.loads(response.body) == {"name": "Café", "count": 3}
+
+
+def test_backend_selection_falls_back_to_stdlib(monkeypatch):
+    assert json_codec._select_backend("json") == "json"
+
+    monkeypatch.setattr(json_codec, "orjson", None)
+    assert json_codec._select_backend("auto") == "json"
+    assert json_codec._select_backend("orjson") == "json"
+
+
+@pytest.mark.asyncio
+async def test_send_json_uses_text_frames():
+    class _Socket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, data):
+            self.sent.append(data)
+
+    socket = _Socket()
+    await json_codec.send_json(socket, {"type": "pong"})
+
+    assert socket.sent == ['{"type":"pong"}']
@@ -0,0 +1,130 @@
+"""
+Tests for queued post-call finalization of voice sessions.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from analytics import AnalyticsService
+from compact_transcript import CompactCallRecord
+from database import Conversation, DailyMetric, InboundMessageJob, VoiceCallDetails
+from inbound_queue import InboundQueue, InboundWorkerPool
+from post_call import (
+    POST_CALL_CHANNEL,
+    persist_call_transcript,
+    process_call_finalization,
+)
+
+SESSION_DATA = {
+    "transcript": [
+        {"speaker": "customer", "text": "Hi, I'd like Botox on Friday"},
+        {"speaker": "assistant", "text": "Booked you in!"},
+    ],
+    "function_calls": [],
+    "customer_data": {"name": "Pat Caller", "phone": "+15555550142"},
+}
+
+
+def _score_response(score: int = 9, outcome: str = "appointment_scheduled") -> MagicMock:
+    response = MagicMock()
+    response.choices[0].message.content = json.dumps(
+        {
+            "satisfaction_score": score,
+            "sentiment": "positive",
+            "outcome": outcome,
+            "summary": "Caller booked Botox.",
+        }
+    )
+    return response
+
+
+@pytest.fixture
+def session_factory(test_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+
+@pytest.fixture
+def call(db_session):
+    db_session.query(InboundMessageJob).delete()
+    db_session.commit()
+    conversation = AnalyticsService.create_conversation(
+        db=db_session, customer_id=None, channel="voice", metadata={"session_id": "s-post"}
+    )
+    yield conversation
+    db_session.query(InboundMessageJob).delete()
+    db_session.commit()
+
+
+def test_teardown_persists_transcript_and_queues_one_job(db_session, call):
+    job = persist_call_transcript(
+        db_session, conversation=call, session_id="s-post", session_data=SESSION_DATA
+    )
+    again = persist_call_transcript(
+        db_session, conversation=call, session_id="s-post", session_data=SESSION_DATA
+    )
+
+    assert job.channel == POST_CALL_CHANNEL
+    assert again.id == job.id
+    details = (
+        db_session.query(VoiceCallDetails)
+        .filter(VoiceCallDetails.message_id.in_([m.id for m in call.messages]))
+        .first()
+    )
+    assert list(CompactCallRecord(details.call_record).transcript) == SESSION_DATA["transcript"]
+    # Scoring and completion are left to the worker
+    db_session.refresh(call)
+    assert call.status == "active"
+    assert call.satisfaction_score is None
+
+
+@patch("analytics.openai_client.chat.completions.create")
+def test_worker_finalizes_call_and_refreshes_rollup(mock_openai, db_session, call, session_factory):
+    mock_openai.return_value = _score_response()
+    persist_call_transcript(
+        db_session, conversation=call, session_id="s-post", session_data=SESSION_DATA
+    )
+
+    pool = InboundWorkerPool(concurrency=1, session_factory=session_factory)
+    pool.register(POST_CALL_CHANNEL, process_call_finalization)
+    assert asyncio.run(pool.run_until_idle()) == 1
+
+    db_session.expire_all()
+    conversation = db_session.get(Conversation, call.id)
+    assert conversation.status == "completed"
+    assert conversation.customer_id is not None
+    assert conversation.satisfaction_score == 9
+    assert conversation.ai_summary == "Caller booked Botox."
+
+    initiated = conversation.initiated_at
+    metric = (
+        db_session.query(DailyMetric)
+        .filter(DailyMetric.date == datetime(initiated.year, initiated.month, initiated.day))
+        .one()
+    )
+    assert metric.total_calls >= 1
+    assert metric.appointments_booked >= 1
+
+
+@patch("analytics.openai_client.chat.completions.create")
+def test_scoring_failure_is_retried_without_losing_transcript(mock_openai, db_session, call):
+    mock_openai.side_effect = RuntimeError("OpenAI unavailable")
+    persist_call_transcript(
+        db_session, conversation=call, session_id="s-post", session_data=SESSION_DATA
+    )
+
+    job = InboundQueue.claim_next(db_session, channel=POST_CALL_CHANNEL)
+    with pytest.raises(RuntimeError):
+        process_call_finalization(db_session, job)
+
+    # The last attempt stores the neutral fallback instead of raising
+    job.attempts = 99
+    process_call_finalization(db_session, job)
+    db_session.refresh(call)
+    assert call.satisfaction_score == 5
+    assert call.status == "completed"
+    assert len(call.messages) == 1
@@ -0,0 +1,114 @@
+"""
+Tests for Realtime event capture and offline replay.
+"""
+
+import json
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from realtime_capture import (
+    CaptureWriter,
+    CapturedMessage,
+    CapturingSocket,
+    ReplaySocket,
+    load_capture,
+    replay_capture,
+)
+from realtime_client import RealtimeClient
+
+SERVER_EVENTS = [
+    '{"type":"response.audio.delta","delta":"AAAAAA=="}',
+    '{"type":"conversation.item.input_audio_transcription.completed","transcript":"Hi, café hours?"}',
+    '{"type":"response.audio_transcript.done","transcript":"We open at nine."}',
+]
+
+
+class FakeUpstream:
+    def __init__(self, messages):
+        self.messages = messages
+        self.send = AsyncMock()
+
+    async def __aiter__(self):
+        for message in self.messages:
+            yield message
+
+
+@pytest.mark.asyncio
+async def test_capture_records_both_directions_verbatim(tmp_path):
+    writer = CaptureWriter(str(tmp_path / "call.jsonl.gz"))
+    socket = CapturingSocket(FakeUpstream(SERVER_EVENTS[:2]), writer)
+
+    await socket.send('{"type":"session.update"}')
+    received = [message async for message in socket]
+    writer.close()
+
+    captured = load_capture(str(tmp_path / "call.jsonl.gz"))
+    assert [(m.direction, m.raw) for m in captured] == [
+        ("c", '{"type":"session.update"}'),
+        ("s", SERVER_EVENTS[0]),
+        ("s", SERVER_EVENTS[1]),
+    ]
+    assert received == SERVER_EVENTS[:2]
+    assert captured[0].offset_ms <= captured[-1].offset_ms
+    assert writer.stats()["error"] is None
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_replay_drives_realtime_client_and_reports(mock_calendar_service, db_session, tmp_path):
+    mock_calendar_service.return_value = MagicMock()
+    path = tmp_path / "call.jsonl"
+    path.write_text(
+        "".join(
+            '{"t":%d,"d":"s","e":%s}\n' % (index * 20, event)
+            for index, event in enumerate(SERVER_EVENTS)
+        ),
+        encoding="utf-8",
+    )
+    clients = []
+
+    def client_factory():
+        clients.append(RealtimeClient(session_id="replay-test", db=db_session))
+        return clients[0]
+
+    report = await replay_capture(str(path), speed=0, client_factory=client_factory)
+
+    assert report["server_events"] == 3
+    assert report["processing_ms"]["count"] == 3
+    assert report["handlers"]["response.audio.delta"]["count"] == 1
+    assert report["audio_b64_chars"] > 0
+    transcript = clients[0].session_data["transcript"]
+    assert [entry["speaker"] for entry in transcript] == ["customer", "assistant"]
+    json.dumps(report)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("live_calendar", [False, True])
+async def test_default_replay_uses_mock_calendar_unless_live(
+    live_calendar, test_engine, tmp_path
+):
+    """Replayed tool calls only reach the real calendar when asked to."""
+    path = tmp_path / "call.jsonl"
+    path.write_text('{"t":0,"d":"s","e":%s}\n' % SERVER_EVENTS[0], encoding="utf-8")
+    sessions = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+    with patch("realtime_client.SessionLocal", sessions), patch(
+        "realtime_client.get_calendar_service", return_value=MagicMock()
+    ) as live:
+        report = await replay_capture(str(path), speed=0, live_calendar=live_calendar)
+
+    assert report["server_events"] == 1
+    assert live.called is live_calendar
+
+
+@pytest.mark.asyncio
+async def test_replay_socket_keeps_recorded_pace_scaled_by_speed():
+    socket = ReplaySocket(
+        [CapturedMessage(0.0, "s", "{}"), CapturedMessage(400.0, "s", "{}")], speed=4
+    )
+    started = time.perf_counter()
+    assert [message async for message in socket] == ["{}", "{}"]
+    assert 0.09 <= time.perf_counter() - started < 0.4
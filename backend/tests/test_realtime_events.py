@@ -0,0 +1,103 @@
+"""
+Tests for the Realtime event router and RealtimeClient dispatch.
+"""
+
+import json
+import logging
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from realtime_client import RealtimeClient
+from realtime_events import HISTOGRAM_BOUNDS_MS, LazyJson, RealtimeEventRouter
+
+
+@pytest.mark.asyncio
+async def test_router_dispatches_sync_and_async_handlers_with_stats():
+    router = RealtimeEventRouter()
+    seen = []
+
+    @router.on("sync.event")
+    def _sync(data):
+        seen.append(("sync", data["n"]))
+
+    async def _async(data):
+        seen.append(("async", data["n"]))
+
+    router.register("async.event", _async)
+
+    assert await router.dispatch("sync.event", {"n": 1}) is True
+    assert await router.dispatch("async.event", {"n": 2}) is True
+    assert await router.dispatch("unknown.event", {"n": 3}) is False
+
+    assert seen == [("sync", 1), ("async", 2)]
+    stats = router.stats()
+    assert stats["sync.event"]["count"] == 1
+    assert stats["unknown.event"]["count"] == 1
+    assert len(stats["async.event"]["buckets"]) == len(HISTOGRAM_BOUNDS_MS) + 1
+    assert router.handles("sync.event") and not router.handles("unknown.event")
+
+
+@pytest.mark.asyncio
+async def test_router_counts_handler_errors():
+    router = RealtimeEventRouter()
+
+    def _boom(data):
+        raise RuntimeError("boom")
+
+    router.register("bad.event", _boom)
+    with pytest.raises(RuntimeError):
+        await router.dispatch("bad.event", {})
+
+    assert router.stats()["bad.event"]["errors"] == 1
+
+
+def test_lazy_json_is_not_serialized_when_debug_is_disabled():
+    class _Exploding:
+        def __str__(self):
+            raise AssertionError("formatted while debug logging was off")
+
+    logger = logging.getLogger("test_realtime_events.lazy")
+    logger.setLevel(logging.INFO)
+    logger.debug("   Data: %s", LazyJson({"x": _Exploding()}))
+
+    assert str(LazyJson({"a": 1}, limit=5)) == '{\n  "'
+
+
+class _FakeRealtimeSocket:
+    def __init__(self, events):
+        self._events = [json.dumps(event) for event in events]
+        self.send = AsyncMock()
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for event in self._events:
+            yield event
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_handle_messages_routes_events(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = object()
+    client = RealtimeClient(session_id="session-router", db=db_session)
+    client.ws = _FakeRealtimeSocket(
+        [
+            {"type": "response.audio.delta", "delta": "AAAA"},
+            {"type": "response.audio_transcript.delta", "delta": "Hello "},
+            {"type": "response.audio_transcript.delta", "delta": "there"},
+            {"type": "response.audio_transcript.done"},
+            {"type": "rate_limits.updated"},
+        ]
+    )
+    audio = AsyncMock()
+
+    await client.handle_messages(on_audio_callback=audio)
+    await client.flush_db_writes()
+
+    audio.assert_awaited_once_with("AAAA")
+    assert client.session_data["transcript"][-1]["text"] == "Hello there"
+    stats = client.event_stats()
+    assert stats["response.audio_transcript.delta"]["count"] == 2
+    assert stats["rate_limits.updated"]["count"] == 1
@@ -0,0 +1,87 @@
+"""
+Tests that RealtimeClient keeps database work off the event loop.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from analytics import AnalyticsService
+from database import CommunicationMessage, Conversation
+from loop_monitor import EventLoopLagMonitor
+from realtime_client import RealtimeClient
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_slow_transcript_commit_does_not_block_loop(
+    mock_calendar_service, db_session
+):
+    mock_calendar_service.return_value = object()
+    conversation = AnalyticsService.create_conversation(
+        db=db_session,
+        customer_id=None,
+        channel="voice",
+        metadata={"session_id": "session-db-offload"},
+    )
+    client = RealtimeClient(
+        session_id="session-db-offload",
+        db=db_session,
+        conversation=conversation,
+    )
+
+    writes = []
+    loop_thread = threading.get_ident()
+
+    def _slow_record(content):
+        time.sleep(0.3)
+        writes.append((content, threading.get_ident()))
+
+    monitor = EventLoopLagMonitor(interval=0.01)
+    monitor.start()
+    try:
+        with patch.object(
+            client, "_record_customer_transcript_message", side_effect=_slow_record
+        ):
+            started = time.perf_counter()
+            client._append_transcript_entry("customer", "first")
+            client._append_transcript_entry("customer", "second")
+            assert time.perf_counter() - started < 0.1
+
+            await client.flush_db_writes()
+    finally:
+        await monitor.stop()
+
+    # Writes are applied in order, on a worker thread
+    assert [content for content, _ in writes] == ["first", "second"]
+    assert all(thread_id != loop_thread for _, thread_id in writes)
+    # The loop kept ticking while 600ms of commits ran
+    assert monitor.samples > 10
+    assert monitor.max_ms < 200
+
+    db_session.query(CommunicationMessage).filter(
+        CommunicationMessage.conversation_id == conversation.id
+    ).delete()
+    db_session.query(Conversation).filter(Conversation.id == conversation.id).delete()
+    db_session.commit()
+
+
+def test_loop_lag_monitor_reports_blocking():
+    async def _block():
+        monitor = EventLoopLagMonitor(interval=0.01, warn_ms=50)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        time.sleep(0.15)  # simulate a synchronous commit on the loop
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        return monitor.stats()
+
+    stats = asyncio.run(_block())
+
+    assert stats["max_ms"] >= 100
+    assert stats["over_warn"] >= 1
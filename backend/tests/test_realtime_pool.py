@@ -0,0 +1,214 @@
+"""
+Tests for pre-warmed Realtime sessions and time-to-greeting metrics.
+"""
+
+import asyncio
+import json
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from prompts import get_system_prompt
+from realtime_client import RealtimeClient
+from realtime_pool import CallSetupMetrics, RealtimeSessionPool
+from settings_service import SettingsService
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+        self.open = True
+
+    async def send(self, data):
+        self.sent.append(json.loads(data))
+
+    async def close(self):
+        self.open = False
+
+
+class FakeConnector:
+    def __init__(self, fail_first: int = 0):
+        self.sockets = []
+        self._fail_first = fail_first
+
+    async def __call__(self):
+        if self._fail_first:
+            self._fail_first -= 1
+            raise OSError("connect failed")
+        socket = FakeSocket()
+        self.sockets.append(socket)
+        return socket
+
+
+def _config(prompt="hello"):
+    return {"type": "session.update", "session": {"instructions": prompt}}
+
+
+async def _wait_for_idle(pool, count):
+    for _ in range(200):
+        if pool.stats()["idle"] >= count:
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError(f"pool never reached {count} idle sessions: {pool.stats()}")
+
+
+@pytest.mark.asyncio
+async def test_pool_hands_out_configured_sessions_and_refills():
+    connector = FakeConnector()
+    pool = RealtimeSessionPool(size=2, max_age_seconds=60, connector=connector)
+    pool.start(_config)
+    try:
+        await _wait_for_idle(pool, 2)
+
+        ws = await pool.acquire(_config())
+
+        assert ws.sent == [_config()]
+        await _wait_for_idle(pool, 2)
+        assert pool.stats()["hits"] == 1
+        assert pool.stats()["opened"] == 3
+    finally:
+        await pool.stop()
+    assert all(not socket.open for socket in connector.sockets if socket is not ws)
+
+
+@pytest.mark.asyncio
+async def test_pool_skips_sessions_for_other_configs():
+    """A call with a different config connects cold and leaves the pool intact."""
+    connector = FakeConnector()
+    pool = RealtimeSessionPool(size=2, max_age_seconds=60, connector=connector)
+    pool.start(_config)
+    try:
+        await _wait_for_idle(pool, 2)
+        first, second = connector.sockets
+
+        assert await pool.acquire(_config("g711 passthrough")) is None
+        assert await pool.acquire(_config("g711 passthrough")) is None
+        stats = pool.stats()
+        assert stats["skipped"] == 4
+        assert stats["stale"] == 0
+        assert stats["misses"] == 2
+        assert stats["idle"] == 2
+        assert first.open and second.open
+
+        assert await pool.acquire(_config()) is first
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_discards_stale_and_expired_sessions():
+    now = [0.0]
+    prompt = ["hello"]
+    connector = FakeConnector()
+    pool = RealtimeSessionPool(
+        size=1,
+        max_age_seconds=60,
+        refresh_interval=0.01,
+        connector=connector,
+        clock=lambda: now[0],
+    )
+    pool.start(lambda: _config(prompt[0]))
+    try:
+        await _wait_for_idle(pool, 1)
+        # Settings were edited: the pool's own config no longer matches
+        prompt[0] = "edited prompt"
+        await pool._recycle_expired()
+        assert pool.stats()["stale"] == 1
+        assert not connector.sockets[0].open
+
+        await _wait_for_idle(pool, 1)
+        now[0] = 120.0
+        assert await pool.acquire(_config("edited prompt")) is None
+        assert pool.stats()["recycled"] == 1
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_keeps_sessions_when_only_the_prompt_time_changes():
+    moments = [datetime(2026, 3, 2, 9, 15)]
+
+    class _Clock(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return moments[0].replace(tzinfo=tz)
+
+    def voice_config():
+        with patch("prompts.datetime", _Clock):
+            return _config(get_system_prompt("voice"))
+
+    connector = FakeConnector()
+    pool = RealtimeSessionPool(size=1, max_age_seconds=3600, connector=connector)
+    pool.start(voice_config)
+    try:
+        await _wait_for_idle(pool, 1)
+        warmed = voice_config()
+
+        # A minute later the prompt reads a different time
+        moments[0] = datetime(2026, 3, 2, 9, 16)
+        current = voice_config()
+        assert current != warmed
+        await pool._recycle_expired()
+        ws = await pool.acquire(current)
+
+        assert ws is connector.sockets[0]
+        refresh = {"type": "session.update", "session": current["session"]}
+        assert ws.sent == [warmed, refresh]
+        assert pool.stats()["stale"] == 0
+        assert pool.stats()["refreshed"] == 1
+        assert pool.stats()["hits"] == 1
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_pool_backs_off_after_connect_failures():
+    pool = RealtimeSessionPool(
+        size=1, max_age_seconds=60, connector=FakeConnector(fail_first=1)
+    )
+    pool.start(_config)
+    try:
+        await asyncio.sleep(0.05)
+        assert pool.stats()["warm_failures"] == 1
+        assert pool.stats()["idle"] == 0
+    finally:
+        await pool.stop()
+
+
+def test_call_setup_metrics_summary():
+    metrics = CallSetupMetrics()
+    for elapsed in (100, 200, 300, 400):
+        metrics.record("warm", "first_audio", elapsed)
+
+    summary = metrics.summary()["warm"]["first_audio"]
+    assert summary == {"count": 4, "p50_ms": 300, "p95_ms": 400, "max_ms": 400}
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_realtime_client_uses_warm_session(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = object()
+    connector = FakeConnector()
+    pool = RealtimeSessionPool(size=1, max_age_seconds=60, connector=connector)
+    metrics = CallSetupMetrics()
+    session_config = RealtimeClient.build_session_config(
+        service_names=list(SettingsService.get_services_dict(db_session).keys())
+    )
+    pool.start(lambda: session_config)
+    try:
+        await _wait_for_idle(pool, 1)
+        client = RealtimeClient(session_id="session-warm", db=db_session)
+        with patch("realtime_client.realtime_session_pool", pool), patch(
+            "realtime_client.call_setup_metrics", metrics
+        ):
+            await client.connect()
+            await client.send_greeting()
+            await client._on_audio_delta({"delta": ""})
+    finally:
+        await pool.stop()
+
+    assert client.connection_source == "warm"
+    # session.update was sent while warming; the call itself only asked for the greeting
+    assert [event["type"] for event in client.ws.sent] == ["session.update", "response.create"]
+    assert set(metrics.summary()["warm"]) == {"connected", "greeting_requested", "first_audio"}
@@ -0,0 +1,111 @@
+"""
+Tests for the shared voice session registry and its command channel.
+"""
+
+import base64
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from database import VoiceSessionCommand, VoiceSessionRecord
+from session_registry import (
+    DatabaseSessionBackend,
+    InMemorySessionBackend,
+    SessionRegistry,
+)
+
+
+@pytest.fixture
+def db_backend(test_engine, db_session):
+    backend = DatabaseSessionBackend(
+        session_factory=sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+    )
+    yield backend
+    db_session.query(VoiceSessionCommand).delete()
+    db_session.query(VoiceSessionRecord).delete()
+    db_session.commit()
+
+
+def _recorder():
+    received = []
+
+    async def on_command(command, payload):
+        received.append((command, payload))
+
+    return received, on_command
+
+
+@pytest.mark.asyncio
+async def test_command_from_another_worker_reaches_owner(db_backend):
+    owner = SessionRegistry(db_backend, worker_id="worker-a")
+    other = SessionRegistry(db_backend, worker_id="worker-b")
+    received, on_command = _recorder()
+    await owner.register("call-1", on_command=on_command, details={"audio_format": "pcm16"})
+
+    sessions = await other.list_sessions()
+    assert [(s["session_id"], s["worker_id"]) for s in sessions] == [("call-1", "worker-a")]
+
+    assert await other.send_command("call-1", "hangup", {"reason": "supervisor"})
+    assert received == []
+    assert await owner.poll_once() == 1
+    assert received == [("hangup", {"reason": "supervisor"})]
+    # Delivered commands are not claimed twice
+    assert await owner.poll_once() == 0
+
+    await owner.unregister("call-1")
+    assert await other.send_command("call-1", "hangup") is False
+
+
+@pytest.mark.asyncio
+async def test_stale_sessions_are_reaped(db_backend, db_session):
+    registry = SessionRegistry(db_backend, worker_id="worker-a", stale_after_seconds=30)
+    _, on_command = _recorder()
+    await registry.register("call-stale", on_command=on_command)
+    record = db_session.get(VoiceSessionRecord, "call-stale")
+    record.heartbeat_at = datetime.utcnow() - timedelta(minutes=5)
+    db_session.commit()
+
+    assert await registry.list_sessions() == []
+    assert db_backend.reap_stale(30) == 1
+    db_session.expire_all()
+    assert db_session.get(VoiceSessionRecord, "call-stale").status == "ended"
+
+
+@pytest.mark.asyncio
+async def test_local_sessions_skip_the_backend():
+    registry = SessionRegistry(InMemorySessionBackend(), worker_id="worker-a")
+    received, on_command = _recorder()
+    await registry.register("call-local", on_command=on_command)
+
+    assert await registry.send_command("call-local", "hangup")
+    assert received == [("hangup", {})]
+    assert registry.stats()["commands_local"] == 1
+
+
+def _bearer(role):
+    claims = {
+        "sub": "user-1",
+        "email": "admin@example.com",
+        "user_metadata": {"role": role},
+    }
+    payload = base64.urlsafe_b64encode(json.dumps(claims).encode()).decode().rstrip("=")
+    return {"Authorization": f"Bearer header.{payload}.signature"}
+
+
+def test_admin_hangup_requires_an_owner(monkeypatch):
+    import main
+    from session_registry import session_registry
+
+    monkeypatch.setattr(session_registry, "backend", InMemorySessionBackend())
+    client = TestClient(main.app)
+    url = "/api/admin/live-sessions/missing/hangup"
+
+    assert client.post(url).status_code in (401, 403)
+    assert client.post(url, headers=_bearer("staff")).status_code == 403
+    assert client.post(url, headers=_bearer("owner")).status_code == 404
+    assert client.get("/api/admin/live-sessions").status_code in (401, 403)
+    staff_list = client.get("/api/admin/live-sessions", headers=_bearer("staff"))
+    assert staff_list.status_code == 200
@@ -0,0 +1,315 @@
+"""
+Tests for per-conversation inbound burst coalescing.
+"""
+
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from sqlalchemy.orm import sessionmaker
+
+from analytics import AnalyticsService
+from database import CommunicationMessage, Conversation, Customer
+from messaging_service import MessagingService
+from sms_coalescer import SUPERSEDED, InboundBurstCoalescer
+
+
+def _run_in_threads(coalescer, key, turn, count, stagger=0.01):
+    results = [None] * count
+    threads = []
+
+    def _worker(index):
+        results[index] = coalescer.run(key, turn)
+
+    for index in range(count):
+        thread = threading.Thread(target=_worker, args=(index,))
+        threads.append(thread)
+        thread.start()
+        time.sleep(stagger)
+
+    for thread in threads:
+        thread.join(timeout=5)
+    return results
+
+
+def test_burst_within_window_runs_single_turn():
+    """Messages inside the debounce window share one turn and one reply."""
+    coalescer = InboundBurstCoalescer(window_seconds=0.1)
+    calls = []
+
+    def turn(claim):
+        calls.append(1)
+        assert claim() is True
+        return "reply"
+
+    results = _run_in_threads(coalescer, "convo-1", turn, count=3)
+
+    assert len(calls) == 1
+    assert results == ["reply", "reply", "reply"]
+    stats = coalescer.stats()
+    assert stats["turns"] == 1
+    assert stats["merged_messages"] == 2
+    assert coalescer.pending_count() == 0
+
+
+def test_different_conversations_are_not_merged():
+    """Bursts are keyed per conversation."""
+    coalescer = InboundBurstCoalescer(window_seconds=0.05)
+
+    assert coalescer.run("a", lambda claim: claim() and "a") == "a"
+    assert coalescer.run("b", lambda claim: claim() and "b") == "b"
+    assert coalescer.stats()["turns"] == 2
+
+
+def test_late_arrival_supersedes_in_flight_turn():
+    """A message arriving during generation discards the unsent reply."""
+    coalescer = InboundBurstCoalescer(window_seconds=0.05)
+    generating = threading.Event()
+    release = threading.Event()
+    sent = []
+
+    def turn(claim):
+        if not generating.is_set():
+            generating.set()
+            release.wait(timeout=5)
+            if not claim():
+                return SUPERSEDED
+            sent.append("stale")
+            return "stale"
+        if not claim():
+            return SUPERSEDED
+        sent.append("merged")
+        return "merged"
+
+    first_result = []
+    first = threading.Thread(
+        target=lambda: first_result.append(coalescer.run("convo-2", turn))
+    )
+    first.start()
+    assert generating.wait(timeout=5)
+
+    second = threading.Thread(target=lambda: coalescer.run("convo-2", turn))
+    second.start()
+    time.sleep(0.01)
+    release.set()
+
+    first.join(timeout=5)
+    second.join(timeout=5)
+
+    assert sent == ["merged"]
+    assert first_result == ["merged"]
+    assert coalescer.stats()["superseded_turns"] == 1
+
+
+def test_committed_turn_keeps_its_reply_after_losing_the_claim():
+    """A turn that ignores a failed claim answers its own caller only."""
+    coalescer = InboundBurstCoalescer(window_seconds=0.05)
+    generating = threading.Event()
+    release = threading.Event()
+    sent = []
+
+    def turn(claim):
+        if not generating.is_set():
+            generating.set()
+            release.wait(timeout=5)
+            assert claim() is False
+            sent.append("booked")
+            return "booked"
+        assert claim() is True
+        sent.append("follow-up")
+        return "follow-up"
+
+    results = {}
+    first = threading.Thread(
+        target=lambda: results.update(first=coalescer.run("convo-4", turn))
+    )
+    first.start()
+    assert generating.wait(timeout=5)
+    second = threading.Thread(
+        target=lambda: results.update(second=coalescer.run("convo-4", turn))
+    )
+    second.start()
+    time.sleep(0.01)
+    release.set()
+    first.join(timeout=5)
+    second.join(timeout=5)
+
+    assert sent == ["booked", "follow-up"]
+    assert results == {"first": "booked", "second": "follow-up"}
+    assert coalescer.stats()["committed_turns"] == 1
+    assert coalescer.stats()["superseded_turns"] == 0
+
+
+def test_turn_error_propagates_to_whole_burst():
+    """Failures are raised to every request waiting on the burst."""
+    coalescer = InboundBurstCoalescer(window_seconds=0.05)
+    errors = []
+
+    def turn(claim):
+        raise RuntimeError("boom")
+
+    def _worker():
+        try:
+            coalescer.run("convo-3", turn)
+        except RuntimeError as exc:
+            errors.append(str(exc))
+
+    threads = [threading.Thread(target=_worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert errors == ["boom", "boom"]
+    assert coalescer.pending_count() == 0
+
+
+def test_sms_arriving_during_generation_gets_one_combined_reply(monkeypatch):
+    """A text recorded behind an in-flight turn still supersedes that turn."""
+    import messaging_pipeline
+
+    coalescer = InboundBurstCoalescer(window_seconds=0.05)
+    monkeypatch.setattr(messaging_pipeline, "sms_burst_coalescer", coalescer)
+
+    conversation = SimpleNamespace(id=f"convo-{uuid.uuid4()}")
+    recorded = []
+    sent = []
+    generating = threading.Event()
+    release = threading.Event()
+
+    def fake_record(db, *, content, **kwargs):
+        recorded.append(content)
+        return SimpleNamespace(id=f"in-{content}")
+
+    def fake_turn(db, *, claim, **kwargs):
+        history = list(recorded)
+        if not generating.is_set():
+            generating.set()
+            release.wait(timeout=5)
+        if not claim():
+            return SUPERSEDED
+        sent.append(history)
+        return SimpleNamespace(id="out-1")
+
+    monkeypatch.setattr(messaging_pipeline, "record_inbound_message", fake_record)
+    monkeypatch.setattr(messaging_pipeline, "run_assistant_turn", fake_turn)
+    db = SimpleNamespace(get=lambda model, message_id: message_id)
+
+    results = {}
+
+    def _text(content):
+        results[content] = messaging_pipeline.handle_inbound_message(
+            db,
+            conversation=conversation,
+            customer=SimpleNamespace(id=1),
+            channel="sms",
+            content=content,
+        )
+
+    first = threading.Thread(target=_text, args=("hi",))
+    first.start()
+    assert generating.wait(timeout=5)
+
+    second = threading.Thread(target=_text, args=("can I book botox tomorrow?",))
+    second.start()
+    deadline = time.monotonic() + 5
+    while coalescer.pending_count(conversation.id) < 2:
+        assert time.monotonic() < deadline, "second text never joined the burst"
+        time.sleep(0.005)
+    release.set()
+
+    first.join(timeout=5)
+    second.join(timeout=5)
+
+    assert sent == [["hi", "can I book botox tomorrow?"]]
+    assert results["hi"][0].id == "in-hi"
+    assert results["hi"][1] == "out-1"
+    assert results["can I book botox tomorrow?"][1] == "out-1"
+    assert coalescer.stats()["superseded_turns"] == 1
+
+
+def test_late_text_during_booking_turn_still_delivers_confirmation(
+    monkeypatch, test_engine, sms_conversation, customer
+):
+    """A booking committed by a superseded turn is still confirmed to the guest."""
+    import messaging_pipeline
+
+    coalescer = InboundBurstCoalescer(window_seconds=0.05)
+    monkeypatch.setattr(messaging_pipeline, "sms_burst_coalescer", coalescer)
+    monkeypatch.setattr(
+        AnalyticsService,
+        "score_conversation_satisfaction",
+        staticmethod(lambda db, conversation_id: None),
+    )
+    generating = threading.Event()
+    release = threading.Event()
+    history_seen = []
+
+    def fake_generate(db, conversation_id, channel, log_assistant_message=True):
+        history_seen.append(
+            [
+                message.content
+                for message in db.query(CommunicationMessage)
+                .filter(CommunicationMessage.conversation_id == conversation_id)
+                .order_by(CommunicationMessage.sent_at)
+            ]
+        )
+        if not generating.is_set():
+            generating.set()
+            release.wait(timeout=5)
+            # Deterministic slot booking: committed, answered without the model
+            return "✓ Booked! Botox on Friday at 3pm.", None
+        return "Yes, there is free parking out front.", SimpleNamespace(tool_calls=[])
+
+    monkeypatch.setattr(
+        MessagingService, "generate_ai_response", staticmethod(fake_generate)
+    )
+
+    delivered = []
+    replies = {}
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
+
+    def _text(content):
+        db = session_factory()
+        try:
+            _, outbound = messaging_pipeline.handle_inbound_message(
+                db,
+                conversation=db.get(Conversation, sms_conversation.id),
+                customer=db.get(Customer, customer.id),
+                channel="sms",
+                content=content,
+                deliver=lambda message: delivered.append(message.content) or {},
+            )
+            replies[content] = outbound.content
+        finally:
+            db.close()
+
+    first = threading.Thread(target=_text, args=("2",))
+    first.start()
+    assert generating.wait(timeout=5)
+    second = threading.Thread(target=_text, args=("is there parking?",))
+    second.start()
+    deadline = time.monotonic() + 5
+    while coalescer.pending_count(sms_conversation.id) < 2:
+        assert time.monotonic() < deadline, "late text never joined the burst"
+        time.sleep(0.005)
+    release.set()
+    first.join(timeout=10)
+    second.join(timeout=10)
+
+    assert delivered == [
+        "✓ Booked! Botox on Friday at 3pm.",
+        "Yes, there is free parking out front.",
+    ]
+    assert replies == {
+        "2": "✓ Booked! Botox on Friday at 3pm.",
+        "is there parking?": "Yes, there is free parking out front.",
+    }
+    # The follow-up turn saw the stored confirmation
+    assert history_seen[-1] == [
+        "2",
+        "✓ Booked! Botox on Friday at 3pm.",
+        "is there parking?",
+    ]
+    assert coalescer.stats()["committed_turns"] == 1
@@ -0,0 +1,141 @@
+"""
+Tests for G.711 transcoding and telephony resampling.
+"""
+
+import base64
+import json
+import warnings
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from realtime_client import RealtimeClient
+from realtime_config import build_voice_session_config
+from telephony_audio import (
+    Downsampler,
+    TelephonyTranscoder,
+    Upsampler,
+    build_transcoder,
+    g711_decode,
+    g711_encode,
+)
+from voice_frames import FrameError, decode_frame, encode_audio_frame, negotiate_audio_format
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore", DeprecationWarning)
+    audioop = pytest.importorskip("audioop")
+
+
+ALL_SAMPLES = np.arange(-32768, 32768, dtype=np.int16)
+
+
+@pytest.mark.parametrize(
+    "codec, reference_encode, reference_decode",
+    [
+        ("g711_ulaw", audioop.lin2ulaw, audioop.ulaw2lin),
+        ("g711_alaw", audioop.lin2alaw, audioop.alaw2lin),
+    ],
+)
+def test_g711_tables_match_reference_codec(codec, reference_encode, reference_decode):
+    all_codes = bytes(range(256))
+
+    assert g711_encode(ALL_SAMPLES, codec) == reference_encode(ALL_SAMPLES.tobytes(), 2)
+    assert g711_decode(all_codes, codec).tobytes() == reference_decode(all_codes, 2)
+
+
+def _tone(frequency, sample_rate, count, delay=0.0):
+    n = np.arange(count) - delay
+    return 8000 * np.sin(2 * np.pi * frequency * n / sample_rate)
+
+
+def test_resamplers_are_seamless_across_uneven_chunks():
+    source = _tone(440, 8000, 4000).astype(np.int16)
+    upsampler = Upsampler()
+    upsampled = np.concatenate(
+        [upsampler.process(source[i : i + 37]) for i in range(0, source.size, 37)]
+    )
+
+    # 48-tap FIR: 23.5 samples of group delay at 24 kHz
+    expected = _tone(440, 24000, upsampled.size, delay=23.5)
+    assert upsampled.size == 12000
+    assert np.abs(upsampled[100:] - expected[100:]).max() < 80
+
+    downsampler = Downsampler()
+    downsampled = np.concatenate(
+        [downsampler.process(upsampled[i : i + 101]) for i in range(0, upsampled.size, 101)]
+    )
+    expected = _tone(440, 8000, downsampled.size, delay=47 / 3)
+    assert downsampled.size == 4000
+    assert np.abs(downsampled[100:] - expected[100:]).max() < 120
+
+
+def test_downsampler_filters_content_above_telephony_band():
+    downsampler = Downsampler()
+    out = downsampler.process(_tone(6000, 24000, 2400).astype(np.int16))
+
+    assert np.abs(out[50:]).max() < 200
+
+
+def test_transcoder_round_trip_and_stats():
+    transcoder = TelephonyTranscoder("g711_ulaw")
+    frame = g711_encode(_tone(300, 8000, 160).astype(np.int16), "g711_ulaw")
+
+    upstream = transcoder.to_upstream(frame)
+    client = transcoder.to_client(upstream)
+
+    assert len(upstream) == 160 * 3 * 2
+    assert len(client) == 160
+    stats = transcoder.stats()
+    assert stats["inbound_bytes"] == 160
+    assert stats["upstream_bytes"] == 960
+    assert stats["client_bytes"] == 160
+    assert stats["codec"] == "g711_ulaw"
+
+
+def test_session_config_selects_transcoding_or_passthrough():
+    transcoded = build_voice_session_config(
+        system_prompt="hi", tools=[], client_audio_format="g711_alaw"
+    )["session"]
+    passthrough = build_voice_session_config(
+        system_prompt="hi",
+        tools=[],
+        client_audio_format="g711_alaw",
+        server_transcode=False,
+    )["session"]
+
+    assert transcoded["input_audio_format"] == "pcm16"
+    assert passthrough["input_audio_format"] == "g711_alaw"
+    assert passthrough["output_audio_format"] == "g711_alaw"
+    assert build_transcoder("g711_alaw", transcoded["input_audio_format"]) is not None
+    assert build_transcoder("g711_alaw", passthrough["input_audio_format"]) is None
+    assert build_transcoder(None, "pcm16") is None
+
+
+def test_g711_frames_and_format_negotiation():
+    frame = decode_frame(encode_audio_frame(b"\xff\x7f\x00", sequence=3), sample_width=1)
+
+    assert frame.payload.tobytes() == b"\xff\x7f\x00"
+    with pytest.raises(FrameError):
+        decode_frame(encode_audio_frame(b"\xff\x7f\x00", sequence=3))
+    assert negotiate_audio_format(" G711_ULAW ") == "g711_ulaw"
+    assert negotiate_audio_format("opus") is None
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_realtime_client_transcodes_telephony_audio(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = object()
+    client = RealtimeClient(
+        session_id="session-g711",
+        db=db_session,
+        client_audio_format="g711_ulaw",
+    )
+    client._transcoder = build_transcoder("g711_ulaw", "pcm16")
+    client.ws = AsyncMock()
+
+    await client.send_audio_bytes(b"\xff" * 160)
+
+    sent = json.loads(client.ws.send.await_args.args[0])
+    assert sent["type"] == "input_audio_buffer.append"
+    assert len(base64.b64decode(sent["audio"])) == 960
@@ -0,0 +1,133 @@
+"""
+Tests for the per-conversation turn executor.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+from turn_executor import ConversationTurnExecutor, TurnQueueFull
+
+
+@pytest.fixture
+def executor():
+    executor = ConversationTurnExecutor(
+        max_workers=4,
+        max_queue_per_key=3,
+        max_pending=10,
+        max_concurrent_llm_calls=2,
+    )
+    yield executor
+    executor.shutdown()
+
+
+def test_same_conversation_runs_serially_in_order(executor):
+    """Turns for one conversation never overlap and keep submission order."""
+    active = {"count": 0, "max": 0}
+    order = []
+    lock = threading.Lock()
+
+    def make_turn(index):
+        def _turn():
+            with lock:
+                active["count"] += 1
+                active["max"] = max(active["max"], active["count"])
+            time.sleep(0.02)
+            order.append(index)
+            with lock:
+                active["count"] -= 1
+            return index
+
+        return _turn
+
+    futures = [executor.submit("convo", make_turn(i)) for i in range(3)]
+    assert [f.result(timeout=5) for f in futures] == [0, 1, 2]
+    assert order == [0, 1, 2]
+    assert active["max"] == 1
+
+
+def test_different_conversations_run_in_parallel(executor):
+    """Separate keys overlap on the shared pool."""
+    barrier = threading.Barrier(3, timeout=5)
+
+    futures = [
+        executor.submit(f"convo-{i}", lambda: barrier.wait() is not None)
+        for i in range(3)
+    ]
+
+    assert all(f.result(timeout=5) for f in futures)
+
+
+def test_bounded_queue_rejects_overflow(executor):
+    """A conversation with a full queue gets TurnQueueFull."""
+    release = threading.Event()
+    futures = [executor.submit("busy", release.wait) for _ in range(3)]
+
+    with pytest.raises(TurnQueueFull):
+        executor.submit("busy", lambda: None)
+
+    release.set()
+    for future in futures:
+        future.result(timeout=5)
+    stats = executor.stats()
+    assert stats["rejected"] == 1
+    assert stats["max_queue_depth"] == 3
+    assert stats["pending"] == 0
+
+
+def test_exceptions_surface_to_caller_and_queue_continues(executor):
+    """A failing turn does not block later turns for the same key."""
+
+    def _boom():
+        raise ValueError("bad turn")
+
+    with pytest.raises(ValueError):
+        executor.run("convo", _boom)
+    assert executor.run("convo", lambda: "next") == "next"
+    assert executor.stats()["failed"] == 1
+
+
+def test_llm_slot_caps_concurrency(executor):
+    """No more than max_concurrent_llm_calls hold a slot at once."""
+    active = {"count": 0, "max": 0}
+    lock = threading.Lock()
+
+    def _call():
+        with executor.llm_slot():
+            with lock:
+                active["count"] += 1
+                active["max"] = max(active["max"], active["count"])
+            time.sleep(0.02)
+            with lock:
+                active["count"] -= 1
+
+    threads = [threading.Thread(target=_call) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert active["max"] == 2
+    assert executor.stats()["llm_calls"] == 6
+
+
+def test_executor_without_llm_cap_omits_it_from_stats():
+    """Executors that never run completions leave the LLM cap out of stats."""
+    executor = ConversationTurnExecutor(max_workers=1, max_concurrent_llm_calls=None)
+    try:
+        stats = executor.stats()
+        assert "llm_calls" not in stats
+        assert "max_concurrent_llm_calls" not in stats["limits"]
+        with pytest.raises(RuntimeError):
+            with executor.llm_slot():
+                pass
+    finally:
+        executor.shutdown()
+
+
+def test_run_async_awaits_result(executor):
+    """Event-loop callers can await turns."""
+    result = asyncio.run(executor.run_async("convo", lambda: 42))
+    assert result == 42
@@ -0,0 +1,103 @@
+"""
+Tests for the server-side voice activity gate.
+"""
+
+import base64
+import json
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from realtime_client import RealtimeClient
+from vad_gate import VoiceActivityGate, build_vad_gate
+
+SAMPLE_RATE = 24000
+CHUNK_MS = 100
+CHUNK_SAMPLES = SAMPLE_RATE * CHUNK_MS // 1000
+
+
+def _silence() -> bytes:
+    rng = np.random.default_rng(7)
+    return rng.normal(0, 3, CHUNK_SAMPLES).astype("<i2").tobytes()
+
+
+def _speech() -> bytes:
+    t = np.arange(CHUNK_SAMPLES) / SAMPLE_RATE
+    return (4000 * np.sin(2 * np.pi * 200 * t)).astype("<i2").tobytes()
+
+
+def _fricative() -> bytes:
+    # Quiet, high crossing rate: below the energy threshold on its own
+    rng = np.random.default_rng(3)
+    return rng.normal(0, 60, CHUNK_SAMPLES).astype("<i2").tobytes()
+
+
+def test_gate_drops_silence_and_reports_ratio():
+    gate = VoiceActivityGate(preroll_ms=0, hangover_ms=0)
+
+    for _ in range(8):
+        assert gate.process(_silence()) == []
+    assert gate.process(_speech()) == [_speech()]
+    assert gate.process(_fricative()) == [_fricative()]
+
+    stats = gate.stats()
+    assert stats["dropped_frames"] == 8
+    assert stats["forwarded_frames"] == 2
+    assert stats["forwarded_ratio"] == 0.2
+
+
+def test_preroll_is_flushed_ahead_of_speech():
+    gate = VoiceActivityGate(preroll_ms=300, hangover_ms=0)
+    silent_chunks = [_silence() for _ in range(6)]
+    for chunk in silent_chunks:
+        gate.process(chunk)
+
+    forwarded = gate.process(_speech())
+
+    # 300ms of the most recent silence, then the speech chunk
+    assert forwarded == silent_chunks[-3:] + [_speech()]
+    stats = gate.stats()
+    assert stats["forwarded_frames"] == 4
+    assert stats["dropped_frames"] == 3
+
+
+def test_hangover_keeps_trailing_silence_for_server_vad():
+    gate = build_vad_gate(
+        enabled=True,
+        upstream_format="pcm16",
+        prefix_padding_ms=300,
+        silence_duration_ms=600,
+        threshold_dbfs=-50.0,
+        hangover_margin_ms=200,
+    )
+    gate.process(_speech())
+
+    trailing = [gate.process(_silence()) for _ in range(10)]
+
+    # 800ms of silence still reaches the server so it can close the turn
+    assert sum(1 for chunks in trailing if chunks) == 8
+    assert build_vad_gate(
+        enabled=True,
+        upstream_format="g711_ulaw",
+        prefix_padding_ms=300,
+        silence_duration_ms=600,
+        threshold_dbfs=-50.0,
+        hangover_margin_ms=200,
+    ) is None
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_realtime_client_gates_json_audio(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = object()
+    client = RealtimeClient(session_id="session-vad-gate", db=db_session)
+    client._vad_gate = VoiceActivityGate(preroll_ms=0, hangover_ms=0)
+    client.ws = AsyncMock()
+
+    await client.send_audio(base64.b64encode(_silence()).decode("ascii"))
+    await client.send_audio(base64.b64encode(_speech()).decode("ascii"), commit=True)
+
+    sent = [json.loads(call.args[0])["type"] for call in client.ws.send.await_args_list]
+    assert sent == ["input_audio_buffer.append", "input_audio_buffer.commit"]
+    assert client.get_session_data()["audio_gate"]["dropped_frames"] == 1
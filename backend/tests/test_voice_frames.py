@@ -0,0 +1,56 @@
+"""
+Tests for the binary /ws/voice frame protocol.
+"""
+
+import pytest
+
+from voice_frames import (
+    FLAG_COMMIT,
+    HEADER_SIZE,
+    PROTOCOL_BINARY,
+    PROTOCOL_JSON,
+    FrameError,
+    decode_frame,
+    encode_audio_frame,
+    negotiate_protocol,
+)
+
+
+def test_audio_frame_round_trip():
+    pcm = bytes(range(256)) * 4
+
+    encoded = encode_audio_frame(pcm, sequence=70000, flags=FLAG_COMMIT)
+    frame = decode_frame(encoded)
+
+    assert len(encoded) == HEADER_SIZE + len(pcm)
+    assert frame.sequence == 70000 & 0xFFFF
+    assert frame.commit is True
+    assert frame.payload.tobytes() == pcm
+
+
+def test_decoded_payload_is_a_view_of_the_received_buffer():
+    received = bytearray(encode_audio_frame(b"\x01\x00\x02\x00", sequence=1))
+
+    frame = decode_frame(received)
+    received[HEADER_SIZE] = 0x7F
+
+    assert frame.payload.obj is received
+    assert frame.payload[0] == 0x7F
+    assert frame.commit is False
+
+
+@pytest.mark.parametrize(
+    "data",
+    [b"\x01\x00", b"\x09\x00\x00\x00\x00\x00", b"\x01\x00\x00\x00\x00"],
+    ids=["short-header", "unknown-kind", "odd-pcm-length"],
+)
+def test_malformed_frames_are_rejected(data):
+    with pytest.raises(FrameError):
+        decode_frame(data)
+
+
+def test_protocol_negotiation_defaults_to_json():
+    assert negotiate_protocol("binary") == PROTOCOL_BINARY
+    assert negotiate_protocol(" BINARY ") == PROTOCOL_BINARY
+    assert negotiate_protocol(None) == PROTOCOL_JSON
+    assert negotiate_protocol("msgpack") == PROTOCOL_JSON
@@ -0,0 +1,84 @@
+"""
+Tests for voice latency histograms and per-call latency summaries.
+"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import voice_metrics
+from realtime_client import RealtimeClient
+from voice_metrics import CallLatencyTracker, LatencyHistogram, TimedProxy
+
+
+def test_histogram_renders_cumulative_prometheus_buckets():
+    histogram = LatencyHistogram("test_latency_ms", "Test.", ("tool",), bounds=(100, 500))
+    histogram.observe(40, tool="check_availability")
+    histogram.observe(300, tool="check_availability")
+    histogram.observe(900, tool="check_availability")
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP test_latency_ms Test.", "# TYPE test_latency_ms histogram"]
+    assert 'test_latency_ms_bucket{tool="check_availability",le="100"} 1' in lines
+    assert 'test_latency_ms_bucket{tool="check_availability",le="500"} 2' in lines
+    assert 'test_latency_ms_bucket{tool="check_availability",le="+Inf"} 3' in lines
+    assert 'test_latency_ms_sum{tool="check_availability"} 1240.000' in lines
+    assert 'test_latency_ms_count{tool="check_availability"} 3' in lines
+
+
+def test_turn_latency_closes_on_first_audio_only():
+    tracker = CallLatencyTracker()
+    tracker.response_audio()  # greeting audio: no turn pending
+    tracker.speech_stopped()
+    tracker.response_audio()
+    tracker.response_audio()
+
+    summary = tracker.summary()
+    assert summary["turn_latency_ms"]["count"] == 1
+
+
+def test_timed_proxy_accumulates_per_call_time():
+    calendar = MagicMock()
+    calendar.get_available_slots.return_value = []
+    proxy = TimedProxy(calendar)
+
+    assert proxy.get_available_slots("2025-12-01", "botox") == []
+    assert proxy.take_elapsed_ms() > 0
+    assert proxy.take_elapsed_ms() == 0
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_realtime_client_records_tool_latency(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = MagicMock()
+    client = RealtimeClient(session_id="session-latency", db=db_session)
+    client.ws = AsyncMock()
+
+    await client._event_router.dispatch("input_audio_buffer.speech_stopped", {})
+    await client._event_router.dispatch(
+        "response.function_call_arguments.done",
+        {"name": "get_current_date", "arguments": "{}", "call_id": "call-1"},
+    )
+    await client._event_router.dispatch("response.audio.delta", {"delta": "AAAA"})
+
+    latency = client.get_session_data()["latency"]
+    assert latency["turn_latency_ms"]["count"] == 1
+    assert latency["tool_turnaround_ms"]["count"] == 1
+    assert latency["tool_queue_wait_ms"]["count"] == 1
+    assert latency["tool_calendar_ms"]["max_ms"] == 0
+    sent = [json.loads(call.args[0])["type"] for call in client.ws.send.await_args_list]
+    assert sent[0] == "conversation.item.create"
+
+
+def test_metrics_endpoint_serves_prometheus_text():
+    import main
+
+    voice_metrics.turn_latency.observe(640)
+    response = TestClient(main.app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "# TYPE voice_turn_latency_ms histogram" in response.text
+    assert 'voice_turn_latency_ms_bucket{le="750"}' in response.text
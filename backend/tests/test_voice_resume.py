@@ -0,0 +1,152 @@
+"""
+Tests for resumable voice sessions.
+"""
+
+import asyncio
+import base64
+from unittest.mock import patch
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+import main
+from database import get_db
+from voice_resume import ResumeTokenError, SessionParking, is_dropped
+
+
+@pytest.mark.asyncio
+async def test_reconnect_within_grace_window_is_handed_to_parked_call():
+    parking = SessionParking(grace_seconds=1.0)
+    session = parking.open("s-resume")
+    assert parking.reattach("s-other", object(), session.token) is None
+    with pytest.raises(ResumeTokenError):
+        parking.reattach("s-resume", object(), None)
+    with pytest.raises(ResumeTokenError):
+        parking.reattach("s-resume", object(), "guessed-token")
+
+    park = asyncio.create_task(parking.park(session))
+    await asyncio.sleep(0)
+    new_socket = object()
+    released = parking.reattach("s-resume", new_socket, session.token)
+
+    websocket, handoff_released = await asyncio.wait_for(park, 1)
+    assert websocket is new_socket
+    assert handoff_released is released and not released.done()
+
+    parking.close(session)
+    assert parking.reattach("s-resume", object(), session.token) is None
+    assert parking.stats()["resumed"] == 1
+    assert parking.stats()["rejected"] == 2
+    assert parking.stats()["live"] == 0
+
+
+@pytest.mark.asyncio
+async def test_parked_call_expires_and_newest_reconnect_wins():
+    parking = SessionParking(grace_seconds=0.05)
+    session = parking.open("s-expire")
+    assert await parking.park(session) is None
+    assert parking.stats()["expired"] == 1
+
+    stale = parking.reattach("s-expire", "first", session.token)
+    fresh = parking.reattach("s-expire", "second", session.token)
+    assert stale.result() is False
+    websocket, _ = await session.next_handoff()
+    assert websocket == "second"
+
+    leftover = parking.reattach("s-expire", "third", session.token)
+    parking.close(session)
+    assert leftover.result() is False
+
+    assert SessionParking(grace_seconds=0).open("s-off") is None
+    assert not fresh.done()
+
+
+@pytest.mark.parametrize(
+    "close_code, dropped",
+    [(1000, False), (1001, False), (1005, False), (1006, True), (1011, True), (1012, True)],
+)
+def test_only_abnormal_closes_park_the_call(close_code, dropped):
+    # Hangups and closed tabs end the call; lost connections may come back
+    assert is_dropped(close_code) is dropped
+
+
+class _EchoRealtimeClient:
+    """Stands in for RealtimeClient: echoes caller audio back as assistant audio."""
+
+    def __init__(self, **kwargs) -> None:
+        self._on_audio = None
+
+    async def connect(self) -> None:
+        pass
+
+    async def send_greeting(self) -> None:
+        pass
+
+    async def send_audio(self, audio_b64, commit=False) -> None:
+        await self._on_audio(audio_b64)
+
+    async def handle_messages(self, on_audio):
+        self._on_audio = on_audio
+        await asyncio.sleep(3600)
+
+    async def cancel_response(self) -> None:
+        pass
+
+    async def finish_recording(self) -> None:
+        pass
+
+    async def flush_db_writes(self) -> None:
+        pass
+
+    async def run_db(self, fn, *args):
+        return fn(*args)
+
+    def submit_db(self, fn, *args) -> None:
+        fn(*args)
+
+    async def disconnect(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def get_session_data(self):
+        return {"transcript": [], "customer_data": {}, "function_calls": []}
+
+
+def test_reconnect_needs_resume_token_and_keeps_assistant_audio_flowing(db_session):
+    audio = base64.b64encode(b"\x01\x00" * 480).decode("ascii")
+    client = TestClient(main.app)
+    main.app.dependency_overrides[get_db] = lambda: db_session
+    try:
+        # Both sockets must share one event loop, as they do under uvicorn;
+        # without running the app's startup against the test database
+        with patch.object(main, "RealtimeClient", _EchoRealtimeClient), (
+            anyio.from_thread.start_blocking_portal()
+        ) as client.portal:
+            caller = client.websocket_connect("/ws/voice/s-resume-e2e").__enter__()
+            protocol = caller.receive_json()
+            token = protocol["data"]["resume_token"]
+            caller.send_json({"type": "audio", "data": audio})
+            assert caller.receive_json()["type"] == "audio"
+            caller.close(code=1006)
+
+            # A client that only knows the session_id cannot take the call
+            with client.websocket_connect("/ws/voice/s-resume-e2e?resume_token=nope") as intruder:
+                with pytest.raises(WebSocketDisconnect) as rejected:
+                    intruder.receive_json()
+            assert rejected.value.code == 4403
+
+            with client.websocket_connect(f"/ws/voice/s-resume-e2e?resume_token={token}") as resumed:
+                assert resumed.receive_json()["type"] == "protocol"
+                assert resumed.receive_json() == {
+                    "type": "session_resumed",
+                    "data": {"resume_token": token},
+                }
+                resumed.send_json({"type": "audio", "data": audio})
+                assert resumed.receive_json() == {"type": "audio", "data": audio}
+                resumed.send_json({"type": "end_session"})
+    finally:
+        main.app.dependency_overrides.pop(get_db)
@@ -0,0 +1,89 @@
+"""
+Tests for incremental voice transcript persistence.
+"""
+
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+
+from analytics import AnalyticsService
+from database import CommunicationMessage, VoiceCallDetails, VoiceTranscriptEntry
+from post_call import persist_call_transcript
+from realtime_client import RealtimeClient
+from voice_transcript import TranscriptWriter, load_call_transcript
+
+
+@pytest.mark.asyncio
+async def test_writer_flushes_on_batch_size_and_timer():
+    batches = []
+    writer = TranscriptWriter(batches.append, batch_size=3, flush_seconds=0.05)
+    now = datetime.utcnow()
+
+    for index in range(4):
+        writer.append("customer", f"line {index}", now)
+    assert [[row["sequence"] for row in batch] for batch in batches] == [[0, 1, 2]]
+
+    await asyncio.sleep(0.1)
+    assert [[row["sequence"] for row in batch] for batch in batches] == [[0, 1, 2], [3]]
+    assert writer.stats() == {
+        "entries": 4,
+        "batches": 2,
+        "size_flushes": 1,
+        "timer_flushes": 1,
+        "pending": 0,
+    }
+
+
+@pytest.mark.asyncio
+@patch("realtime_client.get_calendar_service")
+async def test_call_transcript_is_persisted_in_order(mock_calendar_service, db_session):
+    mock_calendar_service.return_value = object()
+    conversation = AnalyticsService.create_conversation(
+        db=db_session, customer_id=None, channel="voice", metadata={"session_id": "s-transcript"}
+    )
+    lines = [
+        ("assistant", "Hi, thanks for calling."),
+        ("customer", "Do you have Botox on Friday?"),
+        ("assistant", "We have 10am or 2pm."),
+        ("customer", "2pm please."),
+    ]
+
+    try:
+        client = RealtimeClient(session_id="s-transcript", db=db_session, conversation=conversation)
+        for speaker, text in lines[:2]:
+            client._append_transcript_entry(speaker, text)
+        await client.flush_db_writes()
+
+        # A reconnect for the same conversation continues the numbering
+        resumed = RealtimeClient(session_id="s-transcript", db=db_session, conversation=conversation)
+        for speaker, text in lines[2:]:
+            resumed._append_transcript_entry(speaker, text)
+        session_data = resumed.get_session_data()
+        await resumed.run_db(
+            lambda: persist_call_transcript(
+                db_session,
+                conversation=conversation,
+                session_id="s-transcript",
+                session_data=session_data,
+            )
+        )
+
+        transcript = load_call_transcript(db_session, conversation.id)
+        assert [(entry["speaker"], entry["text"]) for entry in transcript] == lines
+        # Without pending slot offers, utterances get no message row of their own
+        messages = (
+            db_session.query(CommunicationMessage)
+            .filter(CommunicationMessage.conversation_id == conversation.id)
+            .all()
+        )
+        assert len(messages) == 1
+        details = db_session.get(VoiceCallDetails, messages[0].id)
+        assert details.transcript_segments == []
+        assert messages[0].custom_metadata["transcript_writer"]["batches"] == 1
+    finally:
+        db_session.query(VoiceTranscriptEntry).filter(
+            VoiceTranscriptEntry.conversation_id == conversation.id
+        ).delete()
+        db_session.commit()
@@ -0,0 +1,249 @@
+"""
+Keyed turn executor for conversation-scoped work.
+
+Two turns for the same conversation must never run at once: both read and
+write ``Conversation.custom_metadata`` and pending slot offers, so the last
+commit silently wins. This module serializes work per conversation ID while
+running different conversations in parallel on a shared thread pool.
+
+It also applies backpressure:
+- each conversation has a bounded FIFO queue, and so does the executor as a
+  whole; submissions beyond either limit raise ``TurnQueueFull``
+- ``llm_slot()`` caps how many completion calls run concurrently across all
+  conversations, so bursts queue here instead of at the OpenAI rate limiter
+  (executors built with ``max_concurrent_llm_calls=None`` have no such cap)
+
+Sync callers (FastAPI threadpool routes) use ``run()``; async callers such as
+webhook workers use ``await run_async()``. A turn must not submit more work
+for its own conversation and wait on it, or it will deadlock.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Hashable, Iterator, Optional, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+_SLOW_QUEUE_WAIT_MS = 2000.0
+
+
+class TurnQueueFull(Exception):
+    """Raised when a conversation (or the executor) has too much queued work."""
+
+    def __init__(self, key: Hashable, reason: str):
+        super().__init__(f"Turn queue full for {key}: {reason}")
+        self.key = key
+        self.reason = reason
+
+
+class ConversationTurnExecutor:
+    """Serialize callables per key; run different keys concurrently."""
+
+    def __init__(
+        self,
+        *,
+        max_workers: int = 16,
+        max_queue_per_key: int = 8,
+        max_pending: int = 256,
+        max_concurrent_llm_calls: Optional[int] = 8,
+    ):
+        self.max_workers = max_workers
+        self.max_queue_per_key = max_queue_per_key
+        self.max_pending = max_pending
+        self.max_concurrent_llm_calls = max_concurrent_llm_calls
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="turn"
+        )
+        self._lock = threading.Lock()
+        self._queues: Dict[Hashable, Deque[Tuple[Callable[[], Any], Future, float]]] = {}
+        self._pending = 0
+        self._llm_semaphore = (
+            threading.BoundedSemaphore(max_concurrent_llm_calls)
+            if max_concurrent_llm_calls is not None
+            else None
+        )
+
+        self._stats: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "cancelled": 0,
+            "rejected": 0,
+            "max_queue_depth": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+        }
+        if self._llm_semaphore is not None:
+            self._stats.update(
+                {
+                    "llm_in_flight": 0,
+                    "llm_calls": 0,
+                    "llm_wait_ms_total": 0.0,
+                    "llm_wait_ms_max": 0.0,
+                }
+            )
+
+    # ------------------------------------------------------------------
+    # Submission
+    # ------------------------------------------------------------------
+
+    def submit(self, key: Hashable, fn: Callable[[], Any]) -> Future:
+        """Queue ``fn`` behind any earlier work for ``key``."""
+        future: Future = Future()
+        with self._lock:
+            queue = self._queues.get(key)
+            depth = len(queue) if queue is not None else 0
+            if depth >= self.max_queue_per_key:
+                self._stats["rejected"] += 1
+                raise TurnQueueFull(key, f"{depth} turns already queued")
+            if self._pending >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise TurnQueueFull(key, f"{self._pending} turns pending overall")
+
+            start_drain = queue is None
+            if start_drain:
+                queue = deque()
+                self._queues[key] = queue
+            queue.append((fn, future, time.perf_counter()))
+            self._pending += 1
+            self._stats["submitted"] += 1
+            if len(queue) > self._stats["max_queue_depth"]:
+                self._stats["max_queue_depth"] = len(queue)
+
+        if start_drain:
+            self._pool.submit(self._drain, key)
+        return future
+
+    def run(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Submit ``fn`` and block until it has run; re-raises its exception."""
+        return self.submit(key, fn).result()
+
+    async def run_async(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Awaitable variant of ``run()`` for event-loop callers."""
+        return await asyncio.wrap_future(self.submit(key, fn))
+
+    def _drain(self, key: Hashable) -> None:
+        while True:
+            with self._lock:
+                queue = self._queues.get(key)
+                if not queue:
+                    self._queues.pop(key, None)
+                    return
+                fn, future, enqueued_at = queue[0]
+
+            wait_ms = (time.perf_counter() - enqueued_at) * 1000
+            self._record_wait("queue_wait_ms", wait_ms)
+            if wait_ms > _SLOW_QUEUE_WAIT_MS:
+                logger.warning(
+                    "Turn for %s waited %.0fms in the conversation queue", key, wait_ms
+                )
+
+            if future.set_running_or_notify_cancel():
+                try:
+                    result = fn()
+                except BaseException as exc:  # noqa: BLE001 - surfaced via the future
+                    future.set_exception(exc)
+                    outcome = "failed"
+                else:
+                    future.set_result(result)
+                    outcome = "completed"
+            else:
+                outcome = "cancelled"
+
+            with self._lock:
+                queue.popleft()
+                self._pending -= 1
+                self._stats[outcome] += 1
+
+    # ------------------------------------------------------------------
+    # LLM concurrency cap
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def llm_slot(self) -> Iterator[None]:
+        """Hold one of the global concurrent-completion slots."""
+        if self._llm_semaphore is None:
+            raise RuntimeError("This executor has no LLM concurrency cap")
+        started = time.perf_counter()
+        self._llm_semaphore.acquire()
+        self._record_wait("llm_wait_ms", (time.perf_counter() - started) * 1000)
+        with self._lock:
+            self._stats["llm_in_flight"] += 1
+            self._stats["llm_calls"] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stats["llm_in_flight"] -= 1
+            self._llm_semaphore.release()
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _record_wait(self, prefix: str, wait_ms: float) -> None:
+        with self._lock:
+            self._stats[f"{prefix}_total"] += wait_ms
+            if wait_ms > self._stats[f"{prefix}_max"]:
+                self._stats[f"{prefix}_max"] = wait_ms
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth, backpressure and LLM concurrency counters."""
+        with self._lock:
+            snapshot: Dict[str, Any] = dict(self._stats)
+            snapshot["active_conversations"] = len(self._queues)
+            snapshot["pending"] = self._pending
+            snapshot["queued"] = sum(
+                max(len(queue) - 1, 0) for queue in self._queues.values()
+            )
+        started = snapshot["completed"] + snapshot["failed"]
+        snapshot["queue_wait_ms_avg"] = (
+            snapshot["queue_wait_ms_total"] / started if started else 0.0
+        )
+        snapshot["limits"] = {
+            "max_workers": self.max_workers,
+            "max_queue_per_key": self.max_queue_per_key,
+            "max_pending": self.max_pending,
+        }
+        if self._llm_semaphore is not None:
+            snapshot["llm_wait_ms_avg"] = (
+                snapshot["llm_wait_ms_total"] / snapshot["llm_calls"]
+                if snapshot["llm_calls"]
+                else 0.0
+            )
+            snapshot["limits"][
+                "max_concurrent_llm_calls"
+            ] = self.max_concurrent_llm_calls
+        return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+
+_settings = get_settings()
+
+# Global executor shared by the messaging routes and webhook workers
+turn_executor = ConversationTurnExecutor(
+    max_workers=_settings.TURN_EXECUTOR_MAX_WORKERS,
+    max_queue_per_key=_settings.TURN_QUEUE_MAX_PER_CONVERSATION,
+    max_pending=_settings.TURN_QUEUE_MAX_PENDING,
+    max_concurrent_llm_calls=_settings.MAX_CONCURRENT_LLM_CALLS,
+)
+
+# Separate pool for voice session DB work, keyed by call session. Realtime
+# audio is relayed on the event loop, so its commits run here in call order
+# and never compete with messaging turns for threads.
+voice_db_executor = ConversationTurnExecutor(
+    max_workers=_settings.VOICE_DB_EXECUTOR_WORKERS,
+    max_queue_per_key=_settings.VOICE_DB_QUEUE_PER_SESSION,
+    max_pending=_settings.VOICE_DB_QUEUE_MAX_PENDING,
+    max_concurrent_llm_calls=None,
+)
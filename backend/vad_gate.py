@@ -0,0 +1,149 @@
+"""
+Server-side voice activity gate for inbound call audio.
+
+Silence makes up most of a phone call, and every chunk the caller sends is
+otherwise forwarded to the Realtime API. ``VoiceActivityGate`` looks at each
+PCM16 chunk and suppresses the silent ones before they leave the server.
+
+The gate must not change what the Realtime server VAD sees around speech:
+- pre-roll: the last ``preroll_ms`` of suppressed audio is held back and
+  flushed ahead of the first speech chunk, so ``prefix_padding_ms`` still has
+  real audio to work with
+- hangover: after speech, audio keeps flowing for ``hangover_ms`` so the
+  server VAD observes the ``silence_duration_ms`` it needs to end the turn
+
+Detection is energy based with a zero-crossing assist for quiet fricatives,
+vectorized over 10ms sub-frames of each chunk.
+"""
+
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SUBFRAME_MS = 10
+# Zero-crossing assist: quiet frames with a high crossing rate ("s", "f")
+# count as speech down to ``threshold_dbfs - ZCR_MARGIN_DB``
+ZCR_MARGIN_DB = 10.0
+ZCR_SPEECH_RATE = 0.25
+
+
+def chunk_activity(
+    samples: np.ndarray, samples_per_subframe: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return per-sub-frame level (dBFS) and zero-crossing rate."""
+    usable = samples.size - samples.size % samples_per_subframe
+    if usable == 0:
+        frames = samples.reshape(1, -1)
+    else:
+        frames = samples[:usable].reshape(-1, samples_per_subframe)
+    frames = frames.astype(np.float32)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    dbfs = 20 * np.log10(np.maximum(rms, 1.0) / 32768.0)
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / max(frames.shape[1] - 1, 1)
+    return dbfs, zcr
+
+
+class VoiceActivityGate:
+    """Drop silent PCM16 chunks with pre-roll and hangover."""
+
+    def __init__(
+        self,
+        *,
+        sample_rate: int = 24000,
+        threshold_dbfs: float = -50.0,
+        preroll_ms: int = 300,
+        hangover_ms: int = 900,
+    ):
+        self.sample_rate = sample_rate
+        self.threshold_dbfs = threshold_dbfs
+        self._samples_per_subframe = sample_rate * SUBFRAME_MS // 1000
+        self._preroll_bytes = sample_rate * preroll_ms // 1000 * 2
+        self._hangover_samples = sample_rate * hangover_ms // 1000
+        self._preroll: Deque[bytes] = deque()
+        self._preroll_size = 0
+        self._hangover_remaining = 0
+        self._stats = {
+            "forwarded_frames": 0,
+            "dropped_frames": 0,
+            "forwarded_bytes": 0,
+            "dropped_bytes": 0,
+        }
+
+    def is_speech(self, samples: np.ndarray) -> bool:
+        if samples.size == 0:
+            return False
+        dbfs, zcr = chunk_activity(samples, self._samples_per_subframe)
+        speech = (dbfs >= self.threshold_dbfs) | (
+            (dbfs >= self.threshold_dbfs - ZCR_MARGIN_DB) & (zcr >= ZCR_SPEECH_RATE)
+        )
+        return bool(speech.any())
+
+    def process(self, pcm) -> List[bytes]:
+        """Return the chunks to forward for ``pcm`` (empty when suppressed)."""
+        chunk = bytes(pcm)
+        samples = np.frombuffer(chunk, dtype="<i2", count=len(chunk) // 2)
+
+        if self.is_speech(samples):
+            self._hangover_remaining = self._hangover_samples
+            forwarded = self._flush_preroll()
+            forwarded.append(chunk)
+            self._count("forwarded", 1, len(chunk))
+            return forwarded
+
+        if self._hangover_remaining > 0:
+            self._hangover_remaining -= samples.size
+            self._count("forwarded", 1, len(chunk))
+            return [chunk]
+
+        self._hold(chunk)
+        self._count("dropped", 1, len(chunk))
+        return []
+
+    def _hold(self, chunk: bytes) -> None:
+        self._preroll.append(chunk)
+        self._preroll_size += len(chunk)
+        while self._preroll and self._preroll_size - len(self._preroll[0]) >= self._preroll_bytes:
+            self._preroll_size -= len(self._preroll.popleft())
+
+    def _flush_preroll(self) -> List[bytes]:
+        flushed = list(self._preroll)
+        if flushed:
+            # Held frames were counted as dropped; they are forwarded after all
+            size = self._preroll_size
+            self._count("dropped", -len(flushed), -size)
+            self._count("forwarded", len(flushed), size)
+        self._preroll.clear()
+        self._preroll_size = 0
+        return flushed
+
+    def _count(self, outcome: str, frames: int, size: int) -> None:
+        self._stats[f"{outcome}_frames"] += frames
+        self._stats[f"{outcome}_bytes"] += size
+
+    def stats(self) -> Dict[str, float]:
+        total = self._stats["forwarded_frames"] + self._stats["dropped_frames"]
+        return dict(
+            self._stats,
+            forwarded_ratio=round(self._stats["forwarded_frames"] / total, 4) if total else 1.0,
+        )
+
+
+def build_vad_gate(
+    *,
+    enabled: bool,
+    upstream_format: Optional[str],
+    prefix_padding_ms: int,
+    silence_duration_ms: int,
+    threshold_dbfs: float,
+    hangover_margin_ms: int,
+) -> Optional[VoiceActivityGate]:
+    """Build a gate for PCM16 sessions, sized from the session's turn detection."""
+    if not enabled or upstream_format not in (None, "pcm16"):
+        return None
+    return VoiceActivityGate(
+        threshold_dbfs=threshold_dbfs,
+        preroll_ms=prefix_padding_ms,
+        hangover_ms=silence_duration_ms + hangover_margin_ms,
+    )
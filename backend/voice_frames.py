@@ -0,0 +1,95 @@
+"""
+Binary frame protocol for the /ws/voice websocket.
+
+The original protocol wraps every audio chunk in JSON
+(``{"type": "audio", "data": <base64>}``) in both directions. Binary mode
+sends raw PCM16 in websocket binary frames with a 4-byte header instead;
+control messages (commit, interrupt, ping, end_session, transcripts) stay
+JSON text frames.
+
+Header layout (network byte order)::
+
+    byte 0     frame kind   (FRAME_AUDIO)
+    byte 1     flags        (FLAG_COMMIT: commit the input buffer after append)
+    bytes 2-3  sequence     (uint16, wraps)
+
+Clients opt in with ``?audio_protocol=binary`` on the websocket URL.
+Binary audio frames are accepted in either mode; the negotiated mode only
+decides how outbound audio is sent.
+
+Telephony clients add ``?audio_format=g711_ulaw`` (or ``g711_alaw``) to send
+and receive 8 kHz G.711, one byte per sample, in either protocol mode.
+"""
+
+import struct
+from typing import NamedTuple, Optional, Union
+
+from realtime_config import G711_AUDIO_FORMATS, AudioFormat
+
+PROTOCOL_JSON = "json"
+PROTOCOL_BINARY = "binary"
+
+FRAME_AUDIO = 0x01
+
+FLAG_COMMIT = 0x01
+
+HEADER = struct.Struct("!BBH")
+HEADER_SIZE = HEADER.size
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class FrameError(ValueError):
+    """Raised for malformed binary frames."""
+
+
+class Frame(NamedTuple):
+    kind: int
+    flags: int
+    sequence: int
+    payload: memoryview
+
+    @property
+    def commit(self) -> bool:
+        return bool(self.flags & FLAG_COMMIT)
+
+
+def decode_frame(data: BytesLike, sample_width: int = 2) -> Frame:
+    """Split a binary frame into header fields and a zero-copy payload view.
+
+    ``sample_width`` is 2 for PCM16 and 1 for G.711.
+    """
+    view = memoryview(data)
+    if view.nbytes < HEADER_SIZE:
+        raise FrameError(f"Frame shorter than {HEADER_SIZE}-byte header")
+    kind, flags, sequence = HEADER.unpack_from(view)
+    if kind != FRAME_AUDIO:
+        raise FrameError(f"Unknown frame kind {kind:#04x}")
+    payload = view[HEADER_SIZE:]
+    if payload.nbytes % sample_width:
+        raise FrameError(f"Audio payload must be a multiple of {sample_width} bytes")
+    return Frame(kind, flags, sequence, payload)
+
+
+def encode_audio_frame(pcm: BytesLike, sequence: int, flags: int = 0) -> bytes:
+    """Build an outbound audio frame with a single copy of ``pcm``."""
+    return HEADER.pack(FRAME_AUDIO, flags, sequence & 0xFFFF) + memoryview(pcm)
+
+
+def negotiate_protocol(requested: Optional[str] = None) -> str:
+    """Normalize the client's ``audio_protocol`` query parameter."""
+    if (requested or "").strip().lower() == PROTOCOL_BINARY:
+        return PROTOCOL_BINARY
+    return PROTOCOL_JSON
+
+
+def negotiate_audio_format(requested: Optional[str] = None) -> Optional[AudioFormat]:
+    """Normalize the client's ``audio_format`` query parameter.
+
+    Returns the G.711 format for telephony clients and ``None`` (PCM16)
+    otherwise.
+    """
+    normalized = (requested or "").strip().lower()
+    if normalized in G711_AUDIO_FORMATS:
+        return normalized
+    return None
@@ -0,0 +1,228 @@
+"""
+Latency instrumentation for voice calls.
+
+Answers "how long do callers wait?" with five measurements:
+- turn latency: ``input_audio_buffer.speech_stopped`` to the next
+  ``response.audio.delta`` (tool calls in between are included, since the
+  caller waits through them)
+- greeting latency: call setup start to the greeting's first audio
+- tool turnaround: ``response.function_call_arguments.done`` to the
+  function output being sent back
+- tool backend time inside ``handle_function_call``, split into queue wait
+  on the voice DB executor, calendar API time and the rest of the execution
+  (database work and booking logic)
+- barge-in latency: caller speech onset over assistant playback to the
+  assistant's audio being cut (see barge_in)
+
+Each measurement feeds a process-wide ``LatencyHistogram``; ``/metrics``
+renders them in the Prometheus text format. ``CallLatencyTracker`` keeps the
+same samples for one call so a summary can be stored with the call's
+``VoiceCallDetails``.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Histogram bucket upper bounds (ms)
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (
+    25, 50, 100, 250, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000,
+)
+
+
+class _Series:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self, size: int) -> None:
+        self.buckets = [0] * size
+        self.count = 0
+        self.total = 0.0
+
+
+class LatencyHistogram:
+    """Labelled millisecond histogram with Prometheus text rendering."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        label_names: Tuple[str, ...] = (),
+        bounds: Tuple[float, ...] = LATENCY_BUCKETS_MS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.bounds = bounds
+        # Tool timings are observed from executor threads
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+
+    def observe(self, elapsed_ms: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.label_names)
+        index = bisect.bisect_left(self.bounds, elapsed_ms)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.bounds) + 1)
+            series.buckets[index] += 1
+            series.count += 1
+            series.total += elapsed_ms
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            snapshot = [
+                (key, list(series.buckets), series.count, series.total)
+                for key, series in sorted(self._series.items())
+            ]
+        for key, buckets, count, total in snapshot:
+            labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, key)]
+            cumulative = 0
+            for bound, bucket_count in zip(self.bounds, buckets):
+                cumulative += bucket_count
+                le = ",".join(labels + [f'le="{bound:g}"'])
+                lines.append(f"{self.name}_bucket{{{le}}} {cumulative}")
+            le = ",".join(labels + ['le="+Inf"'])
+            lines.append(f"{self.name}_bucket{{{le}}} {count}")
+            suffix = "{" + ",".join(labels) + "}" if labels else ""
+            lines.append(f"{self.name}_sum{suffix} {total:.3f}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+turn_latency = LatencyHistogram(
+    "voice_turn_latency_ms",
+    "Caller speech stopped to first response audio.",
+)
+greeting_latency = LatencyHistogram(
+    "voice_greeting_latency_ms",
+    "Call setup start to first greeting audio.",
+    ("source",),
+)
+tool_turnaround = LatencyHistogram(
+    "voice_tool_turnaround_ms",
+    "Function call arguments done to function output sent.",
+    ("tool",),
+)
+tool_backend = LatencyHistogram(
+    "voice_tool_backend_ms",
+    "Time inside handle_function_call by stage (queue_wait, calendar, db).",
+    ("tool", "stage"),
+)
+barge_in_latency = LatencyHistogram(
+    "voice_barge_in_latency_ms",
+    "Caller speech onset over assistant audio to the audio being cut.",
+)
+HISTOGRAMS = (turn_latency, greeting_latency, tool_turnaround, tool_backend, barge_in_latency)
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    return "\n".join(lines) + "\n"
+
+
+class TimedProxy:
+    """Wrap a service and accumulate time spent in its method calls.
+
+    Time is accumulated per thread, so a tool call running on one executor
+    thread only sees its own calendar time (not a concurrent prefetch's).
+    """
+
+    def __init__(self, target: Any) -> None:
+        self._target = target
+        self._local = threading.local()
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._target, name)
+        if not callable(attr):
+            return attr
+
+        def timed(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._local.elapsed = getattr(self._local, "elapsed", 0.0) + (
+                    time.perf_counter() - started
+                )
+
+        return timed
+
+    def take_elapsed_ms(self) -> float:
+        """Return and reset this thread's accumulated time."""
+        elapsed = getattr(self._local, "elapsed", 0.0)
+        self._local.elapsed = 0.0
+        return elapsed * 1000
+
+
+class CallLatencyTracker:
+    """Per-call latency samples, mirrored into the process histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+        self._speech_stopped_at: Optional[float] = None
+
+    def speech_stopped(self) -> None:
+        self._speech_stopped_at = time.perf_counter()
+
+    def response_audio(self) -> None:
+        """Close the pending turn, if any, on the first audio after speech."""
+        stopped_at = self._speech_stopped_at
+        if stopped_at is None:
+            return
+        self._speech_stopped_at = None
+        elapsed_ms = (time.perf_counter() - stopped_at) * 1000
+        turn_latency.observe(elapsed_ms)
+        self._add("turn_latency_ms", elapsed_ms)
+
+    def greeting(self, elapsed_ms: float, *, source: str) -> None:
+        greeting_latency.observe(elapsed_ms, source=source)
+        self._add("greeting_latency_ms", elapsed_ms)
+
+    def tool_turnaround(self, tool: str, elapsed_ms: float) -> None:
+        tool_turnaround.observe(elapsed_ms, tool=tool)
+        self._add("tool_turnaround_ms", elapsed_ms)
+
+    def tool_backend(self, tool: str, stages_ms: Dict[str, float]) -> None:
+        for stage, elapsed_ms in stages_ms.items():
+            tool_backend.observe(elapsed_ms, tool=tool, stage=stage)
+            self._add(f"tool_{stage}_ms", elapsed_ms)
+
+    def barge_in(self, elapsed_ms: float) -> None:
+        barge_in_latency.observe(elapsed_ms)
+        self._add("barge_in_latency_ms", elapsed_ms)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: summarize_samples(samples) for name, samples in self._samples.items()}
+
+    def _add(self, name: str, elapsed_ms: float) -> None:
+        with self._lock:
+            self._samples.setdefault(name, []).append(elapsed_ms)
+
+
+def summarize_samples(samples: Iterable[float]) -> Dict[str, float]:
+    """Count, p50, p95 and max of a non-empty sample set."""
+    ordered = sorted(samples)
+    count = len(ordered)
+
+    def _pct(fraction: float) -> float:
+        return round(ordered[min(count - 1, int(fraction * count))], 1)
+
+    return {
+        "count": count,
+        "p50_ms": _pct(0.5),
+        "p95_ms": _pct(0.95),
+        "max_ms": round(ordered[-1], 1),
+    }
@@ -0,0 +1,154 @@
+"""
+Resumable voice sessions.
+
+A browser's websocket can drop for a moment (a network switch, a proxy
+restart) while the call itself is fine. Ending the call there throws away
+the OpenAI socket, the uploaded session configuration and everything
+captured so far, and a reconnect starts a new call from the greeting.
+
+Instead, the handler owning a call keeps it open for
+``VOICE_RESUME_GRACE_SECONDS`` after its client drops: the RealtimeClient,
+its session data and the OpenAI socket stay alive, and a websocket
+connecting with the same session_id is handed to that handler, which
+carries on with the new socket. The reconnecting handler only holds its
+socket open until the owner is done with it.
+
+Only abnormal closes park a call. A client that closes deliberately (1000
+on hangup, 1001 when the tab is closed or navigates away, 1005 with no
+status) is not coming back, and its call is finalized at once.
+
+A reconnect can also arrive before the old socket's drop is noticed (a
+half-open TCP connection); the new socket then takes over right away.
+
+Knowing a session_id is not enough to take a call over: each call gets a
+random resume token, sent only to its own client in the ``protocol``
+message, and a reconnect must present it (``?resume_token=``).
+
+Sessions are parked in the worker that owns them, so a reconnect routed to
+another worker starts a new call.
+"""
+
+import asyncio
+import hmac
+import logging
+import secrets
+from typing import Any, Dict, Optional, Tuple
+
+from config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# (new websocket, future resolved once the owner stops using it)
+Handoff = Tuple[Any, asyncio.Future]
+
+# Close codes for a connection lost rather than closed by the client:
+# abnormal closure, server error, service restart, try again later, bad
+# gateway and TLS failure
+DROPPED_CLOSE_CODES = frozenset({1006, 1011, 1012, 1013, 1014, 1015})
+
+
+def is_dropped(close_code: int) -> bool:
+    """Whether a client websocket closed with ``close_code`` may reconnect."""
+    return close_code in DROPPED_CLOSE_CODES
+
+
+class ResumeTokenError(PermissionError):
+    """Reconnect for a live call without its resume token."""
+
+
+class ResumableSession:
+    """One live call that reconnecting websockets can be handed to."""
+
+    def __init__(self, session_id: str) -> None:
+        self.session_id = session_id
+        self.token = secrets.token_urlsafe(24)
+        self._handoffs: "asyncio.Queue[Handoff]" = asyncio.Queue()
+
+    def offer(self, websocket: Any) -> asyncio.Future:
+        # A newer reconnect supersedes one the owner has not picked up yet
+        while not self._handoffs.empty():
+            _, stale = self._handoffs.get_nowait()
+            if not stale.done():
+                stale.set_result(False)
+        released = asyncio.get_running_loop().create_future()
+        self._handoffs.put_nowait((websocket, released))
+        return released
+
+    async def next_handoff(self) -> Handoff:
+        """Wait for a reconnecting websocket."""
+        return await self._handoffs.get()
+
+    def discard(self) -> None:
+        """Release reconnects nobody will pick up."""
+        while not self._handoffs.empty():
+            _, released = self._handoffs.get_nowait()
+            if not released.done():
+                released.set_result(False)
+
+
+class SessionParking:
+    """This worker's resumable calls, keyed by session_id."""
+
+    def __init__(self, *, grace_seconds: float = 15.0) -> None:
+        self.grace_seconds = grace_seconds
+        self._sessions: Dict[str, ResumableSession] = {}
+        self._stats = {"parked": 0, "resumed": 0, "takeovers": 0, "expired": 0, "rejected": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.grace_seconds > 0
+
+    def open(self, session_id: str) -> Optional[ResumableSession]:
+        if not self.enabled:
+            return None
+        session = ResumableSession(session_id)
+        self._sessions[session_id] = session
+        return session
+
+    def close(self, session: Optional[ResumableSession]) -> None:
+        if session is None:
+            return
+        if self._sessions.get(session.session_id) is session:
+            del self._sessions[session.session_id]
+        session.discard()
+
+    def reattach(
+        self, session_id: str, websocket: Any, token: Optional[str]
+    ) -> Optional[asyncio.Future]:
+        """Hand ``websocket`` to the live call ``session_id``, if there is one.
+
+        Returns a future resolved once the call is done with the socket, or
+        None when the session is not live in this worker. Raises
+        ``ResumeTokenError`` when it is live but ``token`` is not its token.
+        """
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if not token or not hmac.compare_digest(token.encode(), session.token.encode()):
+            self._stats["rejected"] += 1
+            raise ResumeTokenError(f"bad resume token for session {session_id}")
+        return session.offer(websocket)
+
+    async def park(self, session: ResumableSession) -> Optional[Handoff]:
+        """Keep ``session`` open for the grace window after its client dropped.
+
+        Returns the reconnecting websocket's handoff, or None on expiry.
+        """
+        self._stats["parked"] += 1
+        try:
+            handoff = await asyncio.wait_for(session.next_handoff(), self.grace_seconds)
+        except asyncio.TimeoutError:
+            self._stats["expired"] += 1
+            return None
+        self._stats["resumed"] += 1
+        return handoff
+
+    def took_over(self) -> None:
+        """Count a reconnect that replaced a socket not yet seen to drop."""
+        self._stats["takeovers"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, live=len(self._sessions), grace_seconds=self.grace_seconds)
+
+
+session_parking = SessionParking(grace_seconds=get_settings().VOICE_RESUME_GRACE_SECONDS)
@@ -0,0 +1,165 @@
+"""
+Incremental persistence of voice call transcripts.
+
+While a call runs, every transcript entry (customer and assistant) goes to
+``TranscriptWriter``, which numbers it and buffers it on the event loop. A
+batch is handed to the call's DB executor queue once it reaches
+``batch_size`` entries or its oldest entry has waited ``flush_seconds``, and
+is written to ``voice_transcript_entries`` as one multi-row insert and one
+commit. A crashed worker loses at most the unflushed batch, and a call costs
+a few commits instead of one per utterance plus a transcript-sized JSON
+document at finalization.
+
+Readers get the transcript back in call order with ``load_call_transcript``,
+in the same ``{"speaker", "text", "timestamp"}`` shape the call used in
+memory. ``call_transcript_page`` serves one page of a finished call,
+preferring the packed ``call_record`` written at finalization.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from compact_transcript import CompactCallRecord
+from database import VoiceCallDetails, VoiceTranscriptEntry
+
+
+class TranscriptWriter:
+    """Batches one call's transcript entries into ordered DB writes.
+
+    ``submit`` receives each batch as a list of row dicts and must apply
+    batches in submission order (``RealtimeClient.submit_db`` does).
+    """
+
+    def __init__(
+        self,
+        submit: Callable[[List[Dict[str, Any]]], None],
+        *,
+        batch_size: int = 10,
+        flush_seconds: float = 2.0,
+    ) -> None:
+        self._submit = submit
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_seconds
+        self._pending: List[Dict[str, Any]] = []
+        self._next_sequence = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._stats = {"entries": 0, "batches": 0, "size_flushes": 0, "timer_flushes": 0}
+
+    def append(self, speaker: str, text: str, spoken_at: datetime) -> None:
+        self._pending.append(
+            {
+                "sequence": self._next_sequence,
+                "speaker": speaker,
+                "text": text,
+                "spoken_at": spoken_at,
+            }
+        )
+        self._next_sequence += 1
+        self._stats["entries"] += 1
+        if len(self._pending) >= self.batch_size:
+            self._stats["size_flushes"] += 1
+            self.flush()
+        elif self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # No loop (e.g. a synchronous caller): write through
+                self.flush()
+                return
+            self._timer = loop.call_later(self.flush_seconds, self._on_timer)
+
+    def flush(self) -> None:
+        """Hand everything buffered to ``submit`` now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+        self._stats["batches"] += 1
+        self._submit(batch)
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._stats, pending=len(self._pending))
+
+    def _on_timer(self) -> None:
+        self._timer = None
+        self._stats["timer_flushes"] += 1
+        self.flush()
+
+
+def next_transcript_sequence(db: Session, conversation_id: Any) -> int:
+    """First free sequence number for ``conversation_id``."""
+    highest = (
+        db.query(func.max(VoiceTranscriptEntry.sequence))
+        .filter(VoiceTranscriptEntry.conversation_id == conversation_id)
+        .scalar()
+    )
+    return 0 if highest is None else highest + 1
+
+
+def count_transcript_entries(db: Session, conversation_id: Any) -> int:
+    return (
+        db.query(func.count(VoiceTranscriptEntry.id))
+        .filter(VoiceTranscriptEntry.conversation_id == conversation_id)
+        .scalar()
+    )
+
+
+def write_transcript_entries(
+    db: Session, conversation_id: Any, rows: List[Dict[str, Any]], *, offset: int = 0
+) -> None:
+    """Insert one batch from ``TranscriptWriter`` and commit."""
+    if not rows:
+        return
+    db.execute(
+        insert(VoiceTranscriptEntry),
+        [
+            dict(row, conversation_id=conversation_id, sequence=row["sequence"] + offset)
+            for row in rows
+        ],
+    )
+    db.commit()
+
+
+def load_call_transcript(
+    db: Session, conversation_id: Any, *, offset: int = 0, limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """The call's transcript in order, as ``{"speaker", "text", "timestamp"}`` dicts."""
+    query = (
+        db.query(
+            VoiceTranscriptEntry.speaker,
+            VoiceTranscriptEntry.text,
+            VoiceTranscriptEntry.spoken_at,
+        )
+        .filter(VoiceTranscriptEntry.conversation_id == conversation_id)
+        .order_by(VoiceTranscriptEntry.sequence)
+        .offset(offset)
+    )
+    rows = query.limit(limit).all() if limit is not None else query.all()
+    return [
+        {"speaker": speaker, "text": text, "timestamp": spoken_at.isoformat()}
+        for speaker, text, spoken_at in rows
+    ]
+
+
+def call_transcript_page(
+    db: Session, details: Optional[VoiceCallDetails], conversation_id: Any, offset: int, limit: int
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """``(total, entries)`` for one page of a call's transcript.
+
+    Reads the packed call record when the call has one, then the
+    incrementally written entries, then the legacy inline JSON list.
+    """
+    if details is not None and details.call_record:
+        transcript = CompactCallRecord(details.call_record).transcript
+        return len(transcript), transcript[offset : offset + limit]
+    total = count_transcript_entries(db, conversation_id)
+    if total or details is None:
+        return total, load_call_transcript(db, conversation_id, offset=offset, limit=limit)
+    segments = details.transcript_segments or []
+    return len(segments), list(segments[offset : offset + limit])